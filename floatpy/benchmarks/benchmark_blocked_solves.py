@@ -0,0 +1,82 @@
+"""
+Benchmark of the tiled y and z solves of the compact derivative and filter kernels against the original plane-by-plane
+sweeps. The x direction solves are timed as well since they are the reference cost for a pencil of the same size.
+
+Usage: python benchmark_blocked_solves.py [nx ny nz] [num_repeats]
+"""
+
+import numpy
+import sys
+import timeit
+
+import floatpy.derivatives.compact.pycd06 as pycd06
+import floatpy.derivatives.compact.pycd10 as pycd10
+import floatpy.filters.pycf90 as pycf90
+
+BLOCK_SIZES = (0, 32768, 262144, 1048576)
+
+
+def getKernels(shape, periodic):
+    """
+    Return a list of (name, direction, kernel, method name) tuples for all the kernels to time.
+    """
+
+    kernels = []
+    for direction in range(3):
+        n = shape[direction]
+        kernels.append( ('cd06 d1', direction, pycd06.cd06stuff.cd06(n, 0.1, periodic, 0, 0), 'dd%d' %(direction+1)) )
+        kernels.append( ('cd10 d1', direction, pycd10.cd10stuff.cd10(n, 0.1, periodic, 0, 0), 'dd%d' %(direction+1)) )
+        kernels.append( ('cd10 d2', direction, pycd10.cd10stuff.cd10(n, 0.1, periodic, 0, 0), 'd2d%d' %(direction+1)) )
+        kernels.append( ('cf90', direction, pycf90.cf90stuff.cf90(n, periodic), 'filter%d' %(direction+1)) )
+
+    return kernels
+
+
+def timeKernel(kernel, method, f, df, direction, num_repeats):
+    """
+    Return the best time in seconds of a call to the given kernel method.
+    """
+
+    na, nb = [ f.shape[i] for i in range(3) if i != direction ]
+    func = getattr(kernel, method)
+    func(f, df, na, nb)
+
+    return min(timeit.repeat(lambda: func(f, df, na, nb), number=1, repeat=num_repeats))
+
+
+def main(shape=(128, 128, 128), num_repeats=10):
+
+    f = numpy.asfortranarray(numpy.random.rand(*shape))
+    df = numpy.empty(shape, dtype=numpy.float64, order='F')
+    df_ref = numpy.empty(shape, dtype=numpy.float64, order='F')
+
+    print("Grid %d x %d x %d, best of %d calls. Times in ms for block sizes (bytes) %s" \
+        %(shape + (num_repeats,) + (', '.join([ str(b) for b in BLOCK_SIZES ]),)))
+
+    for periodic in (True, False):
+        for name, direction, kernel, method in getKernels(shape, periodic):
+            times = []
+            for block_size in BLOCK_SIZES:
+                kernel.set_block_size(block_size)
+                times.append(timeKernel(kernel, method, f, df, direction, num_repeats))
+
+                if block_size == 0:
+                    df_ref[:] = df
+                elif numpy.absolute(df - df_ref).max() != 0.:
+                    raise RuntimeError("Tiled solve of %s is different from the plane sweep!" %method)
+
+            print("%-8s %-8s %-7s " %(name, 'periodic' if periodic else 'bounded', method) + \
+                ' '.join([ '%8.3f' %(1.e3*t) for t in times ]) + \
+                "   speedup %.2f" %(times[0]/min(times[1:])))
+
+
+if __name__ == '__main__':
+    shape = (128, 128, 128)
+    num_repeats = 10
+
+    if len(sys.argv) >= 4:
+        shape = tuple([ int(n) for n in sys.argv[1:4] ])
+    if len(sys.argv) >= 5:
+        num_repeats = int(sys.argv[4])
+
+    main(shape, num_repeats)
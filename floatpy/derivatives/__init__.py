@@ -1,2 +1,4 @@
 from explicit_differentiator import ExplicitDifferentiator
 from compact_differentiator import CompactDifferentiator
+from spectral_differentiator import SpectralDifferentiator
+from parallel_explicit_differentiator import ParallelExplicitDifferentiator
@@ -3,6 +3,7 @@ import pycd06
 import pycd10
 
 from floatpy.parallel import t3dmod
+from floatpy.utilities import operator_registry
 
 class CompactDerivative(object):
     """
@@ -14,7 +15,8 @@ class CompactDerivative(object):
         Constructor of the class
 
         grid_partition : t3d object or the grid_partition property of the parallel data reader class
-        grid_spacing : float tuple of size 3 with the grid spacing in each direction
+        grid_spacing : tuple of size 3 with the grid spacing in each direction. The entry of a direction with a
+                       non-uniform grid is instead a 1D array with all the coordinates of the grid in that direction
         order : integer tuple of size 3 with each value in {6,10} representing the order of accuracy 
                 of the derivatives in each direction
         periodic : boolean tuple of size 3
@@ -72,24 +74,61 @@ class CompactDerivative(object):
         self._ny = self._chunk_y_size[1]
         self._nz = self._chunk_z_size[2]
 
+        # The kernels of the directions with non-uniform grids work on the uniform grid of the index space and apply
+        # the metric terms computed from the coordinates.
+        grid_spacing = list(grid_spacing)
+        self._coordinates = [None, None, None]
+
+        for i in range(3):
+            if numpy.ndim(grid_spacing[i]) == 0:
+                continue
+
+            coordinates = numpy.asfortranarray(grid_spacing[i], dtype=numpy.float64)
+
+            if coordinates.ndim != 1 or coordinates.shape[0] != (self._nx, self._ny, self._nz)[i]:
+                raise RuntimeError("The coordinates in direction %d have to be a 1D array with the global number of "
+                                   "grid points in that direction!" %i)
+
+            if self._periodic[i]:
+                raise RuntimeError("Non-uniform grid in direction %d is only supported if it is not periodic!" %i)
+
+            if numpy.any(numpy.diff(coordinates) <= 0.):
+                raise RuntimeError("The coordinates in direction %d have to be strictly increasing!" %i)
+
+            self._coordinates[i] = coordinates
+            grid_spacing[i] = 1.
+
         self._dx = grid_spacing[0]
         self._dy = grid_spacing[1]
         self._dz = grid_spacing[2]
 
-        if self._order[0] == 6:
-            self._xder = pycd06.cd06stuff.cd06( self._nx, self._dx, self._periodic[0], 0, 0 )
-        elif self._order[0] == 10:
-            self._xder = pycd10.cd10stuff.cd10( self._nx, self._dx, self._periodic[0], 0, 0 )
+        # The derivative objects are shared with all the other objects of this process using the same schemes.
+        self._xder = self._getOperator(0, self._dx)
+        self._yder = self._getOperator(1, self._dy)
+        self._zder = self._getOperator(2, self._dz)
 
-        if self._order[1] == 6:
-            self._yder = pycd06.cd06stuff.cd06( self._ny, self._dy, self._periodic[1], 0, 0 )
-        elif self._order[1] == 10:
-            self._yder = pycd10.cd10stuff.cd10( self._ny, self._dy, self._periodic[1], 0, 0 )
 
-        if self._order[2] == 6:
-            self._zder = pycd06.cd06stuff.cd06( self._nz, self._dz, self._periodic[2], 0, 0 )
-        elif self._order[2] == 10:
-            self._zder = pycd10.cd10stuff.cd10( self._nz, self._dz, self._periodic[2], 0, 0 )
+    def _getOperator(self, direction, dx):
+        """
+        Return the derivative object of the given direction from the operator registry.
+        """
+
+        n = (self._nx, self._ny, self._nz)[direction]
+        coordinates = self._coordinates[direction]
+
+        if self._order[direction] == 6:
+            scheme, constructor = 'cd06', pycd06.cd06stuff.cd06
+        else:
+            scheme, constructor = 'cd10', pycd10.cd10stuff.cd10
+
+        def create():
+            kernel = constructor( n, dx, self._periodic[direction], 0, 0 )
+            if coordinates is not None:
+                kernel.set_coordinates(coordinates)
+            return kernel
+
+        return operator_registry.default_registry().get(create, scheme, n, dx, self._periodic[direction], \
+                                                        coordinates=coordinates)
 
 
     def ddx(self, f, dfdx, bc=(0,0)):
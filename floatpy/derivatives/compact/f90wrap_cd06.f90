@@ -34,6 +34,50 @@ subroutine f90wrap_destroy(this)
     deallocate(this_ptr%p)
 end subroutine f90wrap_destroy
 
+subroutine f90wrap_set_num_threads(this, nthreads_)
+    use cd06stuff, only: set_num_threads, cd06
+    implicit none
+    
+    type cd06_ptr_type
+        type(cd06), pointer :: p => NULL()
+    end type cd06_ptr_type
+    type(cd06_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    integer, intent(in) :: nthreads_
+    this_ptr = transfer(this, this_ptr)
+    call set_num_threads(this=this_ptr%p, nthreads_=nthreads_)
+end subroutine f90wrap_set_num_threads
+
+subroutine f90wrap_set_block_size(this, blocksize_)
+    use cd06stuff, only: set_block_size, cd06
+    implicit none
+    
+    type cd06_ptr_type
+        type(cd06), pointer :: p => NULL()
+    end type cd06_ptr_type
+    type(cd06_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    integer, intent(in) :: blocksize_
+    this_ptr = transfer(this, this_ptr)
+    call set_block_size(this=this_ptr%p, blocksize_=blocksize_)
+end subroutine f90wrap_set_block_size
+
+subroutine f90wrap_set_coordinates(this, x, n0)
+    use cd06stuff, only: set_coordinates, cd06
+    implicit none
+    
+    type cd06_ptr_type
+        type(cd06), pointer :: p => NULL()
+    end type cd06_ptr_type
+    type(cd06_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    real(8), intent(in), dimension(n0) :: x
+    integer :: n0
+    !f2py intent(hide), depend(x) :: n0 = shape(x,0)
+    this_ptr = transfer(this, this_ptr)
+    call set_coordinates(this=this_ptr%p, x=x)
+end subroutine f90wrap_set_coordinates
+
 subroutine f90wrap_dd1(this, f, df, na, nb, n0, n1, n2, n3, n4, n5)
     use cd06stuff, only: dd1, cd06
     implicit none
@@ -121,5 +165,107 @@ subroutine f90wrap_dd3(this, f, df, na, nb, n0, n1, n2, n3, n4, n5)
     call dd3(this=this_ptr%p, f=f, df=df, na=na, nb=nb)
 end subroutine f90wrap_dd3
 
+subroutine f90wrap_dd1_multi(this, f, df, na, nb, nvars, n0, n1, n2, n3, n4, n5, n6, n7)
+    use cd06stuff, only: dd1_multi, cd06
+    implicit none
+    
+    type cd06_ptr_type
+        type(cd06), pointer :: p => NULL()
+    end type cd06_ptr_type
+    type(cd06_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    real(8), intent(in), dimension(n0,n1,n2,n3) :: f
+    real(8), intent(inout), dimension(n4,n5,n6,n7) :: df
+    integer, intent(in) :: na
+    integer, intent(in) :: nb
+    integer, intent(in) :: nvars
+    integer :: n0
+    !f2py intent(hide), depend(f) :: n0 = shape(f,0)
+    integer :: n1
+    !f2py intent(hide), depend(f) :: n1 = shape(f,1)
+    integer :: n2
+    !f2py intent(hide), depend(f) :: n2 = shape(f,2)
+    integer :: n3
+    !f2py intent(hide), depend(f) :: n3 = shape(f,3)
+    integer :: n4
+    !f2py intent(hide), depend(df) :: n4 = shape(df,0)
+    integer :: n5
+    !f2py intent(hide), depend(df) :: n5 = shape(df,1)
+    integer :: n6
+    !f2py intent(hide), depend(df) :: n6 = shape(df,2)
+    integer :: n7
+    !f2py intent(hide), depend(df) :: n7 = shape(df,3)
+    this_ptr = transfer(this, this_ptr)
+    call dd1_multi(this=this_ptr%p, f=f, df=df, na=na, nb=nb, nvars=nvars)
+end subroutine f90wrap_dd1_multi
+
+subroutine f90wrap_dd2_multi(this, f, df, na, nb, nvars, n0, n1, n2, n3, n4, n5, n6, n7)
+    use cd06stuff, only: dd2_multi, cd06
+    implicit none
+    
+    type cd06_ptr_type
+        type(cd06), pointer :: p => NULL()
+    end type cd06_ptr_type
+    type(cd06_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    real(8), intent(in), dimension(n0,n1,n2,n3) :: f
+    real(8), intent(inout), dimension(n4,n5,n6,n7) :: df
+    integer, intent(in) :: na
+    integer, intent(in) :: nb
+    integer, intent(in) :: nvars
+    integer :: n0
+    !f2py intent(hide), depend(f) :: n0 = shape(f,0)
+    integer :: n1
+    !f2py intent(hide), depend(f) :: n1 = shape(f,1)
+    integer :: n2
+    !f2py intent(hide), depend(f) :: n2 = shape(f,2)
+    integer :: n3
+    !f2py intent(hide), depend(f) :: n3 = shape(f,3)
+    integer :: n4
+    !f2py intent(hide), depend(df) :: n4 = shape(df,0)
+    integer :: n5
+    !f2py intent(hide), depend(df) :: n5 = shape(df,1)
+    integer :: n6
+    !f2py intent(hide), depend(df) :: n6 = shape(df,2)
+    integer :: n7
+    !f2py intent(hide), depend(df) :: n7 = shape(df,3)
+    this_ptr = transfer(this, this_ptr)
+    call dd2_multi(this=this_ptr%p, f=f, df=df, na=na, nb=nb, nvars=nvars)
+end subroutine f90wrap_dd2_multi
+
+subroutine f90wrap_dd3_multi(this, f, df, na, nb, nvars, n0, n1, n2, n3, n4, n5, n6, n7)
+    use cd06stuff, only: dd3_multi, cd06
+    implicit none
+    
+    type cd06_ptr_type
+        type(cd06), pointer :: p => NULL()
+    end type cd06_ptr_type
+    type(cd06_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    real(8), intent(in), dimension(n0,n1,n2,n3) :: f
+    real(8), intent(inout), dimension(n4,n5,n6,n7) :: df
+    integer, intent(in) :: na
+    integer, intent(in) :: nb
+    integer, intent(in) :: nvars
+    integer :: n0
+    !f2py intent(hide), depend(f) :: n0 = shape(f,0)
+    integer :: n1
+    !f2py intent(hide), depend(f) :: n1 = shape(f,1)
+    integer :: n2
+    !f2py intent(hide), depend(f) :: n2 = shape(f,2)
+    integer :: n3
+    !f2py intent(hide), depend(f) :: n3 = shape(f,3)
+    integer :: n4
+    !f2py intent(hide), depend(df) :: n4 = shape(df,0)
+    integer :: n5
+    !f2py intent(hide), depend(df) :: n5 = shape(df,1)
+    integer :: n6
+    !f2py intent(hide), depend(df) :: n6 = shape(df,2)
+    integer :: n7
+    !f2py intent(hide), depend(df) :: n7 = shape(df,3)
+    this_ptr = transfer(this, this_ptr)
+    call dd3_multi(this=this_ptr%p, f=f, df=df, na=na, nb=nb, nvars=nvars)
+end subroutine f90wrap_dd3_multi
+
 ! End of module cd06stuff defined in file cd06.F90
 
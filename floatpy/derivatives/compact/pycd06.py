@@ -8,7 +8,7 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
     Module cd06stuff
     
     
-    Defined at cd06.F90 lines 4-852
+    Defined at cd06.F90 lines 4-1217
     
     """
     @f90wrap.runtime.register_class("cd06")
@@ -17,7 +17,7 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
         Type(name=cd06)
         
         
-        Defined at cd06.F90 lines 70-119
+        Defined at cd06.F90 lines 71-135
         
         """
         def __init__(self, n_, dx_, periodic_, bc1_, bcn_, handle=None):
@@ -25,7 +25,7 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
             self = Cd06(n_, dx_, periodic_, bc1_, bcn_)
             
             
-            Defined at cd06.F90 lines 129-200
+            Defined at cd06.F90 lines 145-218
             
             Parameters
             ----------
@@ -49,7 +49,7 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
             Destructor for class Cd06
             
             
-            Defined at cd06.F90 lines 202-218
+            Defined at cd06.F90 lines 220-239
             
             Parameters
             ----------
@@ -59,12 +59,57 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
             if self._alloc:
                 _pycd06.f90wrap_destroy(this=self._handle)
         
+        def set_num_threads(self, nthreads_):
+            """
+            set_num_threads(self, nthreads_)
+            
+            
+            Defined at cd06.F90 lines 1105-1112
+            
+            Parameters
+            ----------
+            this : Cd06
+            nthreads_ : int
+            
+            """
+            _pycd06.f90wrap_set_num_threads(this=self._handle, nthreads_=nthreads_)
+        
+        def set_block_size(self, blocksize_):
+            """
+            set_block_size(self, blocksize_)
+            
+            
+            Defined at cd06.F90 lines 1114-1121
+            
+            Parameters
+            ----------
+            this : Cd06
+            blocksize_ : int
+            
+            """
+            _pycd06.f90wrap_set_block_size(this=self._handle, blocksize_=blocksize_)
+        
+        def set_coordinates(self, x):
+            """
+            set_coordinates(self, x)
+            
+            
+            Defined at cd06.F90 lines 1123-1149
+            
+            Parameters
+            ----------
+            this : Cd06
+            x : float array
+            
+            """
+            _pycd06.f90wrap_set_coordinates(this=self._handle, x=x)
+        
         def dd1(self, f, df, na, nb):
             """
             dd1(self, f, df, na, nb)
             
             
-            Defined at cd06.F90 lines 774-794
+            Defined at cd06.F90 lines 1161-1178
             
             Parameters
             ----------
@@ -82,7 +127,7 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
             dd2(self, f, df, na, nb)
             
             
-            Defined at cd06.F90 lines 796-816
+            Defined at cd06.F90 lines 1180-1197
             
             Parameters
             ----------
@@ -100,7 +145,7 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
             dd3(self, f, df, na, nb)
             
             
-            Defined at cd06.F90 lines 818-838
+            Defined at cd06.F90 lines 1199-1217
             
             Parameters
             ----------
@@ -113,11 +158,68 @@ class Cd06Stuff(f90wrap.runtime.FortranModule):
             """
             _pycd06.f90wrap_dd3(this=self._handle, f=f, df=df, na=na, nb=nb)
         
-        _dt_array_initialisers = []
+        def dd1_multi(self, f, df, na, nb, nvars):
+            """
+            dd1_multi(self, f, df, na, nb, nvars)
+            
+            
+            Defined at cd06.F90 lines 1066-1076
+            
+            Parameters
+            ----------
+            this : Cd06
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            
+            """
+            _pycd06.f90wrap_dd1_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars)
+        
+        def dd2_multi(self, f, df, na, nb, nvars):
+            """
+            dd2_multi(self, f, df, na, nb, nvars)
+            
+            
+            Defined at cd06.F90 lines 1078-1088
+            
+            Parameters
+            ----------
+            this : Cd06
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            
+            """
+            _pycd06.f90wrap_dd2_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars)
         
+        def dd3_multi(self, f, df, na, nb, nvars):
+            """
+            dd3_multi(self, f, df, na, nb, nvars)
+            
+            
+            Defined at cd06.F90 lines 1090-1103
+            
+            Parameters
+            ----------
+            this : Cd06
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            
+            """
+            _pycd06.f90wrap_dd3_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars)
+        
+        _dt_array_initialisers = []
     
-    _dt_array_initialisers = []
     
+    _dt_array_initialisers = []
+
 
 cd06stuff = Cd06Stuff()
 
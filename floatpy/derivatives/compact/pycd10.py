@@ -8,7 +8,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
     Module cd10stuff
     
     
-    Defined at cd10.F90 lines 4-2500
+    Defined at cd10.F90 lines 4-3055
     
     """
     @f90wrap.runtime.register_class("cd10")
@@ -17,7 +17,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
         Type(name=cd10)
         
         
-        Defined at cd10.F90 lines 108-185
+        Defined at cd10.F90 lines 109-200
         
         """
         def __init__(self, n_, dx_, periodic_, bc1_, bcn_, handle=None):
@@ -25,7 +25,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             self = Cd10(n_, dx_, periodic_, bc1_, bcn_)
             
             
-            Defined at cd10.F90 lines 195-315
+            Defined at cd10.F90 lines 212-334
             
             Parameters
             ----------
@@ -49,7 +49,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             Destructor for class Cd10
             
             
-            Defined at cd10.F90 lines 317-349
+            Defined at cd10.F90 lines 336-373
             
             Parameters
             ----------
@@ -59,12 +59,57 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             if self._alloc:
                 _pycd10.f90wrap_destroy(this=self._handle)
         
+        def set_num_threads(self, nthreads_):
+            """
+            set_num_threads(self, nthreads_)
+            
+            
+            Defined at cd10.F90 lines 2873-2880
+            
+            Parameters
+            ----------
+            this : Cd10
+            nthreads_ : int
+            
+            """
+            _pycd10.f90wrap_set_num_threads(this=self._handle, nthreads_=nthreads_)
+        
+        def set_block_size(self, blocksize_):
+            """
+            set_block_size(self, blocksize_)
+            
+            
+            Defined at cd10.F90 lines 2882-2889
+            
+            Parameters
+            ----------
+            this : Cd10
+            blocksize_ : int
+            
+            """
+            _pycd10.f90wrap_set_block_size(this=self._handle, blocksize_=blocksize_)
+        
+        def set_coordinates(self, x):
+            """
+            set_coordinates(self, x)
+            
+            
+            Defined at cd10.F90 lines 2891-2923
+            
+            Parameters
+            ----------
+            this : Cd10
+            x : float array
+            
+            """
+            _pycd10.f90wrap_set_coordinates(this=self._handle, x=x)
+        
         def dd1(self, f, df, na, nb, bc1_=None, bcn_=None):
             """
             dd1(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cd10.F90 lines 2081-2149
+            Defined at cd10.F90 lines 2935-2953
             
             Parameters
             ----------
@@ -85,7 +130,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             dd2(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cd10.F90 lines 2151-2219
+            Defined at cd10.F90 lines 2955-2973
             
             Parameters
             ----------
@@ -106,7 +151,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             dd3(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cd10.F90 lines 2221-2289
+            Defined at cd10.F90 lines 2975-2994
             
             Parameters
             ----------
@@ -127,7 +172,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             d2d1(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cd10.F90 lines 2291-2359
+            Defined at cd10.F90 lines 2996-3014
             
             Parameters
             ----------
@@ -148,7 +193,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             d2d2(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cd10.F90 lines 2361-2429
+            Defined at cd10.F90 lines 3016-3034
             
             Parameters
             ----------
@@ -169,7 +214,7 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             d2d3(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cd10.F90 lines 2431-2500
+            Defined at cd10.F90 lines 3036-3055
             
             Parameters
             ----------
@@ -185,11 +230,143 @@ class Cd10Stuff(f90wrap.runtime.FortranModule):
             _pycd10.f90wrap_d2d3(this=self._handle, f=f, df=df, na=na, nb=nb, bc1_=bc1_, \
                 bcn_=bcn_)
         
-        _dt_array_initialisers = []
+        def dd1_multi(self, f, df, na, nb, nvars, bc1_=None, bcn_=None):
+            """
+            dd1_multi(self, f, df, na, nb, nvars[, bc1_, bcn_])
+            
+            
+            Defined at cd10.F90 lines 2789-2800
+            
+            Parameters
+            ----------
+            this : Cd10
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            bc1_ : int
+            bcn_ : int
+            
+            """
+            _pycd10.f90wrap_dd1_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars, \
+                bc1_=bc1_, bcn_=bcn_)
+        
+        def dd2_multi(self, f, df, na, nb, nvars, bc1_=None, bcn_=None):
+            """
+            dd2_multi(self, f, df, na, nb, nvars[, bc1_, bcn_])
+            
+            
+            Defined at cd10.F90 lines 2802-2813
+            
+            Parameters
+            ----------
+            this : Cd10
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            bc1_ : int
+            bcn_ : int
+            
+            """
+            _pycd10.f90wrap_dd2_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars, \
+                bc1_=bc1_, bcn_=bcn_)
+        
+        def dd3_multi(self, f, df, na, nb, nvars, bc1_=None, bcn_=None):
+            """
+            dd3_multi(self, f, df, na, nb, nvars[, bc1_, bcn_])
+            
+            
+            Defined at cd10.F90 lines 2815-2829
+            
+            Parameters
+            ----------
+            this : Cd10
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            bc1_ : int
+            bcn_ : int
+            
+            """
+            _pycd10.f90wrap_dd3_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars, \
+                bc1_=bc1_, bcn_=bcn_)
+        
+        def d2d1_multi(self, f, df, na, nb, nvars, bc1_=None, bcn_=None):
+            """
+            d2d1_multi(self, f, df, na, nb, nvars[, bc1_, bcn_])
+            
+            
+            Defined at cd10.F90 lines 2831-2842
+            
+            Parameters
+            ----------
+            this : Cd10
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            bc1_ : int
+            bcn_ : int
+            
+            """
+            _pycd10.f90wrap_d2d1_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars, \
+                bc1_=bc1_, bcn_=bcn_)
+        
+        def d2d2_multi(self, f, df, na, nb, nvars, bc1_=None, bcn_=None):
+            """
+            d2d2_multi(self, f, df, na, nb, nvars[, bc1_, bcn_])
+            
+            
+            Defined at cd10.F90 lines 2844-2855
+            
+            Parameters
+            ----------
+            this : Cd10
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            bc1_ : int
+            bcn_ : int
+            
+            """
+            _pycd10.f90wrap_d2d2_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars, \
+                bc1_=bc1_, bcn_=bcn_)
+        
+        def d2d3_multi(self, f, df, na, nb, nvars, bc1_=None, bcn_=None):
+            """
+            d2d3_multi(self, f, df, na, nb, nvars[, bc1_, bcn_])
+            
+            
+            Defined at cd10.F90 lines 2857-2871
+            
+            Parameters
+            ----------
+            this : Cd10
+            f : float array
+            df : float array
+            na : int
+            nb : int
+            nvars : int
+            bc1_ : int
+            bcn_ : int
+            
+            """
+            _pycd10.f90wrap_d2d3_multi(this=self._handle, f=f, df=df, na=na, nb=nb, nvars=nvars, \
+                bc1_=bc1_, bcn_=bcn_)
         
+        _dt_array_initialisers = []
     
-    _dt_array_initialisers = []
     
+    _dt_array_initialisers = []
+
 
 cd10stuff = Cd10Stuff()
 
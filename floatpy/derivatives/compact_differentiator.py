@@ -4,22 +4,30 @@ import compact.pycd10 as pycd10
 
 from floatpy.parallel import t3dmod
 from floatpy.utilities import data_reshaper
+from floatpy.utilities import operator_registry
 
 class CompactDifferentiator(object):
     """
     Class to perform derivatives with compact finite difference schemes.
     """
     
-    def __init__(self, grid_partition, grid_spacing, order, dimension=3, periodic_dimensions=(False, False, False)):
+    def __init__(self, grid_partition, grid_spacing, order, dimension=3, periodic_dimensions=(False, False, False), \
+                 num_threads=1, block_size=262144):
         """
         Constructor of the class.
         
         grid_partition : the grid_partition property (t3d object) of the parallel data reader class
-        grid_spacing : iterable of floats for the grid spacing in each direction
+        grid_spacing : iterable with the grid spacing in each direction. The entry of a direction with a non-uniform
+                       grid is instead a 1D array with all the coordinates of the grid in that direction. The metric
+                       terms of the mapping are computed once here and applied inside the Fortran kernels
         order : integer iterable with each value in {6, 10} representing the order of accuracy of the derivatives
                 in each direction
         dimension : dimension of problem
         periodic_dimensions : iterable of boolean descibing whether the periodicity in each direction
+        num_threads : number of OpenMP threads used by the Fortran kernels in each direction. The default of 1 keeps
+                      the parallelism pure MPI
+        block_size : size in bytes of the tiles of contiguous lines used by the solves in the y and z directions. 0
+                     uses the original plane-by-plane sweeps
         """
         
         if not isinstance(grid_partition, t3dmod.t3d):
@@ -97,29 +105,334 @@ class CompactDifferentiator(object):
         self._ny = self._chunk_y_size[1]
         self._nz = self._chunk_z_size[2]
         
-        self._der_x = None
-        self._der_y = None
-        self._der_z = None
+        # A direction is pencil aligned if the 3D decomposition chunk is already the pencil of that direction, e.g. when
+        # running on a single process. The derivatives in such a direction are computed on the data directly without
+        # any transposes.
+        self._pencil_aligned = [ numpy.array_equal(self._chunk_3d_size, chunk_size) and \
+                                 numpy.array_equal(self._chunk_3d_lo, chunk_lo) \
+                                 for chunk_size, chunk_lo in ((self._chunk_x_size, self._chunk_x_lo), \
+                                                              (self._chunk_y_size, self._chunk_y_lo), \
+                                                              (self._chunk_z_size, self._chunk_z_lo)) ]
         
-        if self._order[0] == 6:
-            self._der_x = pycd06.cd06stuff.cd06( self._nx, grid_spacing[0], self._periodic[0], 0, 0 )
-        elif self._order[0] == 10:
-            self._der_x = pycd10.cd10stuff.cd10( self._nx, grid_spacing[0], self._periodic[0], 0, 0 )
+        # Get the coordinates of the directions with non-uniform grids. The kernels of these directions work on the
+        # uniform grid of the index space.
+        grid_spacing = list(grid_spacing[0:self._dim])
+        self._coordinates = [None, None, None]
+        
+        for i in range(self._dim):
+            if numpy.ndim(grid_spacing[i]) == 0:
+                continue
+            
+            coordinates = numpy.asfortranarray(grid_spacing[i], dtype=numpy.float64)
+            
+            if coordinates.ndim != 1 or coordinates.shape[0] != (self._nx, self._ny, self._nz)[i]:
+                raise RuntimeError("The coordinates in direction %d have to be a 1D array with the global number of "
+                                   "grid points in that direction!" %i)
+            
+            if self._periodic[i]:
+                raise RuntimeError("Non-uniform grid in direction %d is only supported if it is not periodic!" %i)
+            
+            if numpy.any(numpy.diff(coordinates) <= 0.):
+                raise RuntimeError("The coordinates in direction %d have to be strictly increasing!" %i)
+            
+            self._coordinates[i] = coordinates
+            grid_spacing[i] = 1.
+        
+        # The derivative objects are shared with all the other objects of this process using the same schemes.
+        self._der_x = self._getOperator(0, grid_spacing[0])
         
         if self._dim > 1:
-            if self._order[1] == 6:
-                self._der_y = pycd06.cd06stuff.cd06( self._ny, grid_spacing[1], self._periodic[1], 0, 0 )
-            elif self._order[1] == 10:
-                self._der_y = pycd10.cd10stuff.cd10( self._ny, grid_spacing[1], self._periodic[1], 0, 0 )
+            self._der_y = self._getOperator(1, grid_spacing[1])
+        else:
+            self._der_y = None
         
         if self._dim > 2:
-            if self._order[2] == 6:
-                self._der_z = pycd06.cd06stuff.cd06( self._nz, grid_spacing[2], self._periodic[2], 0, 0 )
-            elif self._order[2] == 10:
-                self._der_z = pycd10.cd10stuff.cd10( self._nz, grid_spacing[2], self._periodic[2], 0, 0 )
+            self._der_z = self._getOperator(2, grid_spacing[2])
+        else:
+            self._der_z = None
+        
+        self.num_threads = num_threads
+        self.block_size = block_size
         
         # Initialize the data reshaper.
         self._data_reshaper = data_reshaper.DataReshaper(self._dim, data_order='F')
+        
+        # Pencil buffers of the data and derivative in each direction. These are allocated once and reused by all the
+        # derivative methods.
+        self._pencil_buffers = [None, None, None]
+        
+        # Multi-component pencil buffers in each direction used by the batched derivatives of all components. These
+        # are reallocated only when the number of components changes.
+        self._multi_pencil_buffers = [None, None, None]
+    
+    
+    @property
+    def num_threads(self):
+        """
+        Return the number of OpenMP threads used by the Fortran kernels in each direction.
+        """
+        
+        return self._num_threads
+    
+    
+    @num_threads.setter
+    def num_threads(self, num_threads):
+        """
+        Set the number of OpenMP threads used by the Fortran kernels in each direction. The lines of each pencil are
+        split among the threads. This has no effect if the kernels are built without OpenMP.
+        """
+        
+        if num_threads < 1:
+            raise RuntimeError("Number of threads has to be at least 1!")
+        
+        self._num_threads = int(num_threads)
+    
+    
+    @property
+    def block_size(self):
+        """
+        Return the size in bytes of the tiles used by the solves in the y and z directions.
+        """
+        
+        return self._block_size
+    
+    
+    @block_size.setter
+    def block_size(self, block_size):
+        """
+        Set the size in bytes of the tiles used by the solves in the y and z directions. The lines of a pencil that are
+        contiguous in memory are solved together in tiles of about this size so that they stay in cache. 0 uses the
+        original plane-by-plane sweeps. The results do not depend on this value.
+        """
+        
+        if block_size < 0:
+            raise RuntimeError("Block size cannot be negative!")
+        
+        self._block_size = int(block_size)
+    
+    
+    @property
+    def coordinates(self):
+        """
+        Return the coordinates of the non-uniform grid in each direction. The entry of a direction with a uniform grid
+        is None.
+        """
+        
+        return tuple(self._coordinates)
+    
+    
+    @property
+    def pencil_aligned(self):
+        """
+        Return a tuple telling whether the 3D decomposition is aligned with the pencil of each direction. The
+        derivatives in the aligned directions bypass the transposes.
+        """
+        
+        return tuple(self._pencil_aligned)
+    
+    
+    @property
+    def data_reshaper(self):
+        """
+        Return the data reshaper used by this object. Its counters tell how many reshapes had to copy the data.
+        """
+        
+        return self._data_reshaper
+    
+    
+    def _getOperator(self, direction, dx):
+        """
+        Return the derivative object of the given direction from the operator registry.
+        """
+        
+        n = (self._nx, self._ny, self._nz)[direction]
+        coordinates = self._coordinates[direction]
+        
+        if self._order[direction] == 6:
+            scheme, constructor = 'cd06', pycd06.cd06stuff.cd06
+        else:
+            scheme, constructor = 'cd10', pycd10.cd10stuff.cd10
+        
+        def create():
+            kernel = constructor( n, dx, self._periodic[direction], 0, 0 )
+            if coordinates is not None:
+                kernel.set_coordinates(coordinates)
+            return kernel
+        
+        return operator_registry.default_registry().get(create, scheme, n, dx, self._periodic[direction], \
+                                                        coordinates=coordinates)
+    
+    
+    def _getPencilSize(self, direction):
+        """
+        Return the size of the pencil of the given direction.
+        """
+        
+        if direction == 0:
+            return self._chunk_x_size
+        elif direction == 1:
+            return self._chunk_y_size
+        
+        return self._chunk_z_size
+    
+    
+    def _getPencilBuffers(self, direction, num_components=None):
+        """
+        Return the buffers of the data and derivative in the pencil of the given direction. The buffers have a trailing
+        component dimension if num_components is not None.
+        """
+        
+        pencil_size = tuple(self._getPencilSize(direction))
+        
+        if num_components is None:
+            if self._pencil_buffers[direction] is None:
+                self._pencil_buffers[direction] = (numpy.empty(pencil_size, dtype=numpy.float64, order='F'), \
+                                                   numpy.empty(pencil_size, dtype=numpy.float64, order='F'))
+            
+            return self._pencil_buffers[direction]
+        
+        pencil_size = pencil_size + (num_components,)
+        
+        if self._multi_pencil_buffers[direction] is None or \
+           self._multi_pencil_buffers[direction][0].shape != pencil_size:
+            self._multi_pencil_buffers[direction] = (numpy.empty(pencil_size, dtype=numpy.float64, order='F'), \
+                                                     numpy.empty(pencil_size, dtype=numpy.float64, order='F'))
+        
+        return self._multi_pencil_buffers[direction]
+    
+    
+    def _getPencilOperators(self, direction):
+        """
+        Return the derivative object, the transposes to and from the pencil and the sizes of the two other dimensions
+        of the pencil of the given direction. The number of threads and the block size of this object are applied to
+        the derivative object since it may be shared with other objects.
+        """
+        
+        der_object = (self._der_x, self._der_y, self._der_z)[direction]
+        der_object.set_num_threads(self._num_threads)
+        der_object.set_block_size(self._block_size)
+        
+        if direction == 0:
+            return der_object, self._grid_partition.transpose_3d_to_x, self._grid_partition.transpose_x_to_3d, \
+                self._chunk_x_size[1], self._chunk_x_size[2]
+        elif direction == 1:
+            return der_object, self._grid_partition.transpose_3d_to_y, self._grid_partition.transpose_y_to_3d, \
+                self._chunk_y_size[0], self._chunk_y_size[2]
+        
+        return der_object, self._grid_partition.transpose_3d_to_z, self._grid_partition.transpose_z_to_3d, \
+            self._chunk_z_size[0], self._chunk_z_size[1]
+    
+    
+    def _differentiatePencil(self, direction, derivative_order, data_3d, der_3d, bc):
+        """
+        Compute the first or second order derivative in the given direction of the 3D data and store it in der_3d.
+        The data is transposed into the pencil buffers unless the direction is pencil aligned, in which case the
+        kernel works on the arrays directly. The derivative goes through the pencil buffer if der_3d is not Fortran
+        contiguous or shares memory with data_3d since the kernels write the derivative while reading the data.
+        """
+        
+        if derivative_order == 2 and self._order[direction] == 6:
+            raise NotImplementedError("6th order 2nd derivatives are not implemented yet. Sorry!")
+        
+        der_object, transpose_to_pencil, transpose_from_pencil, na, nb = self._getPencilOperators(direction)
+        
+        if self._pencil_aligned[direction]:
+            data_pencil = data_3d
+            if der_3d.flags['F_CONTIGUOUS'] and not numpy.may_share_memory(data_3d, der_3d):
+                der_pencil = der_3d
+            else:
+                der_pencil = self._getPencilBuffers(direction)[1]
+        else:
+            data_pencil, der_pencil = self._getPencilBuffers(direction)
+            transpose_to_pencil(data_3d, data_pencil)
+        
+        if derivative_order == 1:
+            solve = getattr(der_object, 'dd%d' % (direction + 1))
+        else:
+            solve = getattr(der_object, 'd2d%d' % (direction + 1))
+        
+        if self._order[direction] == 6:
+            # symmetry BC only supported in 10th order for now
+            solve(data_pencil, der_pencil, na, nb)
+        elif self._order[direction] == 10:
+            solve(data_pencil, der_pencil, na, nb, bc1_=bc[0], bcn_=bc[1])
+        
+        if not self._pencil_aligned[direction]:
+            transpose_from_pencil(der_pencil, der_3d)
+        elif der_pencil is not der_3d:
+            der_3d[:] = der_pencil
+    
+    
+    def _differentiateComponents(self, direction, derivative_order, data, der, bc):
+        """
+        Compute the first or second order derivative of all the components of data in the given direction. All the
+        components are transposed into a multi-component pencil and differentiated with a single batched solve so
+        that the factorization is swept only once for all of them.
+        """
+        
+        if direction >= self._dim:
+            raise RuntimeError("There is no derivative in direction %d for %dD problem!" % (direction, self._dim))
+        
+        data_shape = data.shape
+        
+        if tuple(data_shape[0:self._dim]) != tuple(self._chunk_3d_size[0:self._dim]):
+            raise RuntimeError("Make sure data is of the same size as in grid_partition!")
+        
+        if derivative_order == 2 and self._order[direction] == 6:
+            raise NotImplementedError("6th order 2nd derivatives are not implemented yet. Sorry!")
+        
+        num_components = data_shape[-1]
+        der_shape = tuple(self._chunk_3d_size[0:self._dim]) + (num_components,)
+        
+        return_der = True
+        if der is None:
+            der = numpy.empty(der_shape, dtype=numpy.float64, order='F')
+        else:
+            if tuple(der.shape) != der_shape:
+                raise RuntimeError("Make sure der is of the same size as data!")
+            return_der = False
+        
+        der_object, transpose_to_pencil, transpose_from_pencil, na, nb = self._getPencilOperators(direction)
+        pencil_size = tuple(self._getPencilSize(direction)) + (num_components,)
+        
+        # In a pencil aligned direction the components are differentiated in place of the transposes. The derivative
+        # is written directly into der if it is Fortran contiguous and does not share memory with data.
+        aligned = self._pencil_aligned[direction]
+        der_direct = aligned and der.flags['F_CONTIGUOUS'] and not numpy.may_share_memory(data, der)
+        
+        if aligned:
+            data_pencil = numpy.reshape(data, pencil_size, order='F')
+            if der_direct:
+                der_pencil = numpy.reshape(der, pencil_size, order='F')
+            else:
+                der_pencil = self._getPencilBuffers(direction, num_components)[1]
+        else:
+            data_pencil, der_pencil = self._getPencilBuffers(direction, num_components)
+            
+            for i in range(num_components):
+                data_3d = self._data_reshaper.reshapeTo3d(data, i)
+                transpose_to_pencil(data_3d, data_pencil[:, :, :, i])
+        
+        if derivative_order == 1:
+            solve = getattr(der_object, 'dd%d_multi' % (direction + 1))
+        else:
+            solve = getattr(der_object, 'd2d%d_multi' % (direction + 1))
+        
+        if self._order[direction] == 6:
+            # symmetry BC only supported in 10th order for now
+            solve(data_pencil, der_pencil, na, nb, num_components)
+        elif self._order[direction] == 10:
+            solve(data_pencil, der_pencil, na, nb, num_components, bc1_=bc[0], bcn_=bc[1])
+        
+        if not aligned:
+            for i in range(num_components):
+                der_3d = self._data_reshaper.reshapeTo3d(der, i, allow_copy=False)
+                transpose_from_pencil(der_pencil[:, :, :, i], der_3d)
+        elif not der_direct:
+            der[:] = numpy.reshape(der_pencil, der_shape, order='F')
+        
+        if return_der:
+            return der
     
     
     def ddx(self, data, der=None, component_idx=None, bc=(0,0)):
@@ -131,7 +444,8 @@ class CompactDifferentiator(object):
         der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
               decomposition and the problem dimension. This method will return der if der is None
         component_idx : index of component in data for taking derivative. None if there is only one component in the
-                        data
+                        data or to take the derivatives of all the components at once with a batched solve. In the
+                        latter case der has the same number of components as data
         bc : integer iterable of size 2 with the boundary condition at the left and right.
              0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
         """
@@ -140,6 +454,8 @@ class CompactDifferentiator(object):
         
         if component_idx is not None:
             data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            return self._differentiateComponents(0, 1, data, der, bc)
         
         if self._dim == 1:
             if len(data_shape) != 1:
@@ -168,25 +484,14 @@ class CompactDifferentiator(object):
         else:
             return_der = False
         
-        data_x = numpy.empty(self._chunk_x_size, dtype=numpy.float64, order='F')
-        der_x  = numpy.empty(self._chunk_x_size, dtype=numpy.float64, order='F')
-        
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
         
-        self._grid_partition.transpose_3d_to_x(data_3d, data_x)
-        
-        if self._order[0] == 6:
-            # symmetry BC only supported in 10th order for now
-            self._der_x.dd1(data_x, der_x, self._chunk_x_size[1], self._chunk_x_size[2])
-        elif self._order[0] == 10:
-            self._der_x.dd1(data_x, der_x, self._chunk_x_size[1], self._chunk_x_size[2], bc1_=bc[0], bcn_=bc[1])
-        
-        der_3d = self._data_reshaper.reshapeTo3d(der)
-        self._grid_partition.transpose_x_to_3d(der_x, der_3d)
+        der_3d = self._data_reshaper.reshapeTo3d(der, allow_copy=False)
+        self._differentiatePencil(0, 1, data_3d, der_3d, bc)
         der = self._data_reshaper.reshapeFrom3d(der_3d)
         
         if return_der:
@@ -202,7 +507,8 @@ class CompactDifferentiator(object):
         der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
               decomposition and the problem dimension. This method will return der if der is None
         component_idx : index of component in data for taking derivative. None if there is only one component in the
-                        data
+                        data or to take the derivatives of all the components at once with a batched solve. In the
+                        latter case der has the same number of components as data
         bc : integer iterable of size 2 with the boundary condition at the left and right.
              0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
         """
@@ -211,6 +517,8 @@ class CompactDifferentiator(object):
         
         if component_idx is not None:
             data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            return self._differentiateComponents(1, 1, data, der, bc)
         
         if self._dim == 1:
             raise RuntimeError("There is no ddy for 1D problem!")
@@ -236,25 +544,14 @@ class CompactDifferentiator(object):
         else:
             return_der = False
         
-        data_y = numpy.empty(self._chunk_y_size, dtype=numpy.float64, order='F')
-        der_y  = numpy.empty(self._chunk_y_size, dtype=numpy.float64, order='F')
-        
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
         
-        self._grid_partition.transpose_3d_to_y(data_3d, data_y)
-        
-        if self._order[1] == 6:
-            # symmetry BC only supported in 10th order for now
-            self._der_y.dd2(data_y, der_y, self._chunk_y_size[0], self._chunk_y_size[2])
-        elif self._order[1] == 10:
-            self._der_y.dd2(data_y, der_y, self._chunk_y_size[0], self._chunk_y_size[2], bc1_=bc[0], bcn_=bc[1])
-        
-        der_3d = self._data_reshaper.reshapeTo3d(der)
-        self._grid_partition.transpose_y_to_3d(der_y, der_3d)
+        der_3d = self._data_reshaper.reshapeTo3d(der, allow_copy=False)
+        self._differentiatePencil(1, 1, data_3d, der_3d, bc)
         der = self._data_reshaper.reshapeFrom3d(der_3d)
         
         if return_der:
@@ -270,7 +567,8 @@ class CompactDifferentiator(object):
         der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
               decomposition and the problem dimension. This method will return der if der is None
         component_idx : index of component in data for taking derivative. None if there is only one component in the
-                        data
+                        data or to take the derivatives of all the components at once with a batched solve. In the
+                        latter case der has the same number of components as data
         bc : integer iterable of size 2 with the boundary condition at the left and right.
              0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
         """
@@ -279,6 +577,8 @@ class CompactDifferentiator(object):
         
         if component_idx is not None:
             data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            return self._differentiateComponents(2, 1, data, der, bc)
         
         if self._dim == 1:
             raise RuntimeError("There is no ddz for 1D problem!")
@@ -300,24 +600,13 @@ class CompactDifferentiator(object):
         else:
             return_der = False
         
-        data_z = numpy.empty(self._chunk_z_size, dtype=numpy.float64, order='F')
-        der_z  = numpy.empty(self._chunk_z_size, dtype=numpy.float64, order='F')
-        
         data_3d = []
         if component_idx is None:
             data_3d = data
         else:
             data_3d = data[:, :, :, component_idx]
         
-        self._grid_partition.transpose_3d_to_z(data_3d, data_z)
-        
-        if self._order[2] == 6:
-            # symmetry BC only supported in 10th order for now
-            self._der_z.dd3(data_z, der_z, self._chunk_z_size[0], self._chunk_z_size[1])
-        elif self._order[2] == 10:
-            self._der_z.dd3(data_z, der_z, self._chunk_z_size[0], self._chunk_z_size[1], bc1_=bc[0], bcn_=bc[1])
-        
-        self._grid_partition.transpose_z_to_3d(der_z, der)
+        self._differentiatePencil(2, 1, data_3d, der, bc)
         
         if return_der:
             return der
@@ -332,7 +621,8 @@ class CompactDifferentiator(object):
         der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
               decomposition and the problem dimension. This method will return der if der is None
         component_idx : index of component in data for taking derivative. None if there is only one component in the
-                        data
+                        data or to take the derivatives of all the components at once with a batched solve. In the
+                        latter case der has the same number of components as data
         bc : integer iterable of size 2 with the boundary condition at the left and right.
              0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
         """
@@ -341,6 +631,8 @@ class CompactDifferentiator(object):
         
         if component_idx is not None:
             data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            return self._differentiateComponents(0, 2, data, der, bc)
         
         if self._dim == 1:
             if len(data_shape) != 1:
@@ -369,24 +661,14 @@ class CompactDifferentiator(object):
         else:
             return_der = False
         
-        data_x = numpy.empty(self._chunk_x_size, dtype=numpy.float64, order='F')
-        der_x  = numpy.empty(self._chunk_x_size, dtype=numpy.float64, order='F')
-        
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
         
-        self._grid_partition.transpose_3d_to_x(data_3d, data_x)
-        
-        if self._order[0] == 6:
-            raise NotImplementedError("6th order 2nd derivatives are not implemented yet. Sorry!")
-        elif self._order[0] == 10:
-            self._der_x.d2d1(data_x, der_x, self._chunk_x_size[1], self._chunk_x_size[2], bc1_=bc[0], bcn_=bc[1])
-        
-        der_3d = self._data_reshaper.reshapeTo3d(der)
-        self._grid_partition.transpose_x_to_3d(der_x, der_3d)
+        der_3d = self._data_reshaper.reshapeTo3d(der, allow_copy=False)
+        self._differentiatePencil(0, 2, data_3d, der_3d, bc)
         der = self._data_reshaper.reshapeFrom3d(der_3d)
         
         if return_der:
@@ -402,7 +684,8 @@ class CompactDifferentiator(object):
         der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
               decomposition and the problem dimension. This method will return der if der is None
         component_idx : index of component in data for taking derivative. None if there is only one component in the
-                        data
+                        data or to take the derivatives of all the components at once with a batched solve. In the
+                        latter case der has the same number of components as data
         bc : integer iterable of size 2 with the boundary condition at the left and right.
              0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
         """
@@ -411,6 +694,8 @@ class CompactDifferentiator(object):
         
         if component_idx is not None:
             data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            return self._differentiateComponents(1, 2, data, der, bc)
         
         if self._dim == 1:
             raise RuntimeError("There is no d2dy2 for 1D problem!")
@@ -436,24 +721,14 @@ class CompactDifferentiator(object):
         else:
             return_der = False
         
-        data_y = numpy.empty(self._chunk_y_size, dtype=numpy.float64, order='F')
-        der_y  = numpy.empty(self._chunk_y_size, dtype=numpy.float64, order='F')
-        
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
         
-        self._grid_partition.transpose_3d_to_y(data_3d, data_y)
-        
-        if self._order[1] == 6:
-            raise NotImplementedError("6th order 2nd derivatives are not implemented yet. Sorry!")
-        elif self._order[1] == 10:
-            self._der_y.d2d2(data_y, der_y, self._chunk_y_size[0], self._chunk_y_size[2], bc1_=bc[0], bcn_=bc[1])
-        
-        der_3d = self._data_reshaper.reshapeTo3d(der)
-        self._grid_partition.transpose_y_to_3d(der_y, der_3d)
+        der_3d = self._data_reshaper.reshapeTo3d(der, allow_copy=False)
+        self._differentiatePencil(1, 2, data_3d, der_3d, bc)
         der = self._data_reshaper.reshapeFrom3d(der_3d)
         
         if return_der:
@@ -469,7 +744,8 @@ class CompactDifferentiator(object):
         der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
               decomposition and the problem dimension. This method will return der if der is None
         component_idx : index of component in data for taking derivative. None if there is only one component in the
-                        data
+                        data or to take the derivatives of all the components at once with a batched solve. In the
+                        latter case der has the same number of components as data
         bc : integer iterable of size 2 with the boundary condition at the left and right.
              0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
         """
@@ -478,6 +754,8 @@ class CompactDifferentiator(object):
         
         if component_idx is not None:
             data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            return self._differentiateComponents(2, 2, data, der, bc)
         
         if self._dim == 1:
             raise RuntimeError("There is no d2dz2 for 1D problem!")
@@ -499,23 +777,13 @@ class CompactDifferentiator(object):
         else:
             return_der = False
         
-        data_z = numpy.empty(self._chunk_z_size, dtype=numpy.float64, order='F')
-        der_z  = numpy.empty(self._chunk_z_size, dtype=numpy.float64, order='F')
-        
         data_3d = []
         if component_idx is None:
             data_3d = data
         else:
             data_3d = data[:, :, :, component_idx]
         
-        self._grid_partition.transpose_3d_to_z(data_3d, data_z)
-        
-        if self._order[2] == 6:
-            raise NotImplementedError("6th order 2nd derivatives are not implemented yet. Sorry!")
-        elif self._order[2] == 10:
-            self._der_z.d2d3(data_z, der_z, self._chunk_z_size[0], self._chunk_z_size[1], bc1_=bc[0], bcn_=bc[1])
-        
-        self._grid_partition.transpose_z_to_3d(der_z, der)
+        self._differentiatePencil(2, 2, data_3d, der, bc)
         
         if return_der:
             return der
@@ -524,7 +792,7 @@ class CompactDifferentiator(object):
     def gradient(self, data, component_idx=None, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0)):
         """
         Method to compute the gradient of data.
-
+        
         data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
                and the problem dimension
         component_idx : index of component in data for taking derivative. None if there is only one component in the
@@ -551,7 +819,7 @@ class CompactDifferentiator(object):
     def divergence(self, data, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0)):
         """
         Method to compute the gradient of a vector.
-
+        
         data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
                and the problem dimension. The number of components should be as same as the number of dimensions
         *_bc : integer tuple of size 2 with the boundary condition at the left and right.
@@ -582,7 +850,7 @@ class CompactDifferentiator(object):
     def curl(self, data, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0)):
         """
         Method to compute the curl of a vector.
-
+        
         data : input numpy array in the chosen contiguous layout. This array must be consistent with the problem
                dimension. The number of components should be as same as the number of dimensions
         *_bc : integer tuple of size 2 with the boundary condition at the left and right.
@@ -608,7 +876,7 @@ class CompactDifferentiator(object):
             dudy = self.ddy(data, component_idx=0, bc=y_bc)
             
             curl = dvdx - dudy
-            
+        
         if self._dim == 3:
             dvdx = self.ddx(data, component_idx=1, bc=x_bc)
             dwdx = self.ddx(data, component_idx=2, bc=x_bc)
@@ -631,7 +899,7 @@ class CompactDifferentiator(object):
     def laplacian(self, data, component_idx=None, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0)):
         """
         Method to compute the laplacian of data.
-
+        
         data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
                and the problem dimension
         component_idx : index of component in data for taking derivative. None if there is only one component in the
@@ -649,3 +917,171 @@ class CompactDifferentiator(object):
             laplacian = laplacian + self.d2dz2(data, component_idx=component_idx, bc=z_bc)
         
         return laplacian
+    
+    
+    def velocity_gradient(self, data, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0), gradient=None):
+        """
+        Method to compute the gradient tensor of a vector (e.g. the velocity gradient tensor). Each component of the
+        vector is transposed to the pencil of each direction only once, all the components are differentiated with a
+        single batched solve and the derivatives are written directly into the tensor.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension. The number of components should be as same as the number of dimensions
+        *_bc : integer tuple of size 2 with the boundary condition at the left and right.
+               0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
+        gradient : optional output numpy array in Fortran contiguous layout with two additional trailing dimensions of
+                   size equal to the problem dimension. gradient[..., i, j] is the derivative of the i-th component in
+                   the j-th direction. This method will return gradient if gradient is None
+        """
+        
+        data_shape = data.shape
+        
+        if len(data_shape) != self._dim + 1 or data_shape[-1] != self._dim:
+            raise RuntimeError("Make sure data is %dD and has enough number of components!" % self._dim)
+        
+        gradient_shape = tuple(self._chunk_3d_size[0:self._dim]) + (self._dim, self._dim)
+        
+        return_gradient = True
+        if gradient is None:
+            gradient = numpy.empty(gradient_shape, dtype=numpy.float64, order='F')
+        else:
+            if tuple(gradient.shape) != gradient_shape:
+                raise RuntimeError("Make sure gradient is of the same size as in grid_partition and has enough " + \
+                                   "number of components!")
+            return_gradient = False
+        
+        derivatives = (self.ddx, self.ddy, self.ddz)
+        bcs = (x_bc, y_bc, z_bc)
+        
+        # All the components are differentiated in each direction with a single batched solve.
+        for j in range(self._dim):
+            derivatives[j](data, der=gradient[..., j], bc=bcs[j])
+        
+        if return_gradient:
+            return gradient
+    
+    
+    def _getVelocityGradient(self, data, x_bc, y_bc, z_bc, velocity_gradient):
+        """
+        Return the given velocity gradient tensor or compute it from data if it is not given.
+        """
+        
+        if velocity_gradient is not None:
+            gradient_shape = tuple(self._chunk_3d_size[0:self._dim]) + (self._dim, self._dim)
+            if tuple(velocity_gradient.shape) != gradient_shape:
+                raise RuntimeError("Make sure velocity_gradient is of the same size as in grid_partition and has " + \
+                                   "enough number of components!")
+            return velocity_gradient
+        
+        if data is None:
+            raise RuntimeError("Either data or velocity_gradient has to be given!")
+        
+        return self.velocity_gradient(data, x_bc=x_bc, y_bc=y_bc, z_bc=z_bc)
+    
+    
+    def vorticity(self, data=None, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0), velocity_gradient=None):
+        """
+        Method to compute the vorticity of a velocity field.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension. The number of components should be as same as the number of dimensions.
+               Not required if velocity_gradient is given
+        *_bc : integer tuple of size 2 with the boundary condition at the left and right.
+               0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
+        velocity_gradient : optional velocity gradient tensor from the velocity_gradient method. The derivatives are
+                            reused instead of being computed again
+        vorticity : returned output numpy array in Fortran contiguous layout. This array has three components in 3D
+                    and a single component in 2D
+        """
+        
+        if self._dim == 1:
+            raise RuntimeError("There is no vorticity for 1D problem!")
+        
+        A = self._getVelocityGradient(data, x_bc, y_bc, z_bc, velocity_gradient)
+        
+        if self._dim == 2:
+            return A[..., 1, 0] - A[..., 0, 1]
+        
+        vorticity = numpy.empty(A.shape[0:3] + (3,), dtype=numpy.float64, order='F')
+        
+        vorticity[..., 0] = A[..., 2, 1] - A[..., 1, 2]
+        vorticity[..., 1] = A[..., 0, 2] - A[..., 2, 0]
+        vorticity[..., 2] = A[..., 1, 0] - A[..., 0, 1]
+        
+        return vorticity
+    
+    
+    def dilatation(self, data=None, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0), velocity_gradient=None):
+        """
+        Method to compute the dilatation (divergence) of a velocity field.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension. The number of components should be as same as the number of dimensions.
+               Not required if velocity_gradient is given
+        *_bc : integer tuple of size 2 with the boundary condition at the left and right.
+               0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
+        velocity_gradient : optional velocity gradient tensor from the velocity_gradient method. The derivatives are
+                            reused instead of being computed again
+        dilatation : returned output numpy array in Fortran contiguous layout
+        """
+        
+        A = self._getVelocityGradient(data, x_bc, y_bc, z_bc, velocity_gradient)
+        
+        dilatation = A[..., 0, 0].copy(order='F')
+        for i in range(1, self._dim):
+            dilatation += A[..., i, i]
+        
+        return dilatation
+    
+    
+    def q_criterion(self, data=None, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0), velocity_gradient=None):
+        """
+        Method to compute the Q-criterion of a velocity field, Q = (|Omega|^2 - |S|^2)/2 where S and Omega are the
+        symmetric and anti-symmetric parts of the velocity gradient tensor.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension. The number of components should be as same as the number of dimensions.
+               Not required if velocity_gradient is given
+        *_bc : integer tuple of size 2 with the boundary condition at the left and right.
+               0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
+        velocity_gradient : optional velocity gradient tensor from the velocity_gradient method. The derivatives are
+                            reused instead of being computed again
+        Q : returned output numpy array in Fortran contiguous layout
+        """
+        
+        A = self._getVelocityGradient(data, x_bc, y_bc, z_bc, velocity_gradient)
+        
+        # |Omega|^2 - |S|^2 = -A_ij A_ji.
+        Q = numpy.zeros(A.shape[0:self._dim], dtype=numpy.float64, order='F')
+        for i in range(self._dim):
+            for j in range(self._dim):
+                Q -= A[..., i, j]*A[..., j, i]
+        
+        Q *= 0.5
+        
+        return Q
+    
+    
+    def strain_rate_magnitude(self, data=None, x_bc=(0,0), y_bc=(0,0), z_bc=(0,0), velocity_gradient=None):
+        """
+        Method to compute the magnitude of the strain-rate tensor of a velocity field, sqrt(2 S_ij S_ij).
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension. The number of components should be as same as the number of dimensions.
+               Not required if velocity_gradient is given
+        *_bc : integer tuple of size 2 with the boundary condition at the left and right.
+               0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
+        velocity_gradient : optional velocity gradient tensor from the velocity_gradient method. The derivatives are
+                            reused instead of being computed again
+        strain_rate_magnitude : returned output numpy array in Fortran contiguous layout
+        """
+        
+        A = self._getVelocityGradient(data, x_bc, y_bc, z_bc, velocity_gradient)
+        
+        # 2 S_ij S_ij = A_ij A_ij + A_ij A_ji.
+        SS = numpy.zeros(A.shape[0:self._dim], dtype=numpy.float64, order='F')
+        for i in range(self._dim):
+            for j in range(self._dim):
+                SS += A[..., i, j]*(A[..., i, j] + A[..., j, i])
+        
+        return numpy.sqrt(SS)
@@ -0,0 +1,111 @@
+"""
+Compiled kernels of the stencil engine for the interior points of the explicit finite difference schemes. The kernels
+are only available if Numba can be imported. Each kernel evaluates the whole central stencil at a point in registers
+and writes the result once, with a parallel loop over the lines of the data that are normal to the derivative.
+"""
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+available = numba is not None
+
+
+if available:
+
+    @numba.njit(parallel=True, cache=True)
+    def _centralAxis0(data, der, weights, g, sign, accumulate, start, i0, i1):
+        n1 = data.shape[1]
+        n2 = data.shape[2]
+
+        for jk in numba.prange(n1*n2):
+            j = jk % n1
+            k = jk // n1
+
+            for i in range(i0, i1):
+                value = weights[0]*data[i, j, k]
+                for m in range(1, g+1):
+                    value += weights[m]*(data[i+m, j, k] + sign*data[i-m, j, k])
+
+                if accumulate:
+                    der[i-start, j, k] += value
+                else:
+                    der[i-start, j, k] = value
+
+
+    @numba.njit(parallel=True, cache=True)
+    def _centralAxis1(data, der, weights, g, sign, accumulate, start, i0, i1):
+        n0 = data.shape[0]
+        n2 = data.shape[2]
+        nj = i1 - i0
+
+        for jk in numba.prange(nj*n2):
+            j = i0 + jk % nj
+            k = jk // nj
+
+            for i in range(n0):
+                value = weights[0]*data[i, j, k]
+                for m in range(1, g+1):
+                    value += weights[m]*(data[i, j+m, k] + sign*data[i, j-m, k])
+
+                if accumulate:
+                    der[i, j-start, k] += value
+                else:
+                    der[i, j-start, k] = value
+
+
+    @numba.njit(parallel=True, cache=True)
+    def _centralAxis2(data, der, weights, g, sign, accumulate, start, i0, i1):
+        n0 = data.shape[0]
+        n1 = data.shape[1]
+        nk = i1 - i0
+
+        for jk in numba.prange(n1*nk):
+            j = jk % n1
+            k = i0 + jk // n1
+
+            for i in range(n0):
+                value = weights[0]*data[i, j, k]
+                for m in range(1, g+1):
+                    value += weights[m]*(data[i, j, k+m] + sign*data[i, j, k-m])
+
+                if accumulate:
+                    der[i, j, k-start] += value
+                else:
+                    der[i, j, k-start] = value
+
+
+    _kernels = (_centralAxis0, _centralAxis1, _centralAxis2)
+
+
+def applyCentral(data, der, weights, sign, axis, accumulate, start, i0, i1):
+    """
+    Apply a central stencil at the points i0, ..., i1-1 along an axis with a compiled kernel.
+
+    data : numpy array with the data
+    der : numpy array to store the derivative. It has the shape of data except along axis, where it starts at the
+          point start
+    weights : numpy array with the scaled coefficients of the stencil at the offsets 0, 1, ..., g
+    sign : 1.0 for a symmetric stencil and -1.0 for an antisymmetric stencil
+    axis : axis of the derivative
+    accumulate : boolean to decide whether to add the derivative to der instead of overwriting it
+    """
+
+    if not available:
+        raise RuntimeError('Numba is not available!')
+
+    ndim = data.ndim
+
+    # The kernels loop over the first axis innermost, so arrays with the last axis varying fastest are transposed.
+
+    if ndim > 1 and data.strides[0] > data.strides[-1]:
+        data = data.T
+        der = der.T
+        axis = ndim - 1 - axis
+
+    # Unit axes are appended to get three-dimensional views.
+
+    index = (Ellipsis,) + (None,)*(3 - ndim)
+
+    _kernels[axis](data[index], der[index], weights, weights.shape[0] - 1, sign, accumulate, start, i0, i1)
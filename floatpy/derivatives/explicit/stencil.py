@@ -0,0 +1,415 @@
+"""
+Stencil engine for computing first and second order derivatives with explicit finite differencing of any even order of
+accuracy. The coefficients of the central and one-sided stencils are derived exactly with the algorithm of Fornberg
+(Fornberg, Math. Comp. 51 (184), 1988) and the stencils are applied with strided slices of the data ('numpy' backend)
+or with the compiled kernels of the numba_kernels module ('numba' backend).
+"""
+
+from fractions import Fraction
+import numpy
+
+import numba_kernels
+
+BACKENDS = ('numpy', 'numba')
+
+def getBackend(backend):
+    """
+    Return the name of the backend to use for the requested backend. 'auto' is the 'numba' backend if Numba is
+    available and the 'numpy' backend otherwise.
+    """
+
+    if backend == 'auto':
+        return 'numba' if numba_kernels.available else 'numpy'
+
+    if backend not in BACKENDS:
+        raise RuntimeError("Unknown backend '%s'! Backend can only be 'numpy', 'numba' or 'auto'." % backend)
+
+    if backend == 'numba' and not numba_kernels.available:
+        raise RuntimeError("The 'numba' backend needs Numba, which cannot be imported!")
+
+    return backend
+
+
+def computeFornbergWeights(offsets, x0, max_derivative_order):
+    """
+    Compute the weights of the finite difference approximations of all the derivatives up to max_derivative_order at
+    x0 with the values at the points in offsets. The weights are computed in exact rational arithmetic and are returned
+    as a list over the derivative orders of lists over the points of fractions.Fraction objects.
+
+    offsets : iterable of distinct integers (or fractions) with the locations of the points of the stencil
+    x0 : location where the derivatives are approximated
+    max_derivative_order : highest order of the derivatives
+    """
+
+    x = [ Fraction(offset) for offset in offsets ]
+    x0 = Fraction(x0)
+    n = len(x)
+    m = max_derivative_order
+
+    if len(set(x)) != n:
+        raise RuntimeError('Points of the stencil are not distinct!')
+
+    if n < m + 1:
+        raise RuntimeError('Stencil with %d points is too small for derivatives of order %d!' % (n, m))
+
+    c = [ [ Fraction(0) ]*n for k in range(m+1) ]
+    c[0][0] = Fraction(1)
+
+    c1 = Fraction(1)
+    c4 = x[0] - x0
+
+    for i in range(1, n):
+        mn = min(i, m)
+        c2 = Fraction(1)
+        c5 = c4
+        c4 = x[i] - x0
+
+        for j in range(i):
+            c3 = x[i] - x[j]
+            c2 = c2*c3
+
+            if j == i - 1:
+                for k in range(mn, 0, -1):
+                    c[k][i] = c1*(k*c[k-1][i-1] - c5*c[k][i-1])/c2
+                c[0][i] = -c1*c5*c[0][i-1]/c2
+
+            for k in range(mn, 0, -1):
+                c[k][j] = (c4*c[k][j] - k*c[k-1][j])/c3
+            c[0][j] = c4*c[0][j]/c3
+
+        c1 = c2
+
+    return c
+
+
+class ExplicitStencil(object):
+    """
+    Class holding the coefficients of the explicit finite difference scheme of a derivative with a given order of
+    accuracy. The central stencil has order//2 points on each side. The one-sided stencils at the order//2 points
+    closest to each boundary have order + derivative_order points.
+    """
+
+    def __init__(self, derivative_order, order):
+        """
+        Constructor of the class.
+
+        derivative_order : order of the derivative (1 or 2)
+        order : order of accuracy of the scheme. It has to be an even integer not smaller than 2
+        """
+
+        if derivative_order not in (1, 2):
+            raise RuntimeError('Only first and second order derivatives are supported!')
+
+        if int(order) != order or order < 2 or order % 2 != 0:
+            raise RuntimeError('Order of accuracy has to be an even integer not smaller than 2!')
+
+        self._derivative_order = derivative_order
+        self._order = int(order)
+        self._num_ghosts = self._order//2
+
+        g = self._num_ghosts
+
+        # Coefficients of the central stencil at the offsets 0, 1, ..., g. The stencil is antisymmetric for the first
+        # derivative and symmetric for the second derivative.
+
+        central = computeFornbergWeights(range(-g, g+1), 0, derivative_order)[derivative_order]
+        self._central = numpy.array([ float(w) for w in central[g:] ])
+
+        # Coefficients of the one-sided stencils at the points 0, 1, ..., g-1 from the left boundary and at the points
+        # -1, -2, ..., -g from the right boundary.
+
+        self._width = self._order + derivative_order
+
+        self._left = []
+        self._right = []
+        for i in range(g):
+            weights = computeFornbergWeights(range(self._width), i, derivative_order)[derivative_order]
+            self._left.append(numpy.array([ float(w) for w in weights ]))
+
+            weights = computeFornbergWeights(range(self._width), self._width - 1 - i, derivative_order)[derivative_order]
+            self._right.append(numpy.array([ float(w) for w in weights ]))
+
+
+    @property
+    def derivative_order(self):
+        """
+        Return the order of the derivative.
+        """
+
+        return self._derivative_order
+
+
+    @property
+    def order(self):
+        """
+        Return the order of accuracy of the scheme.
+        """
+
+        return self._order
+
+
+    @property
+    def num_ghosts(self):
+        """
+        Return the number of ghost cells needed by the central stencil on each side.
+        """
+
+        return self._num_ghosts
+
+
+    @property
+    def central_coefficients(self):
+        """
+        Return the coefficients of the central stencil at the offsets 0, 1, ..., num_ghosts for a unit grid spacing.
+        """
+
+        return self._central.copy()
+
+
+    @property
+    def boundary_coefficients(self):
+        """
+        Return two lists with the coefficients of the one-sided stencils at the num_ghosts points closest to the left
+        and to the right boundaries for a unit grid spacing.
+        """
+
+        return [ w.copy() for w in self._left ], [ w.copy() for w in self._right ]
+
+
+    def checkSize(self, n, use_one_sided):
+        """
+        Raise a RuntimeError if a direction with n points is too small for the stencils.
+        """
+
+        if n < 2*self._num_ghosts + 1 or (use_one_sided and n < self._width):
+            raise RuntimeError('Data with %d points in the direction is not large enough for the stencil!' % n)
+
+
+    def apply(self, data, der, dx, axis, use_one_sided=False, accumulate=False, factor=1.0, start=0, stop=None, \
+              backend='numpy'):
+        """
+        Compute the derivative of data along an axis and store it in der. With the 'numpy' backend, the interior points
+        are computed with one multiply-add of a strided slice of data per pair of points of the central stencil,
+        directly in der. The
+        num_ghosts points at each boundary are computed with the one-sided stencils if use_one_sided is True and are
+        set to NaN otherwise.
+
+        data : numpy array with the data
+        der : numpy array to store the derivative. It has the shape of data except along axis, where it has the
+              stop - start points of the range of the derivative. It cannot share memory with data
+        dx : grid spacing
+        axis : axis of the derivative
+        use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
+        accumulate : boolean to decide whether to add the derivative to der instead of overwriting it
+        factor : factor multiplying the derivative
+        start, stop : range of the points along axis where the derivative is computed. stop is the number of points
+                      of data along axis if it is None
+        backend : 'numpy' to apply the central stencil with strided slices or 'numba' to apply it with a compiled
+                  parallel kernel
+        """
+
+        n = data.shape[axis]
+        g = self._num_ghosts
+
+        if stop is None:
+            stop = n
+
+        self.checkSize(n, use_one_sided)
+
+        def section(lo, hi):
+            index = [slice(None)]*data.ndim
+            index[axis] = slice(lo, hi)
+            return tuple(index)
+
+        scale = factor/dx**self._derivative_order
+
+        # Interior points of the range. The first term is computed directly in der unless the derivative is
+        # accumulated and the others in a single work array.
+
+        i0 = max(start, g)
+        i1 = min(stop, n - g)
+
+        if i1 > i0 and backend == 'numba':
+            sign = -1.0 if self._derivative_order == 1 else 1.0
+            numba_kernels.applyCentral(data, der, scale*self._central, sign, axis, accumulate, start, i0, i1)
+
+        elif i1 > i0:
+            der_interior = der[section(i0 - start, i1 - start)]
+
+            work = None
+            first_term = not accumulate
+
+            for k in range(0, g+1):
+                if self._central[k] == 0.0:
+                    continue
+
+                if first_term:
+                    term = der_interior
+                else:
+                    if work is None:
+                        work = numpy.empty_like(der_interior)
+                    term = work
+
+                if k == 0:
+                    numpy.multiply(data[section(i0, i1)], scale*self._central[0], out=term)
+                else:
+                    if self._derivative_order == 1:
+                        numpy.subtract(data[section(i0+k, i1+k)], data[section(i0-k, i1-k)], out=term)
+                    else:
+                        numpy.add(data[section(i0+k, i1+k)], data[section(i0-k, i1-k)], out=term)
+
+                    term *= scale*self._central[k]
+
+                if not first_term:
+                    der_interior += term
+                first_term = False
+
+        # Boundary points of the range.
+
+        for i in range(g):
+            for point, weights, offset in ((i, self._left[i], 0), (n-1-i, self._right[i], n - self._width)):
+                if point < start or point >= stop:
+                    continue
+
+                der_plane = der[section(point - start, point - start + 1)]
+
+                if use_one_sided:
+                    self._applyOneSided(data, der_plane, scale*weights, section, offset, accumulate)
+                else:
+                    der_plane[...] = numpy.nan
+
+
+    def _applyOneSided(self, data, der_plane, weights, section, offset, accumulate):
+        """
+        Compute the derivative on a boundary plane, kept as a slice of width one, with a one-sided stencil starting at
+        the point offset.
+        """
+
+        if accumulate:
+            der_plane += weights[0]*data[section(offset, offset+1)]
+        else:
+            numpy.multiply(data[section(offset, offset+1)], weights[0], out=der_plane)
+
+        for j in range(1, weights.shape[0]):
+            der_plane += weights[j]*data[section(offset+j, offset+j+1)]
+
+
+def applyBlocked(operations, block_axis, block_size, use_one_sided=False, backend='numpy'):
+    """
+    Apply several stencils in a single pass over blocks of planes normal to block_axis. All the stencils of a block
+    are applied before moving to the next block, so the data of the block is still in cache when it is read by the
+    stencils in the other directions and the outputs are accumulated in place without full-size temporaries.
+
+    operations : list of tuples (stencil, data, der, dx, axis, accumulate, factor) with the arguments of
+                 ExplicitStencil.apply for each stencil. The data and der arrays of all the operations have the same
+                 shape. The operations are applied in order in each block, so the first operation on an output should
+                 not accumulate
+    block_axis : axis normal to the planes of the blocks. It should be the slowest varying axis of the arrays
+    block_size : size in bytes of the part of the arrays of all the operations in a block. 0 uses a single block
+    use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
+    backend : backend of ExplicitStencil.apply
+    """
+
+    n = operations[0][1].shape[block_axis]
+
+    bytes_per_plane = 0
+    for operation in operations:
+        bytes_per_plane += (operation[1].nbytes + operation[2].nbytes)//max(n, 1)
+
+    if block_size > 0 and bytes_per_plane > 0:
+        planes_per_block = max(1, block_size//bytes_per_plane)
+    else:
+        planes_per_block = n
+
+    def section(ndim, lo, hi):
+        index = [slice(None)]*ndim
+        index[block_axis] = slice(lo, hi)
+        return tuple(index)
+
+    for k0 in range(0, n, planes_per_block):
+        k1 = min(n, k0 + planes_per_block)
+
+        for stencil, data, der, dx, axis, accumulate, factor in operations:
+            block = section(data.ndim, k0, k1)
+
+            if axis == block_axis:
+                stencil.apply(data, der[block], dx, axis, use_one_sided, accumulate, factor, start=k0, stop=k1, \
+                              backend=backend)
+            else:
+                stencil.apply(data[block], der[block], dx, axis, use_one_sided, accumulate, factor, backend=backend)
+
+
+_stencils = {}
+
+def getStencil(derivative_order, order):
+    """
+    Return the stencil of the given derivative and order of accuracy. The stencils are only derived once per process.
+    """
+
+    key = (derivative_order, order)
+    if key not in _stencils:
+        _stencils[key] = ExplicitStencil(derivative_order, order)
+
+    return _stencils[key]
+
+
+def differentiate(data, dx, derivative_order, order, direction, component_idx, use_one_sided, dimension, data_order, \
+                  der=None, backend='numpy'):
+    """
+    Compute the derivative of data in a direction with explicit finite differencing of the given order of accuracy.
+    Returns der, which is allocated in the data order if it is None.
+
+    data : numpy array with the data
+    dx : grid spacing in the direction
+    derivative_order : order of the derivative (1 or 2)
+    order : order of accuracy of the scheme
+    direction : direction of the derivative
+    component_idx : index of component in data for taking derivative. None if there is only one component in the data
+    use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
+    dimension : dimension of the problem
+    data_order : a string {'F', 'C'} describing whether the data is in Fortran or C contiguous layout. The component
+                 index is the first index of C ordered data and the last index of Fortran ordered data
+    der : optional numpy array to store the derivative
+    backend : backend of ExplicitStencil.apply
+    """
+
+    # Check whether the direction is valid.
+
+    if direction < 0 or direction > 2:
+        raise RuntimeError('Direction < 0 or > 2 is invalid!')
+
+    if direction >= dimension:
+        raise IOError('There is no direction %d in data with %d dimensions!' % (direction, dimension))
+
+    # Check whether the shape of data is valid and get the component's data.
+
+    if component_idx is None:
+        if data.ndim < 1 or data.ndim > 3:
+            raise RuntimeError('Shape of data is invalid!')
+
+        data_component = data
+
+    else:
+        if data.ndim < 2 or data.ndim > 4:
+            raise RuntimeError('Shape of data is invalid!')
+
+        if data_order == 'C':
+            if component_idx >= data.shape[0] or component_idx < 0:
+                raise RuntimeError('Component index is invalid!')
+
+            data_component = data[component_idx, ...]
+
+        else:
+            if component_idx >= data.shape[-1] or component_idx < 0:
+                raise RuntimeError('Component index is invalid!')
+
+            data_component = data[..., component_idx]
+
+    if der is None:
+        der = numpy.empty(data_component.shape, dtype=numpy.float64, order=data_order)
+    elif der.shape != data_component.shape:
+        raise RuntimeError('Make sure shape of der is consistent with that of data!')
+
+    getStencil(derivative_order, order).apply(data_component, der, dx, direction, use_one_sided, backend=backend)
+
+    return der
@@ -1,22 +1,27 @@
 import numpy
 
-import explicit.first as first_der
-import explicit.second as second_der
+import explicit.stencil as stencil
 
 class ExplicitDifferentiator(object):
     """
-    Class to perform derivatives with explicit finite difference schemes.
+    Class to perform derivatives with explicit finite difference schemes. The coefficients of the schemes are derived
+    for any even order of accuracy at construction and the derivatives are written directly into the output arrays.
     """
     
-    def __init__(self, grid_spacing, order, dimension=3, data_order='F'):
+    def __init__(self, grid_spacing, order, dimension=3, data_order='F', block_size=262144, backend='auto'):
         """
         Constructor of the class.
         
         grid_spacing : iterable of floats for the grid spacing in each direction
-        order : integer iterable with each value in {2, 4, 6} representing the order of accuracy of the derivatives
-                in each direction
+        order : integer iterable with each value an even integer not smaller than 2 (e.g. 2, 4, 6, 8 or 10)
+                representing the order of accuracy of the derivatives in each direction
         dimension : dimension of problem
         data_order : a string {'F', 'C'} describing whether the data is in Fortran or C contiguous layout
+        block_size : size in bytes of the blocks of planes over which the gradient, divergence, curl and laplacian apply
+                     the stencils of all the directions in a single pass. 0 uses a single block
+        backend : a string {'numpy', 'numba', 'auto'} for the implementation of the stencils. 'numpy' uses strided
+                  slices of the data and 'numba' uses compiled kernels with parallel loops over the lines of the data.
+                  'auto' uses 'numba' if Numba can be imported and 'numpy' otherwise
         """
         
         if dimension < 1 or dimension > 3:
@@ -31,8 +36,8 @@ class ExplicitDifferentiator(object):
             raise RuntimeError("Size of 'order' is smaller than problem dimension!")
         
         for i in range(self._dim):
-            if order[i] not in [2, 4, 6]:
-                raise RuntimeError("order[%d] has to be one of {2, 4, 6}" %i)
+            if int(order[i]) != order[i] or order[i] < 2 or order[i] % 2 != 0:
+                raise RuntimeError("order[%d] has to be an even integer not smaller than 2" %i)
         
         self._order = tuple(order)
         
@@ -42,10 +47,20 @@ class ExplicitDifferentiator(object):
         if self._dim > 2:
             self._dz = grid_spacing[2]
         
+        self._grid_spacing = tuple(grid_spacing[0:self._dim])
+        
         if data_order != 'C' and data_order != 'F':
             raise RuntimeError("Invalid data order! Data order can only be 'C' or 'F'.")
         
         self._data_order = data_order
+        
+        # Stencils of the first and second derivatives in each direction.
+        self._stencils = [ [ stencil.getStencil(derivative_order, self._order[i]) for i in range(self._dim) ] \
+                           for derivative_order in (1, 2) ]
+        
+        self.block_size = block_size
+        
+        self._backend = stencil.getBackend(backend)
     
     
     def getNumberOfGhostCells(self):
@@ -53,32 +68,7 @@ class ExplicitDifferentiator(object):
         Determine the number of ghost cells needed for the chosen explicit finite difference scheme.
         """
         
-        n_ghosts = numpy.empty(self._dim, dtype=numpy.int32)
-        
-        if self._order[0] == 2:
-            n_ghosts[0] = 1
-        elif self._order[0] == 4:
-            n_ghosts[0] = 2
-        elif self._order[0] == 6:
-            n_ghosts[0] = 3
-        
-        if self._dim > 1:
-            if self._order[1] == 2:
-                n_ghosts[1] = 1
-            elif self._order[1] == 4:
-                n_ghosts[1] = 2
-            elif self._order[1] == 6:
-                n_ghosts[1] = 3
-        
-        if self._dim > 2:
-            if self._order[2] == 2:
-                n_ghosts[2] = 1
-            elif self._order[2] == 4:
-                n_ghosts[2] = 2
-            elif self._order[2] == 6:
-                n_ghosts[2] = 3
-        
-        return n_ghosts
+        return numpy.array([ self._stencils[0][i].num_ghosts for i in range(self._dim) ], dtype=numpy.int32)
     
     
     @property
@@ -90,6 +80,67 @@ class ExplicitDifferentiator(object):
         return self.getNumberOfGhostCells()
     
     
+    @property
+    def backend(self):
+        """
+        Return the name of the backend used for the stencils ('numpy' or 'numba').
+        """
+        
+        return self._backend
+    
+    
+    @property
+    def block_size(self):
+        """
+        Return the size in bytes of the blocks of planes used by the fused multi-direction operators.
+        """
+        
+        return self._block_size
+    
+    
+    @block_size.setter
+    def block_size(self, block_size):
+        """
+        Set the size in bytes of the blocks of planes used by the fused multi-direction operators. The planes normal to
+        the slowest varying direction are processed in blocks of about this size so that the data read by the stencil
+        of one direction is still in cache for the others. 0 uses a single block. The results do not depend on this
+        value.
+        """
+        
+        if block_size < 0:
+            raise RuntimeError("Block size cannot be negative!")
+        
+        self._block_size = int(block_size)
+    
+    
+    def _differentiate(self, derivative_order, direction, data, der, component_idx, use_one_sided):
+        """
+        Compute a derivative of data in a direction into der. Returns der if der is None and None otherwise.
+        """
+        
+        data_shape = data.shape
+        
+        if component_idx is not None:
+            if self._data_order == 'C':
+                data_shape = data_shape[1:]
+            else:
+                data_shape = data_shape[0:-1]
+        
+        if len(data_shape) != self._dim:
+            raise RuntimeError("Make sure data is %dD!" % self._dim)
+        
+        if direction >= self._dim:
+            raise RuntimeError("There is no direction %d in %dD data!" % (direction, self._dim))
+        
+        return_der = der is None
+        
+        der = stencil.differentiate(data, self._grid_spacing[direction], derivative_order, self._order[direction], \
+            direction, component_idx, use_one_sided, self._dim, self._data_order, der=der, backend=self._backend)
+        
+        if return_der:
+            return der
+    
+    
     def ddx(self, data, der=None, component_idx=None, use_one_sided=False):
         """
         Method to compute the first order derivative of data in first direction.
@@ -102,43 +153,7 @@ class ExplicitDifferentiator(object):
         use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
         """
         
-        data_shape = data.shape
-        
-        if component_idx is not None:
-            data_shape = data_shape[0:-1]
-        
-        if self._dim == 1:
-            if len(data_shape) != 1:
-                raise RuntimeError("Make sure data is 1D!")
-        
-        elif self._dim == 2:
-            if len(data_shape) != 2:
-                raise RuntimeError("Make sure data is 2D!")
-        
-        else:
-            if len(data_shape) != 3:
-                raise RuntimeError("Make sure data is 3D!")
-        
-        return_der = True
-        if der is None:
-            der = numpy.empty(data_shape, dtype=numpy.float64, order='F')
-        else:
-            if der.shape != data_shape:
-                raise RuntimeError("Make sure shape of der is consistent with that of data!")
-            return_der = False
-        
-        if self._order[0] == 2:
-            der[[slice(None)]*self._dim] = first_der.differentiateSecondOrderFiniteDifference(\
-                data, self._dx, 0, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[0] == 4:
-            der[[slice(None)]*self._dim] = first_der.differentiateFourthOrderFiniteDifference(\
-                data, self._dx, 0, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[0] == 6:
-            der[[slice(None)]*self._dim] = first_der.differentiateSixthOrderFiniteDifference(\
-                data, self._dx, 0, component_idx, use_one_sided, self._dim, self._data_order)
-        
-        if return_der:
-            return der
+        return self._differentiate(1, 0, data, der, component_idx, use_one_sided)
     
     
     def ddy(self, data, der=None, component_idx=None, use_one_sided=False):
@@ -153,43 +168,7 @@ class ExplicitDifferentiator(object):
         use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
         """
         
-        data_shape = data.shape
-        
-        if component_idx is not None:
-            data_shape = data_shape[0:-1]
-        
-        if self._dim == 1:
-            if len(data_shape) != 1:
-                raise RuntimeError("Make sure data is 1D!")
-        
-        elif self._dim == 2:
-            if len(data_shape) != 2:
-                raise RuntimeError("Make sure data is 2D!")
-        
-        else:
-            if len(data_shape) != 3:
-                raise RuntimeError("Make sure data is 3D!")
-        
-        return_der = True
-        if der is None:
-            der = numpy.empty(data_shape, dtype=numpy.float64, order='F')
-        else:
-            if der.shape != data_shape:
-                raise RuntimeError("Make sure shape of der is consistent with that of data!")
-            return_der = False
-        
-        if self._order[1] == 2:
-            der[[slice(None)]*self._dim] = first_der.differentiateSecondOrderFiniteDifference(\
-                data, self._dy, 1, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[1] == 4:
-            der[[slice(None)]*self._dim] = first_der.differentiateFourthOrderFiniteDifference(\
-                data, self._dy, 1, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[1] == 6:
-            der[[slice(None)]*self._dim] = first_der.differentiateSixthOrderFiniteDifference(\
-                data, self._dy, 1, component_idx, use_one_sided, self._dim, self._data_order)
-        
-        if return_der:
-            return der
+        return self._differentiate(1, 1, data, der, component_idx, use_one_sided)
     
     
     def ddz(self, data, der=None, component_idx=None, use_one_sided=False):
@@ -204,43 +183,7 @@ class ExplicitDifferentiator(object):
         use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
         """
         
-        data_shape = data.shape
-        
-        if component_idx is not None:
-            data_shape = data_shape[0:-1]
-        
-        if self._dim == 1:
-            if len(data_shape) != 1:
-                raise RuntimeError("Make sure data is 1D!")
-        
-        elif self._dim == 2:
-            if len(data_shape) != 2:
-                raise RuntimeError("Make sure data is 2D!")
-        
-        else:
-            if len(data_shape) != 3:
-                raise RuntimeError("Make sure data is 3D!")
-        
-        return_der = True
-        if der is None:
-            der = numpy.empty(data_shape, dtype=numpy.float64, order='F')
-        else:
-            if der.shape != data_shape:
-                raise RuntimeError("Make sure shape of der is consistent with that of data!")
-            return_der = False
-        
-        if self._order[2] == 2:
-            der[[slice(None)]*self._dim] = first_der.differentiateSecondOrderFiniteDifference(\
-                data, self._dz, 2, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[2] == 4:
-            der[[slice(None)]*self._dim] = first_der.differentiateFourthOrderFiniteDifference(\
-                data, self._dz, 2, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[2] == 6:
-            der[[slice(None)]*self._dim] = first_der.differentiateSixthOrderFiniteDifference(\
-                data, self._dz, 2, component_idx, use_one_sided, self._dim, self._data_order)
-        
-        if return_der:
-            return der
+        return self._differentiate(1, 2, data, der, component_idx, use_one_sided)
     
     
     def d2dx2(self, data, der=None, component_idx=None, use_one_sided=False):
@@ -255,43 +198,7 @@ class ExplicitDifferentiator(object):
         use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
         """
         
-        data_shape = data.shape
-        
-        if component_idx is not None:
-            data_shape = data_shape[0:-1]
-        
-        if self._dim == 1:
-            if len(data_shape) != 1:
-                raise RuntimeError("Make sure data is 1D!")
-        
-        elif self._dim == 2:
-            if len(data_shape) != 2:
-                raise RuntimeError("Make sure data is 2D!")
-        
-        else:
-            if len(data_shape) != 3:
-                raise RuntimeError("Make sure data is 3D!")
-        
-        return_der = True
-        if der is None:
-            der = numpy.empty(data_shape, dtype=numpy.float64, order='F')
-        else:
-            if der.shape != data_shape:
-                raise RuntimeError("Make sure shape of der is consistent with that of data!")
-            return_der = False
-        
-        if self._order[0] == 2:
-            der[[slice(None)]*self._dim] = second_der.differentiateSecondOrderFiniteDifference(\
-                data, self._dx, 0, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[0] == 4:
-            der[[slice(None)]*self._dim] = second_der.differentiateFourthOrderFiniteDifference(\
-                data, self._dx, 0, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[0] == 6:
-            der[[slice(None)]*self._dim] = second_der.differentiateSixthOrderFiniteDifference(\
-                data, self._dx, 0, component_idx, use_one_sided, self._dim, self._data_order)
-        
-        if return_der:
-            return der
+        return self._differentiate(2, 0, data, der, component_idx, use_one_sided)
     
     
     def d2dy2(self, data, der=None, component_idx=None, use_one_sided=False):
@@ -306,43 +213,7 @@ class ExplicitDifferentiator(object):
         use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
         """
         
-        data_shape = data.shape
-        
-        if component_idx is not None:
-            data_shape = data_shape[0:-1]
-        
-        if self._dim == 1:
-            if len(data_shape) != 1:
-                raise RuntimeError("Make sure data is 1D!")
-        
-        elif self._dim == 2:
-            if len(data_shape) != 2:
-                raise RuntimeError("Make sure data is 2D!")
-        
-        else:
-            if len(data_shape) != 3:
-                raise RuntimeError("Make sure data is 3D!")
-        
-        return_der = True
-        if der is None:
-            der = numpy.empty(data_shape, dtype=numpy.float64, order='F')
-        else:
-            if der.shape != data_shape:
-                raise RuntimeError("Make sure shape of der is consistent with that of data!")
-            return_der = False
-        
-        if self._order[1] == 2:
-            der[[slice(None)]*self._dim] = second_der.differentiateSecondOrderFiniteDifference(\
-                data, self._dy, 1, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[1] == 4:
-            der[[slice(None)]*self._dim] = second_der.differentiateFourthOrderFiniteDifference(\
-                data, self._dy, 1, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[1] == 6:
-            der[[slice(None)]*self._dim] = second_der.differentiateSixthOrderFiniteDifference(\
-                data, self._dy, 1, component_idx, use_one_sided, self._dim, self._data_order)
-        
-        if return_der:
-            return der
+        return self._differentiate(2, 1, data, der, component_idx, use_one_sided)
     
     
     def d2dz2(self, data, der=None, component_idx=None, use_one_sided=False):
@@ -357,48 +228,44 @@ class ExplicitDifferentiator(object):
         use_one_sided : boolean to decide whether to use one-sided scheme at the boundaries
         """
         
-        data_shape = data.shape
+        return self._differentiate(2, 2, data, der, component_idx, use_one_sided)
+    
+    
+    def _getComponent(self, data, component_idx):
+        """
+        Return a view of the component of data of the given index and check its dimension.
+        """
         
         if component_idx is not None:
-            data_shape = data_shape[0:-1]
+            if self._data_order == 'C':
+                data = data[component_idx, ...]
+            else:
+                data = data[..., component_idx]
         
-        if self._dim == 1:
-            if len(data_shape) != 1:
-                raise RuntimeError("Make sure data is 1D!")
-        
-        elif self._dim == 2:
-            if len(data_shape) != 2:
-                raise RuntimeError("Make sure data is 2D!")
-        
-        else:
-            if len(data_shape) != 3:
-                raise RuntimeError("Make sure data is 3D!")
-        
-        return_der = True
-        if der is None:
-            der = numpy.empty(data_shape, dtype=numpy.float64, order='F')
-        else:
-            if der.shape != data_shape:
-                raise RuntimeError("Make sure shape of der is consistent with that of data!")
-            return_der = False
-        
-        if self._order[2] == 2:
-            der[[slice(None)]*self._dim] = second_der.differentiateSecondOrderFiniteDifference(\
-                data, self._dz, 2, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[2] == 4:
-            der[[slice(None)]*self._dim] = second_der.differentiateFourthOrderFiniteDifference(\
-                data, self._dz, 2, component_idx, use_one_sided, self._dim, self._data_order)
-        elif self._order[2] == 6:
-            der[[slice(None)]*self._dim] = second_der.differentiateSixthOrderFiniteDifference(\
-                data, self._dz, 2, component_idx, use_one_sided, self._dim, self._data_order)
+        if data.ndim != self._dim:
+            raise RuntimeError("Make sure data is %dD!" % self._dim)
         
-        if return_der:
-            return der
+        return data
+    
+    
+    def _applyFused(self, operations, use_one_sided):
+        """
+        Apply a list of (derivative order, direction, data, der, accumulate, factor) operations in a single pass over
+        blocks of the arrays.
+        """
+        
+        block_axis = self._dim - 1 if self._data_order == 'F' else 0
+        
+        stencil.applyBlocked( [ (self._stencils[derivative_order-1][direction], data, der, \
+                                 self._grid_spacing[direction], direction, accumulate, factor) \
+                                for derivative_order, direction, data, der, accumulate, factor in operations ], \
+                              block_axis, self._block_size, use_one_sided, self._backend )
     
     
     def gradient(self, data, component_idx=None, use_one_sided=False):
         """
-        Method to compute the gradient of data.
+        Method to compute the gradient of data. The derivatives in all the directions are computed in a single pass
+        over blocks of the data.
 
         data : input numpy array in the chosen contiguous layout. This array must be consistent with the problem
                dimension
@@ -409,22 +276,24 @@ class ExplicitDifferentiator(object):
                      the problem dimension
         """
         
-        if self._dim == 1:
-            return self.ddx(data, component_idx=component_idx, use_one_sided=use_one_sided)
+        data_component = self._getComponent(data, component_idx)
+        
+        gradient = [ numpy.empty(data_component.shape, dtype=numpy.float64, order=self._data_order) \
+                     for i in range(self._dim) ]
         
-        elif self._dim == 2:
-            return self.ddx(data, component_idx=component_idx,use_one_sided=use_one_sided), \
-                   self.ddy(data, component_idx=component_idx, use_one_sided=use_one_sided)
+        self._applyFused( [ (1, i, data_component, gradient[i], False, 1.0) for i in range(self._dim) ], \
+                          use_one_sided )
+        
+        if self._dim == 1:
+            return gradient[0]
         
-        else:
-            return self.ddx(data, component_idx=component_idx, use_one_sided=use_one_sided), \
-                   self.ddy(data, component_idx=component_idx, use_one_sided=use_one_sided), \
-                   self.ddz(data, component_idx=component_idx, use_one_sided=use_one_sided)
+        return tuple(gradient)
     
     
     def divergence(self, data, use_one_sided=False):
         """
-        Method to compute the gradient of a vector.
+        Method to compute the gradient of a vector. The derivatives of all the components are accumulated in the
+        output in a single pass over blocks of the data.
 
         data : input numpy array in the chosen contiguous layout. This array must be consistent with the problem
                dimension. The number of components should be as same as the number of dimensions
@@ -444,18 +313,19 @@ class ExplicitDifferentiator(object):
         if self._dim == 3 and len(data_shape) != 4:
             raise RuntimeError("Make sure data is 3D and has enough number of components!")
         
-        divergence = self.ddx(data, component_idx=0, use_one_sided=use_one_sided)
-        if self._dim >= 2:
-            divergence = divergence + self.ddy(data, component_idx=1, use_one_sided=use_one_sided)
-        if self._dim == 3:
-            divergence = divergence + self.ddz(data, component_idx=2, use_one_sided=use_one_sided)
+        components = [ self._getComponent(data, i) for i in range(self._dim) ]
+        
+        divergence = numpy.empty(components[0].shape, dtype=numpy.float64, order=self._data_order)
+        
+        self._applyFused( [ (1, i, components[i], divergence, i > 0, 1.0) for i in range(self._dim) ], use_one_sided )
         
         return divergence
     
     
     def curl(self, data, use_one_sided=False):
         """
-        Method to compute the curl of a vector.
+        Method to compute the curl of a vector. All the components of the curl are computed in a single pass over
+        blocks of the data.
 
         data : input numpy array in the chosen contiguous layout. This array must be consistent with the problem
                dimension. The number of components should be as same as the number of dimensions
@@ -475,43 +345,36 @@ class ExplicitDifferentiator(object):
         if self._dim == 3 and len(data_shape) != 4:
             raise RuntimeError("Make sure data is 3D and has enough number of components!")
         
+        u, v = self._getComponent(data, 0), self._getComponent(data, 1)
+        
         curl = None
         if self._dim == 2:
-            dvdx = self.ddx(data, component_idx=1, use_one_sided=use_one_sided)
-            dudy = self.ddy(data, component_idx=0, use_one_sided=use_one_sided)
+            curl = numpy.empty(u.shape, dtype=numpy.float64, order=self._data_order)
             
-            curl = dvdx - dudy
+            self._applyFused( [ (1, 0, v, curl, False, 1.0), (1, 1, u, curl, True, -1.0) ], use_one_sided )
             
         if self._dim == 3:
-            dvdx = self.ddx(data, component_idx=1, use_one_sided=use_one_sided)
-            dwdx = self.ddx(data, component_idx=2, use_one_sided=use_one_sided)
-            
-            dudy = self.ddy(data, component_idx=0, use_one_sided=use_one_sided)
-            dwdy = self.ddy(data, component_idx=2, use_one_sided=use_one_sided)
-            
-            dudz = self.ddz(data, component_idx=0, use_one_sided=use_one_sided)
-            dvdz = self.ddz(data, component_idx=1, use_one_sided=use_one_sided)
+            w = self._getComponent(data, 2)
             
             if self._data_order == 'C':
                 curl = numpy.empty( (3, data_shape[1], data_shape[2], data_shape[3]), dtype=numpy.float64, order='C' )
-                
-                curl[0, :, :, :] = dwdy - dvdz
-                curl[1, :, :, :] = dudz - dwdx
-                curl[2, :, :, :] = dvdx - dudy
+                curl_x, curl_y, curl_z = curl[0, :, :, :], curl[1, :, :, :], curl[2, :, :, :]
             
             else:
                 curl = numpy.empty( (data_shape[0], data_shape[1], data_shape[2], 3), dtype=numpy.float64, order='F' )
-                
-                curl[:, :, :, 0] = dwdy - dvdz
-                curl[:, :, :, 1] = dudz - dwdx
-                curl[:, :, :, 2] = dvdx - dudy
+                curl_x, curl_y, curl_z = curl[:, :, :, 0], curl[:, :, :, 1], curl[:, :, :, 2]
+            
+            self._applyFused( [ (1, 1, w, curl_x, False, 1.0), (1, 2, v, curl_x, True, -1.0), \
+                                (1, 2, u, curl_y, False, 1.0), (1, 0, w, curl_y, True, -1.0), \
+                                (1, 0, v, curl_z, False, 1.0), (1, 1, u, curl_z, True, -1.0) ], use_one_sided )
         
         return curl
     
     
     def laplacian(self, data, component_idx=None, use_one_sided=False):
         """
-        Method to compute the laplacian of data.
+        Method to compute the laplacian of data. The second derivatives in all the directions are accumulated in the
+        output in a single pass over blocks of the data.
 
         data : input numpy array in the chosen contiguous layout. This array must be consistent with the problem
                dimension
@@ -522,10 +385,10 @@ class ExplicitDifferentiator(object):
                       the problem dimension
         """
         
-        laplacian = self.d2dx2(data, component_idx=component_idx, use_one_sided=use_one_sided)
-        if self._dim >= 2:
-            laplacian = laplacian + self.d2dy2(data, component_idx=component_idx, use_one_sided=use_one_sided)
-        if self._dim == 3:
-            laplacian = laplacian + self.d2dz2(data, component_idx=component_idx, use_one_sided=use_one_sided)
+        data_component = self._getComponent(data, component_idx)
+        
+        laplacian = numpy.empty(data_component.shape, dtype=numpy.float64, order=self._data_order)
+        
+        self._applyFused( [ (2, i, data_component, laplacian, i > 0, 1.0) for i in range(self._dim) ], use_one_sided )
         
         return laplacian
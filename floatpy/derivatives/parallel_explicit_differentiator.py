@@ -0,0 +1,503 @@
+from mpi4py import MPI
+import numpy
+
+import explicit.stencil as stencil
+from floatpy.parallel import t3dmod
+from floatpy.utilities import data_reshaper
+
+class ParallelExplicitDifferentiator(object):
+    """
+    Class to perform derivatives with explicit finite difference schemes on data in the 3D decomposition of a t3d
+    object. The data is copied in a work buffer with the ghost cells of the t3d object and only the halos of the
+    directions that are differentiated are exchanged, so the data can be given without ghost cells.
+    """
+
+    def __init__(self, grid_partition, grid_spacing, order, dimension=3, periodic_dimensions=(False, False, False), \
+                 overlap=False, backend='auto'):
+        """
+        Constructor of the class.
+
+        grid_partition : the grid_partition property (t3d object) of the parallel data reader class. It has to be
+                         constructed with at least order//2 ghost cells in each direction that has neighbors, e.g.
+                         with num_ghosts=num_ghosts in the parallel data reader
+        grid_spacing : iterable of floats for the grid spacing in each direction
+        order : integer iterable with each value an even integer not smaller than 2 representing the order of accuracy
+                of the derivatives in each direction
+        dimension : dimension of problem
+        periodic_dimensions : iterable of boolean descibing whether the periodicity in each direction. The halos are
+                              exchanged across the global boundaries of a periodic direction, which needs a grid
+                              partition that is periodic in that direction. The physical boundaries of the other
+                              directions are treated like the ones of a non-periodic grid partition
+        overlap : boolean to decide whether to overlap the halo exchange with the computation of the points that do
+                  not need the halos. The halos are then exchanged with non-blocking messages instead of the fill_halo
+                  methods of the t3d object
+        backend : a string {'numpy', 'numba', 'auto'} for the implementation of the stencils (see
+                  ExplicitDifferentiator)
+        """
+
+        if not isinstance(grid_partition, t3dmod.t3d):
+            raise RuntimeError("The given grid partition object is not an instance of the t3d class!")
+
+        if dimension < 1 or dimension > 3:
+            raise RuntimeError("Class only works with data with number of dimensions between 1 and 3!")
+
+        self._dim = dimension
+
+        if len(grid_spacing) < self._dim:
+            raise RuntimeError("Size of 'grid_spacing' is smaller than problem dimension!")
+
+        if len(order) < self._dim:
+            raise RuntimeError("Size of 'order' is smaller than problem dimension!")
+
+        if len(periodic_dimensions) < self._dim:
+            raise RuntimeError("Size of 'periodic_dimensions' is smaller than problem dimension!")
+
+        for i in range(self._dim):
+            if int(order[i]) != order[i] or order[i] < 2 or order[i] % 2 != 0:
+                raise RuntimeError("order[%d] has to be an even integer not smaller than 2" %i)
+
+        self._grid_partition = grid_partition
+        self._grid_spacing = tuple(grid_spacing[0:self._dim])
+        self._order = tuple(order[0:self._dim])
+        self._periodic = tuple(periodic_dimensions[0:self._dim])
+        self._overlap = bool(overlap)
+        self._backend = stencil.getBackend(backend)
+
+        self._stencils = [ [ stencil.getStencil(derivative_order, self._order[i]) for i in range(self._dim) ] \
+                           for derivative_order in (1, 2) ]
+
+        self._chunk_3d_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_3d_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_3d_hi   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_sz3d(self._chunk_3d_size)
+        self._grid_partition.get_st3d(self._chunk_3d_lo)
+        self._grid_partition.get_en3d(self._chunk_3d_hi)
+
+        self._chunk_3dg_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_3dg_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_3dg_hi   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_sz3dg(self._chunk_3dg_size)
+        self._grid_partition.get_st3dg(self._chunk_3dg_lo)
+        self._grid_partition.get_en3dg(self._chunk_3dg_hi)
+
+        if self._dim == 1:
+            if self._chunk_3d_size[1] != 1 or \
+               self._chunk_3d_size[2] != 1:
+                raise RuntimeError("Make sure grid_partition is consistent with 1D problem!")
+
+        if self._dim == 2:
+            if self._chunk_3d_size[2] != 1:
+                raise RuntimeError("Make sure grid_partition is consistent with 2D problem!")
+
+        # Interior of the 3D decomposition chunk in the ghosted work buffer.
+        self._interior_lo = self._chunk_3d_lo - self._chunk_3dg_lo
+        self._interior = tuple([ slice(self._interior_lo[i], self._interior_lo[i] + self._chunk_3d_size[i]) \
+                                 for i in range(3) ])
+
+        # Neighbors in each direction from the communicators of the t3d object. A side without a neighbor is a
+        # physical boundary where the one-sided schemes are used. The neighbors across the global boundaries of a
+        # periodic grid partition are dropped in the directions that are not periodic.
+        self._fill_halo = (self._grid_partition.fill_halo_x, self._grid_partition.fill_halo_y, \
+                           self._grid_partition.fill_halo_z)
+
+        self._comms = []
+        self._neighbors = []
+        for i, comm in enumerate((self._grid_partition.commx(), self._grid_partition.commy(), \
+                                  self._grid_partition.commz())):
+            cart = MPI.Cartcomm.f2py(comm)
+            self._comms.append(cart)
+
+            if i >= self._dim:
+                self._neighbors.append((MPI.PROC_NULL, MPI.PROC_NULL))
+                continue
+
+            dims, periods, coords = cart.Get_topo()
+            left, right = cart.Shift(0, 1)
+
+            if self._periodic[i] and not periods[0]:
+                raise RuntimeError("Direction %d is periodic but the grid partition is not!" %i)
+
+            if not self._periodic[i] and periods[0]:
+                if coords[0] == 0:
+                    left = MPI.PROC_NULL
+                if coords[0] == dims[0] - 1:
+                    right = MPI.PROC_NULL
+
+            self._neighbors.append((left, right))
+
+        for i in range(self._dim):
+            num_ghosts = self._stencils[0][i].num_ghosts
+            ghosts = (self._interior_lo[i], self._chunk_3dg_size[i] - self._interior_lo[i] - self._chunk_3d_size[i])
+
+            for side in range(2):
+                if self._neighbors[i][side] != MPI.PROC_NULL and ghosts[side] < num_ghosts:
+                    raise RuntimeError("The grid partition has %d ghost cells in direction %d but the scheme of order "
+                                       "%d needs %d!" % (ghosts[side], i, self._order[i], num_ghosts))
+
+            if self._neighbors[i] != (MPI.PROC_NULL, MPI.PROC_NULL) and self._chunk_3d_size[i] < num_ghosts:
+                raise RuntimeError("The chunk of the 3D decomposition in direction %d is smaller than the number of "
+                                   "ghost cells!" %i)
+
+        # Range of the work buffer in each direction with the interior and the ghost cells of the sides with a
+        # neighbor. The ghost cells at a physical boundary are not used.
+        self._buffer_lo = [ 0 if self._neighbors[i][0] != MPI.PROC_NULL else int(self._interior_lo[i]) \
+                            for i in range(3) ]
+        self._buffer_hi = [ int(self._chunk_3dg_size[i]) if self._neighbors[i][1] != MPI.PROC_NULL else \
+                            int(self._interior_lo[i] + self._chunk_3d_size[i]) for i in range(3) ]
+
+        # Ghosted work buffer shared by all the derivatives.
+        self._buffer = numpy.empty(tuple(self._chunk_3dg_size), dtype=numpy.float64, order='F')
+
+        # MPI datatypes of the halos of the non-blocking exchange. Only the halos of width order//2 in the interior
+        # of the other directions are sent.
+        self._halo_types = [ None ]*3
+        if self._overlap:
+            for i in range(self._dim):
+                self._halo_types[i] = self._createHaloTypes(i)
+
+        self._data_reshaper = data_reshaper.DataReshaper(self._dim, data_order='F')
+
+
+    def __del__(self):
+        """
+        Free the MPI datatypes of the halos.
+        """
+
+        if MPI.Is_finalized():
+            return
+
+        for halo_types in getattr(self, '_halo_types', []):
+            if halo_types is None:
+                continue
+            for datatype in halo_types:
+                if datatype is not None:
+                    datatype.Free()
+
+
+    def _createHaloTypes(self, direction):
+        """
+        Return the subarray datatypes of the halos (received from the left, sent to the left, sent to the right,
+        received from the right) of the work buffer in a direction. The datatype of a side without a neighbor is None.
+        """
+
+        num_ghosts = self._stencils[0][direction].num_ghosts
+        lo = self._interior_lo[direction]
+        n = self._chunk_3d_size[direction]
+
+        starts = [ lo - num_ghosts, lo, lo + n - num_ghosts, lo + n ]
+        has_neighbor = [ self._neighbors[direction][0] != MPI.PROC_NULL ]*2 + \
+                       [ self._neighbors[direction][1] != MPI.PROC_NULL ]*2
+
+        halo_types = []
+        for start, neighbor in zip(starts, has_neighbor):
+            if not neighbor:
+                halo_types.append(None)
+                continue
+
+            subsizes = [ int(s) for s in self._chunk_3d_size ]
+            subsizes[direction] = num_ghosts
+            substarts = [ int(s) for s in self._interior_lo ]
+            substarts[direction] = int(start)
+
+            datatype = MPI.DOUBLE.Create_subarray([ int(s) for s in self._chunk_3dg_size ], subsizes, substarts, \
+                                                  order=MPI.ORDER_FORTRAN)
+            datatype.Commit()
+            halo_types.append(datatype)
+
+        return halo_types
+
+
+    @property
+    def num_ghosts(self):
+        """
+        Return the number of ghost cells needed for the chosen explicit finite difference scheme.
+        """
+
+        return numpy.array([ self._stencils[0][i].num_ghosts for i in range(self._dim) ], dtype=numpy.int32)
+
+
+    @property
+    def overlap(self):
+        """
+        Return whether the halo exchange is overlapped with the computation.
+        """
+
+        return self._overlap
+
+
+    @property
+    def backend(self):
+        """
+        Return the name of the backend used for the stencils ('numpy' or 'numba').
+        """
+
+        return self._backend
+
+
+    def _startHaloExchange(self, direction):
+        """
+        Start the non-blocking exchange of the halos of the work buffer in a direction and return the requests.
+        """
+
+        recv_left, send_left, send_right, recv_right = self._halo_types[direction]
+        left, right = self._neighbors[direction]
+        comm = self._comms[direction]
+
+        requests = []
+        if recv_left is not None:
+            requests.append(comm.Irecv([self._buffer, 1, recv_left], source=left, tag=0))
+        if recv_right is not None:
+            requests.append(comm.Irecv([self._buffer, 1, recv_right], source=right, tag=1))
+        if send_left is not None:
+            requests.append(comm.Isend([self._buffer, 1, send_left], dest=left, tag=1))
+        if send_right is not None:
+            requests.append(comm.Isend([self._buffer, 1, send_right], dest=right, tag=0))
+
+        return requests
+
+
+    def _applyStencil(self, derivative_order, direction, der_3d, accumulate, use_one_sided, box):
+        """
+        Apply the stencil of a direction to the work buffer for the box of interior points given by a list of (start,
+        stop) ranges in each direction and store the result in the same box of der_3d.
+        """
+
+        lo = self._interior_lo
+
+        index = [ slice(lo[i] + box[i][0], lo[i] + box[i][1]) for i in range(3) ]
+        index[direction] = slice(self._buffer_lo[direction], self._buffer_hi[direction])
+        data = self._buffer[tuple(index)]
+
+        index = [ slice(box[i][0], box[i][1]) for i in range(3) ]
+
+        start, stop = box[direction]
+        offset = lo[direction] - self._buffer_lo[direction]
+
+        self._stencils[derivative_order-1][direction].apply(data, der_3d[tuple(index)], self._grid_spacing[direction], \
+            direction, use_one_sided, accumulate, start=offset+start, stop=offset+stop, backend=self._backend)
+
+
+    def _applyTerms(self, terms, der_3d, use_one_sided, box):
+        """
+        Compute the sum of the (derivative order, direction) terms in a box of der_3d.
+        """
+
+        for i in range(3):
+            if box[i][1] <= box[i][0]:
+                return
+
+        for i, (derivative_order, direction) in enumerate(terms):
+            self._applyStencil(derivative_order, direction, der_3d, i > 0, use_one_sided, box)
+
+
+    def _sumDerivatives(self, terms, data_3d, der_3d, use_one_sided):
+        """
+        Compute the sum of the (derivative order, direction) terms of the 3D data in der_3d. The data is copied once in
+        the work buffer and the halos of all the directions are exchanged before or, with overlap, during the
+        computation of the points that do not need them.
+        """
+
+        self._buffer[self._interior] = data_3d
+
+        directions = sorted(set([ direction for derivative_order, direction in terms ]))
+        full = [ (0, int(self._chunk_3d_size[i])) for i in range(3) ]
+
+        if not self._overlap:
+            for direction in directions:
+                self._fill_halo[direction](self._buffer)
+
+            self._applyTerms(terms, der_3d, use_one_sided, full)
+
+            return
+
+        requests = []
+        for direction in directions:
+            requests.extend(self._startHaloExchange(direction))
+
+        # The points at least order//2 away from the chunk boundaries in all the differentiated directions do not need
+        # the halos. The other points are split in non-overlapping slabs along each direction.
+
+        deep = list(full)
+        for direction in directions:
+            g = self._stencils[0][direction].num_ghosts
+            n = full[direction][1]
+            deep[direction] = (min(g, n), max(n - g, min(g, n)))
+
+        self._applyTerms(terms, der_3d, use_one_sided, deep)
+
+        MPI.Request.Waitall(requests)
+
+        for k, direction in enumerate(directions):
+            for layer in ((0, deep[direction][0]), (deep[direction][1], full[direction][1])):
+                box = [ deep[i] if i in directions[0:k] else full[i] for i in range(3) ]
+                box[direction] = layer
+                self._applyTerms(terms, der_3d, use_one_sided, box)
+
+
+    def _differentiate(self, terms, data, der, component_idx, use_one_sided):
+        """
+        Compute the sum of the (derivative order, direction) terms of data. All the components of data are
+        differentiated if component_idx is None and data has one more dimension than the problem.
+        """
+
+        for derivative_order, direction in terms:
+            if direction >= self._dim:
+                raise RuntimeError("There is no derivative in direction %d for %dD problem!" % (direction, self._dim))
+
+        data_shape = data.shape
+
+        num_components = None
+        if component_idx is not None:
+            data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            num_components = data_shape[-1]
+            data_shape = data_shape[0:-1]
+
+        if len(data_shape) != self._dim:
+            raise RuntimeError("Make sure data is %dD!" % self._dim)
+
+        if tuple(data_shape) != tuple(self._chunk_3d_size[0:self._dim]):
+            raise RuntimeError("Make sure data is of the same size as in grid_partition!")
+
+        der_shape = tuple(self._chunk_3d_size[0:self._dim])
+        if num_components is not None:
+            der_shape = der_shape + (num_components,)
+
+        return_der = True
+        if der is None:
+            der = numpy.empty(der_shape, dtype=numpy.float64, order='F')
+        else:
+            if tuple(der.shape) != der_shape:
+                raise RuntimeError("Make sure der is of the same size as data!")
+            return_der = False
+
+        if num_components is None:
+            data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
+            der_3d = self._data_reshaper.reshapeTo3d(der, allow_copy=False)
+            self._sumDerivatives(terms, data_3d, der_3d, use_one_sided)
+        else:
+            for i in range(num_components):
+                data_3d = self._data_reshaper.reshapeTo3d(data, i)
+                der_3d = self._data_reshaper.reshapeTo3d(der, i, allow_copy=False)
+                self._sumDerivatives(terms, data_3d, der_3d, use_one_sided)
+
+        if return_der:
+            return der
+
+
+    def ddx(self, data, der=None, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the first order derivative of data in first direction.
+
+        data : input numpy array in Fortran contiguous layout without ghost cells. This array must be consistent with
+               the 3D decomposition and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        use_one_sided : boolean to decide whether to use one-sided scheme at the physical boundaries
+        """
+
+        return self._differentiate([(1, 0)], data, der, component_idx, use_one_sided)
+
+
+    def ddy(self, data, der=None, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the first order derivative of data in second direction (see ddx).
+        """
+
+        return self._differentiate([(1, 1)], data, der, component_idx, use_one_sided)
+
+
+    def ddz(self, data, der=None, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the first order derivative of data in third direction (see ddx).
+        """
+
+        return self._differentiate([(1, 2)], data, der, component_idx, use_one_sided)
+
+
+    def d2dx2(self, data, der=None, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the second order derivative of data in first direction (see ddx).
+        """
+
+        return self._differentiate([(2, 0)], data, der, component_idx, use_one_sided)
+
+
+    def d2dy2(self, data, der=None, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the second order derivative of data in second direction (see ddx).
+        """
+
+        return self._differentiate([(2, 1)], data, der, component_idx, use_one_sided)
+
+
+    def d2dz2(self, data, der=None, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the second order derivative of data in third direction (see ddx).
+        """
+
+        return self._differentiate([(2, 2)], data, der, component_idx, use_one_sided)
+
+
+    def gradient(self, data, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the gradient of data.
+
+        data : input numpy array in Fortran contiguous layout without ghost cells. This array must be consistent with
+               the 3D decomposition and the problem dimension
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data
+        use_one_sided : boolean to decide whether to use one-sided scheme at the physical boundaries
+        gradient_* : returned output numpy array in Fortran contiguous layout. This array is consistent with the 3D
+                     decomposition and the problem dimension
+        """
+
+        gradient = [ self._differentiate([(1, i)], data, None, component_idx, use_one_sided) \
+                     for i in range(self._dim) ]
+
+        if self._dim == 1:
+            return gradient[0]
+
+        return tuple(gradient)
+
+
+    def divergence(self, data, use_one_sided=False):
+        """
+        Method to compute the divergence of a vector.
+
+        data : input numpy array in Fortran contiguous layout without ghost cells. This array must be consistent with
+               the 3D decomposition and the problem dimension. The number of components should be as same as the
+               number of dimensions
+        use_one_sided : boolean to decide whether to use one-sided scheme at the physical boundaries
+        divergence : output numpy array in Fortran contiguous layout. This array is consistent with the 3D
+                     decomposition and the problem dimension
+        """
+
+        if data.ndim != self._dim + 1 or data.shape[-1] < self._dim:
+            raise RuntimeError("Make sure data is %dD and has enough number of components!" % self._dim)
+
+        divergence = self._differentiate([(1, 0)], data, None, 0, use_one_sided)
+        for i in range(1, self._dim):
+            divergence += self._differentiate([(1, i)], data, None, i, use_one_sided)
+
+        return divergence
+
+
+    def laplacian(self, data, component_idx=None, use_one_sided=False):
+        """
+        Method to compute the laplacian of data. The data is copied once in the work buffer and the second derivatives
+        of all the directions are accumulated in the output.
+
+        data : input numpy array in Fortran contiguous layout without ghost cells. This array must be consistent with
+               the 3D decomposition and the problem dimension
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data
+        use_one_sided : boolean to decide whether to use one-sided scheme at the physical boundaries
+        laplacian : returned output numpy array in Fortran contiguous layout. This array is consistent with the 3D
+                    decomposition and the problem dimension
+        """
+
+        return self._differentiate([ (2, i) for i in range(self._dim) ], data, None, component_idx, use_one_sided)
@@ -0,0 +1,405 @@
+import numpy
+
+from floatpy.parallel import t3dmod
+from floatpy.utilities import data_reshaper
+
+class SpectralDifferentiator(object):
+    """
+    Class to perform derivatives with the Fourier spectral method in periodic directions. The data is transposed into
+    the pencil of each direction with the same t3d decomposition as the compact differentiator and the derivative is
+    computed with real FFTs along the pencil.
+    """
+    
+    def __init__(self, grid_partition, grid_spacing, dimension=3, periodic_dimensions=(True, True, True)):
+        """
+        Constructor of the class.
+        
+        grid_partition : the grid_partition property (t3d object) of the parallel data reader class
+        grid_spacing : iterable with the grid spacing in each direction
+        dimension : dimension of problem
+        periodic_dimensions : iterable of boolean descibing whether the periodicity in each direction. All the
+                              directions of the problem have to be periodic
+        """
+        
+        if not isinstance(grid_partition, t3dmod.t3d):
+            raise RuntimeError("The given grid partition object is not an instance of the t3d class!")
+        
+        if dimension < 1 or dimension > 3:
+            raise RuntimeError("Class only works with data with number of dimensions between 1 and 3!")
+        
+        self._dim = dimension
+        
+        if len(grid_spacing) < self._dim:
+            raise RuntimeError("Size of 'grid_spacing' is smaller than problem dimension!")
+        
+        if len(periodic_dimensions) < self._dim:
+            raise RuntimeError("Size of 'periodic_dimensions' is smaller than problem dimension!")
+        
+        for i in range(self._dim):
+            if not periodic_dimensions[i]:
+                raise RuntimeError("Spectral derivatives are only supported in periodic directions but direction %d is "
+                                   "not periodic!" %i)
+        
+        self._grid_partition = grid_partition
+        
+        self._periodic = tuple(periodic_dimensions)
+        
+        self._chunk_3d_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_3d_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_sz3d(self._chunk_3d_size)
+        self._grid_partition.get_st3d(self._chunk_3d_lo)
+        self._chunk_3d_lo = self._chunk_3d_lo - 1 # Convert to 0 based indexing
+        
+        self._chunk_x_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_x_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_szx(self._chunk_x_size)
+        self._grid_partition.get_stx(self._chunk_x_lo)
+        self._chunk_x_lo = self._chunk_x_lo - 1 # Convert to 0 based indexing
+        
+        self._chunk_y_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_y_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_szy(self._chunk_y_size)
+        self._grid_partition.get_sty(self._chunk_y_lo)
+        self._chunk_y_lo = self._chunk_y_lo - 1 # Convert to 0 based indexing
+        
+        self._chunk_z_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_z_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_szz(self._chunk_z_size)
+        self._grid_partition.get_stz(self._chunk_z_lo)
+        self._chunk_z_lo = self._chunk_z_lo - 1 # Convert to 0 based indexing
+        
+        if self._dim == 1:
+            if self._chunk_3d_size[1] != 1 or \
+               self._chunk_3d_size[2] != 1:
+                raise RuntimeError("Make sure grid_partition is consistent with 1D problem!")
+        
+        if self._dim == 2:
+            if self._chunk_3d_size[2] != 1:
+                raise RuntimeError("Make sure grid_partition is consistent with 2D problem!")
+        
+        self._n = (self._chunk_x_size[0], self._chunk_y_size[1], self._chunk_z_size[2])
+        
+        # A direction is pencil aligned if the 3D decomposition chunk is already the pencil of that direction. The
+        # FFTs in such a direction are taken on the data directly without any transposes.
+        self._pencil_aligned = [ numpy.array_equal(self._chunk_3d_size, chunk_size) and \
+                                 numpy.array_equal(self._chunk_3d_lo, chunk_lo) \
+                                 for chunk_size, chunk_lo in ((self._chunk_x_size, self._chunk_x_lo), \
+                                                              (self._chunk_y_size, self._chunk_y_lo), \
+                                                              (self._chunk_z_size, self._chunk_z_lo)) ]
+        
+        # Precompute the non-negative wavenumbers of the real FFT in each direction and the multipliers of the first
+        # and second derivatives. The multipliers are shaped to broadcast along the pencil axis. The Nyquist mode of
+        # the first derivative is set to zero so that the derivative of real data stays real.
+        self._wavenumbers = [None, None, None]
+        self._multipliers = [None, None, None]
+        
+        for i in range(self._dim):
+            n = self._n[i]
+            k = 2.*numpy.pi/(n*grid_spacing[i])*numpy.arange(n//2 + 1, dtype=numpy.float64)
+            self._wavenumbers[i] = k
+            
+            shape = [1, 1, 1]
+            shape[i] = n//2 + 1
+            
+            ik = 1j*k
+            if n % 2 == 0:
+                ik[-1] = 0.
+            
+            self._multipliers[i] = (ik.reshape(shape), (-k*k).reshape(shape))
+        
+        # Initialize the data reshaper.
+        self._data_reshaper = data_reshaper.DataReshaper(self._dim, data_order='F')
+        
+        # Pencil buffers of the data and derivative in each direction. These are allocated once and reused by all the
+        # derivative methods.
+        self._pencil_buffers = [None, None, None]
+    
+    
+    @property
+    def wavenumbers(self):
+        """
+        Return a tuple with the non-negative wavenumbers of the real FFT in each direction of the problem.
+        """
+        
+        return tuple(self._wavenumbers[0:self._dim])
+    
+    
+    @property
+    def pencil_aligned(self):
+        """
+        Return a tuple telling whether the 3D decomposition is aligned with the pencil of each direction. The
+        derivatives in the aligned directions bypass the transposes.
+        """
+        
+        return tuple(self._pencil_aligned)
+    
+    
+    @property
+    def data_reshaper(self):
+        """
+        Return the data reshaper used by this object. Its counters tell how many reshapes had to copy the data.
+        """
+        
+        return self._data_reshaper
+    
+    
+    def _getPencilBuffers(self, direction):
+        """
+        Return the buffers of the data and derivative in the pencil of the given direction.
+        """
+        
+        if self._pencil_buffers[direction] is None:
+            pencil_size = tuple((self._chunk_x_size, self._chunk_y_size, self._chunk_z_size)[direction])
+            self._pencil_buffers[direction] = (numpy.empty(pencil_size, dtype=numpy.float64, order='F'), \
+                                               numpy.empty(pencil_size, dtype=numpy.float64, order='F'))
+        
+        return self._pencil_buffers[direction]
+    
+    
+    def _getTransposes(self, direction):
+        """
+        Return the transposes to and from the pencil of the given direction.
+        """
+        
+        if direction == 0:
+            return self._grid_partition.transpose_3d_to_x, self._grid_partition.transpose_x_to_3d
+        elif direction == 1:
+            return self._grid_partition.transpose_3d_to_y, self._grid_partition.transpose_y_to_3d
+        
+        return self._grid_partition.transpose_3d_to_z, self._grid_partition.transpose_z_to_3d
+    
+    
+    def _differentiatePencil(self, direction, derivative_order, data_3d, der_3d):
+        """
+        Compute the first or second order derivative in the given direction of the 3D data and store it in der_3d.
+        """
+        
+        transpose_to_pencil, transpose_from_pencil = self._getTransposes(direction)
+        
+        if self._pencil_aligned[direction]:
+            data_pencil = data_3d
+        else:
+            data_pencil, der_pencil = self._getPencilBuffers(direction)
+            transpose_to_pencil(data_3d, data_pencil)
+        
+        data_hat = numpy.fft.rfft(data_pencil, axis=direction)
+        data_hat *= self._multipliers[direction][derivative_order - 1]
+        
+        if self._pencil_aligned[direction]:
+            der_3d[:] = numpy.fft.irfft(data_hat, n=self._n[direction], axis=direction)
+        else:
+            der_pencil[:] = numpy.fft.irfft(data_hat, n=self._n[direction], axis=direction)
+            transpose_from_pencil(der_pencil, der_3d)
+    
+    
+    def _differentiate(self, direction, derivative_order, data, der, component_idx):
+        """
+        Compute the first or second order derivative of data in the given direction. All the components of data are
+        differentiated if component_idx is None and data has one more dimension than the problem.
+        """
+        
+        if direction >= self._dim:
+            raise RuntimeError("There is no derivative in direction %d for %dD problem!" % (direction, self._dim))
+        
+        data_shape = data.shape
+        
+        num_components = None
+        if component_idx is not None:
+            data_shape = data_shape[0:-1]
+        elif len(data_shape) == self._dim + 1:
+            num_components = data_shape[-1]
+            data_shape = data_shape[0:-1]
+        
+        if len(data_shape) != self._dim:
+            raise RuntimeError("Make sure data is %dD!" % self._dim)
+        
+        if tuple(data_shape) != tuple(self._chunk_3d_size[0:self._dim]):
+            raise RuntimeError("Make sure data is of the same size as in grid_partition!")
+        
+        der_shape = tuple(self._chunk_3d_size[0:self._dim])
+        if num_components is not None:
+            der_shape = der_shape + (num_components,)
+        
+        return_der = True
+        if der is None:
+            der = numpy.empty(der_shape, dtype=numpy.float64, order='F')
+        else:
+            if tuple(der.shape) != der_shape:
+                raise RuntimeError("Make sure der is of the same size as data!")
+            return_der = False
+        
+        if num_components is None:
+            data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
+            der_3d = self._data_reshaper.reshapeTo3d(der, allow_copy=False)
+            self._differentiatePencil(direction, derivative_order, data_3d, der_3d)
+        else:
+            for i in range(num_components):
+                data_3d = self._data_reshaper.reshapeTo3d(data, i)
+                der_3d = self._data_reshaper.reshapeTo3d(der, i, allow_copy=False)
+                self._differentiatePencil(direction, derivative_order, data_3d, der_3d)
+        
+        if return_der:
+            return der
+    
+    
+    def ddx(self, data, der=None, component_idx=None):
+        """
+        Method to compute the first order derivative of data in first direction.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        """
+        
+        return self._differentiate(0, 1, data, der, component_idx)
+    
+    
+    def ddy(self, data, der=None, component_idx=None):
+        """
+        Method to compute the first order derivative of data in second direction.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        """
+        
+        return self._differentiate(1, 1, data, der, component_idx)
+    
+    
+    def ddz(self, data, der=None, component_idx=None):
+        """
+        Method to compute the first order derivative of data in third direction.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        """
+        
+        return self._differentiate(2, 1, data, der, component_idx)
+    
+    
+    def d2dx2(self, data, der=None, component_idx=None):
+        """
+        Method to compute the second order derivative of data in first direction.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        """
+        
+        return self._differentiate(0, 2, data, der, component_idx)
+    
+    
+    def d2dy2(self, data, der=None, component_idx=None):
+        """
+        Method to compute the second order derivative of data in second direction.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        """
+        
+        return self._differentiate(1, 2, data, der, component_idx)
+    
+    
+    def d2dz2(self, data, der=None, component_idx=None):
+        """
+        Method to compute the second order derivative of data in third direction.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        der : optional output numpy array in Fortran contiguous layout. This array must be consistent with the 3D
+              decomposition and the problem dimension. This method will return der if der is None
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data or to take the derivatives of all the components. In the latter case der has the same
+                        number of components as data
+        """
+        
+        return self._differentiate(2, 2, data, der, component_idx)
+    
+    
+    def gradient(self, data, component_idx=None):
+        """
+        Method to compute the gradient of data.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data
+        gradient_* : returned output numpy array in Fortran contiguous layout. This array must be consistent with the
+                     3D decomposition and the problem dimension
+        """
+        
+        if self._dim == 1:
+            return self.ddx(data, component_idx=component_idx)
+        
+        elif self._dim == 2:
+            return self.ddx(data, component_idx=component_idx), \
+                   self.ddy(data, component_idx=component_idx)
+        
+        else:
+            return self.ddx(data, component_idx=component_idx), \
+                   self.ddy(data, component_idx=component_idx), \
+                   self.ddz(data, component_idx=component_idx)
+    
+    
+    def divergence(self, data):
+        """
+        Method to compute the divergence of a vector.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension. The number of components should be as same as the number of dimensions
+        divergence : output numpy array in Fortran contiguous layout. This array is in the 3D decomposition
+        """
+        
+        if len(data.shape) != self._dim + 1 or data.shape[-1] != self._dim:
+            raise RuntimeError("Make sure data is %dD and has enough number of components!" % self._dim)
+        
+        divergence = self.ddx(data, component_idx=0)
+        if self._dim >= 2:
+            divergence = divergence + self.ddy(data, component_idx=1)
+        if self._dim == 3:
+            divergence = divergence + self.ddz(data, component_idx=2)
+        
+        return divergence
+    
+    
+    def laplacian(self, data, component_idx=None):
+        """
+        Method to compute the laplacian of data.
+        
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        component_idx : index of component in data for taking derivative. None if there is only one component in the
+                        data
+        laplacian : returned output numpy array in Fortran contiguous layout. This array must be consistent with the
+                    3D decomposition and the problem dimension
+        """
+        
+        laplacian = self.d2dx2(data, component_idx=component_idx)
+        if self._dim >= 2:
+            laplacian = laplacian + self.d2dy2(data, component_idx=component_idx)
+        if self._dim == 3:
+            laplacian = laplacian + self.d2dz2(data, component_idx=component_idx)
+        
+        return laplacian
@@ -30,6 +30,20 @@ subroutine f90wrap_destroy(this)
     deallocate(this_ptr%p)
 end subroutine f90wrap_destroy
 
+subroutine f90wrap_set_num_threads(this, nthreads_)
+    use gaussianstuff, only: set_num_threads, gaussian
+    implicit none
+    
+    type gaussian_ptr_type
+        type(gaussian), pointer :: p => NULL()
+    end type gaussian_ptr_type
+    type(gaussian_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    integer, intent(in) :: nthreads_
+    this_ptr = transfer(this, this_ptr)
+    call set_num_threads(this=this_ptr%p, nthreads_=nthreads_)
+end subroutine f90wrap_set_num_threads
+
 subroutine f90wrap_filter1(this, f, fil, nb, nc, bc1_, bcn_, n0, n1, n2, n3, n4, &
     n5)
     use gaussianstuff, only: filter1, gaussian
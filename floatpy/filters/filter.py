@@ -5,13 +5,15 @@ import pygaussian
 
 from floatpy.parallel import t3dmod
 from floatpy.utilities import data_reshaper
+from floatpy.utilities import operator_registry
 
 class Filter(object):
     """
     Class to perform parallel filter operations
     """
 
-    def __init__(self, grid_partition, filter_type, dimension=3, periodic_dimensions=(False, False, False)):
+    def __init__(self, grid_partition, filter_type, dimension=3, periodic_dimensions=(False, False, False), \
+                 num_threads=1, block_size=262144):
         """
         Constructor of the class.
 
@@ -19,6 +21,10 @@ class Filter(object):
         filter_type : string iterable of size 3 with the type of filter to use in each direction
                       options are "compact" and "gaussian"
         periodic_dimensions : boolean iterable of size 3
+        num_threads : number of OpenMP threads used by the Fortran kernels in each direction. The default of 1 keeps
+                      the parallelism pure MPI
+        block_size : size in bytes of the tiles of contiguous lines used by the compact filter solves in the y and z
+                     directions. 0 uses the original plane-by-plane sweeps
         """
 
         if not isinstance(grid_partition, t3dmod.t3d):
@@ -93,29 +99,189 @@ class Filter(object):
         self._ny = self._chunk_y_size[1]
         self._nz = self._chunk_z_size[2]
         
-        self._xfil = None
-        self._yfil = None
-        self._zfil = None
-        
-        if self._filter_type[0] == 'compact':
-            self._xfil = pycf90.cf90stuff.cf90( self._nx, self._periodic[0] )
-        elif self._filter_type[0] == 'gaussian':
-            self._xfil = pygaussian.gaussianstuff.gaussian( self._nx, self._periodic[0] )
+        # A direction is pencil aligned if the 3D decomposition chunk is already the pencil of that direction, e.g. when
+        # running on a single process. The data is filtered in such a direction without any transposes.
+        self._pencil_aligned = [ numpy.array_equal(self._chunk_3d_size, chunk_size) and \
+                                 numpy.array_equal(self._chunk_3d_lo, chunk_lo) \
+                                 for chunk_size, chunk_lo in ((self._chunk_x_size, self._chunk_x_lo), \
+                                                              (self._chunk_y_size, self._chunk_y_lo), \
+                                                              (self._chunk_z_size, self._chunk_z_lo)) ]
         
+        # The filter objects are shared with all the other objects of this process using the same filters.
+        self._xfil = self._getOperator(0)
+
         if self._dim > 1:
-            if self._filter_type[1] == 'compact':
-                self._yfil = pycf90.cf90stuff.cf90( self._ny, self._periodic[1] )
-            elif self._filter_type[1] == 'gaussian':
-                self._yfil = pygaussian.gaussianstuff.gaussian( self._ny, self._periodic[1] )
-        
+            self._yfil = self._getOperator(1)
+        else:
+            self._yfil = None
+
         if self._dim > 2:
-            if self._filter_type[2] == 'compact':
-                self._zfil = pycf90.cf90stuff.cf90( self._nz, self._periodic[2] )
-            elif self._filter_type[2] == 'gaussian':
-                self._zfil = pygaussian.gaussianstuff.gaussian( self._nz, self._periodic[2] )
+            self._zfil = self._getOperator(2)
+        else:
+            self._zfil = None
+        
+        self.num_threads = num_threads
+        self.block_size = block_size
         
         # Initialize the data reshaper.
         self._data_reshaper = data_reshaper.DataReshaper(self._dim, data_order='F')
+        
+        # Pencil buffers of the data and filtered data in each direction. These are allocated once and reused by all
+        # the filter methods.
+        self._pencil_buffers = [None, None, None]
+
+
+    @property
+    def num_threads(self):
+        """
+        Return the number of OpenMP threads used by the Fortran kernels in each direction.
+        """
+
+        return self._num_threads
+
+
+    @num_threads.setter
+    def num_threads(self, num_threads):
+        """
+        Set the number of OpenMP threads used by the Fortran kernels in each direction. The lines of each pencil are
+        split among the threads. This has no effect if the kernels are built without OpenMP.
+        """
+
+        if num_threads < 1:
+            raise RuntimeError("Number of threads has to be at least 1!")
+
+        self._num_threads = int(num_threads)
+
+
+    @property
+    def block_size(self):
+        """
+        Return the size in bytes of the tiles used by the compact filter solves in the y and z directions.
+        """
+
+        return self._block_size
+
+
+    @block_size.setter
+    def block_size(self, block_size):
+        """
+        Set the size in bytes of the tiles used by the compact filter solves in the y and z directions. The gaussian
+        filter is explicit and is not affected. The results do not depend on this value.
+        """
+
+        if block_size < 0:
+            raise RuntimeError("Block size cannot be negative!")
+
+        self._block_size = int(block_size)
+
+
+    @property
+    def data_reshaper(self):
+        """
+        Return the data reshaper used by this object. Its counters tell how many reshapes had to copy the data.
+        """
+
+        return self._data_reshaper
+
+
+    @property
+    def pencil_aligned(self):
+        """
+        Return a tuple telling whether the 3D decomposition is aligned with the pencil of each direction. The filters
+        in the aligned directions bypass the transposes.
+        """
+
+        return tuple(self._pencil_aligned)
+
+
+    def _getOperator(self, direction):
+        """
+        Return the filter object of the given direction from the operator registry.
+        """
+
+        n = (self._nx, self._ny, self._nz)[direction]
+
+        if self._filter_type[direction] == 'compact':
+            scheme, constructor = 'cf90', pycf90.cf90stuff.cf90
+        else:
+            scheme, constructor = 'gaussian', pygaussian.gaussianstuff.gaussian
+
+        create = lambda: constructor( n, self._periodic[direction] )
+
+        return operator_registry.default_registry().get(create, scheme, n, None, self._periodic[direction])
+
+
+    def _getPencilBuffers(self, direction):
+        """
+        Return the buffers of the data and filtered data in the pencil of the given direction.
+        """
+
+        if self._pencil_buffers[direction] is None:
+            pencil_size = tuple((self._chunk_x_size, self._chunk_y_size, self._chunk_z_size)[direction])
+            self._pencil_buffers[direction] = (numpy.empty(pencil_size, dtype=numpy.float64, order='F'), \
+                                               numpy.empty(pencil_size, dtype=numpy.float64, order='F'))
+
+        return self._pencil_buffers[direction]
+
+
+    def _getPencilOperators(self, direction):
+        """
+        Return the filter method, the transposes to and from the pencil and the sizes of the two other dimensions of the
+        pencil of the given direction. The number of threads and the block size of this object are applied to the
+        filter object since it may be shared with other objects.
+        """
+
+        kernel = (self._xfil, self._yfil, self._zfil)[direction]
+        kernel.set_num_threads(self._num_threads)
+        if isinstance(kernel, pycf90.cf90stuff.cf90):
+            kernel.set_block_size(self._block_size)
+
+        if direction == 0:
+            return self._xfil.filter1, self._grid_partition.transpose_3d_to_x, self._grid_partition.transpose_x_to_3d, \
+                self._chunk_x_size[1], self._chunk_x_size[2]
+        elif direction == 1:
+            return self._yfil.filter2, self._grid_partition.transpose_3d_to_y, self._grid_partition.transpose_y_to_3d, \
+                self._chunk_y_size[0], self._chunk_y_size[2]
+
+        return self._zfil.filter3, self._grid_partition.transpose_3d_to_z, self._grid_partition.transpose_z_to_3d, \
+            self._chunk_z_size[0], self._chunk_z_size[1]
+
+
+    def _filterPencil(self, direction, data_3d, data_filtered_3d, bc, ntimes=1):
+        """
+        Filter the 3D data ntimes in the given direction and store it in data_filtered_3d. The data is transposed once
+        into the pencil buffers and the repeated passes ping-pong between the two buffers in the pencil layout before
+        the result is transposed back. If the direction is pencil aligned, the kernel reads the data directly and the
+        last pass writes directly into data_filtered_3d whenever the two do not overlap.
+        """
+
+        filter_pencil, transpose_to_pencil, transpose_from_pencil, na, nb = self._getPencilOperators(direction)
+        pencil_buffers = self._getPencilBuffers(direction)
+
+        aligned = self._pencil_aligned[direction]
+
+        if aligned:
+            data_pencil = data_3d
+        else:
+            data_pencil = pencil_buffers[0]
+            transpose_to_pencil(data_3d, data_pencil)
+
+        for i in range(ntimes):
+            if aligned and i == ntimes-1 and data_filtered_3d.flags['F_CONTIGUOUS'] and \
+               not numpy.may_share_memory(data_pencil, data_filtered_3d):
+                data_filtered_pencil = data_filtered_3d
+            elif data_pencil is pencil_buffers[0]:
+                data_filtered_pencil = pencil_buffers[1]
+            else:
+                data_filtered_pencil = pencil_buffers[0]
+
+            filter_pencil(data_pencil, data_filtered_pencil, na, nb, bc1_=bc[0], bcn_=bc[1])
+            data_pencil = data_filtered_pencil
+
+        if not aligned:
+            transpose_from_pencil(data_pencil, data_filtered_3d)
+        elif data_pencil is not data_filtered_3d:
+            data_filtered_3d[:] = data_pencil
 
 
     def filter_x(self, data, data_filtered=None, component_idx=None, bc=(0,0)):
@@ -163,21 +329,14 @@ class Filter(object):
         else:
             return_data_filtered = False
 
-        data_x          = numpy.empty( self._chunk_x_size, dtype=numpy.float64, order='F' )
-        data_filtered_x = numpy.empty( self._chunk_x_size, dtype=numpy.float64, order='F' )
-
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
 
-        self._grid_partition.transpose_3d_to_x( data_3d, data_x )
-
-        self._xfil.filter1(data_x, data_filtered_x, self._chunk_x_size[1], self._chunk_x_size[2], bc1_=bc[0], bcn_=bc[1])
-
-        data_filtered_3d = self._data_reshaper.reshapeTo3d(data_filtered)
-        self._grid_partition.transpose_x_to_3d( data_filtered_x, data_filtered_3d )
+        data_filtered_3d = self._data_reshaper.reshapeTo3d(data_filtered, allow_copy=False)
+        self._filterPencil(0, data_3d, data_filtered_3d, bc)
         data_filtered = self._data_reshaper.reshapeFrom3d(data_filtered_3d)
 
         if return_data_filtered:
@@ -226,21 +385,14 @@ class Filter(object):
         else:
             return_data_filtered = False
 
-        data_y          = numpy.empty( self._chunk_y_size, dtype=numpy.float64, order='F' )
-        data_filtered_y = numpy.empty( self._chunk_y_size, dtype=numpy.float64, order='F' )
-
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
 
-        self._grid_partition.transpose_3d_to_y( data_3d, data_y )
-        
-        self._yfil.filter2(data_y, data_filtered_y, self._chunk_y_size[0], self._chunk_y_size[2], bc1_=bc[0], bcn_=bc[1])
-        
-        data_filtered_3d = self._data_reshaper.reshapeTo3d(data_filtered)
-        self._grid_partition.transpose_y_to_3d( data_filtered_y, data_filtered_3d )
+        data_filtered_3d = self._data_reshaper.reshapeTo3d(data_filtered, allow_copy=False)
+        self._filterPencil(1, data_3d, data_filtered_3d, bc)
         data_filtered = self._data_reshaper.reshapeFrom3d(data_filtered_3d)
 
         if return_data_filtered:
@@ -285,20 +437,13 @@ class Filter(object):
         else:
             return_data_filtered = False
 
-        data_z          = numpy.empty( self._chunk_z_size, dtype=numpy.float64, order='F' )
-        data_filtered_z = numpy.empty( self._chunk_z_size, dtype=numpy.float64, order='F' )
-
         data_3d = []
         if component_idx is None:
             data_3d = self._data_reshaper.reshapeTo3d(data)
         else:
             data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
 
-        self._grid_partition.transpose_3d_to_z( data_3d, data_z )
-        
-        self._zfil.filter3(data_z, data_filtered_z, self._chunk_z_size[0], self._chunk_z_size[1], bc1_=bc[0], bcn_=bc[1])
-        
-        self._grid_partition.transpose_z_to_3d( data_filtered_z, data_filtered )
+        self._filterPencil(2, data_3d, data_filtered, bc)
 
         if return_data_filtered:
             return data_filtered
@@ -315,6 +460,7 @@ class Filter(object):
         component_idx : index of component in data for filtering. None if there is only one component in the data
         *_bc : integer tuple of size 2 with the boundary condition at the left and right.
                0 is general, 1 is symmetric, -1 is anti-symmetric. Only required if non-periodic
+        ntimes : number of times to apply the filter in each direction
         """
 
         data_shape = data.shape
@@ -343,33 +489,31 @@ class Filter(object):
                data_shape[2] != self._chunk_3d_size[2]:
                 raise RuntimeError("Make sure data is of the same size as in grid_partition!")
 
+        if ntimes < 1:
+            raise RuntimeError("Number of times to filter has to be at least 1!")
+
         return_data_filtered = True
         if data_filtered is None:
             data_filtered = numpy.empty(self._chunk_3d_size[0:self._dim], dtype=numpy.float64, order='F')
         else:
             return_data_filtered = False
 
-        tmp           = numpy.empty( data_shape, dtype=numpy.float64, order='F' )
-        data_filtered = numpy.empty( data_shape, dtype=numpy.float64, order='F' )
+        data_3d = []
+        if component_idx is None:
+            data_3d = self._data_reshaper.reshapeTo3d(data)
+        else:
+            data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
 
-        self.filter_x(data, data_filtered, bc=x_bc)
-        for i in range(ntimes-1):
-            tmp = numpy.copy(data_filtered, order='F')
-            self.filter_x(tmp, data_filtered, bc=x_bc)
+        data_filtered_3d = self._data_reshaper.reshapeTo3d(data_filtered, allow_copy=False)
 
-        if self._dim > 1:
-            self.filter_y(data_filtered, tmp, bc=y_bc)
-            for i in range(ntimes-1):
-                data_filtered = numpy.copy(tmp, order='F')
-                self.filter_y(data_filtered, tmp, bc=y_bc)
-                data_filtered = numpy.copy(tmp, order='F')
-            data_filtered = numpy.copy(tmp, order='F')
+        # The first direction filters data into data_filtered and the other directions filter data_filtered in place.
+        # The repeated passes in each direction stay in the pencil buffers.
+        bcs = (x_bc, y_bc, z_bc)
+        for direction in range(self._dim):
+            self._filterPencil(direction, data_3d, data_filtered_3d, bcs[direction], ntimes)
+            data_3d = data_filtered_3d
 
-        if self._dim > 2:
-            self.filter_z(tmp, data_filtered, bc=z_bc)
-            for i in range(ntimes-1):
-                tmp = numpy.copy(data_filtered, order='F')
-                self.filter_z(tmp, data_filtered, bc=z_bc)
+        data_filtered = self._data_reshaper.reshapeFrom3d(data_filtered_3d)
 
         if return_data_filtered:
             return data_filtered
@@ -8,7 +8,7 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
     Module cf90stuff
     
     
-    Defined at cf90.F90 lines 4-1390
+    Defined at cf90.F90 lines 4-1612
     
     """
     @f90wrap.runtime.register_class("cf90")
@@ -17,7 +17,7 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
         Type(name=cf90)
         
         
-        Defined at cf90.F90 lines 53-98
+        Defined at cf90.F90 lines 53-105
         
         """
         def __init__(self, n_, periodic_, handle=None):
@@ -25,7 +25,7 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
             self = Cf90(n_, periodic_)
             
             
-            Defined at cf90.F90 lines 102-170
+            Defined at cf90.F90 lines 111-179
             
             Parameters
             ----------
@@ -45,7 +45,7 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
             Destructor for class Cf90
             
             
-            Defined at cf90.F90 lines 172-191
+            Defined at cf90.F90 lines 181-199
             
             Parameters
             ----------
@@ -55,12 +55,42 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
             if self._alloc:
                 _pycf90.f90wrap_destroy(this=self._handle)
         
+        def set_num_threads(self, nthreads_):
+            """
+            set_num_threads(self, nthreads_)
+            
+            
+            Defined at cf90.F90 lines 1525-1532
+            
+            Parameters
+            ----------
+            this : Cf90
+            nthreads_ : int
+            
+            """
+            _pycf90.f90wrap_set_num_threads(this=self._handle, nthreads_=nthreads_)
+        
+        def set_block_size(self, blocksize_):
+            """
+            set_block_size(self, blocksize_)
+            
+            
+            Defined at cf90.F90 lines 1534-1541
+            
+            Parameters
+            ----------
+            this : Cf90
+            blocksize_ : int
+            
+            """
+            _pycf90.f90wrap_set_block_size(this=self._handle, blocksize_=blocksize_)
+        
         def filter1(self, f, df, na, nb, bc1_=None, bcn_=None):
             """
             filter1(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cf90.F90 lines 1176-1246
+            Defined at cf90.F90 lines 1553-1571
             
             Parameters
             ----------
@@ -81,7 +111,7 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
             filter2(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cf90.F90 lines 1248-1318
+            Defined at cf90.F90 lines 1573-1591
             
             Parameters
             ----------
@@ -102,7 +132,7 @@ class Cf90Stuff(f90wrap.runtime.FortranModule):
             filter3(self, f, df, na, nb[, bc1_, bcn_])
             
             
-            Defined at cf90.F90 lines 1320-1390
+            Defined at cf90.F90 lines 1593-1612
             
             Parameters
             ----------
@@ -0,0 +1,304 @@
+import numpy
+
+from floatpy.parallel import t3dmod
+from floatpy.utilities import data_reshaper
+
+class SpectralFilter(object):
+    """
+    Class to perform parallel filter operations in Fourier space in periodic directions. The data is transposed into
+    the pencil of each direction with the same t3d decomposition as the compact filters and the transfer function of
+    the filter is applied to the real FFT along the pencil.
+    """
+
+    def __init__(self, grid_partition, filter_type, dimension=3, periodic_dimensions=(True, True, True), \
+                 cutoff=2./3., filter_width=2.):
+        """
+        Constructor of the class
+
+        grid_partition : t3d object or the grid_partition property of the parallel data reader class
+        filter_type : iterable of size 3 with each value in {'sharp', 'gaussian'} representing the type of filter in
+                      each direction
+        dimension : dimension of problem
+        periodic_dimensions : iterable of boolean descibing whether the periodicity in each direction. All the
+                              directions of the problem have to be periodic
+        cutoff : fraction of the Nyquist wavenumber kept by the sharp spectral filter. The default of 2/3 is the
+                 dealiasing rule of quadratic nonlinearities
+        filter_width : width of the gaussian filter in number of grid spacings
+        """
+
+        if not isinstance(grid_partition, t3dmod.t3d):
+            raise RuntimeError("The given grid partition object is not an instance of the t3d class!")
+
+        if dimension < 1 or dimension > 3:
+            raise RuntimeError("Class only works with data with number of dimensions between 1 and 3!")
+
+        self._dim = dimension
+
+        if len(filter_type) < self._dim:
+            raise RuntimeError("Size of 'filter_type' is smaller than problem dimension!")
+
+        if len(periodic_dimensions) < self._dim:
+            raise RuntimeError("Size of 'periodic_dimensions' is smaller than problem dimension!")
+
+        for i in range(self._dim):
+            if filter_type[i] not in ['sharp', 'gaussian']:
+                raise RuntimeError("filter_type[%d] has to be one of {'sharp', 'gaussian'}" %i)
+            if not periodic_dimensions[i]:
+                raise RuntimeError("Spectral filters are only supported in periodic directions but direction %d is "
+                                   "not periodic!" %i)
+
+        if cutoff <= 0. or cutoff > 1.:
+            raise RuntimeError("'cutoff' has to be in (0, 1]!")
+
+        if filter_width <= 0.:
+            raise RuntimeError("'filter_width' has to be positive!")
+
+        self._filter_type = tuple(filter_type)
+        self._grid_partition = grid_partition
+
+        self._periodic = tuple(periodic_dimensions)
+
+        self._chunk_3d_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_3d_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_sz3d(self._chunk_3d_size)
+        self._grid_partition.get_st3d(self._chunk_3d_lo)
+        self._chunk_3d_lo = self._chunk_3d_lo - 1 # Convert to 0 based indexing
+
+        self._chunk_x_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_x_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_szx(self._chunk_x_size)
+        self._grid_partition.get_stx(self._chunk_x_lo)
+        self._chunk_x_lo = self._chunk_x_lo - 1 # Convert to 0 based indexing
+
+        self._chunk_y_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_y_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_szy(self._chunk_y_size)
+        self._grid_partition.get_sty(self._chunk_y_lo)
+        self._chunk_y_lo = self._chunk_y_lo - 1 # Convert to 0 based indexing
+
+        self._chunk_z_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._chunk_z_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self._grid_partition.get_szz(self._chunk_z_size)
+        self._grid_partition.get_stz(self._chunk_z_lo)
+        self._chunk_z_lo = self._chunk_z_lo - 1 # Convert to 0 based indexing
+
+        if self._dim == 1:
+            if self._chunk_3d_size[1] != 1 or \
+               self._chunk_3d_size[2] != 1:
+                raise RuntimeError("Make sure grid_partition is consistent with 1D problem!")
+
+        if self._dim == 2:
+            if self._chunk_3d_size[2] != 1:
+                raise RuntimeError("Make sure grid_partition is consistent with 2D problem!")
+
+        self._n = (self._chunk_x_size[0], self._chunk_y_size[1], self._chunk_z_size[2])
+
+        # A direction is pencil aligned if the 3D decomposition chunk is already the pencil of that direction. The
+        # FFTs in such a direction are taken on the data directly without any transposes.
+        self._pencil_aligned = [ numpy.array_equal(self._chunk_3d_size, chunk_size) and \
+                                 numpy.array_equal(self._chunk_3d_lo, chunk_lo) \
+                                 for chunk_size, chunk_lo in ((self._chunk_x_size, self._chunk_x_lo), \
+                                                              (self._chunk_y_size, self._chunk_y_lo), \
+                                                              (self._chunk_z_size, self._chunk_z_lo)) ]
+
+        # Precompute the transfer function of the filter of each direction as a function of the non-negative
+        # wavenumbers of the real FFT normalized by the grid spacing. The transfer functions are shaped to broadcast
+        # along the pencil axis.
+        self._transfer_functions = [None, None, None]
+
+        for i in range(self._dim):
+            n = self._n[i]
+            k = 2.*numpy.pi/n*numpy.arange(n//2 + 1, dtype=numpy.float64)
+
+            if self._filter_type[i] == 'sharp':
+                transfer_function = numpy.where(k <= cutoff*numpy.pi*(1. + 1.e-12), 1., 0.)
+            else:
+                transfer_function = numpy.exp(-(k*filter_width)**2/24.)
+
+            shape = [1, 1, 1]
+            shape[i] = n//2 + 1
+            self._transfer_functions[i] = transfer_function.reshape(shape)
+
+        # Initialize the data reshaper.
+        self._data_reshaper = data_reshaper.DataReshaper(self._dim, data_order='F')
+
+        # Pencil buffers of the data and filtered data in each direction. These are allocated once and reused by all
+        # the filter methods.
+        self._pencil_buffers = [None, None, None]
+
+
+    @property
+    def transfer_functions(self):
+        """
+        Return a tuple with the transfer function of the filter of each direction of the problem at the non-negative
+        wavenumbers of the real FFT.
+        """
+
+        return tuple([ t.ravel() for t in self._transfer_functions[0:self._dim] ])
+
+
+    @property
+    def pencil_aligned(self):
+        """
+        Return a tuple telling whether the 3D decomposition is aligned with the pencil of each direction. The filters
+        in the aligned directions bypass the transposes.
+        """
+
+        return tuple(self._pencil_aligned)
+
+
+    @property
+    def data_reshaper(self):
+        """
+        Return the data reshaper used by this object. Its counters tell how many reshapes had to copy the data.
+        """
+
+        return self._data_reshaper
+
+
+    def _getPencilBuffers(self, direction):
+        """
+        Return the buffers of the data and filtered data in the pencil of the given direction.
+        """
+
+        if self._pencil_buffers[direction] is None:
+            pencil_size = tuple((self._chunk_x_size, self._chunk_y_size, self._chunk_z_size)[direction])
+            self._pencil_buffers[direction] = (numpy.empty(pencil_size, dtype=numpy.float64, order='F'), \
+                                               numpy.empty(pencil_size, dtype=numpy.float64, order='F'))
+
+        return self._pencil_buffers[direction]
+
+
+    def _getTransposes(self, direction):
+        """
+        Return the transposes to and from the pencil of the given direction.
+        """
+
+        if direction == 0:
+            return self._grid_partition.transpose_3d_to_x, self._grid_partition.transpose_x_to_3d
+        elif direction == 1:
+            return self._grid_partition.transpose_3d_to_y, self._grid_partition.transpose_y_to_3d
+
+        return self._grid_partition.transpose_3d_to_z, self._grid_partition.transpose_z_to_3d
+
+
+    def _filterPencil(self, direction, data_3d, data_filtered_3d):
+        """
+        Filter the 3D data in the given direction and store it in data_filtered_3d.
+        """
+
+        transpose_to_pencil, transpose_from_pencil = self._getTransposes(direction)
+
+        if self._pencil_aligned[direction]:
+            data_pencil = data_3d
+        else:
+            data_pencil, data_filtered_pencil = self._getPencilBuffers(direction)
+            transpose_to_pencil(data_3d, data_pencil)
+
+        data_hat = numpy.fft.rfft(data_pencil, axis=direction)
+        data_hat *= self._transfer_functions[direction]
+
+        if self._pencil_aligned[direction]:
+            data_filtered_3d[:] = numpy.fft.irfft(data_hat, n=self._n[direction], axis=direction)
+        else:
+            data_filtered_pencil[:] = numpy.fft.irfft(data_hat, n=self._n[direction], axis=direction)
+            transpose_from_pencil(data_filtered_pencil, data_filtered_3d)
+
+
+    def _filter(self, directions, data, data_filtered, component_idx):
+        """
+        Filter data successively in the given directions.
+        """
+
+        data_shape = data.shape
+
+        if component_idx is not None:
+            data_shape = data_shape[0:-1]
+
+        if len(data_shape) != self._dim:
+            raise RuntimeError("Make sure data is %dD!" % self._dim)
+
+        if tuple(data_shape) != tuple(self._chunk_3d_size[0:self._dim]):
+            raise RuntimeError("Make sure data is of the same size as in grid_partition!")
+
+        return_data_filtered = True
+        if data_filtered is None:
+            data_filtered = numpy.empty(self._chunk_3d_size[0:self._dim], dtype=numpy.float64, order='F')
+        else:
+            return_data_filtered = False
+
+        data_3d = self._data_reshaper.reshapeTo3d(data, component_idx)
+        data_filtered_3d = self._data_reshaper.reshapeTo3d(data_filtered, allow_copy=False)
+
+        for direction in directions:
+            self._filterPencil(direction, data_3d, data_filtered_3d)
+            data_3d = data_filtered_3d
+
+        if return_data_filtered:
+            return self._data_reshaper.reshapeFrom3d(data_filtered_3d)
+
+
+    def filter_x(self, data, data_filtered=None, component_idx=None):
+        """
+        Method to filter data in the first direction.
+
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        data_filtered : optional output numpy array in Fortran contiguous layout. This array must be consistent with the
+                        3D decomposition and the problem dimension. This method will return data_filtered if
+                        data_filtered is None
+        component_idx : index of component in data for filtering. None if there is only one component in the data
+        """
+
+        return self._filter((0,), data, data_filtered, component_idx)
+
+
+    def filter_y(self, data, data_filtered=None, component_idx=None):
+        """
+        Method to filter data in the second direction.
+
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        data_filtered : optional output numpy array in Fortran contiguous layout. This array must be consistent with the
+                        3D decomposition and the problem dimension. This method will return data_filtered if
+                        data_filtered is None
+        component_idx : index of component in data for filtering. None if there is only one component in the data
+        """
+
+        if self._dim < 2:
+            raise RuntimeError("There is no filter_y for 1D problem!")
+
+        return self._filter((1,), data, data_filtered, component_idx)
+
+
+    def filter_z(self, data, data_filtered=None, component_idx=None):
+        """
+        Method to filter data in the third direction.
+
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        data_filtered : optional output numpy array in Fortran contiguous layout. This array must be consistent with the
+                        3D decomposition and the problem dimension. This method will return data_filtered if
+                        data_filtered is None
+        component_idx : index of component in data for filtering. None if there is only one component in the data
+        """
+
+        if self._dim < 3:
+            raise RuntimeError("There is no filter_z for %dD problem!" % self._dim)
+
+        return self._filter((2,), data, data_filtered, component_idx)
+
+
+    def filter_all(self, data, data_filtered=None, component_idx=None):
+        """
+        Method to filter data in all directions.
+
+        data : input numpy array in Fortran contiguous layout. This array must be consistent with the 3D decomposition
+               and the problem dimension
+        data_filtered : optional output numpy array in Fortran contiguous layout. This array must be consistent with the
+                        3D decomposition and the problem dimension. This method will return data_filtered if
+                        data_filtered is None
+        component_idx : index of component in data for filtering. None if there is only one component in the data
+        """
+
+        return self._filter(range(self._dim), data, data_filtered, component_idx)
@@ -1 +1,2 @@
 from pyt3d.pyt3d import t3dmod
+from decomposition_cache import create_t3d
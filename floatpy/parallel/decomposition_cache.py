@@ -0,0 +1,399 @@
+from mpi4py import MPI
+import json
+import numpy
+import os
+import re
+import socket
+import time
+
+from pyt3d.pyt3d import t3dmod
+
+def num_decompositions(nprocs):
+    """
+    Return the number of processor decompositions (px, py, pz) with px*py*pz = nprocs that are tried by the t3d
+    autotuner.
+    
+    nprocs : number of processors
+    """
+    
+    count = 0
+    for px in range(1, nprocs+1):
+        if nprocs % px != 0:
+            continue
+        pypz = nprocs // px
+        for py in range(1, pypz+1):
+            if pypz % py == 0:
+                count = count + 1
+    
+    return count
+
+
+def default_hostname_pattern():
+    """
+    Return the hostname of this machine with the node numbering stripped (e.g. 'nid00123' -> 'nid') so that all the
+    nodes of a cluster share the same cache entries.
+    """
+    
+    hostname = socket.gethostname().split('.')[0]
+    pattern = re.sub(r'[0-9\-_]+$', '', hostname)
+    if pattern == '':
+        pattern = hostname
+    
+    return pattern
+
+
+class DecompositionCache(object):
+    """
+    Class to persist the processor decompositions chosen by the t3d autotuner (optimize_decomposition) in a local file
+    so that subsequent runs with the same problem can skip the search.
+    """
+    
+    _version = 1
+    
+    def __init__(self, filename=None, hostname_pattern=None):
+        """
+        Constructor of the class.
+        
+        filename : path to the cache file. Defaults to the environment variable FLOATPY_T3D_CACHE if it is set or
+                   '~/.floatpy/t3d_decompositions.json' otherwise
+        hostname_pattern : string identifying the machine the timings were measured on. Defaults to the hostname with
+                           the node numbering stripped
+        """
+        
+        if filename is None:
+            filename = os.environ.get('FLOATPY_T3D_CACHE',
+                                      os.path.join(os.path.expanduser('~'), '.floatpy', 't3d_decompositions.json'))
+        
+        self._filename = os.path.abspath(os.path.expanduser(filename))
+        
+        if hostname_pattern is None:
+            hostname_pattern = default_hostname_pattern()
+        
+        self._hostname_pattern = str(hostname_pattern)
+    
+    
+    @property
+    def filename(self):
+        """
+        Return the path to the cache file.
+        """
+        
+        return self._filename
+    
+    
+    @property
+    def hostname_pattern(self):
+        """
+        Return the hostname pattern used in the keys of the cache.
+        """
+        
+        return self._hostname_pattern
+    
+    
+    def key(self, nprocs, grid_size, periodic, nghosts=None):
+        """
+        Return the key of the cache entry for a problem.
+        
+        nprocs : number of processors
+        grid_size : iterable of size 3 with the global grid size (nx, ny, nz)
+        periodic : boolean iterable of size 3 with the periodicity in each direction
+        nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+        """
+        
+        grid_size, periodic, nghosts = self._normalize(grid_size, periodic, nghosts)
+        
+        return 'nprocs=%d;grid=%dx%dx%d;periodic=%s;nghosts=%dx%dx%d;host=%s' % \
+            ((nprocs,) + grid_size + (''.join(['T' if p else 'F' for p in periodic]),) + nghosts + \
+             (self._hostname_pattern,))
+    
+    
+    def lookup(self, nprocs, grid_size, periodic, nghosts=None):
+        """
+        Return the cached decomposition (px, py, pz) of a problem or None if the problem is not in the cache.
+        
+        nprocs : number of processors
+        grid_size : iterable of size 3 with the global grid size (nx, ny, nz)
+        periodic : boolean iterable of size 3 with the periodicity in each direction
+        nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+        """
+        
+        entry = self._load()['entries'].get(self.key(nprocs, grid_size, periodic, nghosts))
+        
+        if entry is None:
+            return None
+        
+        return tuple(entry['decomposition'])
+    
+    
+    def store(self, nprocs, grid_size, periodic, decomposition, nghosts=None, timings=None):
+        """
+        Store (or pre-populate) the decomposition of a problem in the cache.
+        
+        nprocs : number of processors
+        grid_size : iterable of size 3 with the global grid size (nx, ny, nz)
+        periodic : boolean iterable of size 3 with the periodicity in each direction
+        decomposition : integer iterable of size 3 with the decomposition (px, py, pz) to use
+        nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+        timings : optional iterable of ((px, py, pz), time) pairs with the measured transpose time of each feasible
+                  decomposition
+        """
+        
+        decomposition = tuple([int(p) for p in decomposition])
+        
+        if len(decomposition) != 3:
+            raise ValueError("Size of 'decomposition' should be 3!")
+        
+        if numpy.prod(decomposition) != nprocs:
+            raise ValueError("Decomposition %s is not consistent with %d processors!" % (str(decomposition), nprocs))
+        
+        grid_size, periodic, nghosts = self._normalize(grid_size, periodic, nghosts)
+        
+        if timings is None:
+            timings = []
+        
+        entry = {'nprocs'        : int(nprocs),
+                 'grid_size'     : list(grid_size),
+                 'periodic'      : list(periodic),
+                 'nghosts'       : list(nghosts),
+                 'host'          : self._hostname_pattern,
+                 'decomposition' : list(decomposition),
+                 'timings'       : [[[int(p) for p in d], float(t)] for d, t in timings],
+                 'created'       : time.time()}
+        
+        cache = self._load()
+        cache['entries'][self.key(nprocs, grid_size, periodic, nghosts)] = entry
+        self._save(cache)
+    
+    
+    def entries(self):
+        """
+        Return a dictionary with all the entries in the cache file (from all hosts) keyed by the cache key. Each entry
+        is a dictionary with the problem description, the chosen 'decomposition' and the measured 'timings'.
+        """
+        
+        return self._load()['entries']
+    
+    
+    def invalidate(self, nprocs=None, grid_size=None, periodic=None, nghosts=None):
+        """
+        Remove the entries of this host matching the given problem description from the cache. Parameters that are
+        None match any value, so invalidate() removes all the entries of this host. Returns the number of entries
+        removed.
+        
+        nprocs : number of processors
+        grid_size : iterable of size 3 with the global grid size (nx, ny, nz)
+        periodic : boolean iterable of size 3 with the periodicity in each direction
+        nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+        """
+        
+        cache = self._load()
+        
+        removed = []
+        for key, entry in cache['entries'].items():
+            if entry['host'] != self._hostname_pattern:
+                continue
+            if nprocs is not None and entry['nprocs'] != nprocs:
+                continue
+            if grid_size is not None and entry['grid_size'] != [int(n) for n in grid_size]:
+                continue
+            if periodic is not None and entry['periodic'] != [bool(p) for p in periodic]:
+                continue
+            if nghosts is not None and entry['nghosts'] != [int(n) for n in nghosts]:
+                continue
+            removed.append(key)
+        
+        for key in removed:
+            del cache['entries'][key]
+        
+        if len(removed) > 0:
+            self._save(cache)
+        
+        return len(removed)
+    
+    
+    def _normalize(self, grid_size, periodic, nghosts):
+        """
+        Convert the problem description to tuples of python types.
+        """
+        
+        if len(grid_size) != 3:
+            raise ValueError("Size of 'grid_size' should be 3!")
+        
+        if len(periodic) != 3:
+            raise ValueError("Size of 'periodic' should be 3!")
+        
+        if nghosts is None:
+            nghosts = (0, 0, 0)
+        
+        if len(nghosts) != 3:
+            raise ValueError("Size of 'nghosts' should be 3!")
+        
+        return tuple([int(n) for n in grid_size]), tuple([bool(p) for p in periodic]), tuple([int(n) for n in nghosts])
+    
+    
+    def _load(self):
+        """
+        Read the cache file. An empty cache is returned if the file does not exist or cannot be parsed.
+        """
+        
+        try:
+            with open(self._filename, 'r') as f:
+                cache = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {'version': self._version, 'entries': {}}
+        
+        if not isinstance(cache, dict) or cache.get('version') != self._version or 'entries' not in cache:
+            return {'version': self._version, 'entries': {}}
+        
+        return cache
+    
+    
+    def _save(self, cache):
+        """
+        Write the cache file atomically.
+        """
+        
+        directory = os.path.dirname(self._filename)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        
+        tmp_filename = '%s.%s.%d.tmp' % (self._filename, socket.gethostname(), os.getpid())
+        with open(tmp_filename, 'w') as f:
+            json.dump(cache, f, indent=1, sort_keys=True)
+        os.rename(tmp_filename, self._filename)
+
+
+_default_cache = None
+
+def default_cache():
+    """
+    Return the cache used by create_t3d with cache=True.
+    """
+    
+    global _default_cache
+    
+    if _default_cache is None:
+        _default_cache = DecompositionCache()
+    
+    return _default_cache
+
+
+def set_default_cache(cache):
+    """
+    Set the cache used by create_t3d with cache=True.
+    
+    cache : DecompositionCache object
+    """
+    
+    global _default_cache
+    
+    if not isinstance(cache, DecompositionCache):
+        raise TypeError("The given cache is not an instance of the DecompositionCache class!")
+    
+    _default_cache = cache
+
+
+def lookup_decomposition(comm, grid_size, periodic, nghosts=None, cache=None):
+    """
+    Collective method that looks up the decomposition of a problem on rank 0 of the communicator and broadcasts it to
+    all the other ranks. Returns None if the problem is not in the cache.
+    
+    comm : mpi4py communicator object
+    grid_size : iterable of size 3 with the global grid size (nx, ny, nz)
+    periodic : boolean iterable of size 3 with the periodicity in each direction
+    nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+    cache : DecompositionCache object. The default cache is used if None
+    """
+    
+    if cache is None:
+        cache = default_cache()
+    
+    decomposition = numpy.zeros(3, dtype=numpy.int32)
+    
+    if comm.Get_rank() == 0:
+        found = cache.lookup(comm.Get_size(), grid_size, periodic, nghosts)
+        if found is not None:
+            decomposition[:] = found
+    
+    comm.Bcast(decomposition, root=0)
+    
+    if numpy.prod(decomposition) != comm.Get_size():
+        return None
+    
+    return tuple(decomposition)
+
+
+def store_decomposition(comm, grid_size, periodic, decomposition, nghosts=None, decomps=None, times=None, cache=None):
+    """
+    Store the decomposition of a problem in the cache from rank 0 of the communicator. Failures to write the cache
+    file are ignored.
+    
+    comm : mpi4py communicator object
+    grid_size : iterable of size 3 with the global grid size (nx, ny, nz)
+    periodic : boolean iterable of size 3 with the periodicity in each direction
+    decomposition : integer iterable of size 3 with the decomposition (px, py, pz) chosen
+    nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+    decomps : optional integer numpy array of shape (3, n) with the decompositions tried by the autotuner
+    times : optional numpy array of size n with the time of each decomposition tried (negative if infeasible)
+    cache : DecompositionCache object. The default cache is used if None
+    """
+    
+    if comm.Get_rank() != 0:
+        return
+    
+    if cache is None:
+        cache = default_cache()
+    
+    timings = []
+    if decomps is not None and times is not None:
+        for i in range(len(times)):
+            if times[i] >= 0.:
+                timings.append((decomps[:, i], times[i]))
+    
+    try:
+        cache.store(comm.Get_size(), grid_size, periodic, decomposition, nghosts=nghosts, timings=timings)
+    except (IOError, OSError):
+        pass
+
+
+def create_t3d(comm3d, nx, ny, nz, periodic, nghosts=None, px=None, py=None, pz=None, cache=True):
+    """
+    Collective method that creates a t3d object. Unless the decomposition is given, it is looked up in the cache and
+    the outcome of a fresh search by the t3d autotuner is stored in the cache.
+    
+    comm3d : Fortran handle of the MPI communicator
+    nx, ny, nz : global grid size
+    periodic : boolean iterable of size 3 with the periodicity in each direction
+    nghosts : integer iterable of size 3 with the number of ghost cells in each direction
+    px, py, pz : decomposition to use instead of the cached or optimized one
+    cache : DecompositionCache object, True to use the default cache or False to always optimize the decomposition
+    """
+    
+    comm = MPI.Comm.f2py(comm3d)
+    grid_size = (nx, ny, nz)
+    
+    if cache is True:
+        cache = default_cache()
+    
+    if px is None and py is None and pz is None and cache:
+        cached = lookup_decomposition(comm, grid_size, periodic, nghosts=nghosts, cache=cache)
+        if cached is not None:
+            px, py, pz = cached
+    
+    grid_partition = t3dmod.t3d(comm3d, nx, ny, nz, periodic, nghosts=nghosts, px_=px, py_=py, pz_=pz)
+    
+    if not cache:
+        return grid_partition
+    
+    ncand = num_decompositions(comm.Get_size())
+    decomps = numpy.zeros((3, ncand), dtype=numpy.int32, order='F')
+    times = numpy.full(ncand, -2.)
+    grid_partition.get_decomposition_timings(decomps, times)
+    
+    # Times are only set if the decomposition was searched for
+    if numpy.any(times > -2.):
+        decomposition = (grid_partition.px(), grid_partition.py(), grid_partition.pz())
+        store_decomposition(comm, grid_size, periodic, decomposition, nghosts=nghosts, decomps=decomps, times=times, \
+                            cache=cache)
+    
+    return grid_partition
@@ -0,0 +1,265 @@
+from mpi4py import MPI
+import numpy
+
+from floatpy.parallel import t3dmod
+from floatpy.parallel import transpose_wrapper
+
+class ParallelFFT(object):
+    """
+    Class to compute distributed FFTs and energy spectra of data in the 3D decomposition of a t3d object. The FFT is
+    taken along the pencil of each direction in turn (x pencil -> y pencil -> z pencil) with the transposes of the
+    TransposeWrapper class, so no processor ever holds more than its own pencil of the data.
+    """
+
+    def __init__(self, grid_partition, grid_spacing=None, dimension=3):
+        """
+        Constructor of the class.
+
+        grid_partition : t3d object or the grid_partition property of the parallel data reader class
+        grid_spacing : optional iterable with the grid spacing in each direction. The wavenumbers are the integer mode
+                       numbers if it is None
+        dimension : dimension of the data (2 or 3)
+        """
+
+        if not isinstance(grid_partition, t3dmod.t3d):
+            raise RuntimeError("The given grid partition object is not an instance of the t3d class!")
+
+        if dimension < 2 or dimension > 3:
+            raise RuntimeError('Only data with dimension of 2 or 3 can be transformed!')
+
+        self._grid_partition = grid_partition
+        self._dim = dimension
+
+        self._transposers = [ transpose_wrapper.TransposeWrapper(grid_partition, direction, dimension=self._dim) \
+                              for direction in range(self._dim) ]
+
+        # Global grid size from the length of the pencils.
+        self._grid_size = numpy.array([ self._transposers[i].full_pencil_size[i] for i in range(self._dim) ])
+
+        if grid_spacing is None:
+            grid_spacing = 2.*numpy.pi/self._grid_size
+
+        if len(grid_spacing) < self._dim:
+            raise RuntimeError("Size of 'grid_spacing' is smaller than problem dimension!")
+
+        # Fundamental wavenumber of each direction.
+        self._dk = numpy.array([ 2.*numpy.pi/(self._grid_size[i]*grid_spacing[i]) for i in range(self._dim) ])
+
+        self._comm = MPI.Comm.f2py(self._grid_partition.comm3d())
+        self._rank = self._comm.Get_rank()
+
+        # Wavenumbers of the part of the spectral space owned by this processor. The transformed data lives in the
+        # pencil of the last direction.
+        lo, hi = self._transposers[-1].full_pencil
+
+        self._wavenumbers = []
+        for i in range(self._dim):
+            k = numpy.fft.fftfreq(self._grid_size[i], d=1./self._grid_size[i])[lo[i]:hi[i]+1]*self._dk[i]
+            shape = [1]*self._dim
+            shape[i] = k.shape[0]
+            self._wavenumbers.append(k.reshape(shape))
+
+        # Shell of each local wavenumber for the binning of the spectra. The shells are spaced by the smallest
+        # fundamental wavenumber.
+        self._shell_width = self._dk.min()
+
+        k_magnitude = numpy.sqrt(sum([ k**2 for k in self._wavenumbers ]))
+        self._shells = numpy.rint(k_magnitude/self._shell_width).astype(numpy.int64).ravel(order='F')
+
+        k_max = numpy.sqrt(numpy.sum((self._grid_size//2*self._dk)**2))
+        self._num_shells = int(numpy.rint(k_max/self._shell_width)) + 1
+
+
+    @property
+    def spectral_pencil(self):
+        """
+        Return two tuples containing the chunk of the transformed data owned by this processor as a lower bound (lo)
+        and an upper bound (hi) of the indices of the wavenumbers in FFT order.
+        """
+
+        return self._transposers[-1].full_pencil
+
+
+    @property
+    def wavenumbers(self):
+        """
+        Return a list with the wavenumbers in each direction of the chunk of the transformed data owned by this
+        processor. The arrays are shaped to broadcast against the transformed data.
+        """
+
+        return list(self._wavenumbers)
+
+
+    @property
+    def shell_width(self):
+        """
+        Return the width of the wavenumber shells of the spectra.
+        """
+
+        return self._shell_width
+
+
+    def _toComplex(self, data):
+        """
+        Return the complex data stored as the two trailing real components of data.
+        """
+
+        return data[..., 0] + 1j*data[..., 1]
+
+
+    def _toReal(self, data):
+        """
+        Return the complex data as a real array in Fortran order with the real and imaginary parts as two trailing
+        components.
+        """
+
+        data_real = numpy.empty(data.shape + (2,), dtype=numpy.float64, order='F')
+        data_real[..., 0] = data.real
+        data_real[..., 1] = data.imag
+
+        return data_real
+
+
+    def _getComponent(self, data, component_idx):
+        """
+        Return the component of data to transform.
+        """
+
+        if component_idx is None:
+            if data.ndim != self._dim:
+                raise RuntimeError("Make sure data is %dD or give a component_idx!" % self._dim)
+            return data
+
+        return data[..., component_idx]
+
+
+    def forward(self, data, component_idx=None):
+        """
+        Return the FFT of the data. The transformed data is complex and is in the pencil of the last direction, with
+        the wavenumbers of each direction in the order of numpy.fft.fftfreq. Its normalization is that of numpy.fft,
+        i.e. the sum over the points of the data.
+
+        data : real numpy array in the 3D decomposition in Fortran contiguous layout
+        component_idx : index of component in data to transform. None if there is only one component in the data
+        """
+
+        data = self._getComponent(data, component_idx)
+
+        data_hat = numpy.fft.fft(self._transposers[0].transposeToPencil(data), axis=0)
+
+        for direction in range(1, self._dim):
+            data_3d = self._transposers[direction-1].transposeFromPencil(self._toReal(data_hat))
+            data_hat = self._toComplex(self._transposers[direction].transposeToPencil(data_3d))
+            data_hat = numpy.fft.fft(data_hat, axis=direction)
+
+        return data_hat
+
+
+    def backward(self, data_hat):
+        """
+        Return the real inverse FFT of transformed data in the 3D decomposition. This is the inverse of the forward
+        method.
+
+        data_hat : complex numpy array in the pencil of the last direction
+        """
+
+        for direction in range(self._dim-1, 0, -1):
+            data_hat = numpy.fft.ifft(data_hat, axis=direction)
+            data_3d = self._transposers[direction].transposeFromPencil(self._toReal(data_hat))
+            data_hat = self._toComplex(self._transposers[direction-1].transposeToPencil(data_3d))
+
+        data = numpy.asfortranarray(numpy.fft.ifft(data_hat, axis=0).real)
+
+        return self._transposers[0].transposeFromPencil(data)
+
+
+    def spectrum(self, data, component_idx=None):
+        """
+        Collective method to compute the shell-binned energy spectrum of the data. The spectral energy 0.5*|u_hat|^2
+        of each mode is binned in spherical shells of the wavenumber magnitude on each processor and the bins are
+        summed on rank 0. The sum of the spectrum times the shell width is 0.5*mean(u^2). If data has one more
+        dimension than the problem and component_idx is None, the energy of all the components is summed, e.g. to get
+        the kinetic energy spectrum of a velocity field.
+
+        data : real numpy array in the 3D decomposition in Fortran contiguous layout
+        component_idx : index of component in data. None if there is only one component in the data or to sum the
+                        energy of all the components
+
+        Returns the wavenumbers of the shells and the spectrum on rank 0 and (None, None) on the other processors.
+        """
+
+        if component_idx is None and data.ndim == self._dim + 1:
+            components = range(data.shape[-1])
+        else:
+            components = [component_idx]
+
+        energy = numpy.zeros(self._num_shells, dtype=numpy.float64)
+
+        num_points = numpy.prod(self._grid_size)
+
+        for ic in components:
+            data_hat = self.forward(data, ic)
+            mode_energy = 0.5*numpy.absolute(data_hat.ravel(order='F'))**2/num_points**2
+            energy += numpy.bincount(self._shells, weights=mode_energy, minlength=self._num_shells)
+
+        return self._reduceSpectrum(energy, self._shell_width)
+
+
+    def spectrum1d(self, data, direction, component_idx=None):
+        """
+        Collective method to compute the one-dimensional energy spectrum of the data in a direction. The FFT is only
+        taken along the pencil of that direction and the spectral energy is averaged over the lines of the pencil
+        and folded onto the non-negative wavenumbers. The sum of the spectrum times the fundamental wavenumber is
+        0.5*mean(u^2).
+
+        data : real numpy array in the 3D decomposition in Fortran contiguous layout
+        direction : direction of the spectrum
+        component_idx : index of component in data. None if there is only one component in the data or to sum the
+                        energy of all the components
+
+        Returns the wavenumbers and the spectrum on rank 0 and (None, None) on the other processors.
+        """
+
+        if direction < 0 or direction >= self._dim:
+            raise RuntimeError("Direction %d is invalid for %dD data!" % (direction, self._dim))
+
+        if component_idx is None and data.ndim == self._dim + 1:
+            components = range(data.shape[-1])
+        else:
+            components = [component_idx]
+
+        n = self._grid_size[direction]
+        num_lines = numpy.prod(self._grid_size)//n
+
+        axes = tuple([ i for i in range(self._dim) if i != direction ])
+
+        energy = numpy.zeros(n//2 + 1, dtype=numpy.float64)
+
+        for ic in components:
+            data_pencil = self._transposers[direction].transposeToPencil(self._getComponent(data, ic))
+            data_hat = numpy.fft.rfft(data_pencil, axis=direction)/n
+
+            line_energy = numpy.sum(0.5*numpy.absolute(data_hat)**2, axis=axes)/num_lines
+
+            # Add the energy of the negative wavenumbers, which are not stored by the real FFT.
+            line_energy[1:(n+1)//2] *= 2.
+            energy += line_energy
+
+        return self._reduceSpectrum(energy, self._dk[direction])
+
+
+    def _reduceSpectrum(self, energy, dk):
+        """
+        Sum the local spectrum on rank 0 and return the wavenumbers and the spectrum density there.
+        """
+
+        energy_global = None
+        if self._rank == 0:
+            energy_global = numpy.zeros_like(energy)
+
+        self._comm.Reduce(energy, energy_global, op=MPI.SUM, root=0)
+
+        if self._rank != 0:
+            return None, None
+
+        return dk*numpy.arange(energy.shape[0], dtype=numpy.float64), energy_global/dk
@@ -271,7 +271,7 @@ subroutine f90wrap_fill_halo_z(this, array, n0, n1, n2)
 end subroutine f90wrap_fill_halo_z
 
 subroutine f90wrap_optimize_decomposition(this, comm3d, nx, ny, nz, periodic, &
-    nghosts)
+    nghosts, px_, py_, pz_)
     use t3dmod, only: t3d, optimize_decomposition
     implicit none
     
@@ -286,12 +286,50 @@ subroutine f90wrap_optimize_decomposition(this, comm3d, nx, ny, nz, periodic, &
     integer, intent(in) :: nz
     logical, dimension(3), intent(in) :: periodic
     integer, dimension(3), optional, intent(in) :: nghosts
+    integer, optional, intent(in) :: px_
+    integer, optional, intent(in) :: py_
+    integer, optional, intent(in) :: pz_
     allocate(this_ptr%p)
     call optimize_decomposition(this=this_ptr%p, comm3D=comm3d, nx=nx, ny=ny, nz=nz, &
-        periodic=periodic, nghosts=nghosts)
+        periodic=periodic, nghosts=nghosts, px_=px_, py_=py_, pz_=pz_)
     this = transfer(this_ptr, this)
 end subroutine f90wrap_optimize_decomposition
 
+subroutine f90wrap_get_buffer_sizes(this, sizes)
+    use t3dmod, only: t3d, get_buffer_sizes
+    implicit none
+    
+    type t3d_ptr_type
+        type(t3d), pointer :: p => NULL()
+    end type t3d_ptr_type
+    type(t3d_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    integer, dimension(2), intent(inout) :: sizes
+    this_ptr = transfer(this, this_ptr)
+    call get_buffer_sizes(this=this_ptr%p, sizes=sizes)
+end subroutine f90wrap_get_buffer_sizes
+
+subroutine f90wrap_get_decomposition_timings(this, decomps, times, n0, n1, n2)
+    use t3dmod, only: t3d, get_decomposition_timings
+    implicit none
+    
+    type t3d_ptr_type
+        type(t3d), pointer :: p => NULL()
+    end type t3d_ptr_type
+    type(t3d_ptr_type) :: this_ptr
+    integer, intent(in), dimension(2) :: this
+    integer, intent(inout), dimension(n0,n1) :: decomps
+    real(8), intent(inout), dimension(n2) :: times
+    integer :: n0
+    !f2py intent(hide), depend(decomps) :: n0 = shape(decomps,0)
+    integer :: n1
+    !f2py intent(hide), depend(decomps) :: n1 = shape(decomps,1)
+    integer :: n2
+    !f2py intent(hide), depend(times) :: n2 = shape(times,0)
+    this_ptr = transfer(this, this_ptr)
+    call get_decomposition_timings(this=this_ptr%p, decomps=decomps, times=times)
+end subroutine f90wrap_get_decomposition_timings
+
 subroutine f90wrap_get_sz3d(this, sz3d)
     use t3dmod, only: get_sz3d, t3d
     implicit none
@@ -8,7 +8,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
     Module t3dmod
     
     
-    Defined at t3dMod.F90 lines 1-1656
+    Defined at t3dMod.F90 lines 1-1758
     
     """
     @f90wrap.runtime.register_class("t3d")
@@ -17,7 +17,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
         Type(name=t3d)
         
         
-        Defined at t3dMod.F90 lines 19-90
+        Defined at t3dMod.F90 lines 19-98
         
         """
         def init(self, comm3d, nx, ny, nz, px, py, pz, periodic_, reorder, fail, \
@@ -27,7 +27,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
                 createcrosscommunicators])
             
             
-            Defined at t3dMod.F90 lines 98-518
+            Defined at t3dMod.F90 lines 106-533
             
             Parameters
             ----------
@@ -55,7 +55,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             Destructor for class T3D
             
             
-            Defined at t3dMod.F90 lines 520-536
+            Defined at t3dMod.F90 lines 535-557
             
             Parameters
             ----------
@@ -70,7 +70,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             transpose_3d_to_x(self, input, output)
             
             
-            Defined at t3dMod.F90 lines 538-590
+            Defined at t3dMod.F90 lines 559-614
             
             Parameters
             ----------
@@ -86,7 +86,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             transpose_x_to_3d(self, input, output)
             
             
-            Defined at t3dMod.F90 lines 592-633
+            Defined at t3dMod.F90 lines 616-660
             
             Parameters
             ----------
@@ -102,7 +102,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             transpose_3d_to_y(self, input, output)
             
             
-            Defined at t3dMod.F90 lines 635-687
+            Defined at t3dMod.F90 lines 662-717
             
             Parameters
             ----------
@@ -118,7 +118,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             transpose_y_to_3d(self, input, output)
             
             
-            Defined at t3dMod.F90 lines 689-731
+            Defined at t3dMod.F90 lines 719-764
             
             Parameters
             ----------
@@ -134,7 +134,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             transpose_3d_to_z(self, input, output)
             
             
-            Defined at t3dMod.F90 lines 733-785
+            Defined at t3dMod.F90 lines 766-821
             
             Parameters
             ----------
@@ -150,7 +150,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             transpose_z_to_3d(self, input, output)
             
             
-            Defined at t3dMod.F90 lines 787-829
+            Defined at t3dMod.F90 lines 823-868
             
             Parameters
             ----------
@@ -166,7 +166,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             fill_halo_x(self, array)
             
             
-            Defined at t3dMod.F90 lines 1177-1197
+            Defined at t3dMod.F90 lines 1216-1236
             
             Parameters
             ----------
@@ -181,7 +181,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             fill_halo_y(self, array)
             
             
-            Defined at t3dMod.F90 lines 1199-1219
+            Defined at t3dMod.F90 lines 1238-1258
             
             Parameters
             ----------
@@ -196,7 +196,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             fill_halo_z(self, array)
             
             
-            Defined at t3dMod.F90 lines 1221-1242
+            Defined at t3dMod.F90 lines 1260-1281
             
             Parameters
             ----------
@@ -206,12 +206,13 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             """
             _pyt3d.f90wrap_fill_halo_z(this=self._handle, array=array)
         
-        def __init__(self, comm3d, nx, ny, nz, periodic, nghosts=None, handle=None):
+        def __init__(self, comm3d, nx, ny, nz, periodic, nghosts=None, px_=None, py_=None, \
+            pz_=None, handle=None):
             """
-            self = T3D(comm3d, nx, ny, nz, periodic[, nghosts])
+            self = T3D(comm3d, nx, ny, nz, periodic[, nghosts, px_, py_, pz_])
             
             
-            Defined at t3dMod.F90 lines 1285-1368
+            Defined at t3dMod.F90 lines 1324-1445
             
             Parameters
             ----------
@@ -221,6 +222,9 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             nz : int
             periodic : bool array
             nghosts : int array
+            px_ : int
+            py_ : int
+            pz_ : int
             
             Returns
             -------
@@ -229,14 +233,46 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             """
             f90wrap.runtime.FortranDerivedType.__init__(self)
             self._handle = _pyt3d.f90wrap_optimize_decomposition(comm3d=comm3d, nx=nx, \
-                ny=ny, nz=nz, periodic=periodic, nghosts=nghosts)
+                ny=ny, nz=nz, periodic=periodic, nghosts=nghosts, px_=px_, py_=py_, pz_=pz_)
+        
+        def get_buffer_sizes(self, sizes):
+            """
+            get_buffer_sizes(self, sizes)
+            
+            
+            Defined at t3dMod.F90 lines 1547-1554
+            
+            Parameters
+            ----------
+            this : T3D
+            sizes : int array
+            
+            """
+            _pyt3d.f90wrap_get_buffer_sizes(this=self._handle, sizes=sizes)
+        
+        def get_decomposition_timings(self, decomps, times):
+            """
+            get_decomposition_timings(self, decomps, times)
+            
+            
+            Defined at t3dMod.F90 lines 1556-1568
+            
+            Parameters
+            ----------
+            this : T3D
+            decomps : int array
+            times : float array
+            
+            """
+            _pyt3d.f90wrap_get_decomposition_timings(this=self._handle, decomps=decomps, \
+                times=times)
         
         def get_sz3d(self, sz3d):
             """
             get_sz3d(self, sz3d)
             
             
-            Defined at t3dMod.F90 lines 1470-1475
+            Defined at t3dMod.F90 lines 1570-1575
             
             Parameters
             ----------
@@ -251,7 +287,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_st3d(self, st3d)
             
             
-            Defined at t3dMod.F90 lines 1477-1482
+            Defined at t3dMod.F90 lines 1577-1582
             
             Parameters
             ----------
@@ -266,7 +302,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_en3d(self, en3d)
             
             
-            Defined at t3dMod.F90 lines 1484-1491
+            Defined at t3dMod.F90 lines 1584-1591
             
             Parameters
             ----------
@@ -281,7 +317,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_sz3dg(self, sz3dg)
             
             
-            Defined at t3dMod.F90 lines 1493-1498
+            Defined at t3dMod.F90 lines 1593-1598
             
             Parameters
             ----------
@@ -296,7 +332,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_st3dg(self, st3dg)
             
             
-            Defined at t3dMod.F90 lines 1500-1505
+            Defined at t3dMod.F90 lines 1600-1605
             
             Parameters
             ----------
@@ -311,7 +347,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_en3dg(self, en3dg)
             
             
-            Defined at t3dMod.F90 lines 1507-1514
+            Defined at t3dMod.F90 lines 1607-1614
             
             Parameters
             ----------
@@ -326,7 +362,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_szx(self, szx)
             
             
-            Defined at t3dMod.F90 lines 1516-1521
+            Defined at t3dMod.F90 lines 1616-1621
             
             Parameters
             ----------
@@ -341,7 +377,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_stx(self, stx)
             
             
-            Defined at t3dMod.F90 lines 1523-1528
+            Defined at t3dMod.F90 lines 1623-1628
             
             Parameters
             ----------
@@ -356,7 +392,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_enx(self, enx)
             
             
-            Defined at t3dMod.F90 lines 1530-1536
+            Defined at t3dMod.F90 lines 1630-1636
             
             Parameters
             ----------
@@ -371,7 +407,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_szy(self, szy)
             
             
-            Defined at t3dMod.F90 lines 1538-1543
+            Defined at t3dMod.F90 lines 1638-1643
             
             Parameters
             ----------
@@ -386,7 +422,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_sty(self, sty)
             
             
-            Defined at t3dMod.F90 lines 1545-1550
+            Defined at t3dMod.F90 lines 1645-1650
             
             Parameters
             ----------
@@ -401,7 +437,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_eny(self, eny)
             
             
-            Defined at t3dMod.F90 lines 1552-1558
+            Defined at t3dMod.F90 lines 1652-1658
             
             Parameters
             ----------
@@ -416,7 +452,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_szz(self, szz)
             
             
-            Defined at t3dMod.F90 lines 1560-1565
+            Defined at t3dMod.F90 lines 1660-1665
             
             Parameters
             ----------
@@ -431,7 +467,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_stz(self, stz)
             
             
-            Defined at t3dMod.F90 lines 1567-1572
+            Defined at t3dMod.F90 lines 1667-1672
             
             Parameters
             ----------
@@ -446,7 +482,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             get_enz(self, enz)
             
             
-            Defined at t3dMod.F90 lines 1574-1579
+            Defined at t3dMod.F90 lines 1674-1679
             
             Parameters
             ----------
@@ -461,7 +497,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             comm3d = comm3d(self)
             
             
-            Defined at t3dMod.F90 lines 1581-1586
+            Defined at t3dMod.F90 lines 1681-1686
             
             Parameters
             ----------
@@ -480,7 +516,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             commx = commx(self)
             
             
-            Defined at t3dMod.F90 lines 1588-1593
+            Defined at t3dMod.F90 lines 1688-1693
             
             Parameters
             ----------
@@ -499,7 +535,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             commy = commy(self)
             
             
-            Defined at t3dMod.F90 lines 1595-1600
+            Defined at t3dMod.F90 lines 1695-1700
             
             Parameters
             ----------
@@ -518,7 +554,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             commz = commz(self)
             
             
-            Defined at t3dMod.F90 lines 1602-1607
+            Defined at t3dMod.F90 lines 1702-1707
             
             Parameters
             ----------
@@ -537,7 +573,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             commxy = commxy(self)
             
             
-            Defined at t3dMod.F90 lines 1609-1614
+            Defined at t3dMod.F90 lines 1709-1714
             
             Parameters
             ----------
@@ -556,7 +592,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             commyz = commyz(self)
             
             
-            Defined at t3dMod.F90 lines 1616-1621
+            Defined at t3dMod.F90 lines 1716-1721
             
             Parameters
             ----------
@@ -575,7 +611,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             commxz = commxz(self)
             
             
-            Defined at t3dMod.F90 lines 1623-1628
+            Defined at t3dMod.F90 lines 1723-1728
             
             Parameters
             ----------
@@ -594,7 +630,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             px = px(self)
             
             
-            Defined at t3dMod.F90 lines 1630-1635
+            Defined at t3dMod.F90 lines 1730-1735
             
             Parameters
             ----------
@@ -613,7 +649,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             py = py(self)
             
             
-            Defined at t3dMod.F90 lines 1637-1642
+            Defined at t3dMod.F90 lines 1737-1742
             
             Parameters
             ----------
@@ -632,7 +668,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             pz = pz(self)
             
             
-            Defined at t3dMod.F90 lines 1644-1649
+            Defined at t3dMod.F90 lines 1744-1749
             
             Parameters
             ----------
@@ -651,7 +687,7 @@ class T3Dmod(f90wrap.runtime.FortranModule):
             nprocs = nprocs(self)
             
             
-            Defined at t3dMod.F90 lines 1651-1656
+            Defined at t3dMod.F90 lines 1751-1756
             
             Parameters
             ----------
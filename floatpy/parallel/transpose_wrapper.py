@@ -76,6 +76,15 @@ class TransposeWrapper(object):
         self._data_reshaper = data_reshaper.DataReshaper(self._dim, data_order='F')
     
     
+    @property
+    def data_reshaper(self):
+        """
+        Return the data reshaper used by this object. Its counters tell how many reshapes had to copy the data.
+        """
+        
+        return self._data_reshaper
+    
+    
     @property
     def full_pencil(self):
         """
@@ -198,3 +207,25 @@ class TransposeWrapper(object):
             data_out = self._data_reshaper.reshapeFrom3d(data_to_transpose)
         
         return data_out
+
+
+def memory_report(grid_partition):
+    """
+    Return a dictionary with the memory in bytes of the persistent pack/unpack buffers of the transposes of a t3d
+    object ('buffer_3d' and 'buffer_pencil') and of both buffers ('total').
+    
+    grid_partition : t3d object or the grid_partition property of the parallel data reader class
+    """
+    
+    if not isinstance(grid_partition, t3dmod.t3d):
+        raise RuntimeError("The given grid partition object is not an instance of the t3d class!")
+    
+    sizes = numpy.zeros(2, dtype=numpy.int32)
+    grid_partition.get_buffer_sizes(sizes)
+    
+    itemsize = numpy.dtype(numpy.float64).itemsize
+    
+    report = {'buffer_3d' : int(sizes[0])*itemsize, 'buffer_pencil' : int(sizes[1])*itemsize}
+    report['total'] = report['buffer_3d'] + report['buffer_pencil']
+    
+    return report
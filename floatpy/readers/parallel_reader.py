@@ -4,7 +4,8 @@ import numpy
 import os
 import sys
 
-from floatpy.parallel import t3dmod
+from floatpy.parallel import create_t3d
+from samrai_reader import SamraiDataReader
 
 class ParallelDataReader(object):
     """
@@ -102,9 +103,9 @@ class ParallelDataReader(object):
             self._subdomain_size = self._subdomain_hi - self._subdomain_lo + 1
         
         # Create the parallel grid partition object that handles all the communication stuff.
-        self._grid_partition = t3dmod.t3d(self._fcomm, \
-                                               self._subdomain_size[0], self._subdomain_size[1], self._subdomain_size[2], \
-                                               self._periodic_dimensions, nghosts=self._num_ghosts )
+        self._grid_partition = create_t3d(self._fcomm, \
+                                          self._subdomain_size[0], self._subdomain_size[1], self._subdomain_size[2], \
+                                          self._periodic_dimensions, nghosts=self._num_ghosts )
         
         # Size of the interior chunk of this process.
         self._interior_chunk_size = numpy.zeros(3, dtype=numpy.int32, order='F')
@@ -140,6 +141,18 @@ class ParallelDataReader(object):
                   self._full_chunk_size[1] - (self._full_chunk_hi[1] - self._interior_chunk_hi[1])),
             slice(self._interior_chunk_lo[2] - self._full_chunk_lo[2],
                   self._full_chunk_size[2] - (self._full_chunk_hi[2] - self._interior_chunk_hi[2])) )
+        
+        # Route the patch data of the SAMRAI data to the processors that need it so that the file of each file cluster
+        # is read by only one processor.
+        self._route_patch_data = isinstance(serial_reader, SamraiDataReader)
+        
+        if self._route_patch_data:
+            # Read the summary file at each time step on one processor only.
+            self._serial_reader.setCommunicator(self._comm)
+            
+            interior_chunk = numpy.concatenate((self._interior_chunk_lo, self._interior_chunk_hi)).astype(numpy.int64)
+            self._all_interior_chunks = numpy.empty((self._comm.Get_size(), 6), dtype=numpy.int64)
+            self._comm.Allgather(interior_chunk, self._all_interior_chunks)
     
     
     @property
@@ -344,16 +357,27 @@ class ParallelDataReader(object):
         """
         Read the data of several variables in the assigned chunk of the stored sub-domain.
         Default to the full domain when the sub-domain is not set.
+        With SAMRAI data, the file of each file cluster is read by only one processor and the data of the patches is
+        routed to the processors that need it.
         (Not yet well implemented with communication and vector!)
         """
         
         if isinstance(var_names, basestring):
             var_names = (var_names,)
         
+        if self._route_patch_data:
+            self._routePatchData(var_names)
+        
+        try:
+            serial_data_vars = [ self._serial_reader.readData(var_name)[0] for var_name in var_names ]
+        finally:
+            if self._route_patch_data:
+                self._serial_reader.setRoutedPatchData(None)
+        
         data_vars = []
         
         for i in range(len(var_names)):
-            data_var, = self._serial_reader.readData(var_names[i])
+            data_var = serial_data_vars[i]
             
             num_components = 1
             if data_var.ndim == self._dim + 1:
@@ -407,3 +431,62 @@ class ParallelDataReader(object):
                         self._grid_partition.fill_halo_z(data_to_communicate)
         
         return tuple(data_vars)
+    
+    
+    def _routePatchData(self, var_names):
+        """
+        Read the data of the patches needed by all the processors with the file of each file cluster read by only one
+        processor and route the data of the patches to the processors that need it.
+        """
+        
+        num_procs = self._comm.Get_size()
+        rank = self._comm.Get_rank()
+        
+        patch_map = self._serial_reader.getPatchMap()
+        patch_data_sizes = self._serial_reader.getPatchDataSizes(var_names)
+        
+        # The file of each file cluster is read by one processor only.
+        patch_readers = patch_map['file_cluster_number'] % num_procs
+        
+        # Get the patches needed by each processor.
+        patches = [ self._serial_reader.getPatchesInSubdomain(self._all_interior_chunks[i, 0:3], \
+                                                              self._all_interior_chunks[i, 3:6]) \
+                    for i in range(num_procs) ]
+        
+        # Read the patches needed by any processor in the file clusters assigned to this processor.
+        patches_to_send = [ patches[i][patch_readers[patches[i]] == rank] for i in range(num_procs) ]
+        patch_data = self._serial_reader.readPatchData(numpy.unique(numpy.concatenate(patches_to_send)), var_names)
+        
+        patches_to_receive = [ patches[rank][patch_readers[patches[rank]] == i] for i in range(num_procs) ]
+        
+        send_counts = numpy.array([ patch_data_sizes[patches_to_send[i]].sum() for i in range(num_procs) ])
+        recv_counts = numpy.array([ patch_data_sizes[patches_to_receive[i]].sum() for i in range(num_procs) ])
+        
+        send_displacements = numpy.concatenate(([0], numpy.cumsum(send_counts)[:-1]))
+        recv_displacements = numpy.concatenate(([0], numpy.cumsum(recv_counts)[:-1]))
+        
+        # Pack the data of the patches to send to each processor in the order of the global patch indices.
+        send_buffer = numpy.empty(send_counts.sum(), dtype=numpy.float64)
+        
+        offset = 0
+        for i in range(num_procs):
+            for global_patch_idx in patches_to_send[i]:
+                send_buffer[offset:offset + patch_data_sizes[global_patch_idx]] = patch_data[global_patch_idx]
+                offset = offset + patch_data_sizes[global_patch_idx]
+        
+        recv_buffer = numpy.empty(recv_counts.sum(), dtype=numpy.float64)
+        
+        self._comm.Alltoallv([send_buffer, (send_counts, send_displacements), MPI.DOUBLE], \
+                             [recv_buffer, (recv_counts, recv_displacements), MPI.DOUBLE])
+        
+        # Unpack the data of the patches received from each processor.
+        routed_patch_data = {}
+        
+        offset = 0
+        for i in range(num_procs):
+            for global_patch_idx in patches_to_receive[i]:
+                routed_patch_data[global_patch_idx] = recv_buffer[offset:offset + patch_data_sizes[global_patch_idx]]
+                offset = offset + patch_data_sizes[global_patch_idx]
+        
+        self._serial_reader.setRoutedPatchData(routed_patch_data, var_names)
+
@@ -2,25 +2,51 @@
 Module for reading and handling samrai data.
 """
 
+import collections
 import copy
 import h5py
+import itertools
 import numpy
 import re
 
-from floatpy.upsampling import Lagrange_upsampler
+from floatpy.upsampling import conservative_upsampler, Lagrange_upsampler
 
 from base_reader import BaseReader
 
+class _RoutedFileCluster(dict):
+    """
+    Container of the patch data of a file cluster in memory with the same layout of groups and datasets as the file
+    of the file cluster.
+    """
+    
+    def close(self):
+        """
+        Nothing to close for the data in memory.
+        """
+        
+        pass
+
+
 class SamraiDataReader(BaseReader):
     """
     Class to read samrai data.
     """
     
     def __init__(self, data_directory_path, periodic_dimensions = (False, False, False), \
-                 upsampling_method = 'constant', processor_zero_padding_length = 5, data_order = 'F'):
+                 upsampling_method = 'constant', processor_zero_padding_length = 5, data_order = 'F', \
+                 comm = None, summary_cache_size = 8):
         """
         Constructor of the class.
         The current time step of the class is set to the first time step in dump file.
+        
+        upsampling_method : a string {'constant', 'second_order_Lagrange', 'fourth_order_Lagrange',
+                            'sixth_order_Lagrange', 'third_order_conservative', 'fifth_order_conservative',
+                            'fifth_order_WENO'} to describe the method to upsample the data at coarse levels. The
+                            conservative methods preserve the averages of the coarse cells and the WENO method avoids
+                            oscillations at discontinuities
+        comm : mpi4py communicator object of the processors sharing the reader to read the summary file on the first
+               processor only and broadcast the metadata (None to read the summary file on every processor)
+        summary_cache_size : number of the most recently visited time steps with the metadata kept in memory
         """
         
         self._data_directory_path = data_directory_path
@@ -54,6 +80,13 @@ class SamraiDataReader(BaseReader):
         
         self._step = self._steps[0]
         
+        if summary_cache_size < 1:
+            raise RuntimeError('Size of the cache of the summary files should be at least 1!')
+        
+        self._comm = comm
+        self._summary_cache = collections.OrderedDict()
+        self._summary_cache_size = summary_cache_size
+        
         self._basic_info = {}
         self._readSummary(self._step)
         
@@ -90,6 +123,13 @@ class SamraiDataReader(BaseReader):
             self._upsampler = Lagrange_upsampler.LagrangeUpsampler('fourth_order', data_order=self._data_order)
         elif upsampling_method == 'sixth_order_Lagrange':
             self._upsampler = Lagrange_upsampler.LagrangeUpsampler('sixth_order', data_order=self._data_order)
+        elif upsampling_method == 'third_order_conservative':
+            self._upsampler = conservative_upsampler.ConservativeUpsampler('third_order', data_order=self._data_order)
+        elif upsampling_method == 'fifth_order_conservative':
+            self._upsampler = conservative_upsampler.ConservativeUpsampler('fifth_order', data_order=self._data_order)
+        elif upsampling_method == 'fifth_order_WENO':
+            self._upsampler = conservative_upsampler.ConservativeUpsampler('fifth_order_WENO', \
+                data_order=self._data_order)
         else:
             raise RuntimeError("Unknown method '" + upsampling_method + "' for upsampling!")
         
@@ -128,6 +168,10 @@ class SamraiDataReader(BaseReader):
         
         self._data_loaded = False
         self._data = {}
+        
+        # Patch data routed to this reader in place of the files of the file clusters.
+        
+        self._routed_patch_data = None
     
     
     @property
@@ -208,7 +252,38 @@ class SamraiDataReader(BaseReader):
     
     def _readSummary(self, step):
         """
-        Get the basic information, patch extents and path map from the summary file.
+        Get the basic information, patch extents and patch map at a time step from the cache of the recently visited
+        time steps or from the summary file. With a communicator, the summary file is read by the first processor only
+        and the metadata is broadcast to the other processors.
+        """
+        
+        if step in self._summary_cache:
+            summary = self._summary_cache.pop(step)
+        
+        elif self._comm is None:
+            summary = self._readSummaryFile(step)
+        
+        else:
+            summary = self._broadcastSummary(step)
+        
+        # Move the time step to the end of the cache of the most recently visited time steps.
+        
+        self._summary_cache[step] = summary
+        
+        while len(self._summary_cache) > self._summary_cache_size:
+            self._summary_cache.popitem(last = False)
+        
+        self._basic_info, self._patch_extents, self._patch_map = summary
+        
+        # Set the flag for loading summary file to be true.
+        
+        self._summary_loaded = True
+    
+    
+    def _readSummaryFile(self, step):
+        """
+        Private method to read the basic information, patch extents and patch map from the summary file at a time
+        step.
         """
         
         # Open the summary file.
@@ -216,69 +291,114 @@ class SamraiDataReader(BaseReader):
         summary_file_path = self._full_viz_folder_paths[step] + '/' + 'summary.samrai'
         f_summary = h5py.File(summary_file_path, 'r')
         
-        # Clear metadata in self._basic_info.
-        
-        self._basic_info = {}
-        
         # Get the basic information.
         
+        info = {}
+        
         basic_info = f_summary['BASIC_INFO']
         
         # Get the number of file clusters.
-        self._basic_info['num_file_clusters'] = basic_info['number_file_clusters'].value[0]
+        info['num_file_clusters'] = basic_info['number_file_clusters'].value[0]
         
         # Get the time and dimension of the data.
         
-        self._basic_info['t'] = basic_info['time'].value[0]
-        self._basic_info['t_dump'] = basic_info['time_of_dump'].value[0]
-        self._basic_info['n'] = basic_info['time_step_number'].value[0]
-        self._basic_info['dim'] = basic_info['number_dimensions_of_problem'].value[0]
+        info['t'] = basic_info['time'].value[0]
+        info['t_dump'] = basic_info['time_of_dump'].value[0]
+        info['n'] = basic_info['time_step_number'].value[0]
+        info['dim'] = basic_info['number_dimensions_of_problem'].value[0]
         
         # Get and check the grid type.
         
-        self._basic_info['grid_type'] = basic_info['grid_type'].value[0]
+        info['grid_type'] = basic_info['grid_type'].value[0]
         
-        if numpy.char.strip(self._basic_info['grid_type']) != 'CARTESIAN':
+        if numpy.char.strip(info['grid_type']) != 'CARTESIAN':
             raise RuntimeError("Grid type other than 'CARTESIAN' not supported!")
         
         # Get the number of levels and number of patches at different levels.
         
-        self._basic_info['num_levels'] = basic_info['number_levels'].value[0]
-        self._basic_info['num_patches'] = basic_info['number_patches_at_level'].value
-        self._basic_info['num_global_patches'] = basic_info['number_global_patches'].value[0]
+        info['num_levels'] = basic_info['number_levels'].value[0]
+        info['num_patches'] = basic_info['number_patches_at_level'].value
+        info['num_global_patches'] = basic_info['number_global_patches'].value[0]
         
         # Get the ratios to coarser levels at different levels.
         
-        self._basic_info['ratios_to_coarser_levels'] = basic_info['ratios_to_coarser_levels'].value
+        info['ratios_to_coarser_levels'] = basic_info['ratios_to_coarser_levels'].value
         
         # Get the variable names, number of variables and number of components in each variable.
         
-        self._basic_info['var_names'] = basic_info['var_names'].value
-        self._basic_info['num_variables'] = basic_info['number_visit_variables'].value[0]
-        self._basic_info['num_var_components'] = basic_info['var_number_components'].value
+        info['var_names'] = basic_info['var_names'].value
+        info['num_variables'] = basic_info['number_visit_variables'].value[0]
+        info['num_var_components'] = basic_info['var_number_components'].value
         
         # Get the geometry and check the dimension.
         
-        self._basic_info['x_lo'] = basic_info['XLO'].value
-        self._basic_info['dx'] = basic_info['dx'].value
+        info['x_lo'] = basic_info['XLO'].value
+        info['dx'] = basic_info['dx'].value
         
         extents = f_summary['extents']
         
         # Get the patch extents.
         
-        self._patch_extents = extents['patch_extents'].value
+        patch_extents = extents['patch_extents'].value
         
         # Geth the patch map.
         
-        self._patch_map =  extents['patch_map'].value
-        
-        # Set the flag for loading summary file to be true.
-        
-        self._summary_loaded = True
+        patch_map =  extents['patch_map'].value
         
         # Close the summary file.
         
         f_summary.close()
+        
+        return info, patch_extents, patch_map
+    
+    
+    def _broadcastSummary(self, step):
+        """
+        Private method to read the summary file at a time step on the first processor of the communicator and
+        broadcast the metadata to the other processors. The patch extents and patch map are broadcast as buffers.
+        """
+        
+        # Broadcast the failure to read the summary file as well so that all the processors raise the error.
+        
+        header = None
+        
+        if self._comm.Get_rank() == 0:
+            try:
+                basic_info, patch_extents, patch_map = self._readSummaryFile(step)
+                header = (basic_info, patch_extents.dtype, patch_extents.shape, patch_map.dtype, patch_map.shape)
+            except (IOError, RuntimeError) as error:
+                header = str(error)
+        
+        header = self._comm.bcast(header, root = 0)
+        
+        if isinstance(header, basestring):
+            raise RuntimeError('Cannot read the summary file: ' + header)
+        
+        basic_info, extents_dtype, extents_shape, map_dtype, map_shape = header
+        
+        if self._comm.Get_rank() != 0:
+            patch_extents = numpy.empty(extents_shape, dtype = extents_dtype)
+            patch_map = numpy.empty(map_shape, dtype = map_dtype)
+        
+        patch_extents = numpy.ascontiguousarray(patch_extents)
+        patch_map = numpy.ascontiguousarray(patch_map)
+        
+        self._comm.Bcast(patch_extents.view(numpy.uint8), root = 0)
+        self._comm.Bcast(patch_map.view(numpy.uint8), root = 0)
+        
+        return basic_info, patch_extents, patch_map
+    
+    
+    def setCommunicator(self, comm):
+        """
+        Set the communicator of the processors sharing this reader. The summary file at each time step is then read by
+        the first processor only and the metadata is broadcast to the other processors. All the processors of the
+        communicator have to change the time step together.
+        
+        comm : mpi4py communicator object or None to read the summary file on every processor
+        """
+        
+        self._comm = comm
     
     
     def getBasicInfo(self):
@@ -314,6 +434,147 @@ class SamraiDataReader(BaseReader):
         return self._patch_map
     
     
+    def getPatchesInSubdomain(self, lo_subdomain, hi_subdomain, num_ghosts = None):
+        """
+        Get the global indices of the patches at all levels that are needed to read the combined data in a
+        sub-domain.
+        
+        lo_subdomain : lower indices of the sub-domain at the finest level
+        hi_subdomain : upper indices of the sub-domain at the finest level
+        num_ghosts : number of ghost cells of the sub-domain in each direction
+        """
+        
+        dim = self._basic_info['dim']
+        
+        if num_ghosts is None:
+            num_ghosts = numpy.zeros(dim, dtype = numpy.int)
+        
+        if len(num_ghosts) < dim:
+            raise RuntimeError('Dimension of num_ghosts is not correct!')
+        
+        lo_subdomain = numpy.asarray(lo_subdomain[0:dim])
+        hi_subdomain = numpy.asarray(hi_subdomain[0:dim])
+        num_ghosts = numpy.asarray(num_ghosts[0:dim])
+        
+        ratios_to_finest_level, domain_shape_level, lo_subdomain_level, hi_subdomain_level = \
+            self._getSubdomainAtAllLevels(lo_subdomain, hi_subdomain, num_ghosts)
+        
+        return self._getPatchesOverlappingSubdomain(lo_subdomain_level, hi_subdomain_level, domain_shape_level)
+    
+    
+    def getPatchDataSizes(self, var_names):
+        """
+        Get the number of values of all the components of several variables in each patch.
+        """
+        
+        dim = self._basic_info['dim']
+        
+        num_components = len(self._getComponentNames(var_names))
+        
+        patch_shapes = self._patch_extents['upper'][:, 0:dim] - self._patch_extents['lower'][:, 0:dim] + 1
+        
+        return numpy.prod(patch_shapes, axis = 1)*num_components
+    
+    
+    def readPatchData(self, global_patch_indices, var_names):
+        """
+        Read the data of several variables in some patches at the current time step. The file of each file cluster
+        is opened only once.
+        
+        global_patch_indices : global indices of the patches to read
+        var_names : names of the variables to read
+        
+        Return a dictionary with the data of all the components of the variables in each patch flattened and
+        concatenated in a single array.
+        """
+        
+        if isinstance(var_names, basestring):
+            var_names = (var_names,)
+        
+        global_patch_indices = numpy.asarray(global_patch_indices, dtype = numpy.int)
+        
+        component_names = self._getComponentNames(var_names)
+        patch_data_sizes = self.getPatchDataSizes(var_names)
+        
+        file_clusters = self._patch_map['file_cluster_number'][global_patch_indices]
+        
+        patch_data = {}
+        
+        for file_cluster_num in numpy.unique(file_clusters):
+            f_input = h5py.File(self._getFileClusterPath(file_cluster_num), 'r')
+            file_cluster = f_input['processor.' + str(file_cluster_num).zfill(self._processor_zero_padding_length)]
+            
+            for global_patch_idx in global_patch_indices[file_clusters == file_cluster_num]:
+                level_num = self._patch_map['level_number'][global_patch_idx]
+                patch_num = self._patch_map['patch_number'][global_patch_idx]
+                
+                file_cluster_patch = \
+                    file_cluster['level.' + str(level_num).zfill(5)]['patch.' + str(patch_num).zfill(5)]
+                
+                data = numpy.empty(patch_data_sizes[global_patch_idx], dtype = numpy.float64)
+                num_values = data.shape[0]/len(component_names)
+                
+                for component_idx in range(len(component_names)):
+                    data[component_idx*num_values:(component_idx + 1)*num_values] = \
+                        file_cluster_patch[component_names[component_idx]][()]
+                
+                patch_data[global_patch_idx] = data
+            
+            f_input.close()
+        
+        return patch_data
+    
+    
+    def setRoutedPatchData(self, patch_data, var_names = None):
+        """
+        Set the data of several variables in the patches routed to this reader (e.g. by a parallel reader) that is
+        used in place of the files of the file clusters to read the combined data. The routed patch data is cleared
+        when patch_data is None.
+        
+        patch_data : dictionary with the data of the patches in the format returned by readPatchData
+        var_names : names of the variables in the patch data
+        """
+        
+        if patch_data is None:
+            self._routed_patch_data = None
+            return
+        
+        if isinstance(var_names, basestring):
+            var_names = (var_names,)
+        
+        component_names = self._getComponentNames(var_names)
+        
+        # Create the groups of all the file clusters and levels.
+        
+        self._routed_patch_data = {}
+        
+        for file_cluster_num in range(self._basic_info['num_file_clusters']):
+            file_cluster = {}
+            for level_num in range(self._basic_info['num_levels']):
+                file_cluster['level.' + str(level_num).zfill(5)] = {}
+            
+            self._routed_patch_data[file_cluster_num] = _RoutedFileCluster( \
+                {'processor.' + str(file_cluster_num).zfill(self._processor_zero_padding_length): file_cluster})
+        
+        # Split the data of each patch into the datasets of the components.
+        
+        for global_patch_idx, data in patch_data.items():
+            file_cluster_num = self._patch_map['file_cluster_number'][global_patch_idx]
+            level_num = self._patch_map['level_number'][global_patch_idx]
+            patch_num = self._patch_map['patch_number'][global_patch_idx]
+            
+            num_values = data.shape[0]/len(component_names)
+            
+            file_cluster_patch = {}
+            for component_idx in range(len(component_names)):
+                file_cluster_patch[component_names[component_idx]] = \
+                    data[component_idx*num_values:(component_idx + 1)*num_values]
+            
+            file_cluster = self._routed_patch_data[file_cluster_num][ \
+                'processor.' + str(file_cluster_num).zfill(self._processor_zero_padding_length)]
+            file_cluster['level.' + str(level_num).zfill(5)]['patch.' + str(patch_num).zfill(5)] = file_cluster_patch
+    
+    
     def getData(self, var_name):
         """
         Return the loaded data.
@@ -899,16 +1160,11 @@ class SamraiDataReader(BaseReader):
         
         periodic_dimensions = self._periodic_dimensions
         
-        # Get the number of file clusters.
-        
-        num_file_clusters = self._basic_info['num_file_clusters']
-        
         # Get the dimension of the problem, number of levels and number of patches.
         
         dim = self._basic_info['dim']
         num_levels = self._basic_info['num_levels']
         num_patches = self._basic_info['num_patches']
-        num_patches_root_level = num_patches[0]
         
         # Get the number of ghost cells.
         
@@ -955,86 +1211,12 @@ class SamraiDataReader(BaseReader):
                 for component_idx in range(0, var_num_components[var_name]):
                     var_component_names[var_name][component_idx] = var_name + '.' + str(component_idx).zfill(2)
         
-        # Get the refinement ratios from different levels to finest level.
-        
-        ratios_to_coarser_levels = self._basic_info['ratios_to_coarser_levels']
-        ratios_to_finest_level = numpy.empty(ratios_to_coarser_levels.shape, dtype = ratios_to_coarser_levels.dtype)
-        ratios_to_finest_level[num_levels - 1] = -ratios_to_coarser_levels[0]
-        for level_idx in range(num_levels - 2, -1, -1):
-            ratios_to_finest_level[level_idx] = numpy.multiply(ratios_to_coarser_levels[level_idx + 1], \
-                                                ratios_to_finest_level[level_idx + 1])
-        
-        # Get the lower and upper indices of the domain.
-        
-        lo_root_level = self._patch_extents[0][0]
-        hi_root_level = self._patch_extents[0][1]
-        
-        for patch_idx in range(1, num_patches_root_level):
-            lo_root_level = numpy.minimum(lo_root_level, self._patch_extents[patch_idx][0])
-            hi_root_level = numpy.maximum(hi_root_level, self._patch_extents[patch_idx][1])
-        
-        # Refine the the lower and upper indices of the domain to the highest level.
-        
-        lo_root_level_refined = []
-        hi_root_level_refined = []
-        
-        if num_levels == 1:
-            lo_root_level_refined = lo_root_level[0:dim]
-            hi_root_level_refined = hi_root_level[0:dim]
-        
-        else:
-            lo_root_level_refined = numpy.multiply(lo_root_level[0:dim], ratios_to_finest_level[0][0:dim])
-            hi_root_level_refined = numpy.multiply(hi_root_level[0:dim] + numpy.ones(dim, dtype = numpy.int), \
-                ratios_to_finest_level[0][0:dim]) \
-                - numpy.ones(dim, dtype = numpy.int)
-        
-        # Compute the shape of the domain refined to the highest level.
-        
-        domain_shape = hi_root_level_refined[0:dim] - lo_root_level_refined[0:dim] + numpy.ones(dim, dtype = numpy.int)
-        
-        # Check whether the requested sub-domain is inside the computational domain.
-        
-        if numpy.all(numpy.greater_equal(lo_subdomain[0:dim], lo_root_level_refined)) == False:
-            raise RuntimeError('Input sub-domain not inside the computational domain!')
-        if numpy.all(numpy.less_equal(hi_subdomain[0:dim], hi_root_level_refined)) == False:
-            raise RuntimeError('Input sub-domain not inside the computational domain!')
-        
-        # Compute the shape of the domain refined to the highest level.
-        
-        domain_shape = hi_root_level_refined[0:dim] - lo_root_level_refined[0:dim] \
-            + numpy.ones(dim, dtype = lo_root_level_refined.dtype)
-        
-        # Compute the domain shape at each level.
-        
-        domain_shape_level = numpy.empty((num_levels, dim), dtype = domain_shape.dtype)
-        
-        for level_num in range(num_levels - 1):
-            domain_shape_level[level_num] = numpy.divide(domain_shape, ratios_to_finest_level[level_num][0:dim])
-        
-        domain_shape_level[-1] = domain_shape
-        
-        # Get the number of ghost cells required for upsampling.
-        
-        num_ghosts_upsampling = self._upsampler.getNumberOfGhostCells()*numpy.ones(dim, dtype = num_ghosts.dtype)
-        
-        # Compute the lower and upper indices of the sub-domain coarsen to any level.
+        # Get the refinement ratios from different levels to finest level, the domain shape at each level and the
+        # lower and upper indices of the sub-domain coarsen to any level.
         # (including ghost cells requested by user and those for upsampling)
         
-        lo_subdomain_level = numpy.empty((num_levels, dim), dtype = lo_subdomain.dtype)
-        hi_subdomain_level = numpy.empty((num_levels, dim), dtype = hi_subdomain.dtype)
-        
-        for level_num in range(num_levels - 1):
-            num_ghosts_level = (num_ghosts + (ratios_to_finest_level[level_num][0:dim] \
-                - numpy.ones(dim, dtype = num_ghosts.dtype))) / ratios_to_finest_level[level_num][0:dim] \
-                + num_ghosts_upsampling
-            
-            lo_subdomain_level[level_num] = lo_subdomain / ratios_to_finest_level[level_num][0:dim] \
-                - num_ghosts_level
-            hi_subdomain_level[level_num] = hi_subdomain / ratios_to_finest_level[level_num][0:dim] \
-                + num_ghosts_level
-        
-        lo_subdomain_level[-1] = lo_subdomain - num_ghosts[0:dim]
-        hi_subdomain_level[-1] = hi_subdomain + num_ghosts[0:dim]
+        ratios_to_finest_level, domain_shape_level, lo_subdomain_level, hi_subdomain_level = \
+            self._getSubdomainAtAllLevels(lo_subdomain, hi_subdomain, num_ghosts)
         
         # Include the ghost cells in the sub-domain.
         
@@ -1043,347 +1225,10 @@ class SamraiDataReader(BaseReader):
         
         # Determine which file clusters to load.
         
-        file_clusters_to_load = []
+        patches_to_load = self._getPatchesOverlappingSubdomain(lo_subdomain_level, hi_subdomain_level, \
+            domain_shape_level)
         
-        for level_num in range(num_levels):
-            patch_level_start_idx = 0
-            for level_idx in range(0, level_num):
-                patch_level_start_idx = patch_level_start_idx + num_patches[level_idx]
-            
-            for patch_idx in range(num_patches[level_num]):
-                global_patch_idx = patch_level_start_idx + patch_idx
-                lo_patch = self._patch_extents[global_patch_idx][0]
-                hi_patch = self._patch_extents[global_patch_idx][1]
-                
-                file_cluster_num = self._patch_map[global_patch_idx][1]
-                
-                # Determine whether the sub-domain overlaps with the patches.
-                
-                if dim == 1:
-                    load_file_cluster = False
-                    
-                    if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                       (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                        load_file_cluster = True
-                    
-                    # Check whether the patches overlap with the ghost cell regions if the domain is periodic.
-                    
-                    if periodic_dimensions[0] == True:
-                        # Check the left boundary.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]):
-                            load_file_cluster = True
-                        
-                        # Check the right boundary.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]):
-                            load_file_cluster = True
-                    
-                    if load_file_cluster and (file_cluster_num not in file_clusters_to_load):
-                        file_clusters_to_load.append(file_cluster_num)
-                
-                elif dim == 2:
-                    load_file_cluster = False
-                    
-                    if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                       (hi_patch[0] >= lo_subdomain_level[level_num][0]) and \
-                       (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                       (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                        load_file_cluster = True
-                    
-                    # Check whether the patches overlap with the ghost cell regions if the domain is periodic.
-                    
-                    if periodic_dimensions[0] == True:
-                        # Check the left edge.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                        
-                        # Check the right edge.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                    
-                    if periodic_dimensions[1] == True:
-                        # Check the bottom edge.
-                        
-                        if (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                                load_file_cluster = True
-                        
-                        # Check the top edge.
-                        
-                        if (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                                load_file_cluster = True
-                    
-                    if (periodic_dimensions[0] == True) and (periodic_dimensions[1] == True):
-                        # Check the left-bottom corner.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]):
-                            load_file_cluster = True
-                        
-                        # Check the left-top corner.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]):
-                            load_file_cluster = True
-                        
-                        # Check the right-bottom corner.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]):
-                            load_file_cluster = True
-                        
-                        # Check the right-top corner.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]):
-                            load_file_cluster = True
-                    
-                    if load_file_cluster and (file_cluster_num not in file_clusters_to_load):
-                        file_clusters_to_load.append(file_cluster_num)
-                
-                elif dim == 3:
-                    load_file_cluster = False
-                    
-                    if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                       (hi_patch[0] >= lo_subdomain_level[level_num][0]) and \
-                       (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                       (hi_patch[1] >= lo_subdomain_level[level_num][1]) and \
-                       (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                       (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                        load_file_cluster = True
-                    
-                    # Check whether the patches overlap with the ghost cell regions if the domain is periodic.
-                    
-                    if periodic_dimensions[0] == True:
-                        # Check the left face.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]) and \
-                               (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                        
-                        # Check the right face.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]) and \
-                               (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                    
-                    if periodic_dimensions[1] == True:
-                        # Check the bottom face.
-                        
-                        if (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]) and \
-                               (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                        
-                        # Check the top face.
-                        
-                        if (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]) and \
-                               (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                    
-                    if periodic_dimensions[2] == True:
-                        # Check the back face.
-                        
-                        if (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]) and \
-                               (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                        
-                        # Check the front face.
-                        
-                        if (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]) and \
-                               (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                    
-                    if (periodic_dimensions[0] == True) and (periodic_dimensions[1] == True):
-                        # Check the left-bottom edge.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]):
-                            if (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                        
-                        # Check the left-top edge.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]):
-                            if (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                        
-                        # Check the right-bottom edge.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]):
-                            if (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                        
-                        # Check the right-top edge.
-        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]):
-                            if (lo_patch[2] <= hi_subdomain_level[level_num][2]) and \
-                               (hi_patch[2] >= lo_subdomain_level[level_num][2]):
-                                load_file_cluster = True
-                    
-                    if (periodic_dimensions[0] == True) and (periodic_dimensions[2] == True):
-                        # Check the left-back edge.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                        
-                        # Check the left-front edge.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                        
-                        # Check the right-back edge.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                        
-                        # Check the right-front edge.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            if (lo_patch[1] <= hi_subdomain_level[level_num][1]) and \
-                               (hi_patch[1] >= lo_subdomain_level[level_num][1]):
-                                load_file_cluster = True
-                    
-                    if (periodic_dimensions[1] == True) and (periodic_dimensions[2] == True):
-                        # Check the bottom-back edge.
-                        
-                        if (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                                load_file_cluster = True
-                        
-                        # Check the bottom-front edge.
-                        
-                        if (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                                load_file_cluster = True
-                        
-                        # Check the top-back edge.
-                        
-                        if (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                                load_file_cluster = True
-                        
-                        # Check the top-front edge.
-                        
-                        if (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            if (lo_patch[0] <= hi_subdomain_level[level_num][0]) and \
-                               (hi_patch[0] >= lo_subdomain_level[level_num][0]):
-                                load_file_cluster = True
-                    
-                    if (periodic_dimensions[0] == True) and \
-                       (periodic_dimensions[1] == True) and \
-                       (periodic_dimensions[2] == True):
-                        # Check the left-bottom-back corner.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the left-top-back corner.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the right-bottom-back corner.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the right-top-back corner.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]) and \
-                           (lo_subdomain_level[level_num][2] <= hi_patch[2] - domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the left-bottom-front corner.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the left-top-front corner.
-                        
-                        if (lo_subdomain_level[level_num][0] <= hi_patch[0] - domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the right-bottom-front corner.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (lo_subdomain_level[level_num][1] <= hi_patch[1] - domain_shape_level[level_num][1]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                        
-                        # Check the right-top-front corner.
-                        
-                        if (hi_subdomain_level[level_num][0] >= lo_patch[0] + domain_shape_level[level_num][0]) and \
-                           (hi_subdomain_level[level_num][1] >= lo_patch[1] + domain_shape_level[level_num][1]) and \
-                           (hi_subdomain_level[level_num][2] >= lo_patch[2] + domain_shape_level[level_num][2]):
-                            load_file_cluster = True
-                    
-                    if load_file_cluster and (file_cluster_num not in file_clusters_to_load):
-                        file_clusters_to_load.append(file_cluster_num)
-                
-                else:
-                    raise RuntimeError('Problem dimension < 1 or > 3 not supported!')
+        file_clusters_to_load = numpy.unique(self._patch_map['file_cluster_number'][patches_to_load])
         
         # Initialize containers to store the data at different levels. The elements in the containers 
         # are initialized as NAN values.
@@ -1409,9 +1254,7 @@ class SamraiDataReader(BaseReader):
         
         if dim == 1:
             for process_idx in file_clusters_to_load:
-                file_name = 'processor_cluster.' + str(process_idx).zfill(self._processor_zero_padding_length) + '.samrai'
-                full_path = self._full_viz_folder_paths[self._step] + '/' + file_name
-                f_input = h5py.File(full_path, 'r')
+                f_input = self._openFileCluster(process_idx)
                 
                 for level_num in range(num_levels):
                     patch_level_start_idx = 0
@@ -1434,7 +1277,7 @@ class SamraiDataReader(BaseReader):
                             
                             for component_idx in range(0, var_num_components[var_name]):
                                 # Get the patch data.
-                                patch_data = file_cluster_patch[var_component_names[var_name][component_idx]].value
+                                patch_data = file_cluster_patch[var_component_names[var_name][component_idx]][()]
                                 
                                 if self._data_order == 'C':
                                     self._loadDataFromPatchToSubdomain( \
@@ -1488,10 +1331,8 @@ class SamraiDataReader(BaseReader):
                 f_input.close()
         
         elif dim == 2:
-            for process_idx in range(0, num_file_clusters):
-                file_name = 'processor_cluster.' + str(process_idx).zfill(self._processor_zero_padding_length) + '.samrai'
-                full_path = self._full_viz_folder_paths[self._step] + '/' + file_name
-                f_input = h5py.File(full_path, 'r')
+            for process_idx in file_clusters_to_load:
+                f_input = self._openFileCluster(process_idx)
                 
                 for level_num in range(num_levels):
                     patch_level_start_idx = 0
@@ -1519,7 +1360,7 @@ class SamraiDataReader(BaseReader):
                             for component_idx in range(0, var_num_components[var_name]):
                                 # Get the patch data.
                                 
-                                patch_data = file_cluster_patch[var_component_names[var_name][component_idx]].value.reshape( \
+                                patch_data = file_cluster_patch[var_component_names[var_name][component_idx]][()].reshape( \
                                     patch_shape, order = 'F')
                                 
                                 if self._data_order == 'C':
@@ -1739,10 +1580,8 @@ class SamraiDataReader(BaseReader):
                 f_input.close()
         
         elif dim == 3:
-            for process_idx in range(0, num_file_clusters):
-                file_name = 'processor_cluster.' + str(process_idx).zfill(self._processor_zero_padding_length) + '.samrai'
-                full_path = self._full_viz_folder_paths[self._step] + '/' + file_name
-                f_input = h5py.File(full_path, 'r')
+            for process_idx in file_clusters_to_load:
+                f_input = self._openFileCluster(process_idx)
                 
                 for level_num in range(num_levels):
                     patch_level_start_idx = 0
@@ -1770,7 +1609,7 @@ class SamraiDataReader(BaseReader):
                             for component_idx in range(0, var_num_components[var_name]):
                                 # Get the patch data and upsample the data to the finest resolution.
                                 
-                                patch_data = file_cluster_patch[var_component_names[var_name][component_idx]].value.reshape( \
+                                patch_data = file_cluster_patch[var_component_names[var_name][component_idx]][()].reshape( \
                                     patch_shape, order = 'F')
                                 
                                 if self._data_order == 'C':
@@ -2806,6 +2645,185 @@ class SamraiDataReader(BaseReader):
         self._data_loaded = True
     
     
+    def _getSubdomainAtAllLevels(self, lo_subdomain, hi_subdomain, num_ghosts):
+        """
+        Private method to get the refinement ratios from different levels to finest level, the domain shape at each
+        level and the lower and upper indices of the sub-domain coarsen to any level (including ghost cells requested
+        by user and those for upsampling).
+        """
+        
+        # Get the dimension of the problem, number of levels and number of patches.
+        
+        dim = self._basic_info['dim']
+        num_levels = self._basic_info['num_levels']
+        num_patches = self._basic_info['num_patches']
+        num_patches_root_level = num_patches[0]
+        
+        # Get the refinement ratios from different levels to finest level.
+        
+        ratios_to_coarser_levels = self._basic_info['ratios_to_coarser_levels']
+        ratios_to_finest_level = numpy.empty(ratios_to_coarser_levels.shape, dtype = ratios_to_coarser_levels.dtype)
+        ratios_to_finest_level[num_levels - 1] = -ratios_to_coarser_levels[0]
+        for level_idx in range(num_levels - 2, -1, -1):
+            ratios_to_finest_level[level_idx] = numpy.multiply(ratios_to_coarser_levels[level_idx + 1], \
+                                                ratios_to_finest_level[level_idx + 1])
+        
+        # Get the lower and upper indices of the domain.
+        
+        lo_root_level = self._patch_extents[0][0]
+        hi_root_level = self._patch_extents[0][1]
+        
+        for patch_idx in range(1, num_patches_root_level):
+            lo_root_level = numpy.minimum(lo_root_level, self._patch_extents[patch_idx][0])
+            hi_root_level = numpy.maximum(hi_root_level, self._patch_extents[patch_idx][1])
+        
+        # Refine the the lower and upper indices of the domain to the highest level.
+        
+        lo_root_level_refined = []
+        hi_root_level_refined = []
+        
+        if num_levels == 1:
+            lo_root_level_refined = lo_root_level[0:dim]
+            hi_root_level_refined = hi_root_level[0:dim]
+        
+        else:
+            lo_root_level_refined = numpy.multiply(lo_root_level[0:dim], ratios_to_finest_level[0][0:dim])
+            hi_root_level_refined = numpy.multiply(hi_root_level[0:dim] + numpy.ones(dim, dtype = numpy.int), \
+                ratios_to_finest_level[0][0:dim]) \
+                - numpy.ones(dim, dtype = numpy.int)
+        
+        # Compute the shape of the domain refined to the highest level.
+        
+        domain_shape = hi_root_level_refined[0:dim] - lo_root_level_refined[0:dim] + numpy.ones(dim, dtype = numpy.int)
+        
+        # Check whether the requested sub-domain is inside the computational domain.
+        
+        if numpy.all(numpy.greater_equal(lo_subdomain[0:dim], lo_root_level_refined)) == False:
+            raise RuntimeError('Input sub-domain not inside the computational domain!')
+        if numpy.all(numpy.less_equal(hi_subdomain[0:dim], hi_root_level_refined)) == False:
+            raise RuntimeError('Input sub-domain not inside the computational domain!')
+        
+        # Compute the shape of the domain refined to the highest level.
+        
+        domain_shape = hi_root_level_refined[0:dim] - lo_root_level_refined[0:dim] \
+            + numpy.ones(dim, dtype = lo_root_level_refined.dtype)
+        
+        # Compute the domain shape at each level.
+        
+        domain_shape_level = numpy.empty((num_levels, dim), dtype = domain_shape.dtype)
+        
+        for level_num in range(num_levels - 1):
+            domain_shape_level[level_num] = numpy.divide(domain_shape, ratios_to_finest_level[level_num][0:dim])
+        
+        domain_shape_level[-1] = domain_shape
+        
+        # Get the number of ghost cells required for upsampling.
+        
+        num_ghosts_upsampling = self._upsampler.getNumberOfGhostCells()*numpy.ones(dim, dtype = num_ghosts.dtype)
+        
+        # Compute the lower and upper indices of the sub-domain coarsen to any level.
+        # (including ghost cells requested by user and those for upsampling)
+        
+        lo_subdomain_level = numpy.empty((num_levels, dim), dtype = lo_subdomain.dtype)
+        hi_subdomain_level = numpy.empty((num_levels, dim), dtype = hi_subdomain.dtype)
+        
+        for level_num in range(num_levels - 1):
+            num_ghosts_level = (num_ghosts + (ratios_to_finest_level[level_num][0:dim] \
+                - numpy.ones(dim, dtype = num_ghosts.dtype))) / ratios_to_finest_level[level_num][0:dim] \
+                + num_ghosts_upsampling
+            
+            lo_subdomain_level[level_num] = lo_subdomain / ratios_to_finest_level[level_num][0:dim] \
+                - num_ghosts_level
+            hi_subdomain_level[level_num] = hi_subdomain / ratios_to_finest_level[level_num][0:dim] \
+                + num_ghosts_level
+        
+        lo_subdomain_level[-1] = lo_subdomain - num_ghosts[0:dim]
+        hi_subdomain_level[-1] = hi_subdomain + num_ghosts[0:dim]
+        
+        return ratios_to_finest_level, domain_shape_level, lo_subdomain_level, hi_subdomain_level
+    
+    
+    def _getPatchesOverlappingSubdomain(self, lo_subdomain_level, hi_subdomain_level, domain_shape_level):
+        """
+        Private method to get the global indices of the patches overlapping with the sub-domain at each level or with
+        the periodic images of the sub-domain.
+        """
+        
+        dim = self._basic_info['dim']
+        num_levels = self._basic_info['num_levels']
+        num_patches = self._basic_info['num_patches']
+        
+        # Get the shifts of the periodic images of the patches in units of the domain shape.
+        
+        shifts = [(-1, 0, 1) if self._periodic_dimensions[i] else (0,) for i in range(dim)]
+        shifts = numpy.array(list(itertools.product(*shifts)), dtype = domain_shape_level.dtype)
+        
+        patches = []
+        
+        patch_level_start_idx = 0
+        for level_num in range(num_levels):
+            patch_level_end_idx = patch_level_start_idx + num_patches[level_num]
+            
+            lo_patches = self._patch_extents['lower'][patch_level_start_idx:patch_level_end_idx, 0:dim]
+            hi_patches = self._patch_extents['upper'][patch_level_start_idx:patch_level_end_idx, 0:dim]
+            
+            overlap = numpy.zeros(num_patches[level_num], dtype = bool)
+            
+            for shift in shifts:
+                offset = shift*domain_shape_level[level_num]
+                
+                overlap |= numpy.all(lo_patches + offset <= hi_subdomain_level[level_num], axis = 1) & \
+                           numpy.all(hi_patches + offset >= lo_subdomain_level[level_num], axis = 1)
+            
+            patches.append(numpy.nonzero(overlap)[0] + patch_level_start_idx)
+            
+            patch_level_start_idx = patch_level_end_idx
+        
+        return numpy.concatenate(patches)
+    
+    
+    def _openFileCluster(self, file_cluster_num):
+        """
+        Private method to open the file of a file cluster. The patch data routed to this reader is returned instead
+        when it is set.
+        """
+        
+        if self._routed_patch_data is not None:
+            return self._routed_patch_data[file_cluster_num]
+        
+        return h5py.File(self._getFileClusterPath(file_cluster_num), 'r')
+    
+    
+    def _getFileClusterPath(self, file_cluster_num):
+        """
+        Private method to get the full path to the file of a file cluster at the current time step.
+        """
+        
+        file_name = 'processor_cluster.' + str(file_cluster_num).zfill(self._processor_zero_padding_length) + '.samrai'
+        
+        return self._full_viz_folder_paths[self._step] + '/' + file_name
+    
+    
+    def _getComponentNames(self, var_names):
+        """
+        Private method to get the names of the datasets of all the components of several variables.
+        """
+        
+        component_names = []
+        
+        for var_name in var_names:
+            var_idx = numpy.where(self._basic_info['var_names'] == var_name)[0][0]
+            num_components = self._basic_info['num_var_components'][var_idx]
+            
+            if num_components == 1:
+                component_names.append(var_name)
+            else:
+                for component_idx in range(0, num_components):
+                    component_names.append(var_name + '.' + str(component_idx).zfill(2))
+        
+        return component_names
+    
+    
     def _loadDataFromPatchToSubdomain(self, \
             lo_subdomain, \
             hi_subdomain, \
@@ -0,0 +1,94 @@
+from mpi4py import MPI
+import numpy
+import os
+import shutil
+import tempfile
+import unittest
+
+from floatpy.parallel import decomposition_cache
+
+class TestDecompositionCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.comm = MPI.COMM_WORLD
+        self.fcomm = self.comm.py2f()
+        
+        self.directory_name = None
+        if self.comm.rank == 0:
+            self.directory_name = tempfile.mkdtemp()
+        self.directory_name = self.comm.bcast(self.directory_name, root=0)
+        
+        self.cache = decomposition_cache.DecompositionCache(os.path.join(self.directory_name, 'cache.json'), \
+            hostname_pattern='test')
+        
+        self.grid_size = (32, 16, 8)
+        self.periodic = numpy.array([True, False, False])
+    
+    
+    def tearDown(self):
+        self.comm.barrier()
+        if self.comm.rank == 0:
+            shutil.rmtree(self.directory_name)
+    
+    
+    def testStoreAndLookup(self):
+        
+        if self.comm.rank == 0:
+            self.assertEqual(self.cache.lookup(4, self.grid_size, self.periodic), None)
+            
+            self.cache.store(4, self.grid_size, self.periodic, (1, 2, 2), timings=[((1, 2, 2), 1.0), ((4, 1, 1), 2.0)])
+            self.assertEqual(self.cache.lookup(4, self.grid_size, self.periodic), (1, 2, 2))
+            self.assertEqual(self.cache.lookup(4, self.grid_size, self.periodic, nghosts=(1, 1, 1)), None)
+            self.assertEqual(self.cache.lookup(2, self.grid_size, self.periodic), None)
+            
+            entry = self.cache.entries()[self.cache.key(4, self.grid_size, self.periodic)]
+            self.assertEqual(entry['decomposition'], [1, 2, 2])
+            self.assertEqual(len(entry['timings']), 2)
+            
+            other_host = decomposition_cache.DecompositionCache(self.cache.filename, hostname_pattern='other')
+            self.assertEqual(other_host.lookup(4, self.grid_size, self.periodic), None)
+            other_host.store(4, self.grid_size, self.periodic, (4, 1, 1))
+            
+            self.assertRaises(ValueError, self.cache.store, 4, self.grid_size, self.periodic, (2, 2, 2))
+            
+            self.assertEqual(self.cache.invalidate(nprocs=2), 0)
+            self.assertEqual(self.cache.invalidate(grid_size=self.grid_size), 1)
+            self.assertEqual(self.cache.lookup(4, self.grid_size, self.periodic), None)
+            self.assertEqual(other_host.lookup(4, self.grid_size, self.periodic), (4, 1, 1))
+            self.assertEqual(len(self.cache.entries()), 1)
+    
+    
+    def testOptimizedDecompositionIsCached(self):
+        
+        nx, ny, nz = self.grid_size
+        
+        gp = decomposition_cache.create_t3d(self.fcomm, nx, ny, nz, self.periodic, cache=self.cache)
+        decomposition = (gp.px(), gp.py(), gp.pz())
+        
+        cached = decomposition_cache.lookup_decomposition(self.comm, self.grid_size, self.periodic, cache=self.cache)
+        self.assertEqual(cached, decomposition)
+        
+        if self.comm.rank == 0:
+            entry = self.cache.entries()[self.cache.key(self.comm.size, self.grid_size, self.periodic)]
+            self.assertTrue(len(entry['timings']) > 0)
+            self.assertTrue(len(entry['timings']) <= decomposition_cache.num_decompositions(self.comm.size))
+    
+    
+    def testPrepopulatedDecomposition(self):
+        
+        nx, ny, nz = self.grid_size
+        decomposition = (1, 1, self.comm.size)
+        
+        if self.comm.rank == 0:
+            self.cache.store(self.comm.size, self.grid_size, self.periodic, decomposition)
+        self.comm.barrier()
+        
+        gp = decomposition_cache.create_t3d(self.fcomm, nx, ny, nz, self.periodic, cache=self.cache)
+        self.assertEqual((gp.px(), gp.py(), gp.pz()), decomposition)
+        
+        gp = decomposition_cache.create_t3d(self.fcomm, nx, ny, nz, self.periodic, px=self.comm.size, py=1, pz=1, cache=False)
+        self.assertEqual((gp.px(), gp.py(), gp.pz()), (self.comm.size, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import unittest
 
 from floatpy.parallel import t3dmod
 from floatpy.derivatives import CompactDifferentiator
+from floatpy.utilities import operator_registry
 
 class TestDifferentiatorCompact(unittest.TestCase):
     
@@ -217,5 +218,271 @@ class TestDifferentiatorCompact(unittest.TestCase):
         self.assertLess(error[0], 5.0e-12, "Incorrect laplacian!")
 
 
+    def testMultiComponentDerivatives(self):
+        """
+        Test the batched derivatives of all the components of data.
+        """
+        
+        data = numpy.empty( tuple(self.chunk_3d_size) + (2,), dtype=numpy.float64, order='F' )
+        data[:,:,:,0] = self.f
+        data[:,:,:,1] = 2.*self.f
+        
+        dfdx = self.der.ddx(data)
+        dfdy = numpy.empty( tuple(self.chunk_3d_size) + (2,), dtype=numpy.float64, order='F' )
+        self.der.ddy(data, dfdy)
+        d2fdz2 = self.der.d2dz2(data)
+        
+        myerror = numpy.zeros(3)
+        for i in range(2):
+            myerror[0] = max(myerror[0], numpy.absolute((i+1.)*self.dfdx_exact - dfdx[:,:,:,i]).max())
+            myerror[1] = max(myerror[1], numpy.absolute((i+1.)*self.dfdy_exact - dfdy[:,:,:,i]).max())
+            myerror[2] = max(myerror[2], numpy.absolute((i+1.)*self.d2fdz2_exact - d2fdz2[:,:,:,i]).max())
+        
+        error = numpy.zeros(3)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+        
+        self.assertLess(error[0], 1.0e-13, "Incorrect batched first derivative in the X direction!")
+        self.assertLess(error[1], 1.0e-13, "Incorrect batched first derivative in the Y direction!")
+        self.assertLess(error[2], 1.0e-11, "Incorrect batched second derivative in the Z direction!")
+        
+        self.assertRaises(RuntimeError, self.der.ddz, data, numpy.empty(tuple(self.chunk_3d_size), order='F'))
+    
+    
+    def testThreadedDerivatives(self):
+        """
+        Test that splitting the lines among OpenMP threads does not change the derivatives.
+        """
+
+        der_threaded = CompactDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), self.order, 3, \
+                                             self.periodic, num_threads=3)
+
+        myerror = numpy.zeros(3)
+        myerror[0] = numpy.absolute(der_threaded.ddx(self.f) - self.der.ddx(self.f)).max()
+        myerror[1] = numpy.absolute(der_threaded.ddy(self.f) - self.der.ddy(self.f)).max()
+        myerror[2] = numpy.absolute(der_threaded.d2dz2(self.f) - self.der.d2dz2(self.f)).max()
+
+        error = numpy.zeros(3)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertEqual(error[0], 0., "Threaded first derivative in the X direction is different from the serial one!")
+        self.assertEqual(error[1], 0., "Threaded first derivative in the Y direction is different from the serial one!")
+        self.assertEqual(error[2], 0., "Threaded second derivative in the Z direction is different from the serial one!")
+
+
+    def testStretchedGrid(self):
+        """
+        Test the first and second derivatives in the non-periodic Y direction on a stretched grid.
+        """
+
+        eta = numpy.linspace(-1., 1., num=self.ny)
+        y_global = numpy.tanh(1.5*eta) / numpy.tanh(1.5) * numpy.pi
+
+        der_stretched = CompactDifferentiator(self.grid_partition, (self.dx, y_global, self.dz), self.order, 3, \
+                                              (True, False, True))
+        self.assertTrue(der_stretched.coordinates[0] is None)
+        self.assertEqual(numpy.absolute(der_stretched.coordinates[1] - y_global).max(), 0.)
+
+        y = y_global[self.chunk_3d_lo[1]:self.chunk_3d_hi[1]+1].reshape(1, -1, 1)
+        f = numpy.asfortranarray( numpy.cos(self.omega*self.x) * numpy.sin(self.omega*y) * numpy.cos(self.omega*self.z) )
+        dfdy_exact = self.omega * numpy.cos(self.omega*self.x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*self.z)
+
+        myerror = numpy.zeros(2)
+        myerror[0] = numpy.absolute(der_stretched.ddy(f) - dfdy_exact).max()
+        myerror[1] = numpy.absolute(der_stretched.d2dy2(f) + self.omega**2 * f).max()
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 1.0e-4, "Incorrect first derivative in the Y direction on a stretched grid!")
+        self.assertLess(error[1], 1.0e-2, "Incorrect second derivative in the Y direction on a stretched grid!")
+
+        self.assertRaises(RuntimeError, CompactDifferentiator, self.grid_partition, (self.dx, y_global, self.dz), \
+                          self.order, 3, self.periodic)
+        self.assertRaises(RuntimeError, CompactDifferentiator, self.grid_partition, (self.dx, y_global[::-1], self.dz), \
+                          self.order, 3, (True, False, True))
+
+
+    def testSharedOperators(self):
+        """
+        Test that differentiators with the same schemes share the derivative objects but keep their own settings.
+        """
+
+        registry = operator_registry.default_registry()
+        num_operators = registry.num_operators
+
+        der_shared = CompactDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), self.order, 3, \
+                                           self.periodic, num_threads=2, block_size=0)
+        self.assertEqual(registry.num_operators, num_operators, "Derivative objects are not shared!")
+
+        der_other = CompactDifferentiator(self.grid_partition, (self.dx, self.dy, 2.*self.dz), self.order, 3, \
+                                          self.periodic)
+        self.assertEqual(registry.num_operators, num_operators + 1)
+
+        myerror = numpy.zeros(2)
+        myerror[0] = numpy.absolute(der_shared.ddy(self.f) - self.der.ddy(self.f)).max()
+        myerror[1] = numpy.absolute(2.*der_other.ddz(self.f) - self.dfdz_exact).max()
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertEqual(error[0], 0., "Derivative with shared derivative objects is different!")
+        self.assertLess(error[1], 5.0e-14, "Incorrect first derivative in the Z direction with a different grid spacing!")
+        self.assertEqual(self.der.num_threads, 1)
+
+
+    def testPencilAligned(self):
+        """
+        Test the derivatives on a decomposition aligned with the X and Y pencils where the transposes are bypassed.
+        """
+
+        grid_partition = t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic, px_=1, py_=1, pz_=self.comm.size)
+
+        der_aligned = CompactDifferentiator(grid_partition, (self.dx, self.dy, self.dz), self.order, 3, self.periodic)
+        self.assertEqual(der_aligned.pencil_aligned, (True, True, self.comm.size == 1))
+
+        chunk_3d_lo = numpy.zeros(3, dtype=numpy.int32, order='F')
+        chunk_3d_hi = numpy.zeros(3, dtype=numpy.int32, order='F')
+        grid_partition.get_st3d(chunk_3d_lo)
+        grid_partition.get_en3d(chunk_3d_hi)
+
+        x = numpy.linspace(0., 2.*numpy.pi, num=self.nx+1)[chunk_3d_lo[0]-1:chunk_3d_hi[0]]
+        y = numpy.linspace(0., 2.*numpy.pi, num=self.ny+1)[chunk_3d_lo[1]-1:chunk_3d_hi[1]]
+        z = numpy.linspace(0., 2.*numpy.pi, num=self.nz+1)[chunk_3d_lo[2]-1:chunk_3d_hi[2]]
+        x, y, z = numpy.meshgrid(x, y, z, indexing='ij')
+
+        f = numpy.asfortranarray( numpy.sin(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z) )
+        dfdx_exact =  self.omega * numpy.cos(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z)
+        dfdy_exact = -self.omega * numpy.sin(self.omega*x) * numpy.sin(self.omega*y) * numpy.cos(self.omega*z)
+
+        dfdy = numpy.empty(f.shape + (2,), dtype=numpy.float64, order='F')
+        der_aligned.ddy(f, dfdy[:, :, :, 1])
+
+        f_c = numpy.empty(f.shape + (2,), dtype=numpy.float64, order='F')
+        f_c[:, :, :, 0] = f
+        f_c[:, :, :, 1] = 2.*f
+
+        myerror = numpy.zeros(5)
+        myerror[0] = numpy.absolute(der_aligned.ddx(f) - dfdx_exact).max()
+        myerror[1] = numpy.absolute(dfdy[:, :, :, 1] - dfdy_exact).max()
+        myerror[2] = numpy.absolute(der_aligned.d2dx2(f) + self.omega**2 * f).max()
+        myerror[3] = numpy.absolute(der_aligned.ddx(f_c)[:, :, :, 1] - 2.*dfdx_exact).max()
+        myerror[4] = numpy.absolute(der_aligned.ddy(f_c, component_idx=1) - 2.*dfdy_exact).max()
+
+        error = numpy.zeros(5)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 5.0e-14, "Incorrect pencil aligned first derivative in the X direction!")
+        self.assertLess(error[1], 5.0e-14, "Incorrect pencil aligned first derivative in the Y direction!")
+        self.assertLess(error[2], 5.0e-12, "Incorrect pencil aligned second derivative in the X direction!")
+        self.assertLess(error[3], 1.0e-13, "Incorrect pencil aligned batched derivative in the X direction!")
+        self.assertLess(error[4], 1.0e-13, "Incorrect pencil aligned component derivative in the Y direction!")
+
+
+    def testInPlaceDerivatives(self):
+        """
+        Test the derivatives stored in place of the data, including the pencil aligned directions.
+        """
+
+        grid_partition = t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic, px_=1, py_=1, pz_=self.comm.size)
+
+        chunk_3d_lo = numpy.zeros(3, dtype=numpy.int32, order='F')
+        chunk_3d_hi = numpy.zeros(3, dtype=numpy.int32, order='F')
+        grid_partition.get_st3d(chunk_3d_lo)
+        grid_partition.get_en3d(chunk_3d_hi)
+
+        x = numpy.linspace(0., 2.*numpy.pi, num=self.nx+1)[chunk_3d_lo[0]-1:chunk_3d_hi[0]]
+        y = numpy.linspace(0., 2.*numpy.pi, num=self.ny+1)[chunk_3d_lo[1]-1:chunk_3d_hi[1]]
+        z = numpy.linspace(0., 2.*numpy.pi, num=self.nz+1)[chunk_3d_lo[2]-1:chunk_3d_hi[2]]
+        x, y, z = numpy.meshgrid(x, y, z, indexing='ij')
+
+        f = numpy.asfortranarray( numpy.sin(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z) )
+
+        f_c = numpy.empty(f.shape + (2,), dtype=numpy.float64, order='F')
+        f_c[:, :, :, 0] = f
+        f_c[:, :, :, 1] = 2.*f
+
+        myerror = numpy.zeros(2)
+        for order in (6, 10):
+            der_aligned = CompactDifferentiator(grid_partition, (self.dx, self.dy, self.dz), (order, order, order), 3, \
+                                                self.periodic)
+            names = ('ddx', 'ddy', 'ddz') if order == 6 else ('ddx', 'ddy', 'ddz', 'd2dx2', 'd2dy2', 'd2dz2')
+            for name in names:
+                method = getattr(der_aligned, name)
+
+                g = f.copy(order='F')
+                method(g, g)
+                myerror[0] = max(myerror[0], numpy.absolute(g - method(f)).max())
+
+                g_c = f_c.copy(order='F')
+                method(g_c, g_c)
+                myerror[1] = max(myerror[1], numpy.absolute(g_c - method(f_c)).max())
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertEqual(error[0], 0., "Derivative in place of the data is different from the out of place one!")
+        self.assertEqual(error[1], 0., "Batched derivative in place of the data is different from the out of place one!")
+
+
+    def testVelocityGradient(self):
+        """
+        Test the velocity gradient tensor and the quantities derived from it.
+        """
+
+        c, s = numpy.cos, numpy.sin
+        x, y, z = self.x, self.y, self.z
+
+        u = numpy.empty( tuple(self.chunk_3d_size) + (3,), dtype=numpy.float64, order='F' )
+        u[:,:,:,0] =  s(x)*c(y)*c(z)
+        u[:,:,:,1] = -c(x)*s(y)*c(z)
+        u[:,:,:,2] =  s(x)*s(y)
+
+        A_exact = numpy.zeros( tuple(self.chunk_3d_size) + (3, 3), dtype=numpy.float64, order='F' )
+        A_exact[:,:,:,0,0] =  c(x)*c(y)*c(z)
+        A_exact[:,:,:,0,1] = -s(x)*s(y)*c(z)
+        A_exact[:,:,:,0,2] = -s(x)*c(y)*s(z)
+        A_exact[:,:,:,1,0] =  s(x)*s(y)*c(z)
+        A_exact[:,:,:,1,1] = -c(x)*c(y)*c(z)
+        A_exact[:,:,:,1,2] =  c(x)*s(y)*s(z)
+        A_exact[:,:,:,2,0] =  c(x)*s(y)
+        A_exact[:,:,:,2,1] =  s(x)*c(y)
+
+        A = self.der.velocity_gradient(u)
+
+        A_out = numpy.empty( tuple(self.chunk_3d_size) + (3, 3), dtype=numpy.float64, order='F' )
+        self.der.velocity_gradient(u, gradient=A_out)
+
+        S = 0.5*(A_exact + numpy.swapaxes(A_exact, 3, 4))
+        W = 0.5*(A_exact - numpy.swapaxes(A_exact, 3, 4))
+
+        vorticity_exact = numpy.empty( tuple(self.chunk_3d_size) + (3,), dtype=numpy.float64 )
+        vorticity_exact[:,:,:,0] = A_exact[:,:,:,2,1] - A_exact[:,:,:,1,2]
+        vorticity_exact[:,:,:,1] = A_exact[:,:,:,0,2] - A_exact[:,:,:,2,0]
+        vorticity_exact[:,:,:,2] = A_exact[:,:,:,1,0] - A_exact[:,:,:,0,1]
+
+        Q_exact = 0.5*((W**2).sum(axis=(3, 4)) - (S**2).sum(axis=(3, 4)))
+        strain_exact = numpy.sqrt(2.*(S**2).sum(axis=(3, 4)))
+
+        myerror = numpy.zeros(6)
+        myerror[0] = numpy.absolute(A - A_exact).max()
+        myerror[1] = numpy.absolute(A_out - A_exact).max()
+        myerror[2] = numpy.absolute(self.der.vorticity(velocity_gradient=A) - vorticity_exact).max()
+        myerror[3] = numpy.absolute(self.der.dilatation(u)).max()
+        myerror[4] = numpy.absolute(self.der.q_criterion(velocity_gradient=A) - Q_exact).max()
+        myerror[5] = numpy.absolute(self.der.strain_rate_magnitude(velocity_gradient=A) - strain_exact).max()
+
+        error = numpy.zeros(6)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 5.0e-14, "Incorrect velocity gradient!")
+        self.assertLess(error[1], 5.0e-14, "Incorrect velocity gradient in the given output!")
+        self.assertLess(error[2], 1.0e-13, "Incorrect vorticity!")
+        self.assertLess(error[3], 1.0e-13, "Incorrect dilatation!")
+        self.assertLess(error[4], 1.0e-13, "Incorrect Q-criterion!")
+        self.assertLess(error[5], 1.0e-13, "Incorrect strain-rate magnitude!")
+
+        self.assertRaises(RuntimeError, self.der.vorticity)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,151 @@
+from mpi4py import MPI
+import numpy
+import unittest
+
+from floatpy.parallel import t3dmod
+from floatpy.derivatives import ExplicitDifferentiator, ParallelExplicitDifferentiator
+
+class TestDifferentiatorExplicitParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.nx, self.ny, self.nz = 24, 20, 16
+        self.order = (4, 6, 2)
+        self.dx, self.dy, self.dz = 0.1, 0.2, 0.3
+
+        self.comm = MPI.COMM_WORLD
+        self.fcomm = self.comm.py2f()
+        self.periodic = numpy.array([False, True, True])
+        self.num_ghosts = numpy.array([3, 3, 3], dtype=numpy.int32)
+
+        # Same random field on all the processors.
+        numpy.random.seed(11)
+        self.f = numpy.asfortranarray(numpy.random.rand(self.nx, self.ny, self.nz, 2))
+
+        self.setGridPartition(t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic, nghosts=self.num_ghosts))
+
+        self.serial = ExplicitDifferentiator((self.dx, self.dy, self.dz), self.order, 3, 'F', backend='numpy')
+
+
+    def setGridPartition(self, grid_partition):
+        """
+        Use the grid partition and the chunk of the data of this processor in it.
+        """
+
+        self.grid_partition = grid_partition
+
+        self.chunk_3d_lo = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.chunk_3d_hi = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.grid_partition.get_st3d(self.chunk_3d_lo)
+        self.grid_partition.get_en3d(self.chunk_3d_hi)
+        self.chunk_3d_lo = self.chunk_3d_lo - 1 # Convert to 0 based indexing
+        self.chunk_3d_hi = self.chunk_3d_hi - 1 # Convert to 0 based indexing
+
+        lo, hi = self.chunk_3d_lo, self.chunk_3d_hi
+        self.chunk = (slice(lo[0], hi[0]+1), slice(lo[1], hi[1]+1), slice(lo[2], hi[2]+1))
+        self.f_c = numpy.asfortranarray(self.f[self.chunk])
+
+
+    def serialDerivative(self, method, component_idx, use_one_sided, periodic):
+        """
+        Derivative of the full data with periodic extensions in the periodic directions.
+        """
+
+        g = 3
+        pad = [ (g, g) if periodic[i] else (0, 0) for i in range(3) ]
+        f = numpy.asfortranarray(numpy.pad(self.f[..., component_idx], pad, mode='wrap'))
+
+        der = getattr(self.serial, method)(f, use_one_sided=use_one_sided)
+
+        interior = tuple([ slice(g, der.shape[i] - g) if periodic[i] else slice(None) for i in range(3) ])
+
+        return der[interior][self.chunk]
+
+
+    def checkDerivatives(self, der, use_one_sided, periodic=None):
+
+        if periodic is None:
+            periodic = self.periodic
+
+        myerror = numpy.zeros(7)
+
+        for i, method in enumerate(('ddx', 'ddy', 'ddz', 'd2dx2', 'd2dy2', 'd2dz2')):
+            result = getattr(der, method)(self.f_c, component_idx=1, use_one_sided=use_one_sided)
+            reference = self.serialDerivative(method, 1, use_one_sided, periodic)
+
+            self.assertTrue(numpy.array_equal(numpy.isnan(result), numpy.isnan(reference)), \
+                "Incorrect NaN boundaries of %s" % method)
+            myerror[i] = numpy.absolute(numpy.nan_to_num(result) - numpy.nan_to_num(reference)).max()
+
+        laplacian = der.laplacian(self.f_c, component_idx=0, use_one_sided=use_one_sided)
+        reference = self.serialDerivative('laplacian', 0, use_one_sided, periodic)
+        myerror[6] = numpy.absolute(numpy.nan_to_num(laplacian) - numpy.nan_to_num(reference)).max()
+
+        error = numpy.zeros(7)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        for i in range(6):
+            self.assertLess(error[i], 1.e-10, "Incorrect parallel explicit derivative %d!" % i)
+        self.assertLess(error[6], 1.e-9, "Incorrect parallel explicit laplacian!")
+
+
+    def testDerivatives(self):
+
+        der = ParallelExplicitDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), self.order, 3, \
+            self.periodic, backend='numpy')
+        self.assertFalse(der.overlap)
+        self.assertEqual(list(der.num_ghosts), [2, 3, 1])
+
+        self.checkDerivatives(der, True)
+        self.checkDerivatives(der, False)
+
+        # All the components at once.
+        dfdy = der.ddy(self.f_c)
+        self.assertEqual(dfdy.shape, self.f_c.shape)
+        self.assertEqual(numpy.absolute(dfdy[..., 1] - der.ddy(self.f_c, component_idx=1)).max(), 0.)
+
+
+    def testOverlap(self):
+
+        der = ParallelExplicitDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), self.order, 3, \
+            self.periodic, overlap=True, backend='numpy')
+        self.assertTrue(der.overlap)
+
+        self.checkDerivatives(der, True)
+
+        der_blocking = ParallelExplicitDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), self.order, 3, \
+            self.periodic, backend='numpy')
+
+        myerror = numpy.array([ numpy.absolute(der.laplacian(self.f_c, component_idx=1, use_one_sided=True) - \
+                                der_blocking.laplacian(self.f_c, component_idx=1, use_one_sided=True)).max() ])
+        error = numpy.zeros(1)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+        self.assertEqual(error[0], 0., "Overlapped halo exchange changes the laplacian!")
+
+
+    def testNonPeriodicDirection(self):
+
+        # The Y direction of the periodic grid partition is split among all the processors and treated as
+        # non-periodic.
+        self.setGridPartition(t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic, \
+                                         nghosts=self.num_ghosts, px_=1, py_=self.comm.size, pz_=1))
+        periodic = (False, False, True)
+
+        for overlap in (False, True):
+            der = ParallelExplicitDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), self.order, 3, \
+                periodic, overlap=overlap, backend='numpy')
+
+            self.checkDerivatives(der, True, periodic)
+            self.checkDerivatives(der, False, periodic)
+
+        self.assertRaises(RuntimeError, ParallelExplicitDifferentiator, self.grid_partition, \
+            (self.dx, self.dy, self.dz), self.order, 3, (True, True, True))
+
+
+    def testNotEnoughGhosts(self):
+
+        self.assertRaises(RuntimeError, ParallelExplicitDifferentiator, self.grid_partition, \
+            (self.dx, self.dy, self.dz), (2, 8, 2), 3, self.periodic)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+from mpi4py import MPI
+import numpy
+import unittest
+
+from floatpy.parallel import t3dmod
+from floatpy.derivatives import CompactDifferentiator, SpectralDifferentiator
+
+class TestDifferentiatorSpectral(unittest.TestCase):
+    
+    def setUp(self):
+        self.nx, self.ny, self.nz = 32, 36, 30
+        self.omega = (3., 5., 2.)
+
+        self.comm = MPI.COMM_WORLD
+        self.fcomm = self.comm.py2f()
+        self.periodic = numpy.array([True, True, True])
+
+        self.dx, self.dy, self.dz = 2.*numpy.pi / self.nx, 2.*numpy.pi / self.ny, 2.*numpy.pi / self.nz
+
+        self.grid_partition = t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic )
+
+        self.chunk_3d_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.chunk_3d_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.chunk_3d_hi   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.grid_partition.get_sz3d(self.chunk_3d_size)
+        self.grid_partition.get_st3d(self.chunk_3d_lo)
+        self.grid_partition.get_en3d(self.chunk_3d_hi)
+        self.chunk_3d_lo = self.chunk_3d_lo - 1 # Convert to 0 based indexing
+        self.chunk_3d_hi = self.chunk_3d_hi - 1 # Convert to 0 based indexing
+
+        self.der = SpectralDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), 3, self.periodic)
+
+        self.x = numpy.linspace(0., 2.*numpy.pi, num=self.nx+1)[self.chunk_3d_lo[0]:self.chunk_3d_hi[0]+1]
+        self.y = numpy.linspace(0., 2.*numpy.pi, num=self.ny+1)[self.chunk_3d_lo[1]:self.chunk_3d_hi[1]+1]
+        self.z = numpy.linspace(0., 2.*numpy.pi, num=self.nz+1)[self.chunk_3d_lo[2]:self.chunk_3d_hi[2]+1]
+
+        self.x, self.y, self.z = numpy.meshgrid(self.x, self.y, self.z, indexing='ij')
+
+        a, b, c = self.omega
+        self.f = numpy.asfortranarray( numpy.sin(a*self.x) * numpy.cos(b*self.y) * numpy.cos(c*self.z) )
+
+        self.dfdx_exact = numpy.asfortranarray(  a * numpy.cos(a*self.x) * numpy.cos(b*self.y) * numpy.cos(c*self.z) )
+        self.dfdy_exact = numpy.asfortranarray( -b * numpy.sin(a*self.x) * numpy.sin(b*self.y) * numpy.cos(c*self.z) )
+        self.dfdz_exact = numpy.asfortranarray( -c * numpy.sin(a*self.x) * numpy.cos(b*self.y) * numpy.sin(c*self.z) )
+
+
+    def testDerivatives(self):
+        """
+        Test the first and second derivatives in all the directions.
+        """
+
+        a, b, c = self.omega
+
+        dfdz = numpy.empty( self.chunk_3d_size, dtype=numpy.float64, order='F' )
+        self.der.ddz(self.f, dfdz)
+
+        myerror = numpy.zeros(6)
+        myerror[0] = numpy.absolute(self.der.ddx(self.f) - self.dfdx_exact).max()
+        myerror[1] = numpy.absolute(self.der.ddy(self.f) - self.dfdy_exact).max()
+        myerror[2] = numpy.absolute(dfdz - self.dfdz_exact).max()
+        myerror[3] = numpy.absolute(self.der.d2dx2(self.f) + a*a*self.f).max()
+        myerror[4] = numpy.absolute(self.der.d2dy2(self.f) + b*b*self.f).max()
+        myerror[5] = numpy.absolute(self.der.d2dz2(self.f) + c*c*self.f).max()
+
+        error = numpy.zeros(6)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        for i in range(3):
+            self.assertLess(error[i], 1.0e-12, "Incorrect spectral first derivative in direction %d!" %i)
+            self.assertLess(error[i+3], 1.0e-11, "Incorrect spectral second derivative in direction %d!" %i)
+
+
+    def testComponents(self):
+        """
+        Test the derivatives of all the components, the divergence and the laplacian.
+        """
+
+        a, b, c = self.omega
+
+        u = numpy.empty(tuple(self.chunk_3d_size) + (3,), dtype=numpy.float64, order='F')
+        u[:,:,:,0] = self.f
+        u[:,:,:,1] = 2.*self.f
+        u[:,:,:,2] = 3.*self.f
+
+        dudy = self.der.ddy(u)
+        self.assertEqual(dudy.shape, u.shape)
+
+        myerror = numpy.zeros(4)
+        myerror[0] = max([ numpy.absolute(dudy[:,:,:,i] - (i+1)*self.dfdy_exact).max() for i in range(3) ])
+        myerror[1] = numpy.absolute(self.der.ddz(u, component_idx=2) - 3.*self.dfdz_exact).max()
+        myerror[2] = numpy.absolute(self.der.divergence(u) - (self.dfdx_exact + 2.*self.dfdy_exact + 3.*self.dfdz_exact)).max()
+        myerror[3] = numpy.absolute(self.der.laplacian(self.f) + (a*a + b*b + c*c)*self.f).max()
+
+        error = numpy.zeros(4)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 1.0e-11, "Incorrect spectral derivative of all the components!")
+        self.assertLess(error[1], 1.0e-11, "Incorrect spectral derivative of a component!")
+        self.assertLess(error[2], 1.0e-11, "Incorrect spectral divergence!")
+        self.assertLess(error[3], 1.0e-10, "Incorrect spectral laplacian!")
+
+
+    def testAccuracy(self):
+        """
+        Test that the spectral derivative of a resolved smooth function is more accurate than the 10th order compact
+        derivative.
+        """
+
+        f = numpy.asfortranarray( numpy.exp(numpy.sin(self.x)) )
+        dfdx_exact = numpy.cos(self.x) * f
+
+        der_compact = CompactDifferentiator(self.grid_partition, (self.dx, self.dy, self.dz), (10, 10, 10), 3, \
+                                            self.periodic)
+
+        myerror = numpy.zeros(2)
+        myerror[0] = numpy.absolute(self.der.ddx(f) - dfdx_exact).max()
+        myerror[1] = numpy.absolute(der_compact.ddx(f) - dfdx_exact).max()
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 1.0e-12, "Incorrect spectral derivative of a smooth function!")
+        self.assertLess(error[0], error[1], "Spectral derivative is less accurate than the compact derivative!")
+
+
+    def testNonPeriodic(self):
+        """
+        Test that non-periodic directions are rejected.
+        """
+
+        self.assertRaises(RuntimeError, SpectralDifferentiator, self.grid_partition, (self.dx, self.dy, self.dz), 3, \
+                          (True, False, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
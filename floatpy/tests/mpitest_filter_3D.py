@@ -135,5 +135,107 @@ class TestFilter(unittest.TestCase):
         self.assertLess(error[0], 1.0e-13, "Incorrect 3D filter!")
     
     
+    def testFilterRepeated(self):
+        """
+        Test the repeated 3D filter of a component into a given output array against repeated filters in each direction.
+        """
+
+        f_c = numpy.empty(tuple(self.chunk_3d_size) + (2,), dtype=numpy.float64, order='F')
+        f_c[:,:,:,0] = 2.*self.f
+        f_c[:,:,:,1] = self.f
+
+        f_tilde_ref = numpy.copy(self.f, order='F')
+        for filter_direction in (self.fil.filter_x, self.fil.filter_y, self.fil.filter_z):
+            for i in range(3):
+                f_tilde_ref = filter_direction(f_tilde_ref)
+
+        f_tilde = numpy.empty( self.chunk_3d_size, dtype=numpy.float64, order='F' )
+        returned = self.fil.filter_all(f_c, f_tilde, component_idx=1, ntimes=3)
+        self.assertTrue(returned is None)
+
+        # Filter in place.
+        f_in_place = numpy.copy(self.f, order='F')
+        self.fil.filter_all(f_in_place, f_in_place, ntimes=3)
+
+        myerror = numpy.zeros(2)
+        myerror[0] = numpy.absolute(f_tilde - f_tilde_ref).max()
+        myerror[1] = numpy.absolute(f_in_place - f_tilde_ref).max()
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertEqual(error[0], 0., "Repeated 3D filter is different from the repeated filters in each direction!")
+        self.assertEqual(error[1], 0., "Repeated 3D filter in place is different from the repeated filters in each direction!")
+
+        self.assertRaises(RuntimeError, self.fil.filter_all, self.f, ntimes=0)
+    
+    
+    def testFilterPencilAligned(self):
+        """
+        Test the filters on a decomposition aligned with the X and Y pencils where the transposes are bypassed.
+        """
+
+        grid_partition = t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic, px_=1, py_=1, pz_=self.comm.size)
+
+        fil_aligned = Filter( grid_partition, self.filter_type, periodic_dimensions=self.periodic )
+        self.assertEqual(fil_aligned.pencil_aligned, (True, True, self.comm.size == 1))
+
+        chunk_3d_lo = numpy.zeros(3, dtype=numpy.int32, order='F')
+        chunk_3d_hi = numpy.zeros(3, dtype=numpy.int32, order='F')
+        grid_partition.get_st3d(chunk_3d_lo)
+        grid_partition.get_en3d(chunk_3d_hi)
+
+        x = numpy.linspace(0., 2.*numpy.pi, num=self.nx+1)[chunk_3d_lo[0]-1:chunk_3d_hi[0]]
+        y = numpy.linspace(0., 2.*numpy.pi, num=self.ny+1)[chunk_3d_lo[1]-1:chunk_3d_hi[1]]
+        z = numpy.linspace(0., 2.*numpy.pi, num=self.nz+1)[chunk_3d_lo[2]-1:chunk_3d_hi[2]]
+        x, y, z = numpy.meshgrid(x, y, z, indexing='ij')
+
+        f = numpy.asfortranarray( numpy.sin(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z) )
+
+        TF_x = getTransferFunction(self.omega * self.dx)
+        TF_y = getTransferFunction(self.omega * self.dy)
+        TF_z = getTransferFunction(self.omega * self.dz)
+
+        f_in_place = numpy.copy(f, order='F')
+        fil_aligned.filter_all(f_in_place, f_in_place, ntimes=2)
+
+        myerror = numpy.zeros(4)
+        myerror[0] = numpy.absolute(fil_aligned.filter_x(f) - TF_x*f).max()
+        myerror[1] = numpy.absolute(fil_aligned.filter_y(f) - TF_y*f).max()
+        myerror[2] = numpy.absolute(fil_aligned.filter_all(f) - TF_x*TF_y*TF_z*f).max()
+        myerror[3] = numpy.absolute(f_in_place - (TF_x*TF_y*TF_z)**2*f).max()
+
+        error = numpy.zeros(4)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 1.0e-13, "Incorrect pencil aligned filter in the X direction!")
+        self.assertLess(error[1], 1.0e-13, "Incorrect pencil aligned filter in the Y direction!")
+        self.assertLess(error[2], 1.0e-13, "Incorrect pencil aligned 3D filter!")
+        self.assertLess(error[3], 1.0e-13, "Incorrect pencil aligned repeated 3D filter in place!")
+    
+    
+    def testFilterThreaded(self):
+        """
+        Test that splitting the lines among OpenMP threads does not change the filtered data.
+        """
+
+        f_tilde = self.fil.filter_all(self.f)
+
+        fil_threaded = Filter( self.grid_partition, self.filter_type, periodic_dimensions=self.periodic, num_threads=3 )
+        self.assertEqual(fil_threaded.num_threads, 3)
+
+        f_tilde_threaded = fil_threaded.filter_all(self.f)
+
+        myerror = numpy.zeros(1)
+        myerror[0] = numpy.absolute(f_tilde_threaded - f_tilde).max()
+
+        error = numpy.zeros(1)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertEqual(error[0], 0., "Threaded filter is different from the serial one!")
+
+        self.assertRaises(RuntimeError, setattr, fil_threaded, 'num_threads', 0)
+    
+    
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,99 @@
+from mpi4py import MPI
+import numpy
+import unittest
+
+from floatpy.parallel import t3dmod
+from floatpy.filters.spectral_filter import SpectralFilter
+
+class TestSpectralFilter(unittest.TestCase):
+    
+    def setUp(self):
+        self.nx, self.ny, self.nz = 32, 32, 24
+
+        self.comm = MPI.COMM_WORLD
+        self.fcomm = self.comm.py2f()
+        self.periodic = numpy.array([True, True, True])
+
+        self.grid_partition = t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic )
+
+        self.chunk_3d_size = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.chunk_3d_lo   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.chunk_3d_hi   = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.grid_partition.get_sz3d(self.chunk_3d_size)
+        self.grid_partition.get_st3d(self.chunk_3d_lo)
+        self.grid_partition.get_en3d(self.chunk_3d_hi)
+        self.chunk_3d_lo = self.chunk_3d_lo - 1 # Convert to 0 based indexing
+        self.chunk_3d_hi = self.chunk_3d_hi - 1 # Convert to 0 based indexing
+
+        self.x = numpy.linspace(0., 2.*numpy.pi, num=self.nx+1)[self.chunk_3d_lo[0]:self.chunk_3d_hi[0]+1]
+        self.y = numpy.linspace(0., 2.*numpy.pi, num=self.ny+1)[self.chunk_3d_lo[1]:self.chunk_3d_hi[1]+1]
+        self.z = numpy.linspace(0., 2.*numpy.pi, num=self.nz+1)[self.chunk_3d_lo[2]:self.chunk_3d_hi[2]+1]
+
+        self.x, self.y, self.z = numpy.meshgrid(self.x, self.y, self.z, indexing='ij')
+
+        # Low wavenumber part kept by the 2/3 sharp filter and high wavenumber part removed by it.
+        self.f_low  = numpy.sin(3.*self.x) * numpy.cos(2.*self.y) * numpy.cos(4.*self.z)
+        self.f_high = numpy.cos(14.*self.x) * numpy.sin(12.*self.y) + numpy.sin(11.*self.z)
+
+        self.f = numpy.asfortranarray(self.f_low + self.f_high)
+
+
+    def testSharpFilter(self):
+        """
+        Test that the sharp filter removes the wavenumbers above the cutoff and keeps the ones below it.
+        """
+
+        fil = SpectralFilter(self.grid_partition, ('sharp', 'sharp', 'sharp'), periodic_dimensions=self.periodic)
+
+        f_tilde = numpy.empty( self.chunk_3d_size, dtype=numpy.float64, order='F' )
+        returned = fil.filter_all(self.f, f_tilde)
+        self.assertTrue(returned is None)
+
+        f_c = numpy.empty(tuple(self.chunk_3d_size) + (2,), dtype=numpy.float64, order='F')
+        f_c[:,:,:,1] = self.f
+
+        myerror = numpy.zeros(3)
+        myerror[0] = numpy.absolute(f_tilde - self.f_low).max()
+        myerror[1] = numpy.absolute(fil.filter_all(f_c, component_idx=1) - self.f_low).max()
+        myerror[2] = numpy.absolute(fil.filter_z(self.f_low + numpy.sin(11.*self.z)) - self.f_low).max()
+
+        error = numpy.zeros(3)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 1.0e-13, "Incorrect sharp spectral filter!")
+        self.assertLess(error[1], 1.0e-13, "Incorrect sharp spectral filter of a component!")
+        self.assertLess(error[2], 1.0e-13, "Incorrect sharp spectral filter in the Z direction!")
+
+
+    def testGaussianFilter(self):
+        """
+        Test the gaussian filter against its transfer function.
+        """
+
+        fil = SpectralFilter(self.grid_partition, ('gaussian', 'gaussian', 'sharp'), periodic_dimensions=self.periodic, \
+                             filter_width=4.)
+
+        f = numpy.asfortranarray( numpy.sin(3.*self.x) * numpy.cos(5.*self.y) * numpy.cos(4.*self.z) )
+
+        TF_x = numpy.exp(-(3.*2.*numpy.pi/self.nx*4.)**2/24.)
+        TF_y = numpy.exp(-(5.*2.*numpy.pi/self.ny*4.)**2/24.)
+
+        self.assertAlmostEqual(fil.transfer_functions[0][3], TF_x, places=14)
+
+        myerror = numpy.zeros(2)
+        myerror[0] = numpy.absolute(fil.filter_x(f) - TF_x*f).max()
+        myerror[1] = numpy.absolute(fil.filter_all(f) - TF_x*TF_y*f).max()
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertLess(error[0], 1.0e-13, "Incorrect gaussian spectral filter in the X direction!")
+        self.assertLess(error[1], 1.0e-13, "Incorrect gaussian spectral filter in all the directions!")
+
+        self.assertRaises(RuntimeError, SpectralFilter, self.grid_partition, ('sharp', 'sharp', 'sharp'), \
+                          periodic_dimensions=(True, True, False))
+        self.assertRaises(RuntimeError, SpectralFilter, self.grid_partition, ('sharp', 'compact', 'sharp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
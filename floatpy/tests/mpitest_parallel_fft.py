@@ -0,0 +1,124 @@
+from mpi4py import MPI
+import numpy
+import unittest
+
+from floatpy.parallel import t3dmod
+from floatpy.parallel import parallel_fft
+
+class TestParallelFFT(unittest.TestCase):
+
+    def setUp(self):
+        self.nx, self.ny, self.nz = 16, 12, 10
+        self.lengths = (2.*numpy.pi, 4.*numpy.pi, 2.*numpy.pi)
+        self.spacing = (self.lengths[0]/self.nx, self.lengths[1]/self.ny, self.lengths[2]/self.nz)
+
+        self.comm = MPI.COMM_WORLD
+        self.fcomm = self.comm.py2f()
+        self.periodic = numpy.array([True, True, True])
+
+        self.grid_partition = t3dmod.t3d(self.fcomm, self.nx, self.ny, self.nz, self.periodic )
+
+        self.chunk_3d_lo = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.chunk_3d_hi = numpy.zeros(3, dtype=numpy.int32, order='F')
+        self.grid_partition.get_st3d(self.chunk_3d_lo)
+        self.grid_partition.get_en3d(self.chunk_3d_hi)
+        self.chunk_3d_lo = self.chunk_3d_lo - 1 # Convert to 0 based indexing
+        self.chunk_3d_hi = self.chunk_3d_hi - 1 # Convert to 0 based indexing
+
+        # Same random field on all the processors.
+        numpy.random.seed(7)
+        self.u = numpy.random.rand(self.nx, self.ny, self.nz, 3) - 0.5
+
+        lo, hi = self.chunk_3d_lo, self.chunk_3d_hi
+        self.u_c = numpy.asfortranarray(self.u[lo[0]:hi[0]+1, lo[1]:hi[1]+1, lo[2]:hi[2]+1, :])
+
+        self.fft = parallel_fft.ParallelFFT(self.grid_partition, self.spacing)
+
+
+    def shellSpectrum(self, u):
+        """
+        Serial shell-binned spectrum of the full data.
+        """
+
+        dk = [ 2.*numpy.pi/self.lengths[i] for i in range(3) ]
+        shape = u.shape[0:3]
+        k = [ numpy.fft.fftfreq(shape[i], d=1./shape[i])*dk[i] for i in range(3) ]
+        kx, ky, kz = numpy.meshgrid(k[0], k[1], k[2], indexing='ij')
+        shells = numpy.rint(numpy.sqrt(kx**2 + ky**2 + kz**2)/min(dk)).astype(numpy.int64).ravel()
+
+        energy = numpy.zeros(shells.max()+1)
+        for ic in range(u.shape[3]):
+            u_hat = numpy.fft.fftn(u[:, :, :, ic])/u[:, :, :, ic].size
+            energy += numpy.bincount(shells, weights=0.5*numpy.absolute(u_hat.ravel())**2, minlength=energy.shape[0])
+
+        return energy/min(dk)
+
+
+    def testForwardBackward(self):
+
+        u_hat = self.fft.forward(self.u_c, 1)
+        lo, hi = self.fft.spectral_pencil
+
+        u_hat_ref = numpy.fft.fftn(self.u[:, :, :, 1])[lo[0]:hi[0]+1, lo[1]:hi[1]+1, lo[2]:hi[2]+1]
+        self.assertEqual(u_hat.shape, u_hat_ref.shape)
+
+        myerror = numpy.array([ numpy.absolute(u_hat - u_hat_ref).max() ])
+        error = numpy.array([ myerror[0] ])
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+        self.assertLess(error[0], 1.e-12, "Incorrect distributed FFT")
+
+        u = self.fft.backward(u_hat)
+        myerror[0] = numpy.absolute(u - self.u_c[:, :, :, 1]).max()
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+        self.assertLess(error[0], 1.e-14, "Incorrect inverse of the distributed FFT")
+
+        kx, ky, kz = self.fft.wavenumbers
+        self.assertEqual(kx.shape, (u_hat.shape[0], 1, 1))
+        self.assertAlmostEqual(ky[0, 1, 0] - ky[0, 0, 0], 0.5, places=14)
+
+
+    def testSpectrum(self):
+
+        k, E = self.fft.spectrum(self.u_c)
+
+        if self.comm.rank == 0:
+            E_ref = self.shellSpectrum(self.u)
+            self.assertLess(numpy.absolute(E[0:E_ref.shape[0]] - E_ref).max(), 1.e-14, "Incorrect shell spectrum")
+            self.assertEqual(numpy.absolute(E[E_ref.shape[0]:]).max() if E.shape[0] > E_ref.shape[0] else 0., 0.)
+
+            # Parseval's theorem.
+            self.assertAlmostEqual(E.sum()*self.fft.shell_width, 0.5*numpy.mean(numpy.sum(self.u**2, axis=3)), \
+                places=13)
+            self.assertAlmostEqual(k[1] - k[0], 0.5, places=14)
+        else:
+            self.assertTrue(k is None and E is None)
+
+        k, E = self.fft.spectrum(self.u_c, component_idx=2)
+        if self.comm.rank == 0:
+            self.assertAlmostEqual(E.sum()*self.fft.shell_width, 0.5*numpy.mean(self.u[:, :, :, 2]**2), places=13)
+
+
+    def testSpectrum1d(self):
+
+        for direction in range(3):
+            k, E = self.fft.spectrum1d(self.u_c, direction, component_idx=0)
+
+            if self.comm.rank == 0:
+                n = self.u.shape[direction]
+                u_hat = numpy.fft.fft(self.u[:, :, :, 0], axis=direction)/n
+                e = numpy.mean(numpy.moveaxis(0.5*numpy.absolute(u_hat)**2, direction, 0).reshape(n, -1), axis=1)
+
+                E_ref = e[0:n//2+1].copy()
+                E_ref[1:(n+1)//2] += e[n-1:n//2:-1]
+                E_ref /= 2.*numpy.pi/self.lengths[direction]
+
+                self.assertEqual(E.shape, E_ref.shape)
+                self.assertLess(numpy.absolute(E - E_ref).max(), 1.e-14, "Incorrect 1D spectrum in direction %d" \
+                    %direction)
+                self.assertAlmostEqual(E.sum()*(k[1] - k[0]), 0.5*numpy.mean(self.u[:, :, :, 0]**2), places=13)
+
+        self.assertRaises(RuntimeError, self.fft.spectrum1d, self.u_c, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 from mpi4py import MPI
 import numpy
 import os
+import shutil
+import tempfile
 import unittest
 
 import floatpy.readers.miranda_reader as mir
@@ -71,6 +73,81 @@ class TestReaderParallel(unittest.TestCase):
         if has_plane:
             rerr = numpy.absolute(rho[ :, :, self.index ] - rho_p).max()
             self.assertEqual(rerr, 0., "Incorrect chunked variable data reader for rho")
+    
+    
+    def testReadDataPlanes(self):
+        
+        # Read full data.
+        
+        self.serial_reader.sub_domain = (0,0,0), (self.serial_reader.domain_size[0]-1, self.serial_reader.domain_size[1]-1, self.serial_reader.domain_size[2]-1)
+        rho,    = self.serial_reader.readData('density')
+        
+        # Read in chunked data.
+        
+        rho_c,        = self.reader.readData('density')
+        
+        # Get planes in all directions with a single collective, from both a contiguous and a non-contiguous array
+        directions = (0, 1, 2, 2)
+        indices = (5, 3, 0, self.serial_reader.domain_size[2]-1)
+        planes = pp.ParallelPlane(self.reader.grid_partition, directions, indices)
+        self.assertEqual(planes.num_planes, 4)
+        
+        for array in (rho_c[self.reader.interior], numpy.asfortranarray(rho_c[self.reader.interior])):
+            has_planes, rho_p = planes.get_planes(array)
+            
+            self.assertEqual(has_planes, self.comm.rank == 0)
+            if has_planes:
+                rerr = numpy.absolute(rho[5, :, :] - rho_p[0]).max()
+                self.assertEqual(rerr, 0., "Incorrect x plane of rho")
+                rerr = numpy.absolute(rho[:, 3, :] - rho_p[1]).max()
+                self.assertEqual(rerr, 0., "Incorrect y plane of rho")
+                rerr = numpy.absolute(rho[:, :, 0] - rho_p[2]).max()
+                self.assertEqual(rerr, 0., "Incorrect first z plane of rho")
+                rerr = numpy.absolute(rho[:, :, -1] - rho_p[3]).max()
+                self.assertEqual(rerr, 0., "Incorrect last z plane of rho")
+        
+        self.assertRaises(RuntimeError, planes.get_plane, rho_c[self.reader.interior])
+    
+    
+    def testWriteDataPlanes(self):
+        
+        # Read full data.
+        
+        self.serial_reader.sub_domain = (0,0,0), (self.serial_reader.domain_size[0]-1, self.serial_reader.domain_size[1]-1, self.serial_reader.domain_size[2]-1)
+        rho,    = self.serial_reader.readData('density')
+        
+        # Read in chunked data.
+        
+        rho_c,        = self.reader.readData('density')
+        
+        directory_name = None
+        if self.comm.rank == 0:
+            directory_name = tempfile.mkdtemp()
+        directory_name = self.comm.bcast(directory_name, root=0)
+        filename = os.path.join(directory_name, 'planes.dat')
+        
+        # Write planes with MPI-IO
+        planes = pp.ParallelPlane(self.reader.grid_partition, 1, (0, 7))
+        planes.write(rho_c[self.reader.interior], filename)
+        self.pp.write(rho_c[self.reader.interior], filename + '.single')
+        
+        self.comm.barrier()
+        
+        if self.comm.rank == 0:
+            nx, ny, nz = self.serial_reader.domain_size
+            
+            data = numpy.fromfile(filename, dtype=numpy.float64)
+            self.assertEqual(data.shape[0], 2*nx*nz)
+            rerr = numpy.absolute(rho[:, 0, :] - data[:nx*nz].reshape((nx, nz), order='F')).max()
+            self.assertEqual(rerr, 0., "Incorrect first written plane of rho")
+            rerr = numpy.absolute(rho[:, 7, :] - data[nx*nz:].reshape((nx, nz), order='F')).max()
+            self.assertEqual(rerr, 0., "Incorrect second written plane of rho")
+            
+            data = numpy.fromfile(filename + '.single', dtype=numpy.float64)
+            rerr = numpy.absolute(rho[:, :, self.index] - data.reshape((nx, ny), order='F')).max()
+            self.assertEqual(rerr, 0., "Incorrect written plane of rho")
+            
+            shutil.rmtree(directory_name)
 
 
 if __name__ == '__main__':
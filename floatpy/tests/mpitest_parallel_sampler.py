@@ -0,0 +1,125 @@
+from mpi4py import MPI
+import numpy
+import os
+import unittest
+
+import floatpy.readers.miranda_reader as mir
+import floatpy.readers.parallel_reader as pdr
+import floatpy.utilities.parallel_sampler as ps
+
+class TestParallelSampler(unittest.TestCase):
+    
+    def setUp(self):
+        self.filename_prefix = os.path.join(os.path.dirname(__file__), 'test_data_miranda/plot.mir')
+        self.serial_reader = mir.MirandaReader(self.filename_prefix, periodic_dimensions=(False,True,True))
+        self.serial_reader.step = 0
+        
+        self.comm = MPI.COMM_WORLD
+        self.num_ghosts = (1, 1, 1)
+        self.reader = pdr.ParallelDataReader( MPI.COMM_WORLD, mir.MirandaReader(self.filename_prefix, periodic_dimensions=(False,True,True)), num_ghosts=self.num_ghosts )
+        self.reader.step = 0
+        
+        self.serial_reader.sub_domain = (0,0,0), (self.serial_reader.domain_size[0]-1, self.serial_reader.domain_size[1]-1, self.serial_reader.domain_size[2]-1)
+        self.rho, = self.serial_reader.readData('density')
+        
+        rho_c, = self.reader.readData('density')
+        self.rho_c = rho_c[self.reader.interior]
+        
+        nx, ny, nz = self.serial_reader.domain_size
+        
+        self.points = [ (0., 0., 0.), (nx-1, ny-1, nz-1), (10.25, 31.5, 32.75), (159.5, 2., 63.) ]
+        self.lines = [ ((0, 5, 7), (nx-1, 5, 7)), ((3, 0, 40), (3, ny-1, 40)), ((100, 33, 0), (100, 33, nz-1)) ]
+        self.boxes = [ ((150, 20, 25), (170, 40, 45)), ((0, 0, 0), (nx-1, ny-1, nz-1)) ]
+    
+    
+    def trilinear(self, data, point):
+        """
+        Trilinear interpolation of the full data at a point in index space.
+        """
+        
+        lo = [ min(int(numpy.floor(point[i])), data.shape[i]-2) for i in range(3) ]
+        t = [ point[i] - lo[i] for i in range(3) ]
+        
+        value = 0.
+        for a in range(2):
+            for b in range(2):
+                for c in range(2):
+                    w = (t[0] if a else 1.-t[0])*(t[1] if b else 1.-t[1])*(t[2] if c else 1.-t[2])
+                    value += w*data[lo[0]+a, lo[1]+b, lo[2]+c]
+        
+        return value
+    
+    
+    def testSample(self):
+        
+        sampler = ps.ParallelSampler(self.reader.grid_partition, points=self.points, lines=self.lines, boxes=self.boxes)
+        self.assertEqual(sampler.num_points, 4)
+        self.assertEqual(sampler.num_lines, 3)
+        self.assertEqual(sampler.num_boxes, 2)
+        
+        has_samples, points, lines, boxes = sampler.sample(self.rho_c)
+        
+        self.assertEqual(has_samples, self.comm.rank == 0)
+        
+        if has_samples:
+            for p in range(len(self.points)):
+                self.assertAlmostEqual(points[p], self.trilinear(self.rho, self.points[p]), places=12, \
+                    msg="Incorrect interpolated probe of rho")
+            
+            self.assertEqual(numpy.absolute(lines[0] - self.rho[:, 5, 7]).max(), 0., "Incorrect x line of rho")
+            self.assertEqual(numpy.absolute(lines[1] - self.rho[3, :, 40]).max(), 0., "Incorrect y line of rho")
+            self.assertEqual(numpy.absolute(lines[2] - self.rho[100, 33, :]).max(), 0., "Incorrect z line of rho")
+            
+            self.assertEqual(numpy.absolute(boxes[0] - self.rho[150:171, 20:41, 25:46]).max(), 0., \
+                "Incorrect box of rho")
+            self.assertEqual(numpy.absolute(boxes[1] - self.rho).max(), 0., "Incorrect full box of rho")
+    
+    
+    def testSampleComponents(self):
+        
+        sampler = ps.ParallelSampler(self.reader.grid_partition, points=self.points, lines=self.lines[0:1], \
+            interpolate=False)
+        
+        data_c = numpy.empty(tuple(self.rho_c.shape) + (2,), dtype=numpy.float64, order='F')
+        data_c[:,:,:,0] = self.rho_c
+        data_c[:,:,:,1] = 2.*self.rho_c
+        
+        has_samples, points, lines, boxes = sampler.sample(data_c)
+        
+        if has_samples:
+            self.assertEqual(points.shape, (4, 2))
+            self.assertEqual(len(boxes), 0)
+            
+            for p in range(len(self.points)):
+                i, j, k = [ int(numpy.floor(x + 0.5)) for x in self.points[p] ]
+                self.assertEqual(points[p, 0], self.rho[i, j, k], "Incorrect nearest probe of component 0")
+                self.assertEqual(points[p, 1], 2.*self.rho[i, j, k], "Incorrect nearest probe of component 1")
+            
+            self.assertEqual(numpy.absolute(lines[0][:, 1] - 2.*self.rho[:, 5, 7]).max(), 0., \
+                "Incorrect x line of component 1")
+    
+    
+    def testPhysicalCoordinates(self):
+        
+        x, y, z = self.serial_reader.readCoordinates()
+        dx = x[1,0,0] - x[0,0,0]
+        dy = y[0,1,0] - y[0,0,0]
+        dz = z[0,0,1] - z[0,0,0]
+        origin = (x[0,0,0], y[0,0,0], z[0,0,0])
+        
+        point = (10.25, 31.5, 32.75)
+        location = (origin[0] + point[0]*dx, origin[1] + point[1]*dy, origin[2] + point[2]*dz)
+        
+        sampler = ps.ParallelSampler(self.reader.grid_partition, points=[location], origin=origin, spacing=(dx, dy, dz))
+        has_samples, points, lines, boxes = sampler.sample(self.rho_c)
+        
+        if has_samples:
+            self.assertAlmostEqual(points[0], self.trilinear(self.rho, point), places=10, \
+                msg="Incorrect probe of rho in physical coordinates")
+        
+        self.assertRaises(ValueError, ps.ParallelSampler, self.reader.grid_partition, points=[(-1., 0., 0.)])
+        self.assertRaises(ValueError, ps.ParallelSampler, self.reader.grid_partition, lines=[((0, 0, 0), (1, 1, 0))])
+
+
+if __name__ == '__main__':
+    unittest.main()
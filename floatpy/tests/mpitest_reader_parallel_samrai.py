@@ -0,0 +1,142 @@
+from mpi4py import MPI
+import numpy
+import os
+import unittest
+
+import floatpy.readers.samrai_reader as sdr
+import floatpy.readers.parallel_reader as pdr
+
+class TestReaderParallelSamrai(unittest.TestCase):
+
+    def setUp(self):
+        self.comm = MPI.COMM_WORLD
+        self.directory_name = os.path.dirname(__file__)
+
+
+    def checkReadData(self, data_name, periodic_dimensions, upsampling_method):
+
+        path = os.path.join(self.directory_name, data_name)
+
+        serial_reader = sdr.SamraiDataReader(path, periodic_dimensions=periodic_dimensions, \
+            upsampling_method=upsampling_method)
+        dim = serial_reader.dimension
+
+        reader = pdr.ParallelDataReader(self.comm, sdr.SamraiDataReader(path, \
+            periodic_dimensions=periodic_dimensions, upsampling_method=upsampling_method))
+
+        # Record the patches read by this processor.
+
+        patches_read = []
+        read_patch_data = reader.serial_reader.readPatchData
+
+        def readPatchData(global_patch_indices, var_names):
+            patches_read.extend(global_patch_indices)
+            return read_patch_data(global_patch_indices, var_names)
+
+        reader.serial_reader.readPatchData = readPatchData
+
+        # Read full data.
+
+        density, velocity = serial_reader.readData(('density', 'velocity'))
+
+        # Read chunked data.
+
+        density_c, velocity_c = reader.readData(('density', 'velocity'))
+
+        lo, hi = reader.interior_chunk
+        chunk = tuple([ slice(lo[i], hi[i]+1) for i in range(dim) ])
+
+        myerror = numpy.zeros(2)
+        myerror[0] = numpy.absolute(density[chunk] - density_c[reader.interior]).max()
+        myerror[1] = numpy.absolute(velocity[chunk] - velocity_c[reader.interior]).max()
+
+        error = numpy.zeros(2)
+        self.comm.Allreduce(myerror, error, op=MPI.MAX)
+
+        self.assertEqual(error[0], 0., "Incorrect chunked density of %s with routed patches!" % data_name)
+        self.assertEqual(error[1], 0., "Incorrect chunked velocity of %s with routed patches!" % data_name)
+
+        # Check that the patches of each file cluster are read by only one processor.
+
+        file_clusters_read = numpy.unique(serial_reader.getPatchMap()['file_cluster_number'][patches_read])
+        self.assertTrue(numpy.all(file_clusters_read % self.comm.Get_size() == self.comm.Get_rank()))
+
+        all_patches_read = self.comm.allgather(sorted(patches_read))
+        num_patches_read = sum([ len(p) for p in all_patches_read ])
+        self.assertEqual(num_patches_read, len(set(sum(all_patches_read, []))))
+
+        # Check that the routed patch data is cleared after reading.
+
+        self.assertTrue(reader.serial_reader._routed_patch_data is None)
+
+
+    def testReadDataAMR(self):
+
+        self.checkReadData('test_data_samrai_AMR', (True, True, False), 'fourth_order_Lagrange')
+        self.checkReadData('test_data_samrai_AMR', (False, False, False), 'fifth_order_WENO')
+
+
+    def testReadData3D(self):
+
+        self.checkReadData('test_data_samrai_3D', (False, True, True), 'constant')
+
+
+    def testSummaryBroadcast(self):
+
+        path = os.path.join(self.directory_name, 'test_data_samrai_AMR')
+
+        serial_reader = sdr.SamraiDataReader(path)
+        reader = pdr.ParallelDataReader(self.comm, sdr.SamraiDataReader(path, summary_cache_size=1))
+
+        # Count the summary files read.
+
+        steps_read = []
+        read_summary_file = reader.serial_reader._readSummaryFile
+
+        def readSummaryFile(step):
+            steps_read.append(step)
+            return read_summary_file(step)
+
+        reader.serial_reader._readSummaryFile = readSummaryFile
+
+        for step in (100, 0):
+            reader.step = step
+            serial_reader.step = step
+
+            self.assertEqual(reader.time, serial_reader.time)
+            self.assertTrue(numpy.array_equal(reader.serial_reader.getPatchExtents(), serial_reader.getPatchExtents()))
+            self.assertTrue(numpy.array_equal(reader.serial_reader.getPatchMap(), serial_reader.getPatchMap()))
+            self.assertTrue(numpy.array_equal(reader.serial_reader.getBasicInfo()['var_names'], \
+                serial_reader.getBasicInfo()['var_names']))
+
+        # Only the first processor reads the summary files.
+
+        if self.comm.Get_rank() == 0:
+            self.assertEqual(steps_read, [100, 0])
+        else:
+            self.assertEqual(steps_read, [])
+
+
+    def testGetPatchesInSubdomain(self):
+
+        path = os.path.join(self.directory_name, 'test_data_samrai_AMR')
+        serial_reader = sdr.SamraiDataReader(path, periodic_dimensions=(False, False, False))
+
+        # All the patches are needed for the full domain.
+
+        lo = (0, 0)
+        hi = tuple(numpy.array(serial_reader.domain_size) - 1)
+        self.assertEqual(list(serial_reader.getPatchesInSubdomain(lo, hi)), range(9))
+
+        # Only the root level patch at the bottom-left corner is needed away from the refined patches.
+
+        self.assertEqual(list(serial_reader.getPatchesInSubdomain((0, 0), (9, 9))), [3])
+
+        # The periodic images are needed with periodic boundaries.
+
+        serial_reader = sdr.SamraiDataReader(path, periodic_dimensions=(True, True, False))
+        self.assertEqual(list(serial_reader.getPatchesInSubdomain((0, 0), (9, 9), num_ghosts=(1, 1))), [0, 1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
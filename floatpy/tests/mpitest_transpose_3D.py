@@ -121,6 +121,35 @@ class TestTranspose3D(unittest.TestCase):
         vel_c = tw.transposeFromPencil(vel_p)
         vel_err = numpy.absolute(vel[lo_c[0]:hi_c[0]+1, lo_c[1]:hi_c[1]+1, lo_c[2]:hi_c[2]+1, :] - vel_c).max()
         self.assertEqual(vel_err, 0.0, "Incorrect transposed data to pencil in z-direction for vector!")
+    
+    
+    def testMemoryReport(self):
+        
+        grid_partition = self.reader.grid_partition
+        
+        sizes = {}
+        for name in ('sz3d', 'szx', 'szy', 'szz'):
+            sizes[name] = numpy.zeros(3, dtype=numpy.int32, order='F')
+            getattr(grid_partition, 'get_' + name)(sizes[name])
+        
+        report = transpose_wrapper.memory_report(grid_partition)
+        
+        # The persistent buffers are sized to the chunk and to the largest pencil.
+        
+        self.assertEqual(report['buffer_3d'], 8*numpy.prod(sizes['sz3d']))
+        self.assertEqual(report['buffer_pencil'], 8*max([numpy.prod(sizes[name]) for name in ('szx', 'szy', 'szz')]))
+        self.assertEqual(report['total'], report['buffer_3d'] + report['buffer_pencil'])
+        
+        # The transposes reuse the buffers.
+        
+        rho_c, = self.reader.readData('density')
+        
+        for direction in range(3):
+            tw = transpose_wrapper.TransposeWrapper(grid_partition, direction=direction, dimension=3)
+            rho_p = tw.transposeToPencil(rho_c)
+            tw.transposeFromPencil(rho_p)
+        
+        self.assertEqual(transpose_wrapper.memory_report(grid_partition), report)
 
 
 if __name__ == '__main__':
@@ -217,6 +217,110 @@ class TestLagrangeUnsampler(unittest.TestCase):
             y_upsampled_sixth_correct[2:-2, 2:-2, :]).max()
         self.assertLess(error_sixth, 1.0e-10, "Incorrect 3D sixth order Lagrange upsampling!")
 
+    
+    
+    def testLagrangeCoefficients(self):
+        """
+        Test the cached tables of the Lagrange coefficients and the upsampling in all the directions with odd and even
+        refine ratios.
+        """
+        
+        coefficients = floatpy.upsampling.Lagrange_upsampler.getLagrangeCoefficients(4, 3)
+        self.assertTrue(coefficients is floatpy.upsampling.Lagrange_upsampler.getLagrangeCoefficients(4, 3))
+        self.assertEqual(coefficients.shape, (3, 4))
+        self.assertEqual(list(coefficients[0]), [0.0, 1.0, 0.0, 0.0])
+        self.assertLess(numpy.absolute(coefficients.sum(axis=1) - 1.0).max(), 1.0e-14)
+        
+        r = numpy.array([2, 3, 4])
+        
+        x = numpy.arange(9.0) + 0.5
+        y = numpy.arange(8.0) + 0.5
+        z = numpy.arange(10.0) + 0.5
+        X, Y, Z = numpy.meshgrid(x, y, z, indexing='ij')
+        data = numpy.asfortranarray(X*X*X + X*Y*Y*Z - Z*Z*Z)
+        
+        x_fine = (numpy.arange(9*r[0]) + 0.5)/r[0]
+        y_fine = (numpy.arange(8*r[1]) + 0.5)/r[1]
+        z_fine = (numpy.arange(10*r[2]) + 0.5)/r[2]
+        X, Y, Z = numpy.meshgrid(x_fine, y_fine, z_fine, indexing='ij')
+        data_correct = X*X*X + X*Y*Y*Z - Z*Z*Z
+        
+        for data_order in ('F', 'C'):
+            upsampler = floatpy.upsampling.Lagrange_upsampler.LagrangeUpsampler(method='fourth_order', \
+                data_order=data_order)
+            upsampled_data = upsampler.upsample(numpy.array(data, order=data_order), r)
+            
+            self.assertTrue(upsampled_data.flags[data_order + '_CONTIGUOUS'])
+            
+            interior = (slice(r[0] + r[0]/2, -r[0] - r[0]/2), slice(r[1] + r[1]/2, -r[1] - (r[1] - 1)/2), \
+                        slice(r[2] + r[2]/2, -r[2] - r[2]/2))
+            
+            self.assertFalse(numpy.any(numpy.isnan(upsampled_data[interior])))
+            self.assertEqual(numpy.isnan(upsampled_data).sum(), upsampled_data.size - upsampled_data[interior].size)
+            
+            error = numpy.absolute(upsampled_data[interior] - data_correct[interior]).max()
+            self.assertLess(error, 1.0e-10, "Incorrect 3D fourth order Lagrange upsampling with mixed refine ratios!")
+    
+    
+    def testUpsamplingOutput(self):
+        """
+        Test the upsampling in a given container and the reuse of the workspace.
+        """
+        
+        r = numpy.array([2, 4, 3])
+        
+        data = numpy.asfortranarray(numpy.random.rand(9, 8, 7, 2))
+        
+        for method in ('constant', 'second_order', 'sixth_order'):
+            upsampler = floatpy.upsampling.Lagrange_upsampler.LagrangeUpsampler(method=method, data_order='F')
+            upsampled_data = upsampler.upsample(data, r, component_idx=1)
+            
+            # Upsample in a view into a larger array. The cells without a full stencil are not modified.
+            
+            combined_data = -numpy.ones((20, 34, 23), order='F')
+            out = combined_data[1:-1, 1:-1, 1:-1]
+            self.assertTrue(upsampler.upsample(data, r, component_idx=1, out=out) is out)
+            
+            is_finite_idx = numpy.isfinite(upsampled_data)
+            self.assertTrue(numpy.array_equal(out[is_finite_idx], upsampled_data[is_finite_idx]))
+            self.assertTrue(numpy.all(out[numpy.logical_not(is_finite_idx)] == -1.0))
+            self.assertTrue(numpy.all(combined_data[0] == -1.0) and numpy.all(combined_data[:, :, -1] == -1.0))
+            
+            self.assertRaises(RuntimeError, upsampler.upsample, data, r, 1, combined_data)
+        
+        # The workspace is not reallocated for smaller data.
+        
+        workspace = list(upsampler._workspace)
+        upsampler.upsample(data[1:, :, :, 0], r)
+        self.assertTrue(upsampler._workspace[0] is workspace[0] and upsampler._workspace[1] is workspace[1])
+    
+    
+    def testUpsamplingConstantOrders(self):
+        """
+        Test the 3D constant upsampling with both data orders against repeated data.
+        """
+        
+        r = numpy.array([2, 3, 4])
+        
+        data = numpy.random.rand(5, 4, 6)
+        data_correct = numpy.repeat(numpy.repeat(numpy.repeat(data, r[0], axis=0), r[1], axis=1), r[2], axis=2)
+        
+        for data_order in ('F', 'C'):
+            upsampler = floatpy.upsampling.Lagrange_upsampler.LagrangeUpsampler(method='constant', data_order=data_order)
+            
+            upsampled_data = upsampler.upsample(numpy.array(data, order=data_order), r)
+            self.assertTrue(upsampled_data.flags[data_order + '_CONTIGUOUS'])
+            self.assertTrue(numpy.array_equal(upsampled_data, data_correct), "Incorrect 3D constant upsampling!")
+            
+            # Component of data with several components.
+            
+            if data_order == 'C':
+                data_components = numpy.array([data, 2.0*data], order='C')
+            else:
+                data_components = numpy.array(numpy.rollaxis(numpy.array([data, 2.0*data]), 0, 4), order='F')
+            
+            upsampled_data = upsampler.upsample(data_components, r, component_idx=1)
+            self.assertTrue(numpy.array_equal(upsampled_data, 2.0*data_correct), "Incorrect 3D constant upsampling!")
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+import numpy
+import unittest
+
+import floatpy.upsampling.conservative_upsampler
+
+class TestConservativeUpsampler(unittest.TestCase):
+
+    def averages(self, num_cells, primitive):
+        """
+        Cell averages of a function on [0, 1] from its primitive function.
+        """
+
+        x = numpy.linspace(0.0, 1.0, num_cells + 1)
+
+        return (primitive(x[1:]) - primitive(x[:-1]))*num_cells
+
+
+    def testConvergence(self):
+        """
+        Test the order of accuracy and the conservation of the 1D upsampling.
+        """
+
+        primitive = lambda x: -numpy.cos(2.0*numpy.pi*x)/(2.0*numpy.pi)
+
+        for method, order in (('third_order', 3), ('fifth_order', 5), ('fifth_order_WENO', 5)):
+            upsampler = floatpy.upsampling.conservative_upsampler.ConservativeUpsampler(method=method, data_order='F')
+            g = upsampler.num_ghosts
+
+            for r in (2, 3, 4):
+                errors = []
+                for n in (32, 64):
+                    data = self.averages(n, primitive)
+                    upsampled_data = upsampler.upsample(data, numpy.array([r]))
+
+                    upsampled_data_correct = self.averages(n*r, primitive)
+                    errors.append(numpy.absolute(upsampled_data[g*r:-g*r] - upsampled_data_correct[g*r:-g*r]).max())
+
+                    self.assertTrue(numpy.all(numpy.isnan(upsampled_data[0:g*r])))
+                    self.assertTrue(numpy.all(numpy.isnan(upsampled_data[-g*r:])))
+
+                    error_conservation = numpy.absolute(upsampled_data[g*r:-g*r].reshape((-1, r)).mean(axis=1) - \
+                        data[g:-g]).max()
+                    self.assertLess(error_conservation, 1.0e-14, "Upsampling with %s is not conservative!" % method)
+
+                rate = numpy.log2(errors[0]/errors[1])
+                self.assertGreater(rate, order - 0.2, "Upsampling with %s converges at rate %g!" % (method, rate))
+
+
+    def testDiscontinuity(self):
+        """
+        Test that the WENO upsampling does not create new extrema at a discontinuity unlike the linear reconstruction.
+        """
+
+        data = numpy.where(numpy.arange(20) < 10, 1.0, 0.0)
+        data[10] = 0.3
+
+        upsampler = floatpy.upsampling.conservative_upsampler.ConservativeUpsampler(method='fifth_order', data_order='F')
+        upsampled_data = upsampler.upsample(data, numpy.array([4]))
+        self.assertGreater(numpy.nanmax(upsampled_data), 1.05)
+
+        upsampler = floatpy.upsampling.conservative_upsampler.ConservativeUpsampler(method='fifth_order_WENO', \
+            data_order='F')
+        upsampled_data = upsampler.upsample(data, numpy.array([4]))
+        self.assertLess(numpy.nanmax(upsampled_data), 1.0 + 1.0e-8)
+        self.assertGreater(numpy.nanmin(upsampled_data), -1.0e-8)
+
+
+    def testUpsampling3D(self):
+        """
+        Test the conservation of the 3D WENO upsampling with both data orders and the upsampling in a given container.
+        """
+
+        r = numpy.array([2, 3, 4])
+
+        data = numpy.asfortranarray(numpy.random.rand(8, 9, 10, 2))
+
+        for data_order in ('F', 'C'):
+            if data_order == 'C':
+                data_order_data = numpy.ascontiguousarray(numpy.rollaxis(data, 3))
+            else:
+                data_order_data = data
+
+            upsampler = floatpy.upsampling.conservative_upsampler.ConservativeUpsampler(method='fifth_order_WENO', \
+                data_order=data_order)
+            upsampled_data = upsampler.upsample(data_order_data, r, component_idx=1)
+
+            self.assertTrue(upsampled_data.flags[data_order + '_CONTIGUOUS'])
+            self.assertEqual(upsampled_data.shape, (16, 27, 40))
+
+            interior = upsampled_data[4:-4, 6:-6, 8:-8]
+            self.assertEqual(numpy.isnan(upsampled_data).sum(), upsampled_data.size - interior.size)
+
+            averages = interior.reshape((4, 2, 5, 3, 6, 4)).mean(axis=5).mean(axis=3).mean(axis=1)
+            self.assertLess(numpy.absolute(averages - data[2:-2, 2:-2, 2:-2, 1]).max(), 1.0e-14)
+
+            out = numpy.zeros((16, 27, 40), order=data_order)
+            upsampler.upsample(data_order_data, r, component_idx=1, out=out)
+            self.assertTrue(numpy.array_equal(out[4:-4, 6:-6, 8:-8], interior))
+            self.assertTrue(numpy.all(out[0:4] == 0.0))
+
+        self.assertRaises(RuntimeError, floatpy.upsampling.conservative_upsampler.ConservativeUpsampler, 'WENO')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import numpy
+import unittest
+
+from floatpy.utilities import data_reshaper
+
+class TestDataReshaper(unittest.TestCase):
+    
+    def setUp(self):
+        self.reshaper = data_reshaper.DataReshaper(2, data_order='F')
+        
+        self.data = numpy.asfortranarray(numpy.random.rand(8, 6, 3))
+    
+    
+    def testViews(self):
+        
+        for ic in range(3):
+            data_3d = self.reshaper.reshapeTo3d(self.data, component_idx=ic)
+            self.assertEqual(data_3d.shape, (8, 6, 1))
+            self.assertTrue(numpy.may_share_memory(data_3d, self.data), "Reshaped component is not a view!")
+            self.assertEqual(numpy.absolute(data_3d[:, :, 0] - self.data[:, :, ic]).max(), 0.)
+        
+        data_2d = self.reshaper.reshapeFrom3d(data_3d, allow_copy=False)
+        self.assertEqual(data_2d.shape, (8, 6))
+        self.assertTrue(numpy.may_share_memory(data_2d, self.data), "Reshaped data is not a view!")
+        
+        self.assertEqual(self.reshaper.num_views, 4)
+        self.assertEqual(self.reshaper.num_copies, 0)
+        self.assertEqual(self.reshaper.num_bytes_copied, 0)
+    
+    
+    def testCopies(self):
+        
+        data_c = numpy.ascontiguousarray(self.data)
+        
+        data_3d = self.reshaper.reshapeTo3d(data_c, component_idx=1)
+        self.assertEqual(numpy.absolute(data_3d[:, :, 0] - self.data[:, :, 1]).max(), 0.)
+        self.assertEqual(self.reshaper.num_copies, 1)
+        self.assertEqual(self.reshaper.num_bytes_copied, 8*6*8)
+        
+        self.assertRaises(RuntimeError, self.reshaper.reshapeTo3d, data_c, component_idx=1, allow_copy=False)
+        
+        self.reshaper.allow_copy = False
+        self.assertRaises(RuntimeError, self.reshaper.reshapeTo3d, data_c, component_idx=1)
+        
+        self.reshaper.resetCounters()
+        self.assertEqual(self.reshaper.num_copies, 0)
+        self.assertEqual(self.reshaper.num_views, 0)
+    
+    
+    def testDataOutput(self):
+        
+        data_output = numpy.empty((8, 6, 1), dtype=numpy.float64, order='F')
+        returned = self.reshaper.reshapeTo3d(self.data, component_idx=2, data_output=data_output)
+        
+        self.assertTrue(returned is data_output)
+        self.assertEqual(numpy.absolute(data_output[:, :, 0] - self.data[:, :, 2]).max(), 0.)
+        
+        data_output = numpy.empty((8, 6), dtype=numpy.float64, order='F')
+        self.reshaper.reshapeFrom3d(self.data[:, :, 1:2], data_output=data_output)
+        self.assertEqual(numpy.absolute(data_output - self.data[:, :, 1]).max(), 0.)
+        
+        self.assertRaises(RuntimeError, self.reshaper.reshapeFrom3d, self.data[:, :, 1:2], \
+            data_output=numpy.empty((8, 5), order='F'))
+
+
+if __name__ == '__main__':
+    unittest.main()
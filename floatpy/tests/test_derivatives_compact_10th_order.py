@@ -219,5 +219,115 @@ class TestDerivativesCompact10th(unittest.TestCase):
         error = numpy.absolute(dfdz_exact - dfdz).max()
         self.assertLess(error, 5.0e-5, "Incorrect non-periodic first derivative in Z!")
     
+    def testMultiDerivativeNonperiodic(self):
+        """
+        Test the batched non-periodic first and second derivatives of several fields in all directions.
+        """
+        
+        dx, dy, dz = 2.*numpy.pi / (self.nx-1), 2.*numpy.pi / (self.ny-1), 2.*numpy.pi / (self.nz-1)
+        x = numpy.linspace(0., 2.*numpy.pi, num=self.nx)
+        y = numpy.linspace(0., 2.*numpy.pi, num=self.ny)
+        z = numpy.linspace(0., 2.*numpy.pi, num=self.nz)
+        
+        x, y, z = numpy.meshgrid(x, y, z, indexing='ij')
+        
+        nvars = 3
+        f = numpy.empty( (self.nx, self.ny, self.nz, nvars), dtype=numpy.float64, order='F' )
+        for v in range(nvars):
+            f[:,:,:,v] = (v+1.) * numpy.sin(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z)
+        
+        ders = [ pycd10.cd10stuff.cd10(n, d, False, 0, 0) for n, d in zip((self.nx, self.ny, self.nz), (dx, dy, dz)) ]
+        
+        df_multi = numpy.empty( f.shape, dtype=numpy.float64, order='F' )
+        df_single = numpy.empty( (self.nx, self.ny, self.nz), dtype=numpy.float64, order='F' )
+        
+        ders[1].d2d2_multi(f, df_multi, self.nx, self.nz, nvars, bc1_=1, bcn_=1)
+        for v in range(nvars):
+            ders[1].d2d2(f[:,:,:,v], df_single, self.nx, self.nz, bc1_=1, bcn_=1)
+            self.assertEqual(numpy.absolute(df_multi[:,:,:,v] - df_single).max(), 0., \
+                             "Batched second derivative in Y is different from the single field one!")
+        
+        ders[2].dd3_multi(f, df_multi, self.nx, self.ny, nvars)
+        for v in range(nvars):
+            ders[2].dd3(f[:,:,:,v], df_single, self.nx, self.ny)
+            self.assertEqual(numpy.absolute(df_multi[:,:,:,v] - df_single).max(), 0., \
+                             "Batched first derivative in Z is different from the single field one!")
+        
+        ders[0].dd1_multi(f, df_multi, self.ny, self.nz, nvars)
+        for v in range(nvars):
+            dfdx_exact = (v+1.) * self.omega * numpy.cos(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z)
+            error = numpy.absolute(dfdx_exact - df_multi[:,:,:,v]).max()
+            self.assertLess(error, (v+1.)*5.0e-5, "Incorrect batched non-periodic first derivative in X!")
+    
+    def testBlockedSolves(self):
+        """
+        Test that the tiled solves in the Y and Z directions give the same results as the plane sweeps.
+        """
+        
+        nx, ny, nz = 17, 20, 24
+        f = numpy.asfortranarray(numpy.random.rand(nx, ny, nz))
+        
+        df_ref = numpy.empty( (nx, ny, nz), dtype=numpy.float64, order='F' )
+        df = numpy.empty( (nx, ny, nz), dtype=numpy.float64, order='F' )
+        
+        for periodic in (True, False):
+            der_y = pycd10.cd10stuff.cd10(ny, 0.1, periodic, 0, 0)
+            der_z = pycd10.cd10stuff.cd10(nz, 0.1, periodic, 0, 0)
+            
+            for der, funcs, n, na, nb in ((der_y, ('dd2', 'd2d2'), ny, nx, nz), (der_z, ('dd3', 'd2d3'), nz, nx, ny)):
+                for func in funcs:
+                    der.set_block_size(0)
+                    getattr(der, func)(f, df_ref, na, nb)
+                    
+                    for block_size in (1, 8*n*5, 262144):
+                        der.set_block_size(block_size)
+                        getattr(der, func)(f, df, na, nb)
+                        self.assertEqual(numpy.absolute(df - df_ref).max(), 0., \
+                                         "Tiled solve of %s is different from the plane sweep!" %func)
+    
+    def testDerivativeStretchedY(self):
+        """
+        Test the non-periodic first and second derivatives in the Y direction on a stretched grid.
+        """
+        
+        eta = numpy.linspace(-1., 1., num=self.ny)
+        y = numpy.tanh(1.5*eta) / numpy.tanh(1.5) * numpy.pi
+        
+        x = numpy.linspace(0., 2.*numpy.pi, num=self.nx)
+        z = numpy.linspace(0., 2.*numpy.pi, num=self.nz)
+        
+        x, y_3d, z = numpy.meshgrid(x, y, z, indexing='ij')
+        
+        f = numpy.asfortranarray( numpy.cos(self.omega*x) * numpy.sin(self.omega*y_3d) * numpy.cos(self.omega*z) )
+        dfdy_exact = self.omega * numpy.cos(self.omega*x) * numpy.cos(self.omega*y_3d) * numpy.cos(self.omega*z)
+        d2fdy2_exact = -self.omega**2 * f
+        
+        der = pycd10.cd10stuff.cd10(self.ny, 1., False, 0, 0)
+        der.set_coordinates(y)
+        
+        dfdy = numpy.empty( (self.nx, self.ny, self.nz), dtype=numpy.float64, order='F' )
+        der.dd2(f, dfdy, self.nx, self.nz)
+        
+        error = numpy.absolute(dfdy_exact - dfdy).max()
+        self.assertLess(error, 1.0e-4, "Incorrect first derivative in Y on a stretched grid!")
+        
+        d2fdy2 = numpy.empty( (self.nx, self.ny, self.nz), dtype=numpy.float64, order='F' )
+        der.d2d2(f, d2fdy2, self.nx, self.nz)
+        
+        error = numpy.absolute(d2fdy2_exact - d2fdy2).max()
+        self.assertLess(error, 1.0e-2, "Incorrect second derivative in Y on a stretched grid!")
+        
+        # The metric terms of a uniform grid reproduce the derivatives with the uniform grid spacing.
+        y = numpy.linspace(0., 2.*numpy.pi, num=self.ny)
+        der.set_coordinates(y)
+        der.dd2(f, dfdy, self.nx, self.nz)
+        
+        der_uniform = pycd10.cd10stuff.cd10(self.ny, y[1] - y[0], False, 0, 0)
+        dfdy_uniform = numpy.empty( (self.nx, self.ny, self.nz), dtype=numpy.float64, order='F' )
+        der_uniform.dd2(f, dfdy_uniform, self.nx, self.nz)
+        
+        self.assertLess(numpy.absolute(dfdy - dfdy_uniform).max(), 1.0e-12, \
+                        "Metric terms of a uniform grid are different from the grid spacing!")
+
 if __name__ == '__main__':
     unittest.main()
@@ -219,5 +219,55 @@ class TestDerivativesCompact6th(unittest.TestCase):
         error = numpy.absolute(dfdz_exact - dfdz).max()
         self.assertLess(error, 5.0e-5, "Incorrect derivative in first direction for second order finite difference!")
     
+    def testBlockedSolves(self):
+        """
+        Test that the tiled solves in the Y and Z directions give the same results as the plane sweeps.
+        """
+        
+        nx, ny, nz = 17, 20, 24
+        f = numpy.asfortranarray(numpy.random.rand(nx, ny, nz))
+        
+        df_ref = numpy.empty( (nx, ny, nz), dtype=numpy.float64, order='F' )
+        df = numpy.empty( (nx, ny, nz), dtype=numpy.float64, order='F' )
+        
+        for periodic in (True, False):
+            der_y = pycd06.cd06stuff.cd06(ny, 0.1, periodic, 0, 0)
+            der_z = pycd06.cd06stuff.cd06(nz, 0.1, periodic, 0, 0)
+            
+            for der, func, n, na, nb in ((der_y, 'dd2', ny, nx, nz), (der_z, 'dd3', nz, nx, ny)):
+                der.set_block_size(0)
+                getattr(der, func)(f, df_ref, na, nb)
+                
+                for block_size in (1, 8*n*5, 262144):
+                    der.set_block_size(block_size)
+                    getattr(der, func)(f, df, na, nb)
+                    self.assertEqual(numpy.absolute(df - df_ref).max(), 0., \
+                                     "Tiled solve of %s is different from the plane sweep!" %func)
+    
+    def testDerivativeStretchedZ(self):
+        """
+        Test the non-periodic first derivative in the Z direction on a stretched grid.
+        """
+        
+        eta = numpy.linspace(0., 1., num=self.nz)
+        z = 2.*numpy.pi * (numpy.exp(eta) - 1.) / (numpy.e - 1.)
+        
+        x = numpy.linspace(0., 2.*numpy.pi, num=self.nx)
+        y = numpy.linspace(0., 2.*numpy.pi, num=self.ny)
+        
+        x, y, z_3d = numpy.meshgrid(x, y, z, indexing='ij')
+        
+        f = numpy.asfortranarray( numpy.cos(self.omega*x) * numpy.cos(self.omega*y) * numpy.sin(self.omega*z_3d) )
+        dfdz_exact = self.omega * numpy.cos(self.omega*x) * numpy.cos(self.omega*y) * numpy.cos(self.omega*z_3d)
+        
+        der = pycd06.cd06stuff.cd06(self.nz, 1., False, 0, 0)
+        der.set_coordinates(z)
+        
+        dfdz = numpy.empty( (self.nx, self.ny, self.nz), dtype=numpy.float64, order='F' )
+        der.dd3(f, dfdz, self.nx, self.ny)
+        
+        error = numpy.absolute(dfdz_exact - dfdz).max()
+        self.assertLess(error, 5.0e-4, "Incorrect first derivative in Z on a stretched grid!")
+    
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,200 @@
+from fractions import Fraction
+import numpy
+import unittest
+
+import floatpy.derivatives.explicit.numba_kernels as numba_kernels
+import floatpy.derivatives.explicit.stencil as stencil
+from floatpy.derivatives import ExplicitDifferentiator
+
+class TestDerivativesExplicitStencil(unittest.TestCase):
+
+    def testFornbergWeights(self):
+        """
+        Test the weights of the central and one-sided stencils against the tabulated coefficients.
+        """
+
+        weights = stencil.computeFornbergWeights(range(-2, 3), 0, 2)
+        self.assertEqual(weights[1], [Fraction(1, 12), Fraction(-2, 3), 0, Fraction(2, 3), Fraction(-1, 12)])
+        self.assertEqual(weights[2], [Fraction(-1, 12), Fraction(4, 3), Fraction(-5, 2), Fraction(4, 3), \
+            Fraction(-1, 12)])
+
+        weights = stencil.computeFornbergWeights(range(7), 0, 1)
+        self.assertEqual(weights[1], [Fraction(-49, 20), 6, Fraction(-15, 2), Fraction(20, 3), Fraction(-15, 4), \
+            Fraction(6, 5), Fraction(-1, 6)])
+
+        second_sixth = stencil.ExplicitStencil(2, 6)
+        left, right = second_sixth.boundary_coefficients
+        self.assertEqual(second_sixth.num_ghosts, 3)
+        self.assertEqual(left[0].shape, (8,))
+        self.assertAlmostEqual(left[0][0], 469.0/90.0, places=14)
+        self.assertEqual(numpy.absolute(right[1] - left[1][::-1]).max(), 0.)
+
+        self.assertRaises(RuntimeError, stencil.ExplicitStencil, 1, 5)
+        self.assertRaises(RuntimeError, stencil.ExplicitStencil, 3, 4)
+
+
+    def testPolynomialExactness(self):
+        """
+        Test that the schemes with one-sided boundaries are exact for polynomials of degree up to the order.
+        """
+
+        x = numpy.linspace(0., 1., 21)
+        dx = x[1] - x[0]
+
+        for order in (2, 4, 6, 8, 10):
+            f = x**order
+
+            for derivative_order in (1, 2):
+                der = numpy.empty_like(f)
+                stencil.getStencil(derivative_order, order).apply(f, der, dx, 0, use_one_sided=True)
+
+                if derivative_order == 1:
+                    der_exact = order*x**(order-1)
+                else:
+                    der_exact = order*(order-1)*x**(order-2)
+
+                self.assertLess(numpy.absolute(der - der_exact).max(), 1.e-7*max(1., numpy.absolute(der_exact).max()), \
+                    "Scheme of order %d for derivative %d is not exact" % (order, derivative_order))
+
+
+    def testHighOrder(self):
+        """
+        Test the convergence of the eighth and tenth order schemes of the differentiator in all the directions.
+        """
+
+        for order in (8, 10):
+            errors = []
+            for n in (32, 64):
+                dx = 2.*numpy.pi/n
+                x = numpy.linspace(0., 2.*numpy.pi, n+1)
+                x, y, z = numpy.meshgrid(x, x, x, indexing='ij')
+                f = numpy.asfortranarray(numpy.sin(x + 2.*y + 3.*z))
+
+                der = ExplicitDifferentiator((dx, dx, dx), (order, order, order), 3, 'F')
+                self.assertEqual(list(der.num_ghosts), [order//2]*3)
+
+                dfdz = numpy.empty(f.shape, dtype=numpy.float64, order='F')
+                der.ddz(f, dfdz, use_one_sided=True)
+
+                d2fdy2 = der.d2dy2(f, use_one_sided=True)
+
+                errors.append(max(numpy.absolute(dfdz - 3.*numpy.cos(x + 2.*y + 3.*z)).max(), \
+                                  numpy.absolute(d2fdy2 + 4.*f).max()))
+
+            rate = numpy.log2(errors[0]/errors[1])
+            self.assertGreater(rate, order - 1.5, "Order %d scheme converges at rate %g!" % (order, rate))
+
+
+    def testBoundaries(self):
+        """
+        Test that only the boundary points are NaN without one-sided schemes and that der is filled in place.
+        """
+
+        f = numpy.asfortranarray(numpy.random.rand(20, 16, 3))
+        der = ExplicitDifferentiator((0.1, 0.2), (4, 6), 2, 'F')
+
+        dfdy = numpy.zeros((20, 16), dtype=numpy.float64, order='F')
+        self.assertTrue(der.ddy(f, dfdy, component_idx=1) is None)
+
+        self.assertTrue(numpy.all(numpy.isnan(dfdy[:, 0:3])) and numpy.all(numpy.isnan(dfdy[:, -3:])))
+        self.assertFalse(numpy.any(numpy.isnan(dfdy[:, 3:-3])))
+
+        dfdy_ref = (-1./60.*f[:, 0:-6, 1] + 3./20.*f[:, 1:-5, 1] - 3./4.*f[:, 2:-4, 1] \
+                    + 3./4.*f[:, 4:-2, 1] - 3./20.*f[:, 5:-1, 1] + 1./60.*f[:, 6:, 1])/0.2
+        self.assertLess(numpy.absolute(dfdy[:, 3:-3] - dfdy_ref).max(), 1.e-12)
+
+        der_c = ExplicitDifferentiator((0.1, 0.2), (4, 6), 2, 'C')
+        f_c = numpy.ascontiguousarray(numpy.rollaxis(f, 2))
+        dfdy_c = der_c.ddy(f_c, component_idx=1, use_one_sided=True)
+        self.assertTrue(dfdy_c.flags['C_CONTIGUOUS'])
+        self.assertLess(numpy.absolute(dfdy_c - der.ddy(f, component_idx=1, use_one_sided=True)).max(), 1.e-12)
+
+        self.assertRaises(RuntimeError, der.ddx, f[0:4], component_idx=0)
+        self.assertRaises(RuntimeError, ExplicitDifferentiator, (0.1, 0.2), (4, 7), 2)
+
+
+    def testFusedOperators(self):
+        """
+        Test the fused gradient, divergence, curl and laplacian against the derivatives in each direction for several
+        block sizes and both data orders.
+        """
+
+        u = numpy.asfortranarray(numpy.random.rand(18, 14, 12, 3))
+
+        for data_order in ('F', 'C'):
+            if data_order == 'C':
+                data = numpy.ascontiguousarray(numpy.rollaxis(u, 3))
+                component = lambda array, i: array[i]
+            else:
+                data = u
+                component = lambda array, i: array[..., i]
+
+            results = []
+            for block_size in (0, 1, 4096):
+                der = ExplicitDifferentiator((0.1, 0.2, 0.3), (2, 4, 6), 3, data_order, block_size=block_size)
+
+                for use_one_sided in (True, False):
+                    ddx = [ der.ddx(data, component_idx=i, use_one_sided=use_one_sided) for i in range(3) ]
+                    ddy = [ der.ddy(data, component_idx=i, use_one_sided=use_one_sided) for i in range(3) ]
+                    ddz = [ der.ddz(data, component_idx=i, use_one_sided=use_one_sided) for i in range(3) ]
+
+                    gradient = der.gradient(data, component_idx=1, use_one_sided=use_one_sided)
+                    divergence = der.divergence(data, use_one_sided=use_one_sided)
+                    curl = der.curl(data, use_one_sided=use_one_sided)
+                    laplacian = der.laplacian(data, component_idx=2, use_one_sided=use_one_sided)
+
+                    laplacian_ref = der.d2dx2(data, component_idx=2, use_one_sided=use_one_sided) \
+                                  + der.d2dy2(data, component_idx=2, use_one_sided=use_one_sided) \
+                                  + der.d2dz2(data, component_idx=2, use_one_sided=use_one_sided)
+
+                    pairs = [ (gradient[0], ddx[1]), (gradient[1], ddy[1]), (gradient[2], ddz[1]), \
+                              (divergence, ddx[0] + ddy[1] + ddz[2]), (component(curl, 0), ddy[2] - ddz[1]), \
+                              (component(curl, 1), ddz[0] - ddx[2]), (component(curl, 2), ddx[1] - ddy[0]), \
+                              (laplacian, laplacian_ref) ]
+
+                    for fused, reference in pairs:
+                        self.assertTrue(numpy.array_equal(numpy.isnan(fused), numpy.isnan(reference)))
+                        interior = numpy.logical_not(numpy.isnan(reference))
+                        self.assertLess(numpy.absolute(fused[interior] - reference[interior]).max(), \
+                            1.e-11*numpy.absolute(reference[interior]).max())
+
+                    results.append([ fused for fused, reference in pairs ])
+
+            # The results do not depend on the block size.
+            for i in range(2, len(results)):
+                for fused, fused_ref in zip(results[i], results[i % 2]):
+                    self.assertTrue(numpy.array_equal(numpy.nan_to_num(fused), numpy.nan_to_num(fused_ref)))
+
+        self.assertRaises(RuntimeError, ExplicitDifferentiator, (0.1, 0.2), (4, 4), 2, 'F', -1)
+
+
+    def testBackends(self):
+        """
+        Test the selection of the backends and the compiled backend against the numpy backend if Numba is available.
+        """
+
+        der = ExplicitDifferentiator((0.1, 0.2, 0.3), (4, 6, 8), 3, 'F', backend='auto')
+        self.assertEqual(der.backend, 'numba' if numba_kernels.available else 'numpy')
+
+        self.assertRaises(RuntimeError, ExplicitDifferentiator, (0.1, 0.2, 0.3), (4, 6, 8), backend='fortran')
+
+        if not numba_kernels.available:
+            self.assertRaises(RuntimeError, ExplicitDifferentiator, (0.1, 0.2, 0.3), (4, 6, 8), backend='numba')
+            return
+
+        u = numpy.asfortranarray(numpy.random.rand(20, 18, 16, 3))
+
+        der_numpy = ExplicitDifferentiator((0.1, 0.2, 0.3), (4, 6, 8), 3, 'F', backend='numpy')
+        der_numba = ExplicitDifferentiator((0.1, 0.2, 0.3), (4, 6, 8), 3, 'F', backend='numba')
+
+        for method in ('ddx', 'ddy', 'ddz', 'd2dx2', 'd2dy2', 'd2dz2', 'laplacian'):
+            reference = getattr(der_numpy, method)(u, component_idx=1, use_one_sided=True)
+            result = getattr(der_numba, method)(u, component_idx=1, use_one_sided=True)
+            self.assertLess(numpy.absolute(result - reference).max(), 1.e-12*numpy.absolute(reference).max(), \
+                "Incorrect %s with the numba backend!" % method)
+
+        self.assertLess(numpy.absolute(der_numba.curl(u) - der_numpy.curl(u))[3:-3, 3:-3, 4:-4].max(), 1.e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
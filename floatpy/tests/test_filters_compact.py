@@ -109,6 +109,31 @@ class TestFiltersCompact(unittest.TestCase):
 
         error = numpy.absolute(f_tilde_exact - f_tilde).max()
         self.assertLess(error, 5.0e-14, "Incorrect compact filter in Z direction!")
+
+    def testBlockedSolves(self):
+        """
+        Test that the tiled solves in the Y and Z directions give the same results as the plane sweeps.
+        """
+
+        nx, ny, nz = 17, 20, 24
+        f = numpy.asfortranarray(numpy.random.rand(nx, ny, nz))
+
+        f_tilde_ref = numpy.empty( (nx, ny, nz), dtype=numpy.float64, order='F' )
+        f_tilde = numpy.empty( (nx, ny, nz), dtype=numpy.float64, order='F' )
+
+        for periodic in (True, False):
+            fil_y = pycf90.cf90stuff.cf90(ny, periodic)
+            fil_z = pycf90.cf90stuff.cf90(nz, periodic)
+
+            for fil, func, n, na, nb in ((fil_y, 'filter2', ny, nx, nz), (fil_z, 'filter3', nz, nx, ny)):
+                fil.set_block_size(0)
+                getattr(fil, func)(f, f_tilde_ref, na, nb)
+
+                for block_size in (1, 8*n*5, 262144):
+                    fil.set_block_size(block_size)
+                    getattr(fil, func)(f, f_tilde, na, nb)
+                    self.assertEqual(numpy.absolute(f_tilde - f_tilde_ref).max(), 0., \
+                                     "Tiled solve of %s is different from the plane sweep!" %func)
     
     
 if __name__ == '__main__':
@@ -0,0 +1,87 @@
+import gc
+import numpy
+import unittest
+
+import floatpy.derivatives.compact.pycd10 as pycd10
+import floatpy.filters.pycf90 as pycf90
+from floatpy.utilities import operator_registry
+
+class TestOperatorRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        self.registry = operator_registry.OperatorRegistry()
+        
+        self.n = 32
+        self.dx = 2.*numpy.pi/self.n
+    
+    
+    def getDerivative(self, n, dx, periodic, coordinates=None):
+        
+        def create():
+            kernel = pycd10.cd10stuff.cd10(n, dx, periodic, 0, 0)
+            if coordinates is not None:
+                kernel.set_coordinates(coordinates)
+            return kernel
+        
+        return self.registry.get(create, 'cd10', n, dx, periodic, coordinates=coordinates)
+    
+    
+    def testSharing(self):
+        
+        der_1 = self.getDerivative(self.n, self.dx, True)
+        der_2 = self.getDerivative(self.n, self.dx, True)
+        
+        self.assertTrue(der_1 is der_2, "Operators with the same key are not shared!")
+        self.assertEqual(self.registry.num_misses, 1)
+        self.assertEqual(self.registry.num_hits, 1)
+        
+        self.assertFalse(der_1 is self.getDerivative(self.n, self.dx, False))
+        self.assertFalse(der_1 is self.getDerivative(self.n, 2.*self.dx, True))
+        self.assertFalse(der_1 is self.getDerivative(2*self.n, self.dx, True))
+        
+        fil = self.registry.get(lambda: pycf90.cf90stuff.cf90(self.n, True), 'cf90', self.n, None, True)
+        self.assertFalse(fil is der_1)
+        
+        self.registry.resetCounters()
+        self.assertEqual(self.registry.num_hits, 0)
+        self.assertEqual(self.registry.num_misses, 0)
+    
+    
+    def testCoordinates(self):
+        
+        x = numpy.linspace(0., 1., num=self.n)
+        y = numpy.tanh(2.*numpy.linspace(-1., 1., num=self.n))
+        
+        der_x = self.getDerivative(self.n, 1., False, coordinates=x)
+        der_y = self.getDerivative(self.n, 1., False, coordinates=y)
+        
+        self.assertFalse(der_x is der_y, "Operators with different coordinates are shared!")
+        self.assertTrue(der_y is self.getDerivative(self.n, 1., False, coordinates=y.copy()))
+        self.assertFalse(der_x is self.getDerivative(self.n, 1., False))
+    
+    
+    def testRelease(self):
+        
+        der_1 = self.getDerivative(self.n, self.dx, True)
+        der_2 = self.getDerivative(self.n, self.dx, True)
+        self.assertEqual(self.registry.num_operators, 1)
+        
+        del der_1
+        gc.collect()
+        self.assertEqual(self.registry.num_operators, 1, "Operator in use was released!")
+        
+        del der_2
+        gc.collect()
+        self.assertEqual(self.registry.num_operators, 0, "Operator without users was not released!")
+        
+        self.getDerivative(self.n, self.dx, True)
+        self.assertEqual(self.registry.num_misses, 2)
+    
+    
+    def testDefaultRegistry(self):
+        
+        self.assertTrue(operator_registry.default_registry() is operator_registry.default_registry())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -58,6 +58,44 @@ class TestSamraiDataReader2D(unittest.TestCase):
         self.assertEqual(rho_err, 0.0, "Incorrect sub-domain variable data reader for density!")
         self.assertEqual(vel_err, 0.0, "Incorrect sub-domain variable data reader for velocity!")
         self.assertEqual(p_err,   0.0, "Incorrect sub-domain variable data reader for pressure!")
+    
+    
+    def testSummaryCache(self):
+        
+        directory_name = os.path.join(os.path.dirname(__file__), 'test_data_samrai_AMR')
+        reader = samrai_reader.SamraiDataReader(directory_name, summary_cache_size=2)
+        
+        # Count the summary files read.
+        
+        steps_read = []
+        read_summary_file = reader._readSummaryFile
+        
+        def readSummaryFile(step):
+            steps_read.append(step)
+            return read_summary_file(step)
+        
+        reader._readSummaryFile = readSummaryFile
+        
+        time_0 = reader.time
+        patch_extents_0 = reader.getPatchExtents()
+        
+        # Going back and forth between the cached time steps does not read the summary files.
+        
+        for step in (100, 0, 100, 0):
+            reader.step = step
+        
+        self.assertEqual(steps_read, [100])
+        self.assertEqual(reader.time, time_0)
+        self.assertTrue(reader.getPatchExtents() is patch_extents_0)
+        
+        # The least recently visited time step is evicted.
+        
+        reader_small_cache = samrai_reader.SamraiDataReader(directory_name, summary_cache_size=1)
+        reader_small_cache.step = 100
+        self.assertEqual(list(reader_small_cache._summary_cache.keys()), [100])
+        self.assertNotEqual(reader_small_cache.time, time_0)
+        
+        self.assertRaises(RuntimeError, samrai_reader.SamraiDataReader, directory_name, summary_cache_size=0)
 
 
 if __name__ == '__main__':
@@ -3,6 +3,105 @@ Module for upsampling data.
 """
 
 import numpy
+from numpy.lib.stride_tricks import as_strided
+
+# Cache of the tables of the Lagrange interpolation coefficients.
+_coefficients = {}
+
+
+def getLagrangeCoefficients(stencil_size, refine_ratio):
+    """
+    Return the (refine_ratio, stencil_size) table of the coefficients of the Lagrange interpolation at the refine_ratio
+    fine cells in a coarse cell. The coefficients of row s are the weights of the coarse values 0, 1, ..., stencil_size-1
+    for the fine cell s of the coarse cell stencil_size/2 - 1. The tables are computed once and cached.
+    
+    stencil_size : number of coarse cells in the stencil of the interpolation
+    refine_ratio : integer refinement ratio
+    """
+    
+    key = (int(stencil_size), int(refine_ratio))
+    
+    if key not in _coefficients:
+        half_stencil_size = stencil_size//2
+        delta = 1.0/refine_ratio
+        
+        coefficients = numpy.ones([refine_ratio, stencil_size], dtype=numpy.float64)
+        
+        for s in range(refine_ratio):
+            if refine_ratio % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
+                idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
+            else: # If some of the upsampled nodes overlap with the original nodes.
+                idx_r = (half_stencil_size - 1) + s*delta
+            
+            for i in range(stencil_size):
+                for j in range(stencil_size):
+                    if i != j:
+                        coefficients[s, i] = coefficients[s, i]*(idx_r - j)/(i - j)
+        
+        coefficients.flags.writeable = False
+        _coefficients[key] = coefficients
+    
+    return _coefficients[key]
+
+
+def getStencilWindows(data, axis, stencil_size):
+    """
+    Return a view of data with the stencil_size shifted copies of data along axis stacked along a new last axis. The
+    view has n - stencil_size + 1 points along axis, with n the number of points of data along axis.
+    """
+    
+    num_windows = data.shape[axis] - stencil_size + 1
+    
+    return as_strided(data, shape=data.shape[:axis] + (num_windows,) + data.shape[axis+1:] + (stencil_size,), \
+                      strides=data.strides + (data.strides[axis],))
+
+
+def getRefinedView(upsampled_data, axis, refine_ratio, num_windows):
+    """
+    Return a view of the first refine_ratio*num_windows points of upsampled_data along axis with the refine_ratio fine
+    cells of each coarse cell along a new axis after axis.
+    """
+    
+    stride = upsampled_data.strides[axis]
+    
+    return as_strided(upsampled_data, shape=upsampled_data.shape[:axis] + (num_windows, refine_ratio) + \
+                      upsampled_data.shape[axis+1:], strides=upsampled_data.strides[:axis] + \
+                      (refine_ratio*stride, stride) + upsampled_data.strides[axis+1:])
+
+
+def _interpolate(data, upsampled_data, coefficients, axis):
+    """
+    Interpolate data along an axis with a table of Lagrange coefficients as a single tensor contraction of the shifted
+    views of data with the table.
+    
+    data : numpy array with the data
+    upsampled_data : numpy array to store the interpolated data. It has the shape of data except along axis, where it
+                     has refine_ratio*(n - stencil_size + 1) points plus one point if refine_ratio is odd, with n the
+                     number of points of data along axis
+    coefficients : (refine_ratio, stencil_size) table of the coefficients from getLagrangeCoefficients
+    axis : axis of the interpolation
+    """
+    
+    r, stencil_size = coefficients.shape
+    num_windows = data.shape[axis] - stencil_size + 1
+    ndim = data.ndim
+    
+    windows = getStencilWindows(data, axis, stencil_size)
+    fine = getRefinedView(upsampled_data, axis, r, num_windows)
+    
+    numpy.einsum(windows, range(ndim + 1), coefficients.astype(data.dtype), [ndim + 1, ndim], \
+                 range(axis + 1) + [ndim + 1] + range(axis + 1, ndim), out=fine)
+    
+    # If refine_ratio is odd, every refine_ratio-th fine cell and the last fine cell overlap with the original nodes
+    # and are copied.
+    
+    if r % 2 == 1:
+        index = [ slice(None) ]*ndim
+        index[axis] = slice(0, num_windows*r + 1, r)
+        index_data = list(index)
+        index_data[axis] = slice(stencil_size//2 - 1, num_windows + stencil_size//2)
+        upsampled_data[tuple(index)] = data[tuple(index_data)]
+
 
 class LagrangeUpsampler(object):
     """
@@ -32,6 +131,11 @@ class LagrangeUpsampler(object):
             raise RuntimeError("Invalid data order! Data order can only be 'C' or 'F'.")
         
         self._data_order = data_order
+        
+        # Ping-pong buffers of the intermediate directional passes reused by all the upsampling calls. They grow to the
+        # size of the largest data upsampled.
+        
+        self._workspace = [ numpy.empty(0), numpy.empty(0) ]
     
     
     def getNumberOfGhostCells(self):
@@ -58,1195 +162,226 @@ class LagrangeUpsampler(object):
         return self.getNumberOfGhostCells()
     
     
-    def upsample(self, data, refine_ratio, component_idx=None):
+    def upsample(self, data, refine_ratio, component_idx=None, out=None):
         """
         Upsampling the data.
+        
+        data : numpy array of the data
+        refine_ratio : integer iterable of the refine ratio in each direction
+        component_idx : index of the component to upsample. data is a single component if it is None
+        out : optional numpy array of the upsampled shape of the data (e.g. a view into a larger array) to store the
+              upsampled data in. The cells without a full stencil of the Lagrange interpolation are left untouched in
+              out while they are NAN values in a new array
         """
         
         if self._method == 'constant':
-            return self._upsampleConstant(data, refine_ratio, component_idx)
+            return self._upsampleConstant(data, refine_ratio, component_idx, out)
         elif self._method == 'second_order':
-            return self._upsampleSecondOrderLagrange(data, refine_ratio, component_idx)
+            return self._upsampleSecondOrderLagrange(data, refine_ratio, component_idx, out)
         elif self._method == 'fourth_order':
-            return self._upsampleFourthOrderLagrange(data, refine_ratio, component_idx)
+            return self._upsampleFourthOrderLagrange(data, refine_ratio, component_idx, out)
         elif self._method == 'sixth_order':
-            return self._upsampleSixthOrderLagrange(data, refine_ratio, component_idx)
+            return self._upsampleSixthOrderLagrange(data, refine_ratio, component_idx, out)
     
     
-    def _upsampleConstant(self, data, refine_ratio, component_idx=None):
+    def _upsampleConstant(self, data, refine_ratio, component_idx=None, out=None):
         """
-        Upsampling the data using constant interpolation.
+        Upsampling the data using constant interpolation. The upsampled data is written with a single assignment of a
+        broadcast view of the data, with a zero stride along the refined cells of each coarse cell, to a strided view of
+        the upsampled data, so no copy of the refined array is made.
         """
         
         r = refine_ratio
         
-        # Get the shape of data.
-        
-        data_shape = numpy.array(data.shape)
-
-        # Check whether the shape of data is valid.
+        data_component = self._getComponent(data, component_idx)
         
-        if component_idx is None:
-            if data.ndim < 1 or data.ndim > 3:
-                raise RuntimeError('Shape of data is invalid!')
-        
-        else:
-            if data.ndim < 2 or data.ndim > 4:
-                raise RuntimeError('Shape of data is invalid!')
-            
-            # Check whether the component_idx is valid and get the shape of the component's data.
-            
-            if self._data_order == 'C':
-                if component_idx >= data.shape[0] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[1:])
-            
-            else:
-                if component_idx >= data.shape[-1] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[:-1])
+        data_shape = numpy.array(data_component.shape)
         
         # Get the dimension of data.
         
         dim = data_shape.shape[0]
         
-        # Initialize container to store the upsampled data.
-        
-        upsampled_data = None
+        # Get the container to store the upsampled data.
         
-        # Get the component's data.
+        upsampled_data_shape = numpy.multiply(data_shape, r[0:dim])
         
-        data_component = None
-        
-        if component_idx is None:
-            data_component = data
+        if out is None:
+            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
         else:
-            if self._data_order == 'C':
-                if dim == 1:
-                    data_component = data[component_idx, :]
-                elif dim == 2:
-                    data_component = data[component_idx, :, :]
-                elif dim == 3:
-                    data_component = data[component_idx, :, :, :]
-            else:
-                if dim == 1:
-                    data_component = data[:, component_idx]
-                elif dim == 2:
-                    data_component = data[:, :, component_idx]
-                elif dim == 3:
-                    data_component = data[:, :, :, component_idx]
+            self._checkOutput(out, upsampled_data_shape)
+            upsampled_data = out
         
-        # Upsample the data with constant interpolation.
+        # Views of the data and the upsampled data with a refined axis after each direction.
         
-        if dim == 1:
-            upsampled_data = numpy.repeat(data_component, r[0], axis = 0)
+        blocks_shape = ()
+        data_strides = ()
+        upsampled_data_strides = ()
         
-        elif dim == 2:
-            if self._data_order == 'C':
-                upsampled_data = numpy.repeat(data_component, r[0], axis = 0)
-                upsampled_data = numpy.repeat(upsampled_data, r[1], axis = 1)
-            
-            else:
-                upsampled_data = numpy.ravel(data_component, order='F')
-                upsampled_data = upsampled_data.reshape(
-                    (data_shape[1], data_shape[0]), order='C')
-                
-                upsampled_data = numpy.repeat(upsampled_data, r[1], axis = 0)
-                upsampled_data = numpy.repeat(upsampled_data, r[0], axis = 1)
-                
-                upsampled_data = numpy.ravel(upsampled_data, order='C')
-                upsampled_data = upsampled_data.reshape(
-                    data_shape*r[0:dim], order='F')
+        for i in range(dim):
+            blocks_shape += (int(data_shape[i]), int(r[i]))
+            data_strides += (data_component.strides[i], 0)
+            upsampled_data_strides += (int(r[i])*upsampled_data.strides[i], upsampled_data.strides[i])
         
-        elif dim == 3:
-            if self._data_order == 'C':
-                upsampled_data = numpy.repeat(data_component, r[0], axis = 0)
-                upsampled_data = numpy.repeat(upsampled_data, r[1], axis = 1)
-                upsampled_data = numpy.repeat(upsampled_data, r[2], axis = 2)
-            
-            else:
-                upsampled_data = numpy.ravel(data_component, order='F')
-                upsampled_data = upsampled_data.reshape(
-                    (data_shape[2], data_shape[1], data_shape[0]), order='C')
-                
-                upsampled_data = numpy.repeat(upsampled_data, r[2], axis = 0)
-                upsampled_data = numpy.repeat(upsampled_data, r[1], axis = 1)
-                upsampled_data = numpy.repeat(upsampled_data, r[0], axis = 2)
-
-                upsampled_data = numpy.ravel(upsampled_data, order='C')
-                upsampled_data = upsampled_data.reshape(
-                    data_shape*r[0:dim], order='F')
+        data_blocks = as_strided(data_component, shape=blocks_shape, strides=data_strides)
+        upsampled_data_blocks = as_strided(upsampled_data, shape=blocks_shape, strides=upsampled_data_strides)
+        
+        upsampled_data_blocks[...] = data_blocks
         
         return upsampled_data
     
     
-    def _upsampleSecondOrderLagrange(self, data, refine_ratio, component_idx=None):
+    def _checkOutput(self, out, upsampled_data_shape):
         """
-        Upsampling the data using second order Lagrange interpolation.
+        Check whether the given container of the upsampled data has the upsampled shape.
         """
         
-        r = refine_ratio
-        
-        stencil_size = 2
-        half_stencil_size = stencil_size/2
+        if tuple(out.shape) != tuple(upsampled_data_shape):
+            raise RuntimeError('Shape of out is not the shape of the upsampled data!')
+    
+    
+    def _getWorkspace(self, buffer_idx, shape, dtype):
+        """
+        Return an array of the given shape in the ping-pong buffer buffer_idx. The buffer is enlarged if it is too
+        small.
+        """
         
-        # Get the shape of data.
+        size = int(numpy.prod(shape))
         
-        data_shape = numpy.array(data.shape)
+        if self._workspace[buffer_idx].dtype != dtype or self._workspace[buffer_idx].size < size:
+            self._workspace[buffer_idx] = numpy.empty(size, dtype=dtype)
         
-        # Check whether the shape of data is valid.
+        return self._workspace[buffer_idx][0:size].reshape(shape, order=self._data_order)
+    
+    
+    def _getComponent(self, data, component_idx):
+        """
+        Check the shape of data and return the data of the component.
+        """
         
         if component_idx is None:
             if data.ndim < 1 or data.ndim > 3:
                 raise RuntimeError('Shape of data is invalid!')
-        
-        else:
-            if data.ndim < 2 or data.ndim > 4:
-                raise RuntimeError('Shape of data is invalid!')
-            
-            # Check whether the component_idx is valid and get the shape of the component's data.
             
-            if self._data_order == 'C':
-                if component_idx >= data.shape[0] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[1:])
-            
-            else:
-                if component_idx >= data.shape[-1] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[:-1])
+            return data
         
-        # Get the dimension of data.
-        
-        dim = data_shape.shape[0]
-        
-        # Check whether data size is large enough for second order Lagrange interpolation.
-        
-        if data_shape[0] < 3:
-            raise RuntimeError('First dimension of data is not large enough!')
-        
-        if dim > 1:
-            if data_shape[1] < 3:
-                raise RuntimeError('Second dimension of data is not large enough!')
+        if data.ndim < 2 or data.ndim > 4:
+            raise RuntimeError('Shape of data is invalid!')
         
-        elif dim > 2:
-            if data_shape[2] < 3:
-                raise RuntimeError('Third dimension of data is not large enough!')
-        
-        # Compute the coefficients for second order Lagrange interpolation.
-        
-        c_0 = numpy.ones([r[0], stencil_size], dtype=data.dtype)
-        c_1 = None
-        c_2 = None
-        
-        delta = 1.0/r[0]
-        
-        if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-            for s in range(r[0]):
-                idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                for i in range(stencil_size):
-                    for j in range(stencil_size):
-                        if i != j:
-                            c_0[s, i] = c_0[s, i]*(idx_r - j)/(i - j)
-        
-        else: # If some of the upsampled nodes overlap with the original nodes.
-            for s in range(1, r[0]):
-                idx_r = (half_stencil_size - 1) + s*delta
-                for i in range(stencil_size):
-                    for j in range(stencil_size):
-                        if i != j:
-                            c_0[s, i] = c_0[s, i] * (idx_r - j)/(i - j)
-        
-        if dim >= 2:
-            c_1 = numpy.ones([r[1], stencil_size], dtype=data.dtype)
-            
-            delta = 1.0/r[1]
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_1[s, i] = c_1[s, i]*(idx_r - j)/(i - j)
+        if self._data_order == 'C':
+            if component_idx >= data.shape[0] or component_idx < 0:
+                raise RuntimeError('Component index is invalid!')
             
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                for s in range(1, r[1]):
-                    idx_r = (half_stencil_size - 1) + s*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_1[s, i] = c_1[s, i]*(idx_r - j)/(i - j)
+            return data[component_idx]
         
-        if dim >= 3:
-            c_2 = numpy.ones([r[2], stencil_size], dtype=data.dtype)
-            
-            delta = 1.0/r[2]
-            
-            if r[2] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[2]):
-                    idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_2[s, i] = c_2[s, i]*(idx_r - j)/(i - j)
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                for s in range(1, r[2]):
-                    idx_r = (half_stencil_size - 1) + s*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_2[s, i] = c_2[s, i]*(idx_r - j)/(i - j)
-        
-        # Initialize containers to store the upsampled data. The elements in the containers
-        # are initialized as NAN values.
-        
-        upsampled_data_shape_0 = None
-        upsampled_data_shape_1 = None
-        upsampled_data_shape = None
-        
-        upsampled_data_0 = None
-        upsampled_data_1 = None
-        upsampled_data = None
-        
-        if dim == 1:
-            upsampled_data_shape = numpy.multiply(data_shape, r[0])
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            upsampled_data[:] = numpy.NAN
-        
-        elif dim == 2:
-            upsampled_data_shape_0 = numpy.copy(data_shape)
-            upsampled_data_shape_0[0] = upsampled_data_shape_0[0]*r[0]
-            
-            upsampled_data_shape = numpy.copy(upsampled_data_shape_0)
-            upsampled_data_shape[1] = upsampled_data_shape[1]*r[1]
-            
-            upsampled_data_0 = numpy.empty(upsampled_data_shape_0, dtype=data.dtype, order=self._data_order)
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            
-            upsampled_data_0[:] = numpy.NAN
-            upsampled_data[:] = numpy.NAN
-        
-        elif dim == 3:
-            upsampled_data_shape_0 = numpy.copy(data_shape)
-            upsampled_data_shape_0[0] = upsampled_data_shape_0[0]*r[0]
-            
-            upsampled_data_shape_1 = numpy.copy(upsampled_data_shape_0)
-            upsampled_data_shape_1[1] = upsampled_data_shape_1[1]*r[1]
-            
-            upsampled_data_shape = numpy.copy(upsampled_data_shape_1)
-            upsampled_data_shape[2] = upsampled_data_shape[2]*r[2]
-            
-            upsampled_data_0 = numpy.empty(upsampled_data_shape_0, dtype=data.dtype, order=self._data_order)
-            upsampled_data_1 = numpy.empty(upsampled_data_shape_1, dtype=data.dtype, order=self._data_order)
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            
-            upsampled_data_0[:] = numpy.NAN
-            upsampled_data_1[:] = numpy.NAN
-            upsampled_data[:] = numpy.NAN
-        
-        # Get the component's data.
-        
-        data_component = None
-        
-        if component_idx is None:
-            data_component = data
         else:
-            if self._data_order == 'C':
-                if dim == 1:
-                    data_component = data[component_idx, :]
-                elif dim == 2:
-                    data_component = data[component_idx, :, :]
-                elif dim == 3:
-                    data_component = data[component_idx, :, :, :]
-            else:
-                if dim == 1:
-                    data_component = data[:, component_idx]
-                elif dim == 2:
-                    data_component = data[:, :, component_idx]
-                elif dim == 3:
-                    data_component = data[:, :, :, component_idx]
-        
-        # Upsample the data with second order Lagrange interpolation.
-        
-        if dim == 1:
-            start_idx_fine = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
+            if component_idx >= data.shape[-1] or component_idx < 0:
+                raise RuntimeError('Component index is invalid!')
             
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data[(start_idx_fine + s):end_idx_fine:r[0]] = c_0[s, 0]*data_component[0:(-stencil_size + 1)] \
-                        + c_0[s, 1]*data_component[1:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine:end_idx_fine:r[0]] = data_component[0:(-stencil_size + 1)]
-                
-                for s in range(1, r[0]):
-                    upsampled_data[(start_idx_fine + s):end_idx_fine:r[0]] = c_0[s, 0]*data_component[0:(-stencil_size + 1)] \
-                        + c_0[s, 1]*data_component[1:]
-                
-                upsampled_data[end_idx_fine] = data_component[-half_stencil_size]
+            return data[..., component_idx]
+    
+    
+    def _getFineRange(self, num_cells, refine_ratio, stencil_size):
+        """
+        Return the start and end indices of the upsampled cells with a full stencil in a direction with num_cells cells.
+        """
         
-        elif dim == 2:
-            start_idx_fine_0 = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine_0 = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            start_idx_fine_1 = (half_stencil_size - 1)*r[1] + r[1]/2
-            end_idx_fine_1 = upsampled_data_shape[1] - (half_stencil_size - 1)*r[1] - (r[1] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :] + c_0[s, 1]*data_component[1:, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_0[start_idx_fine_0:end_idx_fine_0:r[0], :] = \
-                    data_component[0:(-stencil_size + 1), :]
-                
-                for s in range(1, r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :] + c_0[s, 1]*data_component[1:, :]
-                
-                upsampled_data_0[end_idx_fine_0, :] = data_component[-half_stencil_size, :]
-                
-                end_idx_fine_0 = end_idx_fine_0 + 1
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1]] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1:r[1]] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)]
-                
-                for s in range(1, r[1]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1]] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:]
-                
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, end_idx_fine_1] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, -half_stencil_size]
+        start_idx_fine = (stencil_size//2 - 1)*refine_ratio + refine_ratio//2
+        end_idx_fine = start_idx_fine + (num_cells - stencil_size + 1)*refine_ratio + refine_ratio % 2
         
-        elif dim == 3:
-            start_idx_fine_0 = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine_0 = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            start_idx_fine_1 = (half_stencil_size - 1)*r[1] + r[1]/2
-            end_idx_fine_1 = upsampled_data_shape[1] - (half_stencil_size - 1)*r[1] - (r[1] + 1)/2
-            
-            start_idx_fine_2 = (half_stencil_size - 1)*r[2] + r[2]/2
-            end_idx_fine_2 = upsampled_data_shape[2] - (half_stencil_size - 1)*r[2] - (r[2] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], : :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :, :] \
-                        + c_0[s, 1]*data_component[1:, :, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_0[start_idx_fine_0:end_idx_fine_0:r[0], : :] = \
-                    data_component[0:(-stencil_size + 1), :, :]
-                
-                for s in range(1, r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], : :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :, :] \
-                        + c_0[s, 1]*data_component[1:, :, :]
-                
-                upsampled_data_0[end_idx_fine_0, : :] = data_component[-half_stencil_size, :, :]
-                
-                end_idx_fine_0 = end_idx_fine_0 + 1
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1], :] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1:r[1], :] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :]
-                
-                for s in range(1, r[1]):
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1], :] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:, :]
-                
-                upsampled_data_1[start_idx_fine_0:end_idx_fine_0, end_idx_fine_1, :] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, -half_stencil_size, :]
-                
-                end_idx_fine_1 = end_idx_fine_1 + 1
-            
-            if r[2] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[2]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                   (start_idx_fine_2 + s):end_idx_fine_2:r[2]] = \
-                        c_2[s, 0]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                   0:(-stencil_size + 1)] \
-                        + c_2[s, 1]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 1:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, \
-                               start_idx_fine_1:end_idx_fine_1, start_idx_fine_2:end_idx_fine_2:r[2]] = \
-                        upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                         0:(-stencil_size + 1)]
-                
-                for s in range(1, r[2]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                   (start_idx_fine_2 + s):end_idx_fine_2:r[2]] = \
-                        c_2[s, 0]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                   0:(-stencil_size + 1)] \
-                        + c_2[s, 1]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 1:]
-                
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, end_idx_fine_2] = \
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, -half_stencil_size]
+        return start_idx_fine, end_idx_fine
+    
+    
+    def _upsampleDirection(self, data, upsampled_data, refine_ratio, axis, stencil_size):
+        """
+        Upsample the data in one direction as a tensor contraction with the cached table of Lagrange coefficients.
+        """
         
-        return upsampled_data
+        _interpolate(data, upsampled_data, getLagrangeCoefficients(stencil_size, refine_ratio), axis)
     
     
-    def _upsampleFourthOrderLagrange(self, data, refine_ratio, component_idx=None):
+    def _upsampleSeparable(self, data, refine_ratio, component_idx, stencil_size, out=None):
         """
-        Upsampling the data using fourth order Lagrange interpolation.
+        Upsampling the data with a stencil of stencil_size cells in one direction after the other. The intermediate
+        passes alternate between the two buffers of the workspace and the last pass writes in the upsampled data.
         """
         
         r = refine_ratio
         
-        stencil_size = 4
-        half_stencil_size = stencil_size/2
-        
-        # Get the shape of data.
-        
-        data_shape = numpy.array(data.shape)
+        data_component = self._getComponent(data, component_idx)
         
-        # Check whether the shape of data is valid.
-        
-        if component_idx is None:
-            if data.ndim < 1 or data.ndim > 3:
-                raise RuntimeError('Shape of data is invalid!')
-        
-        else:
-            if data.ndim < 2 or data.ndim > 4:
-                raise RuntimeError('Shape of data is invalid!')
-            
-            # Check whether the component_idx is valid and get the shape of the component's data.
-            
-            if self._data_order == 'C':
-                if component_idx >= data.shape[0] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[1:])
-            
-            else:
-                if component_idx >= data.shape[-1] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[:-1])
+        data_shape = numpy.array(data_component.shape)
         
         # Get the dimension of data.
         
         dim = data_shape.shape[0]
         
-        # Check whether data size is large enough for fourth order Lagrange interpolation.
+        # Check whether data size is large enough for the stencil.
         
-        if data_shape[0] < 5:
-            raise RuntimeError('First dimension of data is not large enough!')
+        for i, name in enumerate(('First', 'Second', 'Third')[0:dim]):
+            if data_shape[i] < stencil_size + 1:
+                raise RuntimeError(name + ' dimension of data is not large enough!')
         
-        if dim > 1:
-            if data_shape[1] < 5:
-                raise RuntimeError('Second dimension of data is not large enough!')
+        # Get the container to store the upsampled data.
         
-        elif dim > 2:
-            if data_shape[2] < 5:
-                raise RuntimeError('Third dimension of data is not large enough!')
-        
-        # Compute the coefficients for fourth order Lagrange interpolation.
-        
-        c_0 = numpy.ones([r[0], stencil_size], dtype=data.dtype)
-        c_1 = None
-        c_2 = None
-        
-        delta = 1.0/r[0]
-        
-        if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-            for s in range(r[0]):
-                idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                for i in range(stencil_size):
-                    for j in range(stencil_size):
-                        if i != j:
-                            c_0[s, i] = c_0[s, i]*(idx_r - j)/(i - j)
+        upsampled_data_shape = numpy.multiply(data_shape, r[0:dim])
         
-        else: # If some of the upsampled nodes overlap with the original nodes.
-            for s in range(1, r[0]):
-                idx_r = (half_stencil_size - 1) + s*delta
-                for i in range(stencil_size):
-                    for j in range(stencil_size):
-                        if i != j:
-                            c_0[s, i] = c_0[s, i] * (idx_r - j)/(i - j)
-        
-        if dim >= 2:
-            c_1 = numpy.ones([r[1], stencil_size], dtype=data.dtype)
-            
-            delta = 1.0/r[1]
-
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_1[s, i] = c_1[s, i]*(idx_r - j)/(i - j)
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                for s in range(1, r[1]):
-                    idx_r = (half_stencil_size - 1) + s*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_1[s, i] = c_1[s, i]*(idx_r - j)/(i - j)
-        
-        if dim >= 3:
-            c_2 = numpy.ones([r[2], stencil_size], dtype=data.dtype)
-            
-            delta = 1.0/r[2]
-            
-            if r[2] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[2]):
-                    idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_2[s, i] = c_2[s, i]*(idx_r - j)/(i - j)
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                for s in range(1, r[2]):
-                    idx_r = (half_stencil_size - 1) + s*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_2[s, i] = c_2[s, i]*(idx_r - j)/(i - j)
-        
-        # Initialize containers to store the upsampled data. The elements in the containers
-        # are initialized as NAN values.
-        
-        upsampled_data_shape_0 = None
-        upsampled_data_shape_1 = None
-        upsampled_data_shape = None
-        
-        upsampled_data_0 = None
-        upsampled_data_1 = None
-        upsampled_data = None
-        
-        if dim == 1:
-            upsampled_data_shape = numpy.multiply(data_shape, r[0])
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            upsampled_data[:] = numpy.NAN
-        
-        elif dim == 2:
-            upsampled_data_shape_0 = numpy.copy(data_shape)
-            upsampled_data_shape_0[0] = upsampled_data_shape_0[0]*r[0]
-            
-            upsampled_data_shape = numpy.copy(upsampled_data_shape_0)
-            upsampled_data_shape[1] = upsampled_data_shape[1]*r[1]
-            
-            upsampled_data_0 = numpy.empty(upsampled_data_shape_0, dtype=data.dtype, order=self._data_order)
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            
-            upsampled_data_0[:] = numpy.NAN
-            upsampled_data[:] = numpy.NAN
-        
-        elif dim == 3:
-            upsampled_data_shape_0 = numpy.copy(data_shape)
-            upsampled_data_shape_0[0] = upsampled_data_shape_0[0]*r[0]
-            
-            upsampled_data_shape_1 = numpy.copy(upsampled_data_shape_0)
-            upsampled_data_shape_1[1] = upsampled_data_shape_1[1]*r[1]
-            
-            upsampled_data_shape = numpy.copy(upsampled_data_shape_1)
-            upsampled_data_shape[2] = upsampled_data_shape[2]*r[2]
-            
-            upsampled_data_0 = numpy.empty(upsampled_data_shape_0, dtype=data.dtype, order=self._data_order)
-            upsampled_data_1 = numpy.empty(upsampled_data_shape_1, dtype=data.dtype, order=self._data_order)
+        if out is None:
             upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            
-            upsampled_data_0[:] = numpy.NAN
-            upsampled_data_1[:] = numpy.NAN
-            upsampled_data[:] = numpy.NAN
-        
-        # Get the component's data.
-        
-        data_component = None
-        
-        if component_idx is None:
-            data_component = data
         else:
-            if self._data_order == 'C':
-                if dim == 1:
-                    data_component = data[component_idx, :]
-                elif dim == 2:
-                    data_component = data[component_idx, :, :]
-                elif dim == 3:
-                    data_component = data[component_idx, :, :, :]
-            else:
-                if dim == 1:
-                    data_component = data[:, component_idx]
-                elif dim == 2:
-                    data_component = data[:, :, component_idx]
-                elif dim == 3:
-                    data_component = data[:, :, :, component_idx]
+            self._checkOutput(out, upsampled_data_shape)
+            upsampled_data = out
         
-        # Upsample the data with fourth order Lagrange interpolation.
+        # Upsample the data in each direction. Each pass only computes the upsampled cells in the directions already
+        # upsampled that have a full stencil.
         
-        if dim == 1:
-            start_idx_fine = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data[(start_idx_fine + s):end_idx_fine:r[0]] = c_0[s, 0]*data_component[0:(-stencil_size + 1)] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2)] + c_0[s, 2]*data_component[2:(-stencil_size + 3)] \
-                        + c_0[s, 3]*data_component[3:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine:end_idx_fine:r[0]] = data_component[1:(-stencil_size + 2)]
-                
-                for s in range(1, r[0]):
-                    upsampled_data[(start_idx_fine + s):end_idx_fine:r[0]] = c_0[s, 0]*data_component[0:(-stencil_size + 1)] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2)] + c_0[s, 2]*data_component[2:(-stencil_size + 3)] \
-                        + c_0[s, 3]*data_component[3:]
-                
-                upsampled_data[end_idx_fine] = data_component[-half_stencil_size]
+        fine_range = []
+        upsampled_data_i = data_component
         
-        elif dim == 2:
-            start_idx_fine_0 = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine_0 = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            start_idx_fine_1 = (half_stencil_size - 1)*r[1] + r[1]/2
-            end_idx_fine_1 = upsampled_data_shape[1] - (half_stencil_size - 1)*r[1] - (r[1] + 1)/2
+        for i in range(dim):
+            start_idx_fine, end_idx_fine = self._getFineRange(data_shape[i], r[i], stencil_size)
+            fine_range.append(slice(start_idx_fine, end_idx_fine))
             
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :] \
-                        + c_0[s, 3]*data_component[3:, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_0[start_idx_fine_0:end_idx_fine_0:r[0], :] = \
-                    data_component[1:(-stencil_size + 2), :]
-                
-                for s in range(1, r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :] \
-                        + c_0[s, 3]*data_component[3:, :]
-                
-                upsampled_data_0[end_idx_fine_0, :] = data_component[-half_stencil_size, :]
-                
-                end_idx_fine_0 = end_idx_fine_0 + 1
+            if i == dim - 1:
+                upsampled_data_next = upsampled_data[tuple(fine_range)]
+            else:
+                upsampled_data_next_shape = list(upsampled_data_i.shape)
+                upsampled_data_next_shape[i] = end_idx_fine - start_idx_fine
+                upsampled_data_next = self._getWorkspace(i % 2, upsampled_data_next_shape, data.dtype)
             
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1]] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2)] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3)] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:]
+            self._upsampleDirection(upsampled_data_i, upsampled_data_next, r[i], i, stencil_size)
             
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1:r[1]] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2)]
-                
-                for s in range(1, r[1]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1]] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2)] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3)] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:]
-                
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, end_idx_fine_1] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, -half_stencil_size]
+            upsampled_data_i = upsampled_data_next
         
-        elif dim == 3:
-            start_idx_fine_0 = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine_0 = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            start_idx_fine_1 = (half_stencil_size - 1)*r[1] + r[1]/2
-            end_idx_fine_1 = upsampled_data_shape[1] - (half_stencil_size - 1)*r[1] - (r[1] + 1)/2
-            
-            start_idx_fine_2 = (half_stencil_size - 1)*r[2] + r[2]/2
-            end_idx_fine_2 = upsampled_data_shape[2] - (half_stencil_size - 1)*r[2] - (r[2] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], : :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :, :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :, :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :, :] \
-                        + c_0[s, 3]*data_component[3:, :, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_0[start_idx_fine_0:end_idx_fine_0:r[0], : :] = \
-                    data_component[1:(-stencil_size + 2), :, :] \
-                
-                for s in range(1, r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], : :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :, :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :, :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :, :] \
-                        + c_0[s, 3]*data_component[3:, :, :]
-                
-                upsampled_data_0[end_idx_fine_0, : :] = data_component[-half_stencil_size, :, :]
-                
-                end_idx_fine_0 = end_idx_fine_0 + 1
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1], :] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2), :] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3), :] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1:r[1], :] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2), :]
-                
-                for s in range(1, r[1]):
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1], :] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2), :] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3), :] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:, :]
-                
-                upsampled_data_1[start_idx_fine_0:end_idx_fine_0, end_idx_fine_1, :] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, -half_stencil_size, :]
-                
-                end_idx_fine_1 = end_idx_fine_1 + 1
-            
-            if r[2] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[2]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                   (start_idx_fine_2 + s):end_idx_fine_2:r[2]] = \
-                        c_2[s, 0]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                   0:(-stencil_size + 1)] \
-                        + c_2[s, 1]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     1:(-stencil_size + 2)] \
-                        + c_2[s, 2]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     2:(-stencil_size + 3)] \
-                        + c_2[s, 3]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 3:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                               start_idx_fine_2:end_idx_fine_2:r[2]] = \
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 1:(-stencil_size + 2)]
-                
-                for s in range(1, r[2]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                   (start_idx_fine_2 + s):end_idx_fine_2:r[2]] = \
-                        c_2[s, 0]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                   0:(-stencil_size + 1)] \
-                        + c_2[s, 1]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     1:(-stencil_size + 2)] \
-                        + c_2[s, 2]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     2:(-stencil_size + 3)] \
-                        + c_2[s, 3]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 3:]
-                
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, end_idx_fine_2] = \
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, -half_stencil_size]
+        # Set the cells of a new container without a full stencil to NAN values.
+        
+        if out is None:
+            for i in range(dim):
+                for boundary_range in (slice(0, fine_range[i].start), slice(fine_range[i].stop, None)):
+                    index = fine_range[0:i] + [ boundary_range ] + [ slice(None) ]*(dim - i - 1)
+                    upsampled_data[tuple(index)] = numpy.NAN
         
         return upsampled_data
     
     
-    def _upsampleSixthOrderLagrange(self, data, refine_ratio, component_idx=None):
+    def _upsampleSecondOrderLagrange(self, data, refine_ratio, component_idx=None, out=None):
         """
-        Upsampling the data using sixth order Lagrange interpolation.
+        Upsampling the data using second order Lagrange interpolation.
         """
         
-        r = refine_ratio
-        
-        stencil_size = 6
-        half_stencil_size = stencil_size/2
-        
-        # Get the shape of data.
-        
-        data_shape = numpy.array(data.shape)
-        
-        # Check whether the shape of data is valid.
-        
-        if component_idx is None:
-            if data.ndim < 1 or data.ndim > 3:
-                raise RuntimeError('Shape of data is invalid!')
-        
-        else:
-            if data.ndim < 2 or data.ndim > 4:
-                raise RuntimeError('Shape of data is invalid!')
-            
-            # Check whether the component_idx is valid and get the shape of the component's data.
-            
-            if self._data_order == 'C':
-                if component_idx >= data.shape[0] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[1:])
-            
-            else:
-                if component_idx >= data.shape[-1] or component_idx < 0:
-                    raise RuntimeError('Component index is invalid!')
-                
-                data_shape = numpy.array(data_shape[:-1])
-        
-        # Get the dimension of data.
-        
-        dim = data_shape.shape[0]
-        
-        # Check whether data size is large enough for sixth order Lagrange interpolation.
-        
-        if data_shape[0] < 7:
-            raise RuntimeError('First dimension of data is not large enough!')
-        
-        if dim > 1:
-            if data_shape[1] < 7:
-                raise RuntimeError('Second dimension of data is not large enough!')
-        
-        elif dim > 2:
-            if data_shape[2] < 7:
-                raise RuntimeError('Third dimension of data is not large enough!')
-        
-        # Compute the coefficients for sixth order Lagrange interpolation.
-        
-        c_0 = numpy.ones([r[0], stencil_size], dtype=data.dtype)
-        c_1 = None
-        c_2 = None
-        
-        delta = 1.0/r[0]
-        
-        if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-            for s in range(r[0]):
-                idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                for i in range(stencil_size):
-                    for j in range(stencil_size):
-                        if i != j:
-                            c_0[s, i] = c_0[s, i]*(idx_r - j)/(i - j)
-        
-        else: # If some of the upsampled nodes overlap with the original nodes.
-            for s in range(1, r[0]):
-                idx_r = (half_stencil_size - 1) + s*delta
-                for i in range(stencil_size):
-                    for j in range(stencil_size):
-                        if i != j:
-                            c_0[s, i] = c_0[s, i] * (idx_r - j)/(i - j)
-        
-        if dim >= 2:
-            c_1 = numpy.ones([r[1], stencil_size], dtype=data.dtype)
-            
-            delta = 1.0/r[1]
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_1[s, i] = c_1[s, i]*(idx_r - j)/(i - j)
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                for s in range(1, r[1]):
-                    idx_r = (half_stencil_size - 1) + s*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_1[s, i] = c_1[s, i]*(idx_r - j)/(i - j)
-        
-        if dim >= 3:
-            c_2 = numpy.ones([r[2], stencil_size], dtype=data.dtype)
-            
-            delta = 1.0/r[2]
-            
-            if r[2] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[2]):
-                    idx_r = (half_stencil_size - 1) + (s + 0.5)*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_2[s, i] = c_2[s, i]*(idx_r - j)/(i - j)
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                for s in range(1, r[2]):
-                    idx_r = (half_stencil_size - 1) + s*delta
-                    for i in range(stencil_size):
-                        for j in range(stencil_size):
-                            if i != j:
-                                c_2[s, i] = c_2[s, i]*(idx_r - j)/(i - j)
-        
-        # Initialize containers to store the upsampled data. The elements in the containers
-        # are initialized as NAN values.
-        
-        upsampled_data_shape_0 = None
-        upsampled_data_shape_1 = None
-        upsampled_data_shape = None
-        
-        upsampled_data_0 = None
-        upsampled_data_1 = None
-        upsampled_data = None
-        
-        if dim == 1:
-            upsampled_data_shape = numpy.multiply(data_shape, r[0])
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            upsampled_data[:] = numpy.NAN
-        
-        elif dim == 2:
-            upsampled_data_shape_0 = numpy.copy(data_shape)
-            upsampled_data_shape_0[0] = upsampled_data_shape_0[0]*r[0]
-            
-            upsampled_data_shape = numpy.copy(upsampled_data_shape_0)
-            upsampled_data_shape[1] = upsampled_data_shape[1]*r[1]
-            
-            upsampled_data_0 = numpy.empty(upsampled_data_shape_0, dtype=data.dtype, order=self._data_order)
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            
-            upsampled_data_0[:] = numpy.NAN
-            upsampled_data[:] = numpy.NAN
-        
-        elif dim == 3:
-            upsampled_data_shape_0 = numpy.copy(data_shape)
-            upsampled_data_shape_0[0] = upsampled_data_shape_0[0]*r[0]
-            
-            upsampled_data_shape_1 = numpy.copy(upsampled_data_shape_0)
-            upsampled_data_shape_1[1] = upsampled_data_shape_1[1]*r[1]
-            
-            upsampled_data_shape = numpy.copy(upsampled_data_shape_1)
-            upsampled_data_shape[2] = upsampled_data_shape[2]*r[2]
-            
-            upsampled_data_0 = numpy.empty(upsampled_data_shape_0, dtype=data.dtype, order=self._data_order)
-            upsampled_data_1 = numpy.empty(upsampled_data_shape_1, dtype=data.dtype, order=self._data_order)
-            upsampled_data = numpy.empty(upsampled_data_shape, dtype=data.dtype, order=self._data_order)
-            
-            upsampled_data_0[:] = numpy.NAN
-            upsampled_data_1[:] = numpy.NAN
-            upsampled_data[:] = numpy.NAN
-        
-        # Get the component's data.
-        
-        data_component = None
-        
-        if component_idx is None:
-            data_component = data
-        else:
-            if self._data_order == 'C':
-                if dim == 1:
-                    data_component = data[component_idx, :]
-                elif dim == 2:
-                    data_component = data[component_idx, :, :]
-                elif dim == 3:
-                    data_component = data[component_idx, :, :, :]
-            else:
-                if dim == 1:
-                    data_component = data[:, component_idx]
-                elif dim == 2:
-                    data_component = data[:, :, component_idx]
-                elif dim == 3:
-                    data_component = data[:, :, :, component_idx]
-        
-        # Upsample the data with sixth order Lagrange interpolation.
-        
-        if dim == 1:
-            start_idx_fine = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data[(start_idx_fine + s):end_idx_fine:r[0]] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1)] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2)] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3)] \
-                        + c_0[s, 3]*data_component[3:(-stencil_size + 4)] \
-                        + c_0[s, 4]*data_component[4:(-stencil_size + 5)] \
-                        + c_0[s, 5]*data_component[5:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine:end_idx_fine:r[0]] = data_component[2:(-stencil_size + 3)]
-                
-                for s in range(1, r[0]):
-                    upsampled_data[(start_idx_fine + s):end_idx_fine:r[0]] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1)] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2)] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3)] \
-                        + c_0[s, 3]*data_component[3:(-stencil_size + 4)] \
-                        + c_0[s, 4]*data_component[4:(-stencil_size + 5)] \
-                        + c_0[s, 5]*data_component[5:]
-                
-                upsampled_data[end_idx_fine] = data_component[-half_stencil_size]
-        
-        elif dim == 2:
-            start_idx_fine_0 = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine_0 = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            start_idx_fine_1 = (half_stencil_size - 1)*r[1] + r[1]/2
-            end_idx_fine_1 = upsampled_data_shape[1] - (half_stencil_size - 1)*r[1] - (r[1] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :] \
-                        + c_0[s, 3]*data_component[3:(-stencil_size + 4), :] \
-                        + c_0[s, 4]*data_component[4:(-stencil_size + 5), :] \
-                        + c_0[s, 5]*data_component[5:, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_0[start_idx_fine_0:end_idx_fine_0:r[0], :] = \
-                    data_component[2:(-stencil_size + 3), :]
-                
-                for s in range(1, r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :] \
-                        + c_0[s, 3]*data_component[3:(-stencil_size + 4), :] \
-                        + c_0[s, 4]*data_component[4:(-stencil_size + 5), :] \
-                        + c_0[s, 5]*data_component[5:, :]
-                
-                upsampled_data_0[end_idx_fine_0, :] = data_component[-half_stencil_size, :]
-                
-                end_idx_fine_0 = end_idx_fine_0 + 1
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1]] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2)] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3)] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:(-stencil_size + 4)] \
-                        + c_1[s, 4]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 4:(-stencil_size + 5)] \
-                        + c_1[s, 5]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 5:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1:r[1]] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3)]
-                
-                for s in range(1, r[1]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1]] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1)] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2)] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3)] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:(-stencil_size + 4)] \
-                        + c_1[s, 4]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 4:(-stencil_size + 5)] \
-                        + c_1[s, 5]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 5:]
-                
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, end_idx_fine_1] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, -half_stencil_size]
+        return self._upsampleSeparable(data, refine_ratio, component_idx, 2, out)
+    
+    
+    def _upsampleFourthOrderLagrange(self, data, refine_ratio, component_idx=None, out=None):
+        """
+        Upsampling the data using fourth order Lagrange interpolation.
+        """
         
-        elif dim == 3:
-            start_idx_fine_0 = (half_stencil_size - 1)*r[0] + r[0]/2
-            end_idx_fine_0 = upsampled_data_shape[0] - (half_stencil_size - 1)*r[0] - (r[0] + 1)/2
-            
-            start_idx_fine_1 = (half_stencil_size - 1)*r[1] + r[1]/2
-            end_idx_fine_1 = upsampled_data_shape[1] - (half_stencil_size - 1)*r[1] - (r[1] + 1)/2
-            
-            start_idx_fine_2 = (half_stencil_size - 1)*r[2] + r[2]/2
-            end_idx_fine_2 = upsampled_data_shape[2] - (half_stencil_size - 1)*r[2] - (r[2] + 1)/2
-            
-            if r[0] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], : :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :, :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :, :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :, :] \
-                        + c_0[s, 3]*data_component[3:(-stencil_size + 4), :, :] \
-                        + c_0[s, 4]*data_component[4:(-stencil_size + 5), :, :] \
-                        + c_0[s, 5]*data_component[5:, :, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_0[start_idx_fine_0:end_idx_fine_0:r[0], : :] = \
-                    data_component[2:(-stencil_size + 3), :, :]
-                
-                for s in range(1, r[0]):
-                    upsampled_data_0[(start_idx_fine_0 + s):end_idx_fine_0:r[0], : :] = \
-                        c_0[s, 0]*data_component[0:(-stencil_size + 1), :, :] \
-                        + c_0[s, 1]*data_component[1:(-stencil_size + 2), :, :] \
-                        + c_0[s, 2]*data_component[2:(-stencil_size + 3), :, :] \
-                        + c_0[s, 3]*data_component[3:(-stencil_size + 4), :, :] \
-                        + c_0[s, 4]*data_component[4:(-stencil_size + 5), :, :] \
-                        + c_0[s, 5]*data_component[5:, :, :]
-                
-                upsampled_data_0[end_idx_fine_0, : :] = data_component[-half_stencil_size, :, :]
-                
-                end_idx_fine_0 = end_idx_fine_0 + 1
-            
-            if r[1] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[1]):
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1], :] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2), :] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3), :] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:(-stencil_size + 4), :] \
-                        + c_1[s, 4]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 4:(-stencil_size + 5), :] \
-                        + c_1[s, 5]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 5:, :]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1:r[1], :] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3), :]
-                
-                for s in range(1, r[1]):
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, (start_idx_fine_1 + s):end_idx_fine_1:r[1], :] = \
-                        c_1[s, 0]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 0:(-stencil_size + 1), :] \
-                        + c_1[s, 1]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 1:(-stencil_size + 2), :] \
-                        + c_1[s, 2]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 2:(-stencil_size + 3), :] \
-                        + c_1[s, 3]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 3:(-stencil_size + 4), :] \
-                        + c_1[s, 4]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 4:(-stencil_size + 5), :] \
-                        + c_1[s, 5]*upsampled_data_0[start_idx_fine_0:end_idx_fine_0, 5:, :]
-                
-                upsampled_data_1[start_idx_fine_0:end_idx_fine_0, end_idx_fine_1, :] = \
-                    upsampled_data_0[start_idx_fine_0:end_idx_fine_0, -half_stencil_size, :]
-                
-                end_idx_fine_1 = end_idx_fine_1 + 1
-            
-            if r[2] % 2 == 0: # If the upsampled nodes don't overlap with the original nodes.
-                for s in range(r[2]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1,\
-                                   (start_idx_fine_2 + s):end_idx_fine_2:r[2]] = \
-                        c_2[s, 0]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                   0:(-stencil_size + 1)] \
-                        + c_2[s, 1]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     1:(-stencil_size + 2)] \
-                        + c_2[s, 2]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     2:(-stencil_size + 3)] \
-                        + c_2[s, 3]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     3:(-stencil_size + 4)] \
-                        + c_2[s, 4]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     4:(-stencil_size + 5)] \
-                        + c_2[s, 5]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 5:]
-            
-            else: # If some of the upsampled nodes overlap with the original nodes.
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                               start_idx_fine_2:end_idx_fine_2:r[2]] = \
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 2:(-stencil_size + 3)]
-                
-                for s in range(1, r[2]):
-                    upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                   (start_idx_fine_2 + s):end_idx_fine_2:r[2]] = \
-                        c_2[s, 0]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                   0:(-stencil_size + 1)] \
-                        + c_2[s, 1]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     1:(-stencil_size + 2)] \
-                        + c_2[s, 2]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     2:(-stencil_size + 3)] \
-                        + c_2[s, 3]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     3:(-stencil_size + 4)] \
-                        + c_2[s, 4]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, \
-                                                     4:(-stencil_size + 5)] \
-                        + c_2[s, 5]*upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, 5:]
-                
-                upsampled_data[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, end_idx_fine_2] = \
-                    upsampled_data_1[start_idx_fine_0:end_idx_fine_0, start_idx_fine_1:end_idx_fine_1, -half_stencil_size]
+        return self._upsampleSeparable(data, refine_ratio, component_idx, 4, out)
+    
+    
+    def _upsampleSixthOrderLagrange(self, data, refine_ratio, component_idx=None, out=None):
+        """
+        Upsampling the data using sixth order Lagrange interpolation.
+        """
         
-        return upsampled_data
+        return self._upsampleSeparable(data, refine_ratio, component_idx, 6, out)
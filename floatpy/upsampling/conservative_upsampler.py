@@ -0,0 +1,303 @@
+"""
+Module for upsampling cell-averaged data conservatively.
+"""
+
+from fractions import Fraction
+import numpy
+
+import Lagrange_upsampler
+
+# Caches of the tables of the coefficients.
+_conservative_coefficients = {}
+_WENO_tables = {}
+
+
+def _computeAverageCoefficients(offsets, refine_ratio):
+    """
+    Compute the (refine_ratio, len(offsets)) table of the coefficients of the averages over the refine_ratio sub-cells
+    of cell 0 of the polynomial with the averages of the cells at the given offsets. The polynomial is the derivative
+    of the Lagrange interpolant of the primitive function at the faces of the cells, so the averages of the sub-cells
+    sum up to the average of cell 0.
+    """
+    
+    faces = [ Fraction(2*offset - 1, 2) for offset in offsets ] + [ Fraction(2*offsets[-1] + 1, 2) ]
+    
+    def Lagrange(n, x):
+        value = Fraction(1)
+        for m in range(len(faces)):
+            if m != n:
+                value *= (x - faces[m])/(faces[n] - faces[m])
+        return value
+    
+    coefficients = numpy.empty([refine_ratio, len(offsets)], dtype=numpy.float64)
+    
+    for s in range(refine_ratio):
+        x_lo = Fraction(-1, 2) + Fraction(s, refine_ratio)
+        x_hi = x_lo + Fraction(1, refine_ratio)
+        
+        # The primitive function at face n is the sum of the averages of the cells l < n.
+        
+        weights = [ refine_ratio*(Lagrange(n, x_hi) - Lagrange(n, x_lo)) for n in range(len(faces)) ]
+        
+        for l in range(len(offsets)):
+            coefficients[s, l] = float(sum(weights[l+1:]))
+    
+    return coefficients
+
+
+def getConservativeCoefficients(stencil_size, refine_ratio):
+    """
+    Return the (refine_ratio, stencil_size) table of the coefficients of the conservative reconstruction of the
+    averages of the refine_ratio sub-cells of the center cell of a stencil with an odd number of cells. The tables are
+    computed once and cached.
+    
+    stencil_size : odd number of coarse cells in the stencil of the reconstruction
+    refine_ratio : integer refinement ratio
+    """
+    
+    key = (int(stencil_size), int(refine_ratio))
+    
+    if key not in _conservative_coefficients:
+        half_stencil_size = stencil_size//2
+        
+        coefficients = _computeAverageCoefficients(range(-half_stencil_size, half_stencil_size + 1), int(refine_ratio))
+        
+        coefficients.flags.writeable = False
+        _conservative_coefficients[key] = coefficients
+    
+    return _conservative_coefficients[key]
+
+
+def getWENOTables(num_substencils, refine_ratio):
+    """
+    Return the tables of the WENO reconstruction of the averages of the refine_ratio sub-cells of the center cell of a
+    stencil of 2*num_substencils - 1 cells. The tables are computed once and cached. The returned dictionary has:
+    
+    'coefficients' : list of the (refine_ratio, num_substencils) tables of the coefficients of the sub-stencils
+    'linear_weights' : (2, refine_ratio, num_substencils) array of the positive and negative parts of the linear
+                       weights of the sub-stencils that give the reconstruction with the full stencil
+    'smoothness' : list of the (number of forms, num_substencils) arrays of the linear forms whose sum of squares is
+                   the smoothness indicator of each sub-stencil
+    """
+    
+    key = (int(num_substencils), int(refine_ratio))
+    
+    if key not in _WENO_tables:
+        k = int(num_substencils)
+        r = int(refine_ratio)
+        
+        coefficients = [ _computeAverageCoefficients(range(q - k + 1, q + 1), r) for q in range(k) ]
+        coefficients_full = _computeAverageCoefficients(range(-k + 1, k), r)
+        
+        # Linear weights of the sub-stencils for each sub-cell. They are split into positive and negative parts if some
+        # of them are negative.
+        
+        linear_weights = numpy.zeros([2, r, k], dtype=numpy.float64)
+        
+        for s in range(r):
+            embedded_coefficients = numpy.zeros([2*k - 1, k], dtype=numpy.float64)
+            for q in range(k):
+                embedded_coefficients[q:q+k, q] = coefficients[q][s]
+            
+            gamma = numpy.linalg.lstsq(embedded_coefficients, coefficients_full[s], rcond=-1)[0]
+            
+            if numpy.absolute(embedded_coefficients.dot(gamma) - coefficients_full[s]).max() > 1.0e-12:
+                raise RuntimeError('No linear weights of the WENO reconstruction for refine ratio %d!' % r)
+            
+            if gamma.min() >= 0.0:
+                linear_weights[0, s] = gamma
+            else:
+                linear_weights[0, s] = 0.5*(gamma + 3.0*numpy.absolute(gamma))
+                linear_weights[1, s] = linear_weights[0, s] - gamma
+        
+        # Smoothness indicators of Jiang and Shu, i.e. the sums of the integrals over the cell of the squares of the
+        # derivatives of the polynomial of each sub-stencil, as sums of squares of linear forms of the cell averages.
+        
+        powers = numpy.arange(k)
+        
+        derivative_squares = numpy.zeros([k, k], dtype=numpy.float64)
+        for l in range(1, k):
+            factors = numpy.array([ numpy.prod(range(n - l + 1, n + 1)) if n >= l else 0 for n in powers ], \
+                dtype=numpy.float64)
+            for n in range(l, k):
+                for m in range(l, k):
+                    p = n + m - 2*l + 1
+                    derivative_squares[n, m] += factors[n]*factors[m]*(0.5**p - (-0.5)**p)/p
+        
+        smoothness = []
+        for q in range(k):
+            offsets = numpy.arange(q - k + 1, q + 1, dtype=numpy.float64)
+            averages = ((offsets[:, numpy.newaxis] + 0.5)**(powers + 1) \
+                        - (offsets[:, numpy.newaxis] - 0.5)**(powers + 1))/(powers + 1)
+            
+            polynomial = numpy.linalg.inv(averages)
+            eigenvalues, eigenvectors = numpy.linalg.eigh(polynomial.T.dot(derivative_squares).dot(polynomial))
+            
+            is_form = eigenvalues > 1.0e-12*eigenvalues.max()
+            smoothness.append((numpy.sqrt(eigenvalues[is_form])*eigenvectors[:, is_form]).T.copy())
+        
+        tables = {'coefficients': coefficients, 'linear_weights': linear_weights, 'smoothness': smoothness}
+        
+        for table in coefficients + smoothness + [linear_weights]:
+            table.flags.writeable = False
+        
+        _WENO_tables[key] = tables
+    
+    return _WENO_tables[key]
+
+
+def _expand(array, axis, ndim):
+    """
+    Return a view of a 1D array of the fine cells of a coarse cell that broadcasts along the refined axis after axis of
+    the refined views with ndim + 1 dimensions.
+    """
+    
+    return array.reshape((array.shape[0],) + (1,)*(ndim - axis - 1))
+
+
+class ConservativeUpsampler(Lagrange_upsampler.LagrangeUpsampler):
+    """
+    Class to upsample cell-averaged data with conservative reconstructions. The averages of the fine cells in a coarse
+    cell sum up to the average of the coarse cell. The WENO reconstruction is limited near discontinuities.
+    """
+    
+    def __init__(self, method='fifth_order_WENO', data_order='F', epsilon=1.0e-6):
+        """
+        Constructor of the class.
+        
+        method : a string {'third_order', 'fifth_order', 'fifth_order_WENO'} to describe the reconstruction method to
+                 use
+        data_order : a string {'F', 'C'} to describe whether the multi-dimensional data is stored in row-major
+                     (C-style) or column-major (Fortran-style) order in memory
+        epsilon : small number of the nonlinear weights of the WENO reconstruction to avoid division by zero
+        """
+        
+        if method != 'third_order' and \
+           method != 'fifth_order' and \
+           method != 'fifth_order_WENO':
+            raise RuntimeError("Unknown method '" + method + "' for upsampling!")
+        
+        super(ConservativeUpsampler, self).__init__('constant', data_order)
+        
+        self._method = method
+        self._epsilon = epsilon
+    
+    
+    def getNumberOfGhostCells(self):
+        """
+        Determine the number of ghost cells needed for upsampling in the interior of domain.
+        """
+        
+        if self._method == 'third_order':
+            return 1
+        elif self._method == 'fifth_order':
+            return 2
+        elif self._method == 'fifth_order_WENO':
+            return 2
+    
+    
+    def upsample(self, data, refine_ratio, component_idx=None, out=None):
+        """
+        Upsampling the data.
+        
+        data : numpy array of the data
+        refine_ratio : integer iterable of the refine ratio in each direction
+        component_idx : index of the component to upsample. data is a single component if it is None
+        out : optional numpy array of the upsampled shape of the data (e.g. a view into a larger array) to store the
+              upsampled data in. The cells without a full stencil are left untouched in out while they are NAN values
+              in a new array
+        """
+        
+        return self._upsampleSeparable(data, refine_ratio, component_idx, 2*self.getNumberOfGhostCells() + 1, out)
+    
+    
+    def _getFineRange(self, num_cells, refine_ratio, stencil_size):
+        """
+        Return the start and end indices of the upsampled cells with a full stencil in a direction with num_cells cells.
+        """
+        
+        start_idx_fine = (stencil_size//2)*refine_ratio
+        end_idx_fine = start_idx_fine + (num_cells - stencil_size + 1)*refine_ratio
+        
+        return start_idx_fine, end_idx_fine
+    
+    
+    def _upsampleDirection(self, data, upsampled_data, refine_ratio, axis, stencil_size):
+        """
+        Upsample the data in one direction with the cached tables of coefficients.
+        """
+        
+        if self._method == 'fifth_order_WENO':
+            self._upsampleDirectionWENO(data, upsampled_data, refine_ratio, axis, stencil_size)
+        else:
+            coefficients = getConservativeCoefficients(stencil_size, refine_ratio)
+            
+            ndim = data.ndim
+            windows = Lagrange_upsampler.getStencilWindows(data, axis, stencil_size)
+            fine = Lagrange_upsampler.getRefinedView(upsampled_data, axis, refine_ratio, windows.shape[axis])
+            
+            numpy.einsum(windows, range(ndim + 1), coefficients.astype(data.dtype), [ndim + 1, ndim], \
+                         range(axis + 1) + [ndim + 1] + range(axis + 1, ndim), out=fine)
+    
+    
+    def _upsampleDirectionWENO(self, data, upsampled_data, refine_ratio, axis, stencil_size):
+        """
+        Upsample the data in one direction with the WENO reconstruction. The reconstructions of the sub-stencils are
+        tensor contractions with the cached tables and they are combined with the nonlinear weights of each coarse cell.
+        The averages of the fine cells of each coarse cell are shifted to sum up to the average of the coarse cell.
+        """
+        
+        k = stencil_size//2 + 1
+        tables = getWENOTables(k, refine_ratio)
+        
+        ndim = data.ndim
+        windows = Lagrange_upsampler.getStencilWindows(data, axis, stencil_size)
+        fine = Lagrange_upsampler.getRefinedView(upsampled_data, axis, refine_ratio, windows.shape[axis])
+        
+        # Index of the arrays of the coarse cells to broadcast along the refined axis.
+        
+        refined_axis = tuple([ slice(None) ]*(axis + 1) + [ numpy.newaxis ])
+        
+        reconstructions = []
+        inverse_smoothness = []
+        
+        for q in range(k):
+            windows_q = windows[..., q:q+k]
+            
+            reconstructions.append(numpy.einsum(windows_q, range(ndim + 1), \
+                tables['coefficients'][q].astype(data.dtype), [ndim + 1, ndim], \
+                range(axis + 1) + [ndim + 1] + range(axis + 1, ndim)))
+            
+            forms = numpy.einsum(windows_q, range(ndim + 1), tables['smoothness'][q].astype(data.dtype), \
+                [ndim + 1, ndim], range(ndim) + [ndim + 1])
+            
+            beta = numpy.einsum(forms, range(ndim + 1), forms, range(ndim + 1), range(ndim))
+            inverse_smoothness.append(1.0/(self._epsilon + beta[refined_axis])**2)
+        
+        fine[...] = 0.0
+        
+        for part, sign in ((0, 1.0), (1, -1.0)):
+            linear_weights = tables['linear_weights'][part]
+            sum_linear_weights = linear_weights.sum(axis=1)
+            
+            if not numpy.any(sum_linear_weights > 0.0):
+                continue
+            
+            sum_weights = numpy.zeros(fine.shape, dtype=data.dtype)
+            part_data = numpy.zeros(fine.shape, dtype=data.dtype)
+            
+            for q in range(k):
+                weights = _expand(linear_weights[:, q], axis, ndim)*inverse_smoothness[q]
+                sum_weights += weights
+                part_data += weights*reconstructions[q]
+            
+            # Sub-cells without a negative part have zero weights.
+            
+            sum_weights[sum_weights == 0.0] = 1.0
+            
+            fine += sign*_expand(sum_linear_weights, axis, ndim)*part_data/sum_weights
+        
+        # Conservation of the average of each coarse cell.
+        
+        window_center = windows[..., stencil_size//2]
+        fine -= fine.mean(axis=axis + 1)[refined_axis] - window_center[refined_axis]
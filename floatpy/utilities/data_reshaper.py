@@ -1,8 +1,22 @@
 import numpy
 
 class DataReshaper(object):
+    """
+    Class to reshape low dimensional data to 3D and back. Reshaped data are guaranteed to be contiguous in the data
+    order so that they can be passed to the Fortran routines without a hidden copy. They are views of the given data
+    whenever the memory layout allows it. Otherwise the data are copied and the copy is recorded in the counters of
+    the class.
+    """
     
-    def __init__(self, dimension, data_order='F'):
+    def __init__(self, dimension, data_order='F', allow_copy=True):
+        """
+        Constructor of the class.
+        
+        dimension : dimension of the data (1, 2 or 3)
+        data_order : memory order of the data ('C' or 'F')
+        allow_copy : boolean. If False, a RuntimeError is raised whenever the data cannot be reshaped to a contiguous
+                     array without a copy
+        """
         
         if dimension < 1 or dimension > 3:
             raise ValueError("Number of dimensions should be between 1 and 3!")
@@ -14,15 +28,136 @@ class DataReshaper(object):
             raise RuntimeError("Invalid data order! Data order can only be 'C' or 'F'.")
         
         self._data_order = data_order
+        
+        self._allow_copy = allow_copy
+        
+        self._num_views = 0
+        self._num_copies = 0
+        self._num_bytes_copied = 0
+    
+    
+    @property
+    def allow_copy(self):
+        """
+        Return whether the data are allowed to be copied when they cannot be reshaped as a view.
+        """
+        
+        return self._allow_copy
+    
+    
+    @allow_copy.setter
+    def allow_copy(self, allow_copy):
+        """
+        Set whether the data are allowed to be copied when they cannot be reshaped as a view.
+        """
+        
+        self._allow_copy = allow_copy
+    
+    
+    @property
+    def num_views(self):
+        """
+        Return the number of reshapes done without copying the data.
+        """
+        
+        return self._num_views
+    
     
+    @property
+    def num_copies(self):
+        """
+        Return the number of reshapes that had to copy the data.
+        """
         
-    def reshapeTo3d(self, data, component_idx=None, data_output=None):
+        return self._num_copies
+    
+    
+    @property
+    def num_bytes_copied(self):
+        """
+        Return the total number of bytes copied by the reshapes.
         """
-        Reshape data to 3D.
+        
+        return self._num_bytes_copied
+    
+    
+    def resetCounters(self):
+        """
+        Reset the counters of views and copies.
+        """
+        
+        self._num_views = 0
+        self._num_copies = 0
+        self._num_bytes_copied = 0
+    
+    
+    def _reshape(self, data, shape, allow_copy, data_output, contiguous=True):
+        """
+        Reshape data to the given shape with the data order of the class, returning a view of data whenever possible.
+        If data_output is given, the reshaped data are written into it instead. If contiguous is True, the reshaped data
+        are copied when the view is not contiguous in the data order.
+        """
+        
+        if allow_copy is None:
+            allow_copy = self._allow_copy
+        
+        shape = tuple([int(e) for e in shape])
+        
+        if data_output is not None:
+            if data_output.size != data.size:
+                raise RuntimeError('Size of data_output is not consistent with the size of data!')
+            
+            # The output is filled through a view of it so that the caller's buffer is actually written.
+            output = self._reshape(data_output, shape, False, None, contiguous=False)
+            output[...] = self._reshape(data, shape, True, None, contiguous=False)
+            return data_output
+        
+        # Setting the shape of a view raises an AttributeError if the reshape cannot be done without a copy.
+        view = None
+        try:
+            if self._data_order == 'C':
+                view = data.view()
+                view.shape = shape
+            else:
+                view = data.T.view()
+                view.shape = shape[::-1]
+                view = view.T
+        except AttributeError:
+            view = None
+        
+        if view is not None and contiguous:
+            if (self._data_order == 'C' and not view.flags.c_contiguous) or \
+               (self._data_order == 'F' and not view.flags.f_contiguous):
+                view = None
+        
+        if view is not None:
+            self._num_views += 1
+            return view
+        
+        if not allow_copy:
+            raise RuntimeError('Data cannot be reshaped without a copy! Make sure that the data are contiguous in ' + \
+                               "'%s' order." % self._data_order)
+        
+        self._num_copies += 1
+        self._num_bytes_copied += data.nbytes
+        
+        data_copy = numpy.empty(shape, dtype=data.dtype, order=self._data_order)
+        data_copy[...] = numpy.reshape(data, shape, order=self._data_order)
+        
+        return data_copy
+    
+    
+    def reshapeTo3d(self, data, component_idx=None, data_output=None, allow_copy=None):
+        """
+        Reshape data to 3D. The reshaped data is contiguous in the data order and is a view of data unless a copy is
+        needed.
         
         data : numpy data to reshape
         component_idx : integer representing component index of data to reshape. None if there is only one component
-        data_output : optional numpy array ouput. This method will return data_output if it is not given
+        data_output : optional numpy array output that is filled with the reshaped data and returned. A new array or a
+                      view of data is returned if it is not given
+        allow_copy : boolean to override allow_copy of the class for this call. A RuntimeError is raised if it is False
+                     and the data cannot be reshaped to a contiguous array without a copy
         """
         
         # Get the shape of data.
@@ -62,7 +197,7 @@ class DataReshaper(object):
         # Get the component's data.
         
         data_component = None
-       
+        
         if component_idx is None:
             data_component = data
         else:
@@ -81,18 +216,19 @@ class DataReshaper(object):
                 elif self._dim == 3:
                     data_component = data[:, :, :, component_idx]
         
-        if data_output is None:
-            return numpy.reshape(data_component, shape_3d, order=self._data_order)
-        else:
-            data_output = numpy.reshape(data_component, shape_3d, order=self._data_order)
+        return self._reshape(data_component, shape_3d, allow_copy, data_output)
     
     
-    def reshapeFrom3d(self, data, data_output=None):
+    def reshapeFrom3d(self, data, data_output=None, allow_copy=None):
         """
-        Reshape data into low dimension from 3D.
+        Reshape data into low dimension from 3D. The reshaped data is contiguous in the data order and is a view of data
+        unless a copy is needed.
         
         data : numpy data to reshape
-        data_output : optional numpy array output. This method will return data_output if it is not given
+        data_output : optional numpy array output that is filled with the reshaped data and returned. A new array or a
+                      view of data is returned if it is not given
+        allow_copy : boolean to override allow_copy of the class for this call. A RuntimeError is raised if it is False
+                     and the data cannot be reshaped to a contiguous array without a copy
         """
         
         # Get the shape of data.
@@ -123,8 +259,5 @@ class DataReshaper(object):
         else:
                 raise RuntimeError('Dimension of data is invalid!')
         
-        if data_output is None:
-            return numpy.reshape(data, shape_low_dim, order=self._data_order)
-        else:
-            data_output = numpy.reshape(data, shape_low_dim, order=self._data_order)
+        return self._reshape(data, shape_low_dim, allow_copy, data_output)
 
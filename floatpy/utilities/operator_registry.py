@@ -0,0 +1,134 @@
+import hashlib
+import numpy
+import weakref
+
+class OperatorRegistry(object):
+    """
+    Class to share the Fortran objects of the compact derivative and filter schemes between all the objects of a
+    process that use the same scheme. Constructing one of these objects computes the factorization of its implicit
+    operator, so an object is constructed only once for each (scheme, n, dx, periodic, bc) key and returned again to all
+    the later requests with the same key.
+
+    The registry only holds weak references to the operators. An operator is thus reference counted by all the objects
+    that use it and its factorization is freed by the destructor of the Fortran object once the last of them is deleted.
+
+    The number of threads and the tile size of the solves are not part of the key. The classes exposing these settings
+    apply them to a shared operator before each of its solves.
+    """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self._operators = weakref.WeakValueDictionary()
+
+        self._num_hits = 0
+        self._num_misses = 0
+
+
+    @property
+    def num_operators(self):
+        """
+        Return the number of operators alive in the registry.
+        """
+
+        return len(self._operators)
+
+
+    @property
+    def num_hits(self):
+        """
+        Return the number of requests that were served with an existing operator.
+        """
+
+        return self._num_hits
+
+
+    @property
+    def num_misses(self):
+        """
+        Return the number of requests that had to construct a new operator.
+        """
+
+        return self._num_misses
+
+
+    def resetCounters(self):
+        """
+        Reset the counters of hits and misses.
+        """
+
+        self._num_hits = 0
+        self._num_misses = 0
+
+
+    def key(self, scheme, n, dx, periodic, bc=(0,0), coordinates=None):
+        """
+        Return the key of an operator.
+
+        scheme : name of the scheme, e.g. 'cd06', 'cd10', 'cf90' or 'gaussian'
+        n : global number of grid points in the direction of the operator
+        dx : grid spacing. None for the schemes that do not depend on it
+        periodic : boolean with the periodicity of the direction
+        bc : integer iterable of size 2 with the boundary conditions at the left and right used in the constructor of
+             the operator
+        coordinates : optional 1D numpy array with the coordinates of a non-uniform grid in the direction
+        """
+
+        if dx is not None:
+            dx = float(dx)
+
+        if coordinates is not None:
+            coordinates = hashlib.sha1(numpy.ascontiguousarray(coordinates, dtype=numpy.float64)).hexdigest()
+
+        return (str(scheme), int(n), dx, bool(periodic), (int(bc[0]), int(bc[1])), coordinates)
+
+
+    def get(self, create, scheme, n, dx, periodic, bc=(0,0), coordinates=None):
+        """
+        Return the operator of the given key. The operator is constructed with create() if there is no operator with
+        the same key alive in the registry.
+
+        create : function without arguments that constructs the operator. It has to set the coordinates of the
+                 operator if the grid is non-uniform
+        scheme, n, dx, periodic, bc, coordinates : description of the operator (see the key method)
+        """
+
+        key = self.key(scheme, n, dx, periodic, bc, coordinates)
+
+        operator = self._operators.get(key)
+
+        if operator is not None:
+            self._num_hits += 1
+            return operator
+
+        operator = create()
+        self._operators[key] = operator
+        self._num_misses += 1
+
+        return operator
+
+
+    def clear(self):
+        """
+        Forget all the operators in the registry. Operators still in use are not freed but are not shared with the
+        objects constructed afterwards.
+        """
+
+        self._operators.clear()
+
+
+_default_registry = None
+
+def default_registry():
+    """
+    Return the registry shared by all the derivative and filter objects of this process.
+    """
+
+    global _default_registry
+
+    if _default_registry is None:
+        _default_registry = OperatorRegistry()
+
+    return _default_registry
@@ -5,25 +5,39 @@ from floatpy.parallel import t3dmod
 
 class ParallelPlane(object):
     """
-    Class to aggregate a plane from a 3D parallel decomposed field
+    Class to aggregate planes from a 3D parallel decomposed field
     """
-
+    
     def __init__(self, grid_partition, direction, index):
         """
         Constructor of the class.
         
         grid_partition : t3d object or the grid_partition property of the parallel data reader class
-        direction : direction of plane normal (0 => x, 1 => y, 2 => z)
-        index : plane normal index of points on the plane
+        direction : direction of plane normal (0 => x, 1 => y, 2 => z) or list of directions of plane normals
+        index : plane normal index of points on the plane or list of plane normal indices
         """
         
         if not isinstance(grid_partition, t3dmod.t3d):
             raise TypeError("The given grid partition object is not an instance of the t3d class!")
         self._grid_partition = grid_partition
         
-        if direction < 0 or direction > 2:
-            raise ValueError('Direction < 0 or > 2 is invalid!')
-        self._direction = direction
+        # A single direction (index) is used for all the given indices (directions).
+        directions = numpy.atleast_1d(direction).astype(numpy.int64)
+        indices    = numpy.atleast_1d(index).astype(numpy.int64)
+        
+        if directions.ndim != 1 or indices.ndim != 1:
+            raise ValueError('Directions and indices of the planes should be scalars or 1D iterables!')
+        
+        if directions.shape[0] == 1 and indices.shape[0] > 1:
+            directions = numpy.repeat(directions, indices.shape[0])
+        if indices.shape[0] == 1 and directions.shape[0] > 1:
+            indices = numpy.repeat(indices, directions.shape[0])
+        
+        if directions.shape[0] != indices.shape[0] or directions.shape[0] == 0:
+            raise ValueError('Number of directions and indices of the planes are not consistent!')
+        
+        self._num_planes = directions.shape[0]
+        self._single = (numpy.ndim(direction) == 0) and (numpy.ndim(index) == 0)
         
         # Get size of chunk from all-direction domain decomposition of this processor and lo and hi of the chunk.
         self._3d_size = numpy.empty(3, dtype=numpy.int32)
@@ -37,81 +51,327 @@ class ParallelPlane(object):
         x_size = numpy.empty(3, dtype=numpy.int32)
         y_size = numpy.empty(3, dtype=numpy.int32)
         z_size = numpy.empty(3, dtype=numpy.int32)
-
+        
         self._grid_partition.get_szx(x_size)
         self._grid_partition.get_szy(y_size)
         self._grid_partition.get_szz(z_size)
-
+        
         # Convert to 0 based indexing.
         self._3d_lo = self._3d_lo - 1
         self._3d_hi = self._3d_hi - 1
-
+        
         self._grid_size = numpy.array([ x_size[0], y_size[1], z_size[2] ])
-        if (index < 0) or (index >= self._grid_size[direction]):
-            raise ValueError('index has to be within bounds!')
-        self._index = index
-
-        self._is_involved = False
-        if (self._index >= self._3d_lo[direction]) or (self._index <= self._3d_hi[direction]):
-            self._is_involved = True
-        
-        if direction == 0:
-            self._comm = MPI.Comm.f2py(self._grid_partition.commyz())
-            self._plane_size = (self._grid_size[1], self._grid_size[2])
-            self._lo = (self._3d_lo[1], self._3d_lo[2])
-            self._hi = (self._3d_hi[1], self._3d_hi[2])
-        
-        elif direction == 1:
-            self._comm = MPI.Comm.f2py(self._grid_partition.commxz())
-            self._plane_size = (self._grid_size[0], self._grid_size[2])
-            self._lo = (self._3d_lo[0], self._3d_lo[2])
-            self._hi = (self._3d_hi[0], self._3d_hi[2])
         
+        for direction, index in zip(directions, indices):
+            if direction < 0 or direction > 2:
+                raise ValueError('Direction < 0 or > 2 is invalid!')
+            if (index < 0) or (index >= self._grid_size[direction]):
+                raise ValueError('index has to be within bounds!')
+        
+        self._directions = tuple([int(d) for d in directions])
+        self._indices    = tuple([int(i) for i in indices])
+        
+        if self._single:
+            self._direction = self._directions[0]
+            self._index = self._indices[0]
+        
+        # Directions in each plane for each plane normal direction.
+        self._plane_axes = ((1, 2), (0, 2), (0, 1))
+        
+        self._plane_sizes = [ tuple([int(self._grid_size[axis]) for axis in self._plane_axes[d]]) \
+                              for d in self._directions ]
+        
+        # A single plane is aggregated in the communicator of the processors sharing the plane. Multiple planes are
+        # aggregated in the communicator of all the processors.
+        if self._single:
+            if self._direction == 0:
+                self._comm = MPI.Comm.f2py(self._grid_partition.commyz())
+            elif self._direction == 1:
+                self._comm = MPI.Comm.f2py(self._grid_partition.commxz())
+            else:
+                self._comm = MPI.Comm.f2py(self._grid_partition.commxy())
         else:
-            self._comm = MPI.Comm.f2py(self._grid_partition.commxy())
-            self._plane_size = (self._grid_size[0], self._grid_size[1])
-            self._lo = (self._3d_lo[0], self._3d_lo[1])
-            self._hi = (self._3d_hi[0], self._3d_hi[1])
-
+            self._comm = MPI.Comm.f2py(self._grid_partition.comm3d())
+        
         self._rank  = self._comm.Get_rank()
         self._procs = self._comm.Get_size()
-
-        self._all_lo = self._comm.gather(self._lo, root=0)
-        self._all_hi = self._comm.gather(self._hi, root=0)
-
-
+        
+        # Local parts of the planes in the order they are sent.
+        self._local_blocks = self._getBlocks(self._3d_lo, self._3d_hi)
+        self._send_count = sum([block['count'] for block in self._local_blocks])
+        self._send_buffer = None
+        self._send_types = {}
+        
+        self._is_involved = (self._send_count > 0)
+        
+        # Gather the chunk extents of all the processors on the root and precompute the counts and displacements.
+        my_lo_hi = numpy.concatenate((self._3d_lo, self._3d_hi)).astype(numpy.int32)
+        all_lo_hi = None
+        if self._rank == 0:
+            all_lo_hi = numpy.empty((self._procs, 6), dtype=numpy.int32)
+        self._comm.Gather(my_lo_hi, all_lo_hi, root=0)
+        
+        self._counts = None
+        self._displacements = None
+        self._recv_blocks = None
+        self._recv_buffer = None
+        self._has_planes = False
+        
+        if self._rank == 0:
+            self._counts = numpy.zeros(self._procs, dtype=numpy.int32)
+            self._displacements = numpy.zeros(self._procs, dtype=numpy.int32)
+            self._recv_blocks = []
+            
+            offset = 0
+            for i in range(self._procs):
+                self._displacements[i] = offset
+                for block in self._getBlocks(all_lo_hi[i, 0:3], all_lo_hi[i, 3:6]):
+                    self._recv_blocks.append((block['plane'], block['lo'], block['hi'], offset + block['offset']))
+                    self._counts[i] += block['count']
+                offset += self._counts[i]
+            
+            self._has_planes = (offset > 0)
+        
+        # File views of the local parts of the planes for writing with MPI-IO.
+        self._file_types = None
+    
+    
+    def __del__(self):
+        """
+        Free the MPI derived datatypes.
+        """
+        
+        if MPI.Is_finalized():
+            return
+        
+        for send_type in getattr(self, '_send_types', {}).values():
+            send_type.Free()
+        
+        if getattr(self, '_file_types', None) is not None:
+            for file_type in self._file_types:
+                if file_type is not None:
+                    file_type.Free()
+    
+    
+    @property
+    def num_planes(self):
+        """
+        Return the number of planes.
+        """
+        
+        return self._num_planes
+    
+    
+    def _getBlocks(self, lo_3d, hi_3d):
+        """
+        Get the parts of the planes on a chunk with the given lo and hi. Each part is given by a dictionary with the
+        plane number, lo and hi of the part in the plane, number of points and offset from the start of the
+        chunk's message.
+        """
+        
+        blocks = []
+        offset = 0
+        
+        for p in range(self._num_planes):
+            direction, index = self._directions[p], self._indices[p]
+            if (index >= lo_3d[direction]) and (index <= hi_3d[direction]):
+                axes = self._plane_axes[direction]
+                lo = (int(lo_3d[axes[0]]), int(lo_3d[axes[1]]))
+                hi = (int(hi_3d[axes[0]]), int(hi_3d[axes[1]]))
+                count = (hi[0] - lo[0] + 1)*(hi[1] - lo[1] + 1)
+                blocks.append({'plane' : p, 'lo' : lo, 'hi' : hi, 'count' : count, 'offset' : offset})
+                offset += count
+        
+        return blocks
+    
+    
+    def _localSlice(self, block):
+        """
+        Get the slice of the local 3D chunk containing a part of a plane.
+        """
+        
+        direction = self._directions[block['plane']]
+        local_index = self._indices[block['plane']] - self._3d_lo[direction]
+        
+        slices = [slice(None), slice(None), slice(None)]
+        slices[direction] = local_index
+        
+        return tuple(slices)
+    
+    
+    def _checkArray(self, array):
+        """
+        Check that the given array is consistent with the grid partition.
+        """
+        
+        if array.ndim != 3 or tuple(array.shape) != tuple(self._3d_size):
+            raise ValueError('Shape of array is not consistent with the chunk of the grid partition!')
+    
+    
+    def _getSendType(self, array):
+        """
+        Get the derived datatype describing the local parts of all the planes in a Fortran contiguous 3D chunk.
+        """
+        
+        key = tuple(array.shape)
+        if key not in self._send_types:
+            subarrays = []
+            for block in self._local_blocks:
+                direction = self._directions[block['plane']]
+                subsizes = list(array.shape)
+                subsizes[direction] = 1
+                starts = [0, 0, 0]
+                starts[direction] = int(self._indices[block['plane']] - self._3d_lo[direction])
+                subarrays.append(MPI.DOUBLE.Create_subarray(list(array.shape), subsizes, starts, order=MPI.ORDER_F))
+            
+            send_type = MPI.Datatype.Create_struct([1]*len(subarrays), [0]*len(subarrays), subarrays)
+            send_type.Commit()
+            
+            for subarray in subarrays:
+                subarray.Free()
+            
+            self._send_types[key] = send_type
+        
+        return self._send_types[key]
+    
+    
+    def _pack(self, array):
+        """
+        Copy the local parts of all the planes of a 3D chunk contiguously into the send buffer.
+        """
+        
+        if self._send_buffer is None:
+            self._send_buffer = numpy.empty(self._send_count, dtype=numpy.float64)
+        
+        for block in self._local_blocks:
+            shape = (block['hi'][0] - block['lo'][0] + 1, block['hi'][1] - block['lo'][1] + 1)
+            buffer_view = self._send_buffer[block['offset']:block['offset']+block['count']].reshape(shape, order='F')
+            buffer_view[:,:] = array[self._localSlice(block)]
+        
+        return self._send_buffer
+    
+    
+    def _gather(self, array):
+        """
+        Gather the parts of all the planes on the root processor of the communicator with a single collective.
+        """
+        
+        self._checkArray(array)
+        
+        if self._is_involved and array.dtype == numpy.float64 and array.flags.f_contiguous:
+            send_message = [array, 1, self._getSendType(array)]
+        elif self._is_involved:
+            send_message = [self._pack(array), self._send_count, MPI.DOUBLE]
+        else:
+            send_message = [numpy.empty(0, dtype=numpy.float64), 0, MPI.DOUBLE]
+        
+        recv_message = None
+        if self._rank == 0:
+            if self._recv_buffer is None:
+                self._recv_buffer = numpy.empty(self._counts.sum(), dtype=numpy.float64)
+            recv_message = [self._recv_buffer, self._counts, self._displacements, MPI.DOUBLE]
+        
+        self._comm.Gatherv(send_message, recv_message, root=0)
+        
+        planes = None
+        
+        if self._rank == 0 and self._has_planes:
+            planes = [ numpy.empty(plane_size, dtype=numpy.float64, order='F') for plane_size in self._plane_sizes ]
+            
+            for p, lo, hi, offset in self._recv_blocks:
+                shape = (hi[0] - lo[0] + 1, hi[1] - lo[1] + 1)
+                count = shape[0]*shape[1]
+                planes[p][lo[0]:hi[0]+1, lo[1]:hi[1]+1] = \
+                    self._recv_buffer[offset:offset+count].reshape(shape, order='F')
+        
+        return planes
+    
+    
     def get_plane(self, array):
         """
-        Method that returns the aggregated plane given a 3D decomposed array
+        Method that returns the aggregated plane given a 3D decomposed array. The plane is only returned on one of the
+        processors sharing the plane.
         
         array : 3D decomposed numpy array
         """
-
+        
+        if not self._single:
+            raise RuntimeError("Use get_planes() for objects with multiple planes!")
+        
         plane = None
         has_plane = False
-
+        
         if self._is_involved:
-
-            if self._direction == 0:
-                my_plane = array[self._index-self._3d_lo[0],:,:]
+            planes = self._gather(array)
             
-            elif self._direction == 1:
-                my_plane = array[:,self._index-self._3d_lo[1],:]
-            
-            else:
-                my_plane = array[:,:,self._index-self._3d_lo[2]]
-
-            data = self._comm.gather(my_plane, root=0)
-
-            if self._rank == 0:
-                plane = numpy.empty(self._plane_size, dtype=numpy.float64, order='F')
-
-                for i in range(self._procs):
-                    lo, hi = self._all_lo[i], self._all_hi[i]
-                    plane[lo[0]:hi[0]+1, lo[1]:hi[1]+1] = data[i]
-
+            if planes is not None:
+                plane = planes[0]
                 has_plane = True
-
-
+        
         return has_plane, plane
-
+    
+    
+    def get_planes(self, array):
+        """
+        Method that returns the list of all the aggregated planes given a 3D decomposed array with a single collective
+        operation. The planes are only returned on one of the processors.
+        
+        array : 3D decomposed numpy array
+        """
+        
+        if self._single:
+            has_plane, plane = self.get_plane(array)
+            if has_plane:
+                return True, [plane]
+            return False, None
+        
+        planes = self._gather(array)
+        
+        return (planes is not None), planes
+    
+    
+    def write(self, array, filename):
+        """
+        Collective method over all the processors of the grid partition that writes the planes of a 3D decomposed array
+        directly to a binary file with MPI-IO without aggregating them on a single processor. The planes are written
+        one after another as double precision numbers in Fortran order.
+        
+        array : 3D decomposed numpy array
+        filename : name of the file to write
+        """
+        
+        self._checkArray(array)
+        
+        if self._file_types is None:
+            self._file_types = [None]*self._num_planes
+            for block in self._local_blocks:
+                p = block['plane']
+                subsizes = [block['hi'][0] - block['lo'][0] + 1, block['hi'][1] - block['lo'][1] + 1]
+                self._file_types[p] = MPI.DOUBLE.Create_subarray(list(self._plane_sizes[p]), subsizes, \
+                    list(block['lo']), order=MPI.ORDER_F)
+                self._file_types[p].Commit()
+        
+        if self._is_involved:
+            send_buffer = self._pack(array)
+        
+        local_offsets = {}
+        for block in self._local_blocks:
+            local_offsets[block['plane']] = (block['offset'], block['count'])
+        
+        comm = MPI.Comm.f2py(self._grid_partition.comm3d())
+        file_handle = MPI.File.Open(comm, filename, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+        file_handle.Set_size(0)
+        
+        displacement = 0
+        for p in range(self._num_planes):
+            if self._file_types[p] is not None:
+                offset, count = local_offsets[p]
+                file_handle.Set_view(displacement, MPI.DOUBLE, self._file_types[p])
+                file_handle.Write_all([send_buffer[offset:offset+count], count, MPI.DOUBLE])
+            else:
+                file_handle.Set_view(displacement, MPI.DOUBLE, MPI.DOUBLE)
+                file_handle.Write_all([numpy.empty(0, dtype=numpy.float64), 0, MPI.DOUBLE])
+            
+            displacement += self._plane_sizes[p][0]*self._plane_sizes[p][1]*MPI.DOUBLE.Get_size()
+        
+        file_handle.Close()
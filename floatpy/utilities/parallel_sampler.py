@@ -0,0 +1,365 @@
+from mpi4py import MPI
+import numpy
+
+from floatpy.parallel import t3dmod
+
+class ParallelSampler(object):
+    """
+    Class to extract probe points, lines and boxes from a 3D parallel decomposed field
+    """
+    
+    def __init__(self, grid_partition, points=None, lines=None, boxes=None, interpolate=True, origin=None, spacing=None):
+        """
+        Constructor of the class. The processors owning each requested point, line and box are found once here so that
+        all of them can be extracted with a single collective operation at every step.
+        
+        grid_partition : t3d object or the grid_partition property of the parallel data reader class
+        points : iterable of probe locations (x, y, z). The locations are in index space unless origin and spacing are
+                 given
+        lines : iterable of lines, each given by the lo and hi indices ((i_lo, j_lo, k_lo), (i_hi, j_hi, k_hi)) of a
+                grid line
+        boxes : iterable of sub-volumes, each given by the lo and hi indices ((i_lo, j_lo, k_lo), (i_hi, j_hi, k_hi))
+        interpolate : boolean. If True, off-grid probes are interpolated trilinearly. Otherwise the value at the
+                      nearest grid point is used
+        origin : iterable of size 3 with the coordinates of the grid point with index (0, 0, 0)
+        spacing : iterable of size 3 with the grid spacing in each direction
+        """
+        
+        if not isinstance(grid_partition, t3dmod.t3d):
+            raise TypeError("The given grid partition object is not an instance of the t3d class!")
+        self._grid_partition = grid_partition
+        
+        self._interpolate = interpolate
+        
+        # Get size of chunk from all-direction domain decomposition of this processor and lo and hi of the chunk.
+        self._3d_size = numpy.empty(3, dtype=numpy.int32)
+        self._3d_lo   = numpy.empty(3, dtype=numpy.int32)
+        self._3d_hi   = numpy.empty(3, dtype=numpy.int32)
+        
+        self._grid_partition.get_sz3d(self._3d_size)
+        self._grid_partition.get_st3d(self._3d_lo)
+        self._grid_partition.get_en3d(self._3d_hi)
+        
+        x_size = numpy.empty(3, dtype=numpy.int32)
+        y_size = numpy.empty(3, dtype=numpy.int32)
+        z_size = numpy.empty(3, dtype=numpy.int32)
+        
+        self._grid_partition.get_szx(x_size)
+        self._grid_partition.get_szy(y_size)
+        self._grid_partition.get_szz(z_size)
+        
+        # Convert to 0 based indexing.
+        self._3d_lo = self._3d_lo - 1
+        self._3d_hi = self._3d_hi - 1
+        
+        self._grid_size = numpy.array([ x_size[0], y_size[1], z_size[2] ])
+        
+        # Convert the probe locations to index space.
+        if points is None:
+            points = numpy.empty((0, 3), dtype=numpy.float64)
+        points = numpy.array(points, dtype=numpy.float64).reshape((-1, 3))
+        
+        if origin is not None:
+            if len(origin) != 3:
+                raise ValueError("Size of 'origin' should be 3!")
+            points = points - numpy.array(origin, dtype=numpy.float64)
+        
+        if spacing is not None:
+            if len(spacing) != 3:
+                raise ValueError("Size of 'spacing' should be 3!")
+            if numpy.any(numpy.array(spacing) <= 0.):
+                raise ValueError("'spacing' should be positive!")
+            points = points/numpy.array(spacing, dtype=numpy.float64)
+        
+        if numpy.any(points < 0.) or numpy.any(points > self._grid_size - 1):
+            raise ValueError('Probe points have to be within bounds!')
+        
+        self._num_points = points.shape[0]
+        
+        # Stencil of each probe in every direction as a list of (index, weight) pairs.
+        self._stencils = []
+        for p in range(self._num_points):
+            stencil = []
+            for i in range(3):
+                stencil.append(self._getStencil(points[p, i], self._grid_size[i]))
+            self._stencils.append(stencil)
+        
+        # Lines are treated as boxes that are degenerate in two directions.
+        if lines is None:
+            lines = []
+        if boxes is None:
+            boxes = []
+        
+        self._num_lines = len(lines)
+        self._num_boxes = len(boxes)
+        
+        self._boxes = []
+        for line in lines:
+            lo, hi = self._checkBox(line)
+            if numpy.count_nonzero(numpy.array(hi) > numpy.array(lo)) > 1:
+                raise ValueError('Lines can only extend in one direction!')
+            self._boxes.append((lo, hi))
+        
+        for box in boxes:
+            self._boxes.append(self._checkBox(box))
+        
+        self._comm = MPI.Comm.f2py(self._grid_partition.comm3d())
+        self._rank  = self._comm.Get_rank()
+        self._procs = self._comm.Get_size()
+        
+        # Layout of the message of this processor.
+        self._local_points, self._local_blocks, self._send_count = self._getLayout(self._3d_lo, self._3d_hi)
+        
+        # Local indices, weights and message slots of the stencil points owned by this processor.
+        local_index = []
+        local_weight = []
+        local_slot = []
+        for slot, p in enumerate(self._local_points):
+            for index, weight in self._ownedStencil(p, self._3d_lo, self._3d_hi):
+                local_index.append(numpy.array(index) - self._3d_lo)
+                local_weight.append(weight)
+                local_slot.append(slot)
+        
+        local_index = numpy.array(local_index, dtype=numpy.int64).reshape((-1, 3))
+        self._local_index = (local_index[:, 0], local_index[:, 1], local_index[:, 2])
+        self._local_weight = numpy.array(local_weight, dtype=numpy.float64)
+        self._local_slot = numpy.array(local_slot, dtype=numpy.int64)
+        
+        self._send_buffer = None
+        
+        # Gather the chunk extents of all the processors on the root and precompute the counts, displacements and
+        # where each part of the messages goes.
+        my_lo_hi = numpy.concatenate((self._3d_lo, self._3d_hi)).astype(numpy.int32)
+        all_lo_hi = None
+        if self._rank == 0:
+            all_lo_hi = numpy.empty((self._procs, 6), dtype=numpy.int32)
+        self._comm.Gather(my_lo_hi, all_lo_hi, root=0)
+        
+        self._counts = None
+        self._displacements = None
+        self._recv_buffer = None
+        
+        if self._rank == 0:
+            self._counts = numpy.zeros(self._procs, dtype=numpy.int64)
+            self._displacements = numpy.zeros(self._procs, dtype=numpy.int64)
+            
+            point_ids = []
+            point_ranks = []
+            point_slots = []
+            self._recv_blocks = []
+            
+            offset = 0
+            for i in range(self._procs):
+                local_points, local_blocks, count = self._getLayout(all_lo_hi[i, 0:3], all_lo_hi[i, 3:6])
+                
+                point_ids.extend(local_points)
+                point_ranks.extend([i]*len(local_points))
+                point_slots.extend(range(len(local_points)))
+                
+                for block in local_blocks:
+                    self._recv_blocks.append((block['box'], i, block['lo'], block['hi'], block['offset']))
+                
+                self._counts[i] = count
+                self._displacements[i] = offset
+                offset += count
+            
+            self._recv_point_ids = numpy.array(point_ids, dtype=numpy.int64)
+            self._recv_point_ranks = numpy.array(point_ranks, dtype=numpy.int64)
+            self._recv_point_slots = numpy.array(point_slots, dtype=numpy.int64)
+    
+    
+    @property
+    def num_points(self):
+        """
+        Return the number of probe points.
+        """
+        
+        return self._num_points
+    
+    
+    @property
+    def num_lines(self):
+        """
+        Return the number of lines.
+        """
+        
+        return self._num_lines
+    
+    
+    @property
+    def num_boxes(self):
+        """
+        Return the number of boxes.
+        """
+        
+        return self._num_boxes
+    
+    
+    def _getStencil(self, x, n):
+        """
+        Get the interpolation stencil in one direction as a list of (index, weight) pairs.
+        """
+        
+        if not self._interpolate:
+            return [(int(numpy.floor(x + 0.5)), 1.)]
+        
+        if n == 1:
+            return [(0, 1.)]
+        
+        i = min(int(numpy.floor(x)), n - 2)
+        t = x - i
+        
+        return [(i, 1. - t), (i + 1, t)]
+    
+    
+    def _ownedStencil(self, p, lo_3d, hi_3d):
+        """
+        Get the list of (index, weight) pairs of the stencil points of a probe owned by a chunk with the given lo and hi.
+        """
+        
+        owned = [ [ (index, weight) for index, weight in self._stencils[p][i] \
+                    if (index >= lo_3d[i]) and (index <= hi_3d[i]) ] for i in range(3) ]
+        
+        stencil = []
+        for i, wi in owned[0]:
+            for j, wj in owned[1]:
+                for k, wk in owned[2]:
+                    stencil.append(((i, j, k), wi*wj*wk))
+        
+        return stencil
+    
+    
+    def _checkBox(self, box):
+        """
+        Check the lo and hi indices of a line or box.
+        """
+        
+        if len(box) != 2 or len(box[0]) != 3 or len(box[1]) != 3:
+            raise ValueError('Lines and boxes should be given as ((i_lo, j_lo, k_lo), (i_hi, j_hi, k_hi))!')
+        
+        lo = tuple([int(i) for i in box[0]])
+        hi = tuple([int(i) for i in box[1]])
+        
+        for i in range(3):
+            if lo[i] < 0 or hi[i] >= self._grid_size[i] or lo[i] > hi[i]:
+                raise ValueError('Lines and boxes have to be within bounds!')
+        
+        return lo, hi
+    
+    
+    def _getLayout(self, lo_3d, hi_3d):
+        """
+        Get the layout of the message of a chunk with the given lo and hi. The message holds the partial sums of the
+        probes with stencil points in the chunk followed by the parts of the lines and boxes in the chunk.
+        """
+        
+        local_points = [ p for p in range(self._num_points) if len(self._ownedStencil(p, lo_3d, hi_3d)) > 0 ]
+        
+        local_blocks = []
+        offset = len(local_points)
+        
+        for b in range(len(self._boxes)):
+            box_lo, box_hi = self._boxes[b]
+            lo = tuple([max(box_lo[i], int(lo_3d[i])) for i in range(3)])
+            hi = tuple([min(box_hi[i], int(hi_3d[i])) for i in range(3)])
+            
+            if all([lo[i] <= hi[i] for i in range(3)]):
+                count = (hi[0] - lo[0] + 1)*(hi[1] - lo[1] + 1)*(hi[2] - lo[2] + 1)
+                local_blocks.append({'box' : b, 'lo' : lo, 'hi' : hi, 'count' : count, 'offset' : offset})
+                offset += count
+        
+        return local_points, local_blocks, offset
+    
+    
+    def _pack(self, array, num_components):
+        """
+        Fill the send buffer with the local part of the samples of every component.
+        """
+        
+        if self._send_buffer is None or self._send_buffer.shape[0] != self._send_count*num_components:
+            self._send_buffer = numpy.empty(self._send_count*num_components, dtype=numpy.float64)
+        
+        num_local_points = len(self._local_points)
+        
+        for c in range(num_components):
+            if array.ndim == 3:
+                component = array
+            else:
+                component = array[:,:,:,c]
+            
+            message = self._send_buffer[c*self._send_count:(c+1)*self._send_count]
+            
+            message[0:num_local_points] = numpy.bincount(self._local_slot, \
+                weights=component[self._local_index]*self._local_weight, minlength=num_local_points)
+            
+            for block in self._local_blocks:
+                lo = numpy.array(block['lo']) - self._3d_lo
+                hi = numpy.array(block['hi']) - self._3d_lo
+                shape = tuple(hi - lo + 1)
+                message[block['offset']:block['offset']+block['count']].reshape(shape, order='F')[:,:,:] = \
+                    component[lo[0]:hi[0]+1, lo[1]:hi[1]+1, lo[2]:hi[2]+1]
+        
+        return self._send_buffer
+    
+    
+    def sample(self, array):
+        """
+        Collective method that extracts all the probe points, lines and boxes from a 3D decomposed array with a single
+        collective operation. The samples are only returned on the root processor of the grid partition. Returns
+        has_samples, points, lines, boxes where points is a numpy array with the values at the probe points, lines is a
+        list of 1D numpy arrays and boxes is a list of 3D numpy arrays. Samples of arrays with components have an
+        additional trailing dimension.
+        
+        array : 3D decomposed numpy array or 4D decomposed numpy array with components in the last dimension
+        """
+        
+        if array.ndim not in (3, 4) or tuple(array.shape[0:3]) != tuple(self._3d_size):
+            raise ValueError('Shape of array is not consistent with the chunk of the grid partition!')
+        
+        num_components = 1
+        if array.ndim == 4:
+            num_components = array.shape[3]
+        
+        send_buffer = self._pack(array, num_components)
+        
+        recv_message = None
+        if self._rank == 0:
+            counts = self._counts*num_components
+            displacements = self._displacements*num_components
+            if self._recv_buffer is None or self._recv_buffer.shape[0] != counts.sum():
+                self._recv_buffer = numpy.empty(counts.sum(), dtype=numpy.float64)
+            recv_message = [self._recv_buffer, counts, displacements, MPI.DOUBLE]
+        
+        self._comm.Gatherv([send_buffer, send_buffer.shape[0], MPI.DOUBLE], recv_message, root=0)
+        
+        if self._rank != 0:
+            return False, None, None, None
+        
+        points = numpy.zeros((self._num_points, num_components), dtype=numpy.float64)
+        boxes = [ numpy.empty((hi[0] - lo[0] + 1, hi[1] - lo[1] + 1, hi[2] - lo[2] + 1, num_components), \
+                              dtype=numpy.float64, order='F') for lo, hi in self._boxes ]
+        
+        for c in range(num_components):
+            # Start of the messages of the processors for this component.
+            starts = self._displacements*num_components + self._counts*c
+            
+            positions = starts[self._recv_point_ranks] + self._recv_point_slots
+            numpy.add.at(points[:, c], self._recv_point_ids, self._recv_buffer[positions])
+            
+            for b, i, lo, hi, offset in self._recv_blocks:
+                box_lo = self._boxes[b][0]
+                shape = (hi[0] - lo[0] + 1, hi[1] - lo[1] + 1, hi[2] - lo[2] + 1)
+                count = shape[0]*shape[1]*shape[2]
+                boxes[b][lo[0]-box_lo[0]:hi[0]-box_lo[0]+1, lo[1]-box_lo[1]:hi[1]-box_lo[1]+1, \
+                         lo[2]-box_lo[2]:hi[2]-box_lo[2]+1, c] = \
+                    self._recv_buffer[starts[i]+offset:starts[i]+offset+count].reshape(shape, order='F')
+        
+        lines = [ box.reshape((-1, num_components), order='F') for box in boxes[0:self._num_lines] ]
+        boxes = boxes[self._num_lines:]
+        
+        if array.ndim == 3:
+            points = points[:, 0]
+            lines = [ line[:, 0] for line in lines ]
+            boxes = [ box[:,:,:,0] for box in boxes ]
+        
+        return True, points, lines, boxes
@@ -2,7 +2,7 @@
 
 from numpy.distutils.core import setup, Extension
 
-from setup_fortran import BuildFortranObjects
+from setup_fortran import BuildFortranObjects, openmp_flags
 
 import sys
 import os
@@ -25,42 +25,55 @@ if sys.version_info[:2] < (2, 7):
 
 version = '1.0'
 
+# Build the line loops of the compact derivative and filter kernels with OpenMP unless FLOATPY_OPENMP=0. The kernels
+# still use a single thread per object unless more threads are requested from Python.
+try:
+    USE_OPENMP = os.environ['FLOATPY_OPENMP'] != '0'
+except:
+    USE_OPENMP = True
+
+OPENMP_LINK_ARGS = [openmp_flags] if USE_OPENMP else []
+
 # Build the fortran extension modules.
 obj_compact_6th_order = BuildFortranObjects(['floatpy/derivatives/compact/kind_parameters.F90',
                                              'floatpy/derivatives/compact/constants.F90',
-                                             'floatpy/derivatives/compact/cd06.F90'])
+                                             'floatpy/derivatives/compact/cd06.F90'], openmp=USE_OPENMP)
 
 ext_compact_6th_order = Extension('_pycd06',
                                     sources = ['floatpy/derivatives/compact/f90wrap_cd06.f90'],
                                     extra_objects = obj_compact_6th_order,
-                                    f2py_options = [])
+                                    f2py_options = [],
+                                    extra_link_args = OPENMP_LINK_ARGS)
 
 obj_compact_10th_order = BuildFortranObjects(['floatpy/derivatives/compact/kind_parameters.F90',
                                               'floatpy/derivatives/compact/constants.F90',
-                                              'floatpy/derivatives/compact/cd10.F90'])
+                                              'floatpy/derivatives/compact/cd10.F90'], openmp=USE_OPENMP)
 
 ext_compact_10th_order = Extension('_pycd10',
                                      sources = ['floatpy/derivatives/compact/f90wrap_cd10.f90'],
                                      extra_objects = obj_compact_10th_order,
-                                     f2py_options = [])
+                                     f2py_options = [],
+                                     extra_link_args = OPENMP_LINK_ARGS)
 
 obj_filter_cf90 = BuildFortranObjects(['floatpy/filters/kind_parameters.F90',
                                        'floatpy/filters/constants.F90',
-                                       'floatpy/filters/cf90.F90'])
+                                       'floatpy/filters/cf90.F90'], openmp=USE_OPENMP)
 
 ext_filter_cf90 = Extension('_pycf90',
                               sources = ['floatpy/filters/f90wrap_cf90.f90'],
                               extra_objects = obj_filter_cf90,
-                              f2py_options = [])
+                              f2py_options = [],
+                              extra_link_args = OPENMP_LINK_ARGS)
 
 obj_filter_gaussian = BuildFortranObjects(['floatpy/filters/kind_parameters.F90',
                                            'floatpy/filters/constants.F90',
-                                           'floatpy/filters/gaussian.F90'])
+                                           'floatpy/filters/gaussian.F90'], openmp=USE_OPENMP)
 
 ext_filter_gaussian = Extension('_pygaussian',
                                   sources = ['floatpy/filters/f90wrap_gaussian.f90'],
                                   extra_objects = obj_filter_gaussian,
-                                  f2py_options = [])
+                                  f2py_options = [],
+                                  extra_link_args = OPENMP_LINK_ARGS)
 
 obj_pyt3d = BuildFortranObjects(['floatpy/parallel/pyt3d/kind_parameters.F90',
                                  'floatpy/parallel/pyt3d/constants.F90',